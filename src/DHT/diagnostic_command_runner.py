@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+diagnostic_command_runner.py - Shell-free execution of registry probe commands.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to run CLI registry commands without a /bin/sh fork per probe
+# - Registry command strings are tokenized once into argv probes
+# - Emulates the trailing `2>&1`, `2>/dev/null` and `| head -n N` idioms in-process
+# - Falls back to the shell only for pipelines, `||` chains and expansions
+#
+
+"""
+diagnostic_command_runner.py - Shell-free execution of registry probe commands.
+
+Registry commands are written as shell strings ("git --version",
+"ssh -V 2>&1", "zip --version 2>&1 | head -n 2"). Running each through
+`shell=True` costs an extra /bin/sh process per probe. This module compiles
+each string once into a ProbeCommand: an argv list plus the handful of
+redirection idioms the registry uses, which are reproduced with subprocess
+pipes. Commands that need a real shell (`a || b`, `| grep`, `$VAR`) keep
+running through it.
+"""
+
+import shlex
+import subprocess
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Characters whose meaning depends on shell expansion; commands using them keep the shell
+_EXPANSION_CHARS = frozenset("$`*")
+
+
+@dataclass(frozen=True)
+class ProbeCommand:
+    """A registry command compiled for execution."""
+
+    command: str
+    # None when the command must run through the shell
+    argv: tuple[str, ...] | None
+    merge_stderr: bool = False
+    discard_stderr: bool = False
+    head_lines: int | None = None
+
+    @property
+    def uses_shell(self) -> bool:
+        """Whether the command runs through /bin/sh."""
+        return self.argv is None
+
+    @property
+    def executable(self) -> str:
+        """Executable the command invokes."""
+        if self.argv:
+            return self.argv[0]
+        words = self.command.split()
+        return words[0] if words else ""
+
+
+def _tokenize(command: str) -> list[str] | None:
+    """Split a command into words with shell operators as separate tokens."""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return list(lexer)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def compile_command(command: str) -> ProbeCommand:
+    """
+    Compile a registry command string into a ProbeCommand.
+
+    Supported without a shell: a simple command, optionally followed by
+    `2>&1` or `2>/dev/null`, optionally followed by `| head -n N`.
+
+    Args:
+        command: Shell command string from the registry
+
+    Returns:
+        ProbeCommand with argv set, or argv None for the shell fallback
+    """
+    shell = ProbeCommand(command=command, argv=None)
+    if any(ch in _EXPANSION_CHARS for ch in command):
+        return shell
+    tokens = _tokenize(command)
+    if not tokens:
+        return shell
+
+    head_lines = None
+    if len(tokens) >= 4 and tokens[-4:-1] == ["|", "head", "-n"] and tokens[-1].isdigit():
+        head_lines = int(tokens[-1])
+        tokens = tokens[:-4]
+
+    merge_stderr = discard_stderr = False
+    if tokens[-3:] == ["2", ">&", "1"]:
+        merge_stderr = True
+        tokens = tokens[:-3]
+    elif tokens[-3:] == ["2", ">", "/dev/null"]:
+        discard_stderr = True
+        tokens = tokens[:-3]
+
+    # Whatever operators remain need the shell; a bare "|" or ";" token means one
+    if not tokens or any(token and all(ch in "|&;<>()" for ch in token) for token in tokens):
+        return shell
+
+    return ProbeCommand(
+        command=command,
+        argv=tuple(tokens),
+        merge_stderr=merge_stderr,
+        discard_stderr=discard_stderr,
+        head_lines=head_lines,
+    )
+
+
+def run_probe(probe: ProbeCommand, timeout: float = 30) -> tuple[str, str | None]:
+    """
+    Execute a compiled probe and return (stdout, error).
+
+    Exit status follows the shell semantics of the original string: a
+    command piped into `head` always succeeds, as it would in /bin/sh.
+
+    Args:
+        probe: Compiled command
+        timeout: Timeout in seconds
+
+    Returns:
+        tuple: (stdout, error) where error is None on success
+    """
+    try:
+        if probe.argv is None:
+            result = subprocess.run(probe.command, capture_output=True, shell=True, text=True, timeout=timeout)
+        else:
+            if probe.merge_stderr:
+                stderr = subprocess.STDOUT
+            elif probe.discard_stderr:
+                stderr = subprocess.DEVNULL
+            else:
+                stderr = subprocess.PIPE
+            result = subprocess.run(
+                list(probe.argv),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                text=True,
+                errors="replace",
+                timeout=timeout,
+            )
+    except subprocess.TimeoutExpired:
+        return "", f"Command timed out after {timeout:g} seconds"
+    except FileNotFoundError:
+        return "", f"Command not found: {probe.executable}"
+    except Exception as e:
+        return "", str(e)
+
+    stdout = result.stdout or ""
+    if probe.head_lines is not None:
+        stdout = "".join(stdout.splitlines(keepends=True)[: probe.head_lines])
+        return stdout, None
+
+    if result.returncode == 0:
+        return stdout, None
+    error_msg = result.stderr or f"Command failed with return code {result.returncode}"
+    return stdout, error_msg
+
+
+__all__ = [
+    "ProbeCommand",
+    "compile_command",
+    "run_probe",
+]
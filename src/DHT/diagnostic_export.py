@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+diagnostic_export.py - Compact row export and fleet aggregation of diagnostic reports.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created "rows" export: one header line, then one [path, value] JSON array per tree leaf
+# - Paths are the atomic tree paths, e.g. tools.version_control.git.version
+# - merge_reports aggregates many reports (rows, JSON or YAML) into a tool version matrix
+# - Row files are filtered line by line so merging only decodes version rows
+#
+
+"""
+diagnostic_export.py - Compact row export and fleet aggregation of diagnostic reports.
+
+A diagnostic report is a deep tree of dicts. Aggregating reports from many
+machines means loading every tree in full just to read a handful of leaves.
+The rows format flattens the tree into newline-delimited records:
+
+    {"format": "dht-diagnostic-rows", "version": 1, "host": "ci-07", ...}
+    ["system.platform", "linux"]
+    ["tools.version_control.git.is_installed", true]
+    ["tools.version_control.git.version", "2.45.1"]
+
+Each line stands alone, so files can be concatenated, grepped and streamed,
+and the merger skips every line that cannot hold a version before decoding it.
+"""
+
+import csv
+import io
+import json
+import socket
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TextIO
+
+ROWS_FORMAT = "dht-diagnostic-rows"
+ROWS_VERSION = 1
+
+# Suffixes picked up when merge is given a directory
+REPORT_SUFFIXES = (".ndjson", ".rows", ".json", ".yaml", ".yml")
+
+# Tool leaves read by the version matrix
+_VERSION_LEAF = ".version"
+_INSTALLED_LEAF = ".is_installed"
+
+
+def flatten_report(tree: dict[str, Any], prefix: str = "") -> Iterator[tuple[str, Any]]:
+    """
+    Yield (path, value) for every leaf of a report tree.
+
+    Dicts are descended into; scalars and lists are leaves. Report metadata
+    (keys starting with "_") is not part of the tree and is skipped.
+
+    Args:
+        tree: Report tree
+        prefix: Path of the tree within the report
+
+    Yields:
+        tuple: Dot-separated path and leaf value
+    """
+    for key, value in tree.items():
+        if not prefix and key.startswith("_"):
+            continue
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            yield from flatten_report(value, path)
+        else:
+            yield path, value
+
+
+def report_host(report: dict[str, Any], default: str = "") -> str:
+    """Return the hostname recorded in a report."""
+    system = report.get("system")
+    if isinstance(system, dict) and system.get("hostname"):
+        return str(system["hostname"])
+    return default
+
+
+def write_rows(report: dict[str, Any], stream: TextIO) -> int:
+    """
+    Write a report in the rows format.
+
+    Args:
+        report: Report tree, optionally with a "_metadata" entry
+        stream: Text stream to write to
+
+    Returns:
+        int: Number of rows written, excluding the header
+    """
+    metadata = report.get("_metadata", {})
+    header = {
+        "format": ROWS_FORMAT,
+        "version": ROWS_VERSION,
+        "host": report_host(report, socket.gethostname()),
+        "generated_at": metadata.get("generated_at") or datetime.now(timezone.utc).isoformat(),
+    }
+    stream.write(json.dumps(header, separators=(",", ":")) + "\n")
+    count = 0
+    for path, value in flatten_report(report):
+        stream.write(json.dumps([path, value], separators=(",", ":"), default=str) + "\n")
+        count += 1
+    return count
+
+
+def report_to_rows(report: dict[str, Any]) -> str:
+    """Return a report in the rows format as a string."""
+    buffer = io.StringIO()
+    write_rows(report, buffer)
+    return buffer.getvalue()
+
+
+def _read_tree(path: Path, text: str) -> dict[str, Any]:
+    if path.suffix in (".yaml", ".yml"):
+        import yaml
+
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} does not contain a diagnostic report")
+    return data
+
+
+def read_tool_versions(path: Path) -> tuple[str, dict[str, str]]:
+    """
+    Read the installed tool versions from one report file.
+
+    Accepts the rows format as well as JSON and YAML report trees.
+
+    Args:
+        path: Report file
+
+    Returns:
+        tuple: (host, {tool path: version}) where the tool path is the tree
+        path below "tools", e.g. "version_control.git"
+
+    Raises:
+        ValueError: If the file is not a diagnostic report
+    """
+    text = path.read_text(encoding="utf-8")
+    first_line, _, rest = text.partition("\n")
+    if first_line.startswith("{") and f'"{ROWS_FORMAT}"' in first_line:
+        header = json.loads(first_line)
+        if header.get("version") != ROWS_VERSION:
+            raise ValueError(f"{path}: unsupported rows format version {header.get('version')}")
+        rows: Iterator[tuple[str, Any]] = (
+            json.loads(line)
+            for line in rest.splitlines()
+            if line.startswith('["tools.') and (f'{_VERSION_LEAF}"' in line or f'{_INSTALLED_LEAF}"' in line)
+        )
+        return str(header.get("host") or path.stem), _tool_versions(rows)
+
+    tree = _read_tree(path, text)
+    tools = tree.get("tools", {})
+    rows = flatten_report(tools, "tools") if isinstance(tools, dict) else iter(())
+    return report_host(tree, path.stem), _tool_versions(rows)
+
+
+def _tool_versions(rows: Iterable[Any]) -> dict[str, str]:
+    """Pick the version leaves of tools from (path, value) rows."""
+    installed: set[str] = set()
+    versions: dict[str, str] = {}
+    for path, value in rows:
+        if path.endswith(_INSTALLED_LEAF):
+            if value:
+                installed.add(path[len("tools.") : -len(_INSTALLED_LEAF)])
+        elif path.endswith(_VERSION_LEAF) and isinstance(value, (str, int, float)):
+            versions[path[len("tools.") : -len(_VERSION_LEAF)]] = str(value)
+    # Only versions sitting directly on a tool entry, not inside parsed command output
+    return {tool: version for tool, version in versions.items() if tool in installed}
+
+
+@dataclass
+class VersionMatrix:
+    """Tool versions across a fleet of reports."""
+
+    hosts: list[str] = field(default_factory=list)
+    # Tool path -> version -> indexes into hosts
+    tools: dict[str, dict[str, list[int]]] = field(default_factory=dict)
+    # Files that could not be read, with the reason
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def add(self, host: str, versions: dict[str, str]) -> None:
+        """Add one host's tool versions."""
+        index = len(self.hosts)
+        self.hosts.append(host)
+        for tool, version in versions.items():
+            self.tools.setdefault(tool, {}).setdefault(version, []).append(index)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary with per-version host lists."""
+        return {
+            "hosts": len(self.hosts),
+            "tools": {
+                tool: {version: [self.hosts[i] for i in indexes] for version, indexes in self._sorted(tool)}
+                for tool, _ in sorted(self.tools.items())
+            },
+            "errors": dict(self.errors),
+        }
+
+    def to_table(self) -> str:
+        """Render tool, version and machine count as an aligned text table."""
+        rows = [("TOOL", "VERSION", "HOSTS")]
+        for tool in sorted(self.tools):
+            for version, indexes in self._sorted(tool):
+                rows.append((tool, version, str(len(indexes))))
+        widths = [max(len(row[i]) for row in rows) for i in range(3)]
+        lines = [f"{row[0]:<{widths[0]}}  {row[1]:<{widths[1]}}  {row[2]:>{widths[2]}}" for row in rows]
+        lines.append(f"\n{len(self.hosts)} report(s), {len(self.tools)} tool(s)")
+        return "\n".join(lines)
+
+    def to_csv(self) -> str:
+        """Render one row per (tool, version) with its machine count."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["tool", "version", "hosts"])
+        for tool in sorted(self.tools):
+            for version, indexes in self._sorted(tool):
+                writer.writerow([tool, version, len(indexes)])
+        return buffer.getvalue()
+
+    def _sorted(self, tool: str) -> list[tuple[str, list[int]]]:
+        # Most common version first
+        return sorted(self.tools[tool].items(), key=lambda item: (-len(item[1]), item[0]))
+
+
+def find_report_files(paths: Iterable[str | Path]) -> list[Path]:
+    """Expand directories into the report files they contain, keeping files as given."""
+    files: list[Path] = []
+    for entry in paths:
+        path = Path(entry)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.is_file() and p.suffix in REPORT_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def merge_reports(paths: Iterable[str | Path], max_workers: int = 8) -> VersionMatrix:
+    """
+    Aggregate diagnostic reports into a tool version matrix.
+
+    Args:
+        paths: Report files or directories of reports
+        max_workers: Threads used to read files
+
+    Returns:
+        VersionMatrix, with unreadable files listed in errors
+    """
+    files = find_report_files(paths)
+
+    def load(path: Path) -> tuple[str, dict[str, str]] | str:
+        try:
+            return read_tool_versions(path)
+        except (OSError, ValueError, ImportError) as e:
+            return str(e)
+        except Exception as e:
+            # Malformed YAML and similar parser errors
+            return f"{type(e).__name__}: {e}"
+
+    matrix = VersionMatrix()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files) or 1))) as executor:
+        for path, loaded in zip(files, executor.map(load, files), strict=True):
+            if isinstance(loaded, str):
+                matrix.errors[str(path)] = loaded
+            else:
+                host, versions = loaded
+                matrix.add(host, versions)
+    return matrix
+
+
+__all__ = [
+    "ROWS_FORMAT",
+    "ROWS_VERSION",
+    "REPORT_SUFFIXES",
+    "flatten_report",
+    "report_host",
+    "write_rows",
+    "report_to_rows",
+    "read_tool_versions",
+    "VersionMatrix",
+    "find_report_files",
+    "merge_reports",
+]
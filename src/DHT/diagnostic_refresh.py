@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+diagnostic_refresh.py - Incremental diagnostic report refresh with change detection.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created incremental refresh for diagnostic reports
+# - Reports record fingerprints: PATH directory mtimes, executable identities, package database mtimes
+# - A refresh re-probes only tools whose fingerprint changed and reports a diff against the previous report
+# - Shims, untracked package listings, budget-skipped probes and stale reports are always re-probed
+#
+
+"""
+diagnostic_refresh.py - Incremental diagnostic report refresh with change detection.
+
+Most of a diagnostic report is unchanged from one run to the next. Each
+full report stores, under `_metadata.fingerprints`, what its tool data was
+derived from:
+
+- the mtime of every PATH directory (tools installed or removed),
+- the identity (realpath, inode, size, mtime) of each tool's executable,
+- the mtime of package manager databases such as /var/lib/dpkg/status.
+
+refresh_report compares those with the current machine, re-runs the
+registry commands of the tools that could have changed and splices the new
+results into the previous report. Version-manager shims and scripts have no
+stable identity, and package listings with no known database cannot be
+tracked, so those tools are always re-probed.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from DHT.modules.path_index import get_path_index
+from DHT.modules.tool_version_cache import executable_identity
+
+from .diagnostic_export import flatten_report
+from .diagnostic_system_info import collect_basic_system_info, collect_psutil_info
+from .diagnostic_tiers import COST_EXPENSIVE, DEPTH_FULL, command_cost, commands_for_depth, validate_depth
+from .diagnostic_tool_collector import (
+    BUDGET_EXHAUSTED,
+    collect_all_tools,
+    insert_into_tree,
+    select_commands,
+    tool_executable,
+    tool_tree_path,
+)
+
+FINGERPRINT_FORMAT = 1
+
+# Previous reports older than this are collected again in full
+DEFAULT_MAX_AGE = 24 * 3600.0
+
+_HOME = Path.home()
+_BREW_PREFIXES = (Path("/opt/homebrew"), Path("/usr/local"), Path("/home/linuxbrew/.linuxbrew"))
+
+# Files and directories whose mtime changes when a package manager installs or removes something
+PACKAGE_DATABASES: dict[str, tuple[Path, ...]] = {
+    "apt": (
+        Path("/var/lib/dpkg/status"),
+        Path("/etc/apt/sources.list"),
+        Path("/etc/apt/sources.list.d"),
+        Path("/var/lib/apt/lists"),
+    ),
+    "apt-get": (Path("/var/lib/dpkg/status"), Path("/var/lib/apt/lists")),
+    "dpkg": (Path("/var/lib/dpkg/status"),),
+    "rpm": (Path("/var/lib/rpm"), Path("/var/lib/rpm/rpmdb.sqlite"), Path("/var/lib/rpm/Packages")),
+    "dnf": (Path("/var/lib/rpm/rpmdb.sqlite"), Path("/var/lib/rpm/Packages"), Path("/etc/yum.repos.d")),
+    "yum": (Path("/var/lib/rpm/rpmdb.sqlite"), Path("/var/lib/rpm/Packages"), Path("/etc/yum.repos.d")),
+    "zypper": (Path("/var/lib/rpm/rpmdb.sqlite"), Path("/var/lib/rpm/Packages"), Path("/etc/zypp/repos.d")),
+    "pacman": (Path("/var/lib/pacman/local"),),
+    "apk": (Path("/lib/apk/db/installed"),),
+    "snap": (Path("/var/lib/snapd/state.json"),),
+    "flatpak": (Path("/var/lib/flatpak/app"), _HOME / ".local/share/flatpak/app"),
+    "brew": tuple(prefix / sub for prefix in _BREW_PREFIXES for sub in ("Cellar", "Caskroom", "Library/Taps")),
+    "cargo": (_HOME / ".cargo/.crates.toml", _HOME / ".cargo/.crates2.json"),
+}
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def tool_fingerprint(tool_name: str, tool_spec: dict[str, Any], depth: str = DEPTH_FULL) -> dict[str, Any]:
+    """
+    Fingerprint what a tool's diagnostic output depends on.
+
+    Args:
+        tool_name: Name of the tool
+        tool_spec: Tool specification from registry
+        depth: Depth whose commands will be run
+
+    Returns:
+        dict: {"executable": identity or None, "databases": {path: mtime_ns},
+        "volatile": bool}. Volatile tools cannot be fingerprinted and are
+        always re-probed.
+    """
+    index = get_path_index()
+    executable = index.which(tool_name) or index.which(tool_executable(tool_name, tool_spec))
+    identity = executable_identity(executable) if executable else None
+
+    databases = {str(path): mtime for path in PACKAGE_DATABASES.get(tool_name, ()) if (mtime := _mtime_ns(path))}
+    lists_packages = any(
+        command_cost(tool_spec, cmd_name) == COST_EXPENSIVE for cmd_name in commands_for_depth(tool_spec, depth)
+    )
+    volatile = (executable is not None and identity is None) or (lists_packages and tool_name not in PACKAGE_DATABASES)
+
+    return {"executable": identity, "databases": databases, "volatile": volatile}
+
+
+def collect_fingerprints(
+    categories: list[str] | None = None, tools: list[str] | None = None, depth: str = DEPTH_FULL
+) -> dict[str, Any]:
+    """
+    Fingerprint the PATH and every selected tool.
+
+    Args:
+        categories: List of categories to include (None for all)
+        tools: List of specific tools to include (None for all)
+        depth: Diagnostic depth of the report
+
+    Returns:
+        dict: Fingerprints to store under the report's `_metadata.fingerprints`
+    """
+    # Rescan up front if a PATH directory changed, so new and shadowing executables are seen
+    index = get_path_index()
+    if index.is_stale():
+        index = get_path_index(refresh=True)
+    return {
+        "format": FINGERPRINT_FORMAT,
+        "depth": validate_depth(depth),
+        "path": index.path,
+        "path_dirs": dict(index.directory_mtimes),
+        "tools": {
+            tool_name: tool_fingerprint(tool_name, tool_spec, depth)
+            for tool_name, tool_spec in select_commands(categories, tools).items()
+        },
+    }
+
+
+def changed_tools(previous: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """
+    List the tools whose diagnostic output could differ between two fingerprints.
+
+    Args:
+        previous: Fingerprints stored with the previous report
+        current: Fingerprints of the machine now
+
+    Returns:
+        list: Tool names to re-probe, in current selection order
+    """
+    previous_tools = previous.get("tools", {})
+    return [
+        tool_name
+        for tool_name, fingerprint in current["tools"].items()
+        if fingerprint["volatile"] or previous_tools.get(tool_name) != fingerprint
+    ]
+
+
+@dataclass
+class ReportDiff:
+    """Differences between two reports, by atomic tree path."""
+
+    added: dict[str, Any] = field(default_factory=dict)
+    removed: dict[str, Any] = field(default_factory=dict)
+    changed: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    # Tools whose commands were run again
+    reprobed: list[str] = field(default_factory=list)
+    # Whether the refresh fell back to collecting everything, and why
+    full_refresh: str | None = None
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether any compared value differs."""
+        return bool(self.added or self.removed or self.changed)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "changed": {path: {"old": old, "new": new} for path, (old, new) in self.changed.items()},
+            "reprobed": self.reprobed,
+            "full_refresh": self.full_refresh,
+        }
+
+    def summary(self) -> str:
+        """Render a short human-readable summary."""
+        lines = []
+        if self.full_refresh:
+            lines.append(f"Full refresh: {self.full_refresh}")
+        lines.append(f"Re-probed {len(self.reprobed)} tool(s)")
+        for path, (old, new) in self.changed.items():
+            lines.append(f"  ~ {path}: {old!r} -> {new!r}")
+        for path, value in self.added.items():
+            lines.append(f"  + {path}: {value!r}")
+        for path, value in self.removed.items():
+            lines.append(f"  - {path}: {value!r}")
+        if not self.has_changes:
+            lines.append("No changes since the previous report")
+        return "\n".join(lines)
+
+
+def diff_reports(old: dict[str, Any], new: dict[str, Any], prefixes: tuple[str, ...] = ("tools.",)) -> ReportDiff:
+    """
+    Compare two reports leaf by leaf.
+
+    System metrics (free memory, CPU load) change on every run, so only tool
+    data is compared by default.
+
+    Args:
+        old: Previous report
+        new: Current report
+        prefixes: Tree paths to compare
+
+    Returns:
+        ReportDiff
+    """
+    old_leaves = {path: value for path, value in flatten_report(old) if path.startswith(prefixes)}
+    new_leaves = {path: value for path, value in flatten_report(new) if path.startswith(prefixes)}
+    diff = ReportDiff()
+    for path, value in new_leaves.items():
+        if path not in old_leaves:
+            diff.added[path] = value
+        elif old_leaves[path] != value:
+            diff.changed[path] = (old_leaves[path], value)
+    for path, value in old_leaves.items():
+        if path not in new_leaves:
+            diff.removed[path] = value
+    return diff
+
+
+def _report_age(report: dict[str, Any]) -> float | None:
+    generated_at = report.get("_metadata", {}).get("generated_at")
+    if not generated_at:
+        return None
+    try:
+        stamp = datetime.fromisoformat(str(generated_at).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return time.time() - stamp.timestamp()
+
+
+def _budget_skipped(tool_info: Any) -> bool:
+    return isinstance(tool_info, dict) and any(
+        key.endswith("_error") and value == BUDGET_EXHAUSTED for key, value in tool_info.items()
+    )
+
+
+def _get_path(tree: dict[str, Any], path: str) -> Any:
+    current: Any = tree
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return None
+        current = current[part]
+    return current
+
+
+def refresh_report(
+    previous: dict[str, Any],
+    categories: list[str] | None = None,
+    tools: list[str] | None = None,
+    depth: str = DEPTH_FULL,
+    budget: float | None = None,
+    include_system_info: bool = True,
+    max_age: float = DEFAULT_MAX_AGE,
+) -> tuple[dict[str, Any], ReportDiff]:
+    """
+    Bring a previous report up to date, re-probing only tools that could have changed.
+
+    Falls back to a full collection when the previous report has no
+    fingerprints, was collected at another depth, or is older than max_age.
+
+    Args:
+        previous: Previously generated report, including its `_metadata`
+        categories: List of categories to include (None for all)
+        tools: List of specific tools to include (None for all)
+        depth: Diagnostic depth
+        budget: Time budget in seconds for the probes that do run
+        include_system_info: Whether to include basic system information
+        max_age: Maximum age in seconds of a previous report that can be refreshed
+
+    Returns:
+        tuple: (new report with fresh `_metadata.fingerprints`, diff against previous)
+    """
+    validate_depth(depth)
+    old_fingerprints = previous.get("_metadata", {}).get("fingerprints") or {}
+    fingerprints = collect_fingerprints(categories, tools, depth)
+    selection = select_commands(categories, tools)
+
+    age = _report_age(previous)
+    if old_fingerprints.get("format") != FINGERPRINT_FORMAT:
+        reason: str | None = "previous report has no fingerprints"
+    elif old_fingerprints.get("depth") != depth:
+        reason = f"previous report was collected at depth {old_fingerprints.get('depth')}"
+    elif age is None or age > max_age:
+        reason = "previous report is too old"
+    else:
+        reason = None
+
+    if reason:
+        stale = list(fingerprints["tools"])
+    else:
+        stale = changed_tools(old_fingerprints, fingerprints)
+        # Tools cut off by the previous run's time budget get another chance
+        for tool_name, tool_spec in selection.items():
+            path = tool_tree_path(tool_name, tool_spec.get("category", "unknown"))
+            if tool_name not in stale and _budget_skipped(_get_path(previous, path)):
+                stale.append(tool_name)
+
+    report: dict[str, Any] = {}
+    if include_system_info:
+        report["system"] = collect_basic_system_info()
+        psutil_info = collect_psutil_info(depth)
+        if psutil_info:
+            report["system"].update(psutil_info)
+
+    # Start from the previous tool data for the selection, then overwrite what was re-probed
+    tree: dict[str, Any] = {}
+    if not reason:
+        for tool_name, tool_spec in selection.items():
+            path = tool_tree_path(tool_name, tool_spec.get("category", "unknown"))
+            tool_info = _get_path(previous, path)
+            if tool_name not in stale and tool_info is not None:
+                insert_into_tree(tree, path, tool_info)
+            elif tool_name not in stale:
+                stale.append(tool_name)
+
+    if stale:
+        fresh = collect_all_tools(categories=categories, tools=stale, depth=depth, budget=budget)
+        for tool_name in stale:
+            path = tool_tree_path(tool_name, selection[tool_name].get("category", "unknown"))
+            tool_info = _get_path(fresh, path)
+            if tool_info is not None:
+                insert_into_tree(tree, path, tool_info)
+    report.update(tree)
+
+    report["_metadata"] = {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "fingerprints": fingerprints,
+        "refreshed_from": previous.get("_metadata", {}).get("generated_at"),
+    }
+
+    diff = diff_reports(previous, report)
+    diff.reprobed = stale
+    diff.full_refresh = reason
+    return report, diff
+
+
+__all__ = [
+    "FINGERPRINT_FORMAT",
+    "DEFAULT_MAX_AGE",
+    "PACKAGE_DATABASES",
+    "tool_fingerprint",
+    "collect_fingerprints",
+    "changed_tools",
+    "ReportDiff",
+    "diff_reports",
+    "refresh_report",
+]
@@ -21,6 +21,9 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Uses ThreadPoolExecutor for parallel command execution
 # - Refactored into smaller modules to comply with 10KB file size limit
 # - Delegates to specialized collector and parser modules
+# - Supports tiered collection depths with a per-depth time budget
+# - Adds the compact "rows" output format for fleet aggregation
+# - Reports record change-detection fingerprints; --refresh re-probes only changed tools and prints a diff
 #
 
 """
@@ -37,7 +40,7 @@ Key features:
 - Parallel command execution
 - Graceful error handling
 - Support for filtering by categories and tools
-- YAML and JSON output formats
+- YAML, JSON and compact rows output formats
 """
 
 import argparse
@@ -51,7 +54,10 @@ from typing import Any
 from DHT.modules import cli_commands_registry, system_taxonomy
 
 # Import our refactored modules
+from .diagnostic_export import report_to_rows
+from .diagnostic_refresh import DEFAULT_MAX_AGE, collect_fingerprints, refresh_report
 from .diagnostic_system_info import collect_basic_system_info, collect_psutil_info
+from .diagnostic_tiers import DEPTH_FULL, DEPTHS
 from .diagnostic_tool_collector import collect_all_tools
 
 # Try to import optional dependencies
@@ -70,7 +76,11 @@ except ImportError:
 
 
 def build_system_report(
-    categories: list[str] | None = None, tools: list[str] | None = None, include_system_info: bool = True
+    categories: list[str] | None = None,
+    tools: list[str] | None = None,
+    include_system_info: bool = True,
+    depth: str = DEPTH_FULL,
+    budget: float | None = None,
 ) -> dict[str, Any]:
     """
     Build a comprehensive system report.
@@ -79,6 +89,8 @@ def build_system_report(
         categories: List of categories to include (None for all)
         tools: List of specific tools to include (None for all)
         include_system_info: Whether to include basic system information
+        depth: How much to collect: "versions-only", "standard" or "full"
+        budget: Time budget in seconds for tool probes (defaults to the depth's budget)
 
     Returns:
         dict: Complete system report
@@ -90,12 +102,12 @@ def build_system_report(
         report["system"] = collect_basic_system_info()
 
         # Add psutil info if available
-        psutil_info = collect_psutil_info()
+        psutil_info = collect_psutil_info(depth)
         if psutil_info:
             report["system"].update(psutil_info)
 
     # Collect tool information
-    tool_tree = collect_all_tools(categories=categories, tools=tools)
+    tool_tree = collect_all_tools(categories=categories, tools=tools, depth=depth, budget=budget)
     report.update(tool_tree)
 
     return report
@@ -131,8 +143,17 @@ Examples:
   # Save as YAML
   %(prog)s --output system-report.yaml
 
+  # Only tool versions, within a 10 second budget
+  %(prog)s --depth versions-only --budget 10
+
   # Save as JSON
   %(prog)s --format json --output system-report.json
+
+  # Save compact rows for aggregation with `dhtl diagnostics merge`
+  %(prog)s --format rows --output system-report.ndjson
+
+  # Update a previous JSON/YAML report, re-probing only tools that changed
+  %(prog)s --refresh system-report.json --output system-report.json
         """,
     )
 
@@ -154,11 +175,37 @@ Examples:
         help="Exclude basic system information",
     )
 
+    parser.add_argument(
+        "--depth",
+        choices=DEPTHS,
+        default=DEPTH_FULL,
+        help="How much to collect: versions-only, standard, or full (default: full)",
+    )
+
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Time budget in seconds for tool probes (default depends on --depth)",
+    )
+
+    parser.add_argument(
+        "--refresh",
+        metavar="PREVIOUS",
+        help="Previous JSON/YAML report to update incrementally; prints what changed to stderr",
+    )
+
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        help="With --refresh, collect everything again if the previous report is older than this (seconds)",
+    )
+
     parser.add_argument(
         "--format",
-        choices=["json", "yaml"],
+        choices=["json", "yaml", "rows"],
         default="yaml" if HAS_YAML else "json",
-        help="Output format (default: yaml if available, else json)",
+        help="Output format; rows writes one [path, value] line per leaf (default: yaml if available, else json)",
     )
 
     parser.add_argument(
@@ -234,6 +281,25 @@ def list_tools() -> None:
         print()
 
 
+def load_report(path: Path) -> dict[str, Any]:
+    """
+    Load a JSON or YAML report written by this reporter.
+
+    Raises:
+        ValueError: If the file does not contain a report
+    """
+    text = path.read_text()
+    if path.suffix in (".yaml", ".yml"):
+        if not HAS_YAML:
+            raise ValueError(f"PyYAML is required to read {path}")
+        report = yaml.safe_load(text)
+    else:
+        report = json.loads(text)
+    if not isinstance(report, dict):
+        raise ValueError(f"{path} does not contain a diagnostic report")
+    return report
+
+
 def main(argv: list[str] | None = None) -> None:
     """Main entry point."""
     args = parse_args(argv)
@@ -247,26 +313,49 @@ def main(argv: list[str] | None = None) -> None:
         list_tools()
         return
 
-    # Build the report
-    report = build_system_report(
-        categories=args.categories,
-        tools=args.tools,
-        include_system_info=not args.no_system_info,
-    )
-
-    # Add metadata
-    report["_metadata"] = {
-        "generated_at": datetime.utcnow().isoformat() + "Z",
-        "generator": "dht-diagnostic-reporter-v2",
-        "filters": {
-            "categories": args.categories or "all",
-            "tools": args.tools or "all",
-            "include_system_info": not args.no_system_info,
-        },
+    filters = {
+        "categories": args.categories or "all",
+        "tools": args.tools or "all",
+        "include_system_info": not args.no_system_info,
+        "depth": args.depth,
     }
 
+    if args.refresh:
+        # Update the previous report, re-probing only tools that could have changed
+        previous = load_report(Path(args.refresh))
+        report, diff = refresh_report(
+            previous,
+            categories=args.categories,
+            tools=args.tools,
+            depth=args.depth,
+            budget=args.budget,
+            include_system_info=not args.no_system_info,
+            max_age=args.max_age,
+        )
+        report["_metadata"].update({"generator": "dht-diagnostic-reporter-v2", "filters": filters})
+        print(diff.summary(), file=sys.stderr)
+    else:
+        # Build the report
+        report = build_system_report(
+            categories=args.categories,
+            tools=args.tools,
+            include_system_info=not args.no_system_info,
+            depth=args.depth,
+            budget=args.budget,
+        )
+
+        # Add metadata
+        report["_metadata"] = {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "generator": "dht-diagnostic-reporter-v2",
+            "filters": filters,
+            "fingerprints": collect_fingerprints(args.categories, args.tools, args.depth),
+        }
+
     # Format output
-    if args.format == "yaml" and HAS_YAML:
+    if args.format == "rows":
+        output = report_to_rows(report).rstrip("\n")
+    elif args.format == "yaml" and HAS_YAML:
         output = yaml.dump(report, default_flow_style=False, sort_keys=False)
     else:
         output = json.dumps(report, indent=2, sort_keys=False)
@@ -11,12 +11,15 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Contains system information collection functions
 # - Supports psutil for enhanced system info when available
 # - Follows CLAUDE.md modularity guidelines
+# - collect_psutil_info honours the diagnostic depth; network enumeration is full-only
 #
 
 import platform
 import socket
 from typing import Any
 
+from .diagnostic_tiers import DEPTH_FULL, DEPTH_VERSIONS_ONLY, validate_depth
+
 # Try to import optional dependencies
 try:
     import psutil
@@ -60,25 +63,30 @@ def collect_basic_system_info() -> dict[str, Any]:
     return info
 
 
-def collect_psutil_info() -> dict[str, Any]:
+def collect_psutil_info(depth: str = DEPTH_FULL) -> dict[str, Any]:
     """
     Collect enhanced system information using psutil.
 
+    Args:
+        depth: Diagnostic depth; "versions-only" skips psutil entirely and
+            network interface enumeration only runs at "full"
+
     Returns:
         dict: Enhanced system information or empty dict if psutil unavailable
     """
-    if not HAS_PSUTIL:
+    if not HAS_PSUTIL or validate_depth(depth) == DEPTH_VERSIONS_ONLY:
         return {}
 
     info: dict[str, Any] = {}
 
     # CPU information
     try:
+        cpu_freq = psutil.cpu_freq()
         info["cpu"] = {
             "physical_cores": psutil.cpu_count(logical=False),
             "logical_cores": psutil.cpu_count(logical=True),
-            "current_freq_mhz": getattr(psutil.cpu_freq(), "current", None) if psutil.cpu_freq() else None,
-            "max_freq_mhz": getattr(psutil.cpu_freq(), "max", None) if psutil.cpu_freq() else None,
+            "current_freq_mhz": getattr(cpu_freq, "current", None) if cpu_freq else None,
+            "max_freq_mhz": getattr(cpu_freq, "max", None) if cpu_freq else None,
         }
     except Exception:
         pass
@@ -107,6 +115,9 @@ def collect_psutil_info() -> dict[str, Any]:
     except Exception:
         pass
 
+    if depth != DEPTH_FULL:
+        return info
+
     # Network interfaces
     try:
         interfaces: list[dict[str, Any]] = []
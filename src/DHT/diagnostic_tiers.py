@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+diagnostic_tiers.py - Cost tiers and depth budgets for diagnostic collection.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created cost-aware diagnostic model
+# - Registry commands declare a cost tier via the optional "cost_tiers" key
+# - Callers request a depth (versions-only, standard, full) with a time budget
+# - Deadline helper used to cancel or shorten straggling probes
+#
+
+"""
+diagnostic_tiers.py - Cost tiers and depth budgets for diagnostic collection.
+
+Every registry command has a cost tier:
+
+- "version": the version probe, needed by nearly every caller
+- "standard": cheap metadata (config values, targets, paths)
+- "expensive": package enumeration, network calls, large dumps
+
+Version commands default to "version" and everything else to "standard";
+registry entries mark their slow commands with a "cost_tiers" mapping of
+command name to tier. A caller asks for a depth, which selects the tiers
+to run and a wall-clock budget for the whole collection.
+"""
+
+import time
+from typing import Any
+
+DEPTH_VERSIONS_ONLY = "versions-only"
+DEPTH_STANDARD = "standard"
+DEPTH_FULL = "full"
+DEPTHS = (DEPTH_VERSIONS_ONLY, DEPTH_STANDARD, DEPTH_FULL)
+
+COST_VERSION = "version"
+COST_STANDARD = "standard"
+COST_EXPENSIVE = "expensive"
+COST_TIERS = (COST_VERSION, COST_STANDARD, COST_EXPENSIVE)
+
+# Tiers included at each depth
+DEPTH_TIERS: dict[str, frozenset[str]] = {
+    DEPTH_VERSIONS_ONLY: frozenset({COST_VERSION}),
+    DEPTH_STANDARD: frozenset({COST_VERSION, COST_STANDARD}),
+    DEPTH_FULL: frozenset(COST_TIERS),
+}
+
+# Wall-clock budget in seconds for collecting all tools at each depth
+DEPTH_BUDGETS: dict[str, float] = {
+    DEPTH_VERSIONS_ONLY: 15.0,
+    DEPTH_STANDARD: 60.0,
+    DEPTH_FULL: 300.0,
+}
+
+
+def validate_depth(depth: str) -> str:
+    """
+    Check a depth name.
+
+    Raises:
+        ValueError: If the depth is not one of DEPTHS
+    """
+    if depth not in DEPTH_TIERS:
+        raise ValueError(f"Unknown diagnostic depth '{depth}', expected one of: {', '.join(DEPTHS)}")
+    return depth
+
+
+def command_cost(tool_spec: dict[str, Any], cmd_name: str) -> str:
+    """Get the cost tier of one of a tool's registry commands."""
+    declared = tool_spec.get("cost_tiers", {}).get(cmd_name)
+    if declared:
+        return str(declared)
+    return COST_VERSION if cmd_name == "version" else COST_STANDARD
+
+
+def commands_for_depth(tool_spec: dict[str, Any], depth: str = DEPTH_FULL) -> dict[str, str]:
+    """
+    Select the commands of a registry entry that run at a depth.
+
+    Args:
+        tool_spec: Tool specification from registry
+        depth: Requested depth
+
+    Returns:
+        dict: Command name -> command string, in registry order
+    """
+    tiers = DEPTH_TIERS[validate_depth(depth)]
+    return {
+        cmd_name: cmd
+        for cmd_name, cmd in tool_spec.get("commands", {}).items()
+        if command_cost(tool_spec, cmd_name) in tiers
+    }
+
+
+class Deadline:
+    """A wall-clock deadline for a diagnostic collection."""
+
+    def __init__(self, budget: float | None) -> None:
+        """Start the deadline; a budget of None never expires."""
+        self.budget = budget
+        self._expires_at = None if budget is None else time.monotonic() + budget
+
+    def remaining(self) -> float | None:
+        """Seconds left, None when unbounded."""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is used up."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, default: float) -> float:
+        """Clamp a per-probe timeout to the time left."""
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+
+__all__ = [
+    "DEPTH_VERSIONS_ONLY",
+    "DEPTH_STANDARD",
+    "DEPTH_FULL",
+    "DEPTHS",
+    "COST_VERSION",
+    "COST_STANDARD",
+    "COST_EXPENSIVE",
+    "COST_TIERS",
+    "DEPTH_TIERS",
+    "DEPTH_BUDGETS",
+    "validate_depth",
+    "command_cost",
+    "commands_for_depth",
+    "Deadline",
+]
@@ -11,23 +11,52 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Contains tool detection and information collection
 # - Supports parallel tool collection with ThreadPoolExecutor
 # - Follows CLAUDE.md modularity guidelines
+# - Tool presence is answered from the PATH index instead of which/--version forks
+# - Version commands are served from the persistent tool version cache
+# - Commands run from pre-tokenized argv probes instead of shell=True
+# - Registry probes are tokenized on first use so importing stays cheap
+# - Each tool command is scheduled individually on the shared pool
+# - Commands are filtered by cost tier for the requested depth, within a time budget
+# - Registry selection is shared with incremental refreshes through select_commands
 #
 
-import os
 import platform
-import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache
 from typing import Any
 
 from DHT.modules import cli_commands_registry
+from DHT.modules.path_index import which
+from DHT.modules.tool_version_cache import cached_probe
 
+from .diagnostic_command_runner import ProbeCommand, compile_command, run_probe
 from .diagnostic_parser_utils import add_unparsed_lines, extract_version, parse_command_output, snake_case
+from .diagnostic_tiers import DEPTH_BUDGETS, DEPTH_FULL, Deadline, commands_for_depth, validate_depth
 
+# Default per-probe timeout in seconds
+PROBE_TIMEOUT = 30.0
 
-def run_command(cmd: str, timeout: int = 30) -> tuple[str, str | None]:
+# Error recorded for commands skipped because the time budget ran out
+BUDGET_EXHAUSTED = "Skipped: diagnostic time budget exhausted"
+
+
+@lru_cache(maxsize=1)
+def registry_probes() -> dict[str, dict[str, ProbeCommand]]:
+    """Registry commands tokenized once, on first use: tool -> command name -> probe."""
+    return {
+        tool_name: {cmd_name: compile_command(cmd) for cmd_name, cmd in tool_spec.get("commands", {}).items()}
+        for tool_name, tool_spec in cli_commands_registry.get_all_commands().items()
+    }
+
+
+def run_command(cmd: str, timeout: float = 30) -> tuple[str, str | None]:
     """
     Execute a command and return (stdout, error).
 
+    The command is run from its pre-tokenized argv form; only commands that
+    need shell features go through /bin/sh.
+
     Args:
         cmd: Command to execute
         timeout: Timeout in seconds
@@ -35,69 +64,168 @@ def run_command(cmd: str, timeout: int = 30) -> tuple[str, str | None]:
     Returns:
         tuple: (stdout, error) where error is None on success
     """
-    try:
-        result = subprocess.run(cmd, capture_output=True, shell=True, text=True, timeout=timeout, env=os.environ.copy())
+    return run_probe(compile_command(cmd), timeout)
 
-        if result.returncode == 0:
-            return result.stdout, None
-        else:
-            error_msg = result.stderr or f"Command failed with return code {result.returncode}"
-            return result.stdout, error_msg
 
-    except subprocess.TimeoutExpired:
-        return "", f"Command timed out after {timeout} seconds"
-    except Exception as e:
-        return "", str(e)
+def run_version_command(executable: str, cmd: str, timeout: float = 30) -> tuple[str, str | None]:
+    """
+    Execute a version command through the persistent tool version cache.
+
+    Output is reused for as long as the executable on disk is unchanged;
+    failed commands are never cached.
+
+    Args:
+        executable: Executable the command invokes
+        cmd: Command to execute
+        timeout: Timeout in seconds
+
+    Returns:
+        tuple: (stdout, error) where error is None on success
+    """
+    errors: list[str] = []
+
+    def probe() -> str | None:
+        stdout, error = run_command(cmd, timeout)
+        if error:
+            errors.append(error)
+            return None
+        return stdout
+
+    stdout = cached_probe(executable, [cmd], probe)
+    if stdout is None:
+        return "", errors[0] if errors else "Command failed"
+    return stdout, None
+
 
+def tool_executable(tool_name: str, tool_spec: dict[str, Any] | None = None) -> str:
+    """
+    Get the executable a registry entry actually invokes.
+
+    Registry keys are not always executable names (e.g. "maven" runs `mvn`),
+    so the first word of the version command is used when available.
+
+    Args:
+        tool_name: Name of the tool in the registry
+        tool_spec: Tool specification from registry
 
-def check_tool_installed(tool_name: str) -> bool:
+    Returns:
+        str: Executable name to look up on PATH
     """
-    Check if a tool is installed by trying common lookup methods.
+    commands = (tool_spec or {}).get("commands", {})
+    probe = commands.get("version") or next(iter(commands.values()), "")
+    words = probe.split()
+    return words[0] if words else tool_name
+
+
+def check_tool_installed(tool_name: str, tool_spec: dict[str, Any] | None = None) -> bool:
+    """
+    Check if a tool is installed by looking it up in the PATH index.
 
     Args:
         tool_name: Name of the tool to check
+        tool_spec: Tool specification from registry, used to find the executable
 
     Returns:
         bool: True if tool appears to be installed
     """
-    # Method 1: Check if tool is in PATH
-    if platform.system().lower() == "windows":
-        check_cmd = f"where {tool_name}"
-    else:
-        check_cmd = f"which {tool_name}"
-
-    stdout, error = run_command(check_cmd, timeout=5)
-    if error is None and stdout.strip():
+    if which(tool_name) is not None:
         return True
 
-    # Method 2: Try running with --version
-    version_cmd = f"{tool_name} --version"
-    stdout, error = run_command(version_cmd, timeout=5)
-    if error is None:
-        return True
+    executable = tool_executable(tool_name, tool_spec)
+    return executable != tool_name and which(executable) is not None
+
+
+def run_tool_command(
+    tool_name: str, tool_spec: dict[str, Any], cmd_name: str, cmd: str, timeout: float = PROBE_TIMEOUT
+) -> tuple[str, str | None]:
+    """
+    Run one registry command for a tool.
+
+    Args:
+        tool_name: Name of the tool
+        tool_spec: Tool specification from registry
+        cmd_name: Name of the command within the tool spec
+        cmd: Command to execute
+        timeout: Timeout in seconds
+
+    Returns:
+        tuple: (stdout, error) where error is None on success
+    """
+    if cmd_name == "version":
+        return run_version_command(tool_executable(tool_name, tool_spec), cmd, timeout)
+    probe = registry_probes().get(tool_name, {}).get(cmd_name)
+    if probe is None or probe.command != cmd:
+        probe = compile_command(cmd)
+    return run_probe(probe, timeout)
 
-    # Method 3: Try running with version subcommand
-    version_cmd = f"{tool_name} version"
-    stdout, error = run_command(version_cmd, timeout=5)
-    if error is None:
-        return True
 
-    return False
+def run_before_deadline(
+    deadline: Deadline, tool_name: str, tool_spec: dict[str, Any], cmd_name: str, cmd: str
+) -> tuple[str, str | None]:
+    """
+    Run a registry command unless the collection deadline has passed.
+
+    The probe timeout is clamped to the time left, so a straggler started
+    just before the deadline is killed when the budget runs out.
+    """
+    if deadline.expired:
+        return "", BUDGET_EXHAUSTED
+    return run_tool_command(tool_name, tool_spec, cmd_name, cmd, deadline.timeout(PROBE_TIMEOUT))
+
+
+def store_command_output(
+    info: dict[str, Any], cmd_name: str, stdout: str, error: str | None, format_hint: str = "auto"
+) -> None:
+    """
+    Parse a command's output and store it in the tool information dict.
+
+    Args:
+        info: Tool information to update
+        cmd_name: Name of the command that produced the output
+        stdout: Command output
+        error: Error message, or None on success
+        format_hint: Output format hint from the registry
+    """
+    if error:
+        info[f"{cmd_name}_error"] = error
+        return
+
+    # Parse the output
+    parsed_data, unparsed_lines = parse_command_output(stdout, format_hint)
+
+    # If we got version info, extract it
+    if cmd_name == "version" and not parsed_data.get("version"):
+        version = extract_version(stdout)
+        if version:
+            parsed_data["version"] = version
+
+    # Add any unparsed lines
+    parsed_data = add_unparsed_lines(parsed_data, unparsed_lines)
+
+    # Store parsed data with snake_case command name
+    cmd_key = snake_case(cmd_name)
+    if parsed_data:
+        # Flatten single-field results
+        if cmd_key == "version" and "version" in parsed_data:
+            info["version"] = parsed_data["version"]
+        else:
+            info[cmd_key] = parsed_data
 
 
-def collect_tool_info(tool_name: str, tool_spec: dict[str, Any]) -> dict[str, Any]:
+def collect_tool_info(tool_name: str, tool_spec: dict[str, Any], depth: str = DEPTH_FULL) -> dict[str, Any]:
     """
     Collect information about a specific tool.
 
     Args:
         tool_name: Name of the tool
         tool_spec: Tool specification from registry
+        depth: Diagnostic depth selecting which commands run
 
     Returns:
         dict: Tool information including install status and command outputs
     """
     info: dict[str, Any] = {
-        "is_installed": check_tool_installed(tool_name),
+        "is_installed": check_tool_installed(tool_name, tool_spec),
         "category": tool_spec.get("category", "unknown"),
     }
 
@@ -105,36 +233,10 @@ def collect_tool_info(tool_name: str, tool_spec: dict[str, Any]) -> dict[str, An
         return info
 
     # Run each command defined for this tool
-    commands = tool_spec.get("commands", {})
     format_hint = tool_spec.get("format", "auto")
-
-    for cmd_name, cmd_template in commands.items():
-        stdout, error = run_command(cmd_template)
-
-        if error:
-            info[f"{cmd_name}_error"] = error
-            continue
-
-        # Parse the output
-        parsed_data, unparsed_lines = parse_command_output(stdout, format_hint)
-
-        # If we got version info, extract it
-        if cmd_name == "version" and not parsed_data.get("version"):
-            version = extract_version(stdout)
-            if version:
-                parsed_data["version"] = version
-
-        # Add any unparsed lines
-        parsed_data = add_unparsed_lines(parsed_data, unparsed_lines)
-
-        # Store parsed data with snake_case command name
-        cmd_key = snake_case(cmd_name)
-        if parsed_data:
-            # Flatten single-field results
-            if cmd_key == "version" and "version" in parsed_data:
-                info["version"] = parsed_data["version"]
-            else:
-                info[cmd_key] = parsed_data
+    for cmd_name, cmd_template in commands_for_depth(tool_spec, depth).items():
+        stdout, error = run_tool_command(tool_name, tool_spec, cmd_name, cmd_template)
+        store_command_output(info, cmd_name, stdout, error, format_hint)
 
     return info
 
@@ -159,16 +261,40 @@ def insert_into_tree(tree: dict[str, Any], path: str, value: Any) -> None:
     current[parts[-1]] = value
 
 
-def collect_all_tools(categories: list[str] | None = None, tools: list[str] | None = None) -> dict[str, Any]:
+def tool_tree_path(tool_name: str, category: str) -> str:
     """
-    Collect information about all tools or filtered subset.
+    Return the report tree path of a tool.
+
+    Args:
+        tool_name: Name of the tool
+        category: Registry category, e.g. "package_managers.language.python"
+
+    Returns:
+        str: Dot-separated path such as "tools.version_control.git"
+    """
+    # Convert category paths like "package_managers.language.python" to proper tree structure
+    if category.startswith("package_managers.language."):
+        # Special handling for language package managers
+        parts = category.split(".")
+        lang = parts[2] if len(parts) > 2 else "unknown"
+        return f"tools.package_managers.language.{lang}.{tool_name}"
+    if category.startswith("package_managers.system."):
+        # Special handling for system package managers
+        return f"tools.package_managers.system.{tool_name}"
+    # Standard category path
+    return f"tools.{category}.{tool_name}"
+
+
+def select_commands(categories: list[str] | None = None, tools: list[str] | None = None) -> dict[str, Any]:
+    """
+    Select the registry entries for this platform, filtered by categories and tool names.
 
     Args:
         categories: List of categories to include (None for all)
         tools: List of specific tools to include (None for all)
 
     Returns:
-        dict: Tree structure with tool information
+        dict: Tool name -> tool specification
     """
     # Get platform-specific commands
     platform_name = platform.system().lower()
@@ -186,50 +312,84 @@ def collect_all_tools(categories: list[str] | None = None, tools: list[str] | No
     if tools:
         commands = {k: v for k, v in commands.items() if k in tools}
 
-    # Collect tool information in parallel
-    tool_results = {}
+    return commands
+
+
+def collect_all_tools(
+    categories: list[str] | None = None,
+    tools: list[str] | None = None,
+    depth: str = DEPTH_FULL,
+    budget: float | None = None,
+) -> dict[str, Any]:
+    """
+    Collect information about all tools or filtered subset.
+
+    Args:
+        categories: List of categories to include (None for all)
+        tools: List of specific tools to include (None for all)
+        depth: Diagnostic depth selecting which command tiers run
+        budget: Wall-clock budget in seconds (defaults to the depth's budget).
+            Commands still pending when it runs out are reported as skipped.
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all tool collection tasks
-        future_to_tool = {
-            executor.submit(collect_tool_info, tool_name, tool_spec): (tool_name, tool_spec)
-            for tool_name, tool_spec in commands.items()
+    Returns:
+        dict: Tree structure with tool information
+    """
+    deadline = Deadline(DEPTH_BUDGETS[validate_depth(depth)] if budget is None else budget)
+    commands = select_commands(categories, tools)
+
+    # Presence checks are index lookups; only installed tools get probed
+    tool_results: dict[str, dict[str, Any]] = {}
+    for tool_name, tool_spec in commands.items():
+        tool_results[tool_name] = {
+            "is_installed": check_tool_installed(tool_name, tool_spec),
+            "category": tool_spec.get("category", "unknown"),
         }
 
-        # Collect results as they complete
-        for future in as_completed(future_to_tool):
-            tool_name, tool_spec = future_to_tool[future]
-            try:
-                tool_info = future.result()
-                tool_results[tool_name] = tool_info
-            except Exception as exc:
-                tool_results[tool_name] = {
-                    "is_installed": False,
-                    "error": str(exc),
-                    "category": tool_spec.get("category", "unknown"),
-                }
+    # Schedule every command individually so one slow probe does not hold up
+    # the rest of its tool's commands
+    selected = {tool_name: commands_for_depth(tool_spec, depth) for tool_name, tool_spec in commands.items()}
+    outputs: dict[tuple[str, str], tuple[str, str | None]] = {}
+    executor = ThreadPoolExecutor(max_workers=10)
+    try:
+        future_to_command = {}
+        for tool_name, tool_commands in selected.items():
+            if not tool_results[tool_name]["is_installed"]:
+                continue
+            for cmd_name, cmd_template in tool_commands.items():
+                future = executor.submit(
+                    run_before_deadline, deadline, tool_name, commands[tool_name], cmd_name, cmd_template
+                )
+                future_to_command[future] = (tool_name, cmd_name)
+
+        # Collect results as they complete, abandoning stragglers at the deadline
+        try:
+            for future in as_completed(future_to_command, timeout=deadline.remaining()):
+                key = future_to_command[future]
+                try:
+                    outputs[key] = future.result()
+                except Exception as exc:
+                    outputs[key] = ("", str(exc))
+        except FuturesTimeoutError:
+            pass
+    finally:
+        # Running probes have timeouts clamped to the deadline; queued ones are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Parse outputs in registry order so the report is deterministic
+    for tool_name, tool_commands in selected.items():
+        info = tool_results[tool_name]
+        if not info["is_installed"]:
+            continue
+        format_hint = commands[tool_name].get("format", "auto")
+        for cmd_name in tool_commands:
+            stdout, error = outputs.get((tool_name, cmd_name), ("", BUDGET_EXHAUSTED))
+            store_command_output(info, cmd_name, stdout, error, format_hint)
 
     # Build the tree structure
     tree: dict[str, Any] = {}
 
     for tool_name, tool_info in tool_results.items():
-        category = tool_info.get("category", "unknown")
-
-        # Create the path for this tool
-        # Convert category paths like "package_managers.language.python" to proper tree structure
-        if category.startswith("package_managers.language."):
-            # Special handling for language package managers
-            parts = category.split(".")
-            lang = parts[2] if len(parts) > 2 else "unknown"
-            path = f"tools.package_managers.language.{lang}.{tool_name}"
-        elif category.startswith("package_managers.system."):
-            # Special handling for system package managers
-            parts = category.split(".")
-            sys_type = parts[2] if len(parts) > 2 else "unknown"
-            path = f"tools.package_managers.system.{tool_name}"
-        else:
-            # Standard category path
-            path = f"tools.{category}.{tool_name}"
+        path = tool_tree_path(tool_name, tool_info.get("category", "unknown"))
 
         # Remove category from tool info since it's encoded in the path
         tool_info_clean = {k: v for k, v in tool_info.items() if k != "category"}
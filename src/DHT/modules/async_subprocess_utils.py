@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+async_subprocess_utils.py - Asyncio-based subprocess execution for DHT
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created asyncio execution layer mirroring subprocess_utils.run_subprocess
+# - Same result schema (stdout/stderr/returncode/success) and exception types
+# - Timeouts kill the whole process group, not just the direct child
+# - Added bounded fan-out helpers for running many commands on one thread
+# - Cancellation reaps the killed child instead of leaving a zombie
+#
+
+"""
+async_subprocess_utils.py - Asyncio-based subprocess execution for DHT
+
+This module runs child processes on the asyncio event loop instead of
+blocking one thread per process. It provides:
+- run_subprocess_async: async counterpart of subprocess_utils.run_subprocess
+- run_subprocesses_async: bounded concurrent fan-out over many commands
+- run_subprocesses: synchronous entry point for non-async callers
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from .subprocess_utils import (
+    CommandTimeoutError,
+    ProcessError,
+    ProcessExecutionError,
+    ProcessNotFoundError,
+    mask_sensitive_args,
+)
+
+logger = logging.getLogger(__name__)
+
+# Default upper bound on concurrently running child processes during fan-out
+DEFAULT_MAX_CONCURRENCY = 32
+
+
+def _command_list(command: list[str] | str) -> list[str]:
+    """Normalize a command to the list form used by ProcessError."""
+    return command if isinstance(command, list) else [command]
+
+
+def _decode(data: bytes | None) -> str:
+    """Decode captured output, replacing undecodable bytes."""
+    return data.decode("utf-8", errors="replace") if data else ""
+
+
+def kill_process_group(process: asyncio.subprocess.Process, own_group: bool) -> None:
+    """
+    Kill a child process and, when it leads its own process group, every process in it.
+
+    Args:
+        process: The asyncio child process
+        own_group: Whether the child was started in a new session/process group
+    """
+    if process.returncode is not None:
+        return
+    try:
+        if own_group and hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_subprocess_async(
+    command: list[str] | str,
+    cwd: Path | str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: float | None = None,
+    check: bool = True,
+    input_data: str | bytes | None = None,
+    shell: bool = False,
+    stderr_mode: str = "capture",  # "capture", "merge", "discard"
+    max_output_size: int | None = None,
+    create_process_group: bool = True,
+    log_command: bool = True,
+    sensitive_args: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Run a subprocess on the event loop with enhanced error handling.
+
+    Args:
+        command: Command to run (list or string if shell=True)
+        cwd: Working directory
+        env: Environment variables (inherits the current environment if None)
+        timeout: Timeout in seconds
+        check: Raise exception on non-zero exit
+        input_data: Data to send to stdin
+        shell: Execute through shell (security risk!)
+        stderr_mode: How to handle stderr ("capture", "merge", "discard")
+        max_output_size: Maximum stdout size in characters
+        create_process_group: Start the child in its own process group so timeouts kill its descendants too
+        log_command: Log command execution
+        sensitive_args: Arguments to mask in logs
+
+    Returns:
+        Dict with execution results, same schema as run_subprocess
+
+    Raises:
+        Various ProcessError subclasses on failure
+    """
+    if shell and not isinstance(command, str):
+        raise ValueError("Shell commands must be strings")
+    if not shell and isinstance(command, str):
+        raise ValueError("Non-shell commands must be lists")
+
+    if log_command:
+        logged_command: list[str] | str = command
+        if sensitive_args and isinstance(command, list):
+            logged_command = mask_sensitive_args(command, sensitive_args)
+        logger.debug(f"Running command (async): {logged_command}")
+
+    stderr_setting = asyncio.subprocess.STDOUT if stderr_mode == "merge" else asyncio.subprocess.PIPE
+    if stderr_mode == "discard":
+        stderr_setting = asyncio.subprocess.DEVNULL
+
+    own_group = create_process_group and sys.platform != "win32"
+    spawn_kwargs: dict[str, Any] = {
+        "cwd": str(cwd) if cwd is not None else None,
+        "env": env,
+        "stdin": asyncio.subprocess.PIPE if input_data else asyncio.subprocess.DEVNULL,
+        "stdout": asyncio.subprocess.PIPE,
+        "stderr": stderr_setting,
+        "start_new_session": own_group,
+    }
+
+    try:
+        if shell:
+            assert isinstance(command, str)
+            process = await asyncio.create_subprocess_shell(command, **spawn_kwargs)
+        else:
+            process = await asyncio.create_subprocess_exec(*command, **spawn_kwargs)
+    except FileNotFoundError as e:
+        raise ProcessNotFoundError(
+            f"Command not found: {command[0] if isinstance(command, list) else command.split()[0]}",
+            _command_list(command),
+            cwd=cwd,
+        ) from e
+    except OSError as e:
+        raise ProcessError(
+            f"Unexpected error: {str(e)}", _command_list(command), cwd=cwd, error_type=type(e).__name__
+        ) from e
+
+    comm_input = input_data.encode() if isinstance(input_data, str) else input_data
+    try:
+        stdout_bytes, stderr_bytes = await asyncio.wait_for(process.communicate(comm_input), timeout=timeout)
+    except asyncio.TimeoutError as e:
+        kill_process_group(process, own_group)
+        await process.wait()
+        raise CommandTimeoutError(
+            f"Command timed out after {timeout} seconds", _command_list(command), timeout or 0.0, cwd=cwd
+        ) from e
+    except asyncio.CancelledError:
+        kill_process_group(process, own_group)
+        # Reap the child so cancellation does not leave a zombie behind
+        await asyncio.shield(process.wait())
+        raise
+
+    stdout = _decode(stdout_bytes)
+    stderr = _decode(stderr_bytes)
+
+    output_truncated = False
+    if max_output_size and len(stdout) > max_output_size:
+        stdout = stdout[:max_output_size]
+        output_truncated = True
+
+    returncode = process.returncode if process.returncode is not None else -1
+    if check and returncode != 0:
+        raise ProcessExecutionError(
+            f"Command failed with exit code {returncode}",
+            _command_list(command),
+            returncode,
+            stdout=stdout,
+            stderr=stderr,
+            cwd=cwd,
+        )
+
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "success": returncode == 0,
+        "output_truncated": output_truncated,
+        "attempt": 1,
+        "command": command,
+    }
+
+
+async def run_subprocesses_async(
+    commands: Sequence[list[str] | str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    """
+    Run many commands concurrently with a bound on simultaneously running processes.
+
+    Failures never abort the batch: a command that cannot be started, times out
+    or (with check=True) exits non-zero yields a result with success=False and
+    an "error" message instead of raising.
+
+    Args:
+        commands: Commands to run, each a list (or a string when shell=True)
+        max_concurrency: Maximum number of child processes alive at once
+        **kwargs: Passed to run_subprocess_async for every command
+
+    Returns:
+        List of result dicts in the same order as commands
+    """
+    kwargs.setdefault("check", False)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(command: list[str] | str) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                return await run_subprocess_async(command, **kwargs)
+            except ProcessError as e:
+                return {
+                    "stdout": str(e.details.get("stdout", "")),
+                    "stderr": str(e.details.get("stderr", "")),
+                    "returncode": getattr(e, "returncode", -1),
+                    "success": False,
+                    "error": str(e),
+                    "timed_out": isinstance(e, CommandTimeoutError),
+                    "command": command,
+                }
+
+    return list(await asyncio.gather(*(run_one(command) for command in commands)))
+
+
+def run_subprocesses(
+    commands: Sequence[list[str] | str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    **kwargs: Any,
+) -> list[dict[str, Any]]:
+    """
+    Synchronous entry point for run_subprocesses_async.
+
+    Must not be called from inside a running event loop; async callers should
+    await run_subprocesses_async directly.
+    """
+    return asyncio.run(run_subprocesses_async(commands, max_concurrency=max_concurrency, **kwargs))
+
+
+__all__ = [
+    "DEFAULT_MAX_CONCURRENCY",
+    "kill_process_group",
+    "run_subprocess_async",
+    "run_subprocesses_async",
+    "run_subprocesses",
+]
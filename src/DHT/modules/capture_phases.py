@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+capture_phases.py - Dependency-aware concurrent execution of snapshot capture phases.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to run environment snapshot capture phases concurrently
+# - Phases declare the phases they require and start as soon as those have finished
+# - Each phase is timed; a failing phase is reported without stopping the others
+# - Added critical_path to find the chain of dependent phases that bounds the total duration
+#
+
+"""
+capture_phases.py - Dependency-aware concurrent execution of snapshot capture phases.
+
+Capturing a snapshot lists packages, probes tools, reads environment
+variables, analyzes the project, generates lock files and reads config
+files. Most of these are independent and spend their time waiting on
+subprocesses or the filesystem, so running them one after another costs
+the sum of their durations. run_phases executes them on a thread pool
+following their declared dependencies, so the capture takes roughly as
+long as its slowest chain of phases.
+
+Phases are best-effort, like the sequential capture they replace: an
+exception is recorded in the phase's result and phases that require it
+still run with whatever it left behind.
+"""
+
+import time
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+# Default pool size; capture phases wait on subprocesses and I/O, not the CPU
+CAPTURE_WORKERS = 6
+
+
+@dataclass(frozen=True)
+class CapturePhase:
+    """A unit of capture work and the phases that must finish before it starts."""
+
+    name: str
+    run: Callable[[], Any]
+    requires: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class PhaseResult:
+    """Timing and outcome of one phase."""
+
+    name: str
+    started: float  # seconds after the run began
+    duration: float  # seconds
+    error: str | None = None
+
+
+def phase_order(phases: Sequence[CapturePhase]) -> list[str]:
+    """
+    Return phase names in an order that satisfies every dependency.
+
+    Raises:
+        ValueError: On duplicate names, unknown dependencies or cycles
+    """
+    by_name: dict[str, CapturePhase] = {}
+    for phase in phases:
+        if phase.name in by_name:
+            raise ValueError(f"Duplicate capture phase: {phase.name}")
+        by_name[phase.name] = phase
+
+    for phase in phases:
+        unknown = [name for name in phase.requires if name not in by_name]
+        if unknown:
+            raise ValueError(f"Capture phase {phase.name} requires unknown phase(s): {', '.join(unknown)}")
+
+    order: list[str] = []
+    state: dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(name: str, chain: list[str]) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            cycle = chain[chain.index(name) :] + [name]
+            raise ValueError(f"Capture phases form a cycle: {' -> '.join(cycle)}")
+        state[name] = 1
+        for required in by_name[name].requires:
+            visit(required, chain + [name])
+        state[name] = 2
+        order.append(name)
+
+    for phase in phases:
+        visit(phase.name, [])
+    return order
+
+
+def _run_timed(phase: CapturePhase, origin: float) -> PhaseResult:
+    """Run a phase, recording when it started, how long it took and any error."""
+    start = time.perf_counter()
+    error = None
+    try:
+        phase.run()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return PhaseResult(phase.name, start - origin, time.perf_counter() - start, error)
+
+
+def run_phases(phases: Sequence[CapturePhase], max_workers: int = CAPTURE_WORKERS) -> dict[str, PhaseResult]:
+    """
+    Run phases concurrently, each starting once the phases it requires have finished.
+
+    Args:
+        phases: Phases to run
+        max_workers: Maximum number of phases running at once; 1 runs them sequentially
+
+    Returns:
+        dict: Phase name -> PhaseResult, in the order of phases
+
+    Raises:
+        ValueError: If the dependencies are invalid (see phase_order)
+    """
+    order = phase_order(phases)
+    if not phases:
+        return {}
+
+    by_name = {phase.name: phase for phase in phases}
+    waiting_on = {phase.name: set(phase.requires) for phase in phases}
+    dependents: dict[str, list[str]] = {name: [] for name in by_name}
+    for phase in phases:
+        for required in phase.requires:
+            dependents[required].append(phase.name)
+
+    origin = time.perf_counter()
+    results: dict[str, PhaseResult] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(phases)))) as executor:
+        running: dict[Future[PhaseResult], str] = {}
+
+        def submit_ready(names: list[str]) -> None:
+            for name in names:
+                if not waiting_on[name]:
+                    running[executor.submit(_run_timed, by_name[name], origin)] = name
+
+        # Dependency order keeps sequential runs (max_workers=1) deterministic
+        submit_ready(order)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                unblocked = []
+                for dependent in dependents[name]:
+                    waiting_on[dependent].discard(name)
+                    if not waiting_on[dependent]:
+                        unblocked.append(dependent)
+                submit_ready(unblocked)
+
+    return {phase.name: results[phase.name] for phase in phases}
+
+
+def critical_path(phases: Sequence[CapturePhase], results: Mapping[str, PhaseResult]) -> list[str]:
+    """
+    Return the chain of dependent phases with the longest total duration.
+
+    However many workers are available, a run cannot finish faster than
+    this chain, so it is where optimizing a phase pays off.
+
+    Args:
+        phases: Phases that were run
+        results: Their results; phases without a result count as taking no time
+
+    Returns:
+        Phase names from the first to the last phase of the chain
+    """
+    by_name = {phase.name: phase for phase in phases}
+    cost: dict[str, float] = {}
+    previous: dict[str, str | None] = {}
+    for name in phase_order(phases):
+        before = max(by_name[name].requires, key=lambda required: cost[required], default=None)
+        own = results[name].duration if name in results else 0.0
+        cost[name] = own + (cost[before] if before is not None else 0.0)
+        previous[name] = before
+
+    if not cost:
+        return []
+    path = []
+    current: str | None = max(cost, key=lambda name: cost[name])
+    while current is not None:
+        path.append(current)
+        current = previous[current]
+    return path[::-1]
+
+
+__all__ = [
+    "CAPTURE_WORKERS",
+    "CapturePhase",
+    "PhaseResult",
+    "critical_path",
+    "phase_order",
+    "run_phases",
+]
@@ -9,6 +9,7 @@ This module contains CLI command definitions for build tools and compilers.
 # - Extracted from cli_commands_registry.py to reduce file size
 # - Contains build tools (make, cmake, ninja, bazel)
 # - Contains compilers (gcc, clang, rustc, javac, msvc)
+# - Slow commands declare an "expensive" cost tier via "cost_tiers"
 #
 
 from typing import Any
@@ -29,6 +30,7 @@ BUILD_TOOLS_COMMANDS: dict[str, dict[str, Any]] = {
             "generators": 'cmake --help | grep "Generators"',
             "system_info": "cmake --system-information",
         },
+        "cost_tiers": {"system_info": "expensive"},
         "category": "build_tools",
         "format": "auto",
     },
@@ -44,6 +46,7 @@ BUILD_TOOLS_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "bazel --version",
             "info": "bazel info",
         },
+        "cost_tiers": {"info": "expensive"},
         "category": "build_tools",
         "format": "auto",
     },
@@ -90,6 +93,7 @@ BUILD_TOOLS_COMMANDS: dict[str, dict[str, Any]] = {
             "host": "rustc --print host",
             "target_list": "rustc --print target-list",
         },
+        "cost_tiers": {"target_list": "expensive"},
         "category": "compilers",
         "format": "auto",
     },
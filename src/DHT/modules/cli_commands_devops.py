@@ -17,6 +17,7 @@ and cloud tools.
 # - Extracted from cli_commands_registry.py to reduce file size
 # - Contains containers and virtualization tools (docker, kubectl, vagrant)
 # - Contains cloud tools (aws, gcloud, terraform, ansible)
+# - Slow commands declare an "expensive" cost tier via "cost_tiers"
 #
 
 from typing import Any
@@ -31,6 +32,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "images": "docker images --format json",
             "ps": "docker ps --format json",
         },
+        "cost_tiers": {"info": "expensive", "system": "expensive", "images": "expensive", "ps": "expensive"},
         "category": "containers_virtualization",
         "format": "json",
     },
@@ -40,6 +42,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "info": "podman info --format json",
             "images": "podman images --format json",
         },
+        "cost_tiers": {"info": "expensive", "images": "expensive"},
         "category": "containers_virtualization",
         "format": "json",
     },
@@ -49,6 +52,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "config": "kubectl config view -o json",
             "contexts": "kubectl config get-contexts",
         },
+        "cost_tiers": {"config": "expensive"},
         "category": "containers_virtualization",
         "format": "json",
     },
@@ -58,6 +62,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "repo_list": "helm repo list -o json",
             "list": "helm list -A -o json",
         },
+        "cost_tiers": {"repo_list": "expensive", "list": "expensive"},
         "category": "containers_virtualization",
         "format": "json",
     },
@@ -67,6 +72,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "status": "minikube status -o json",
             "profile_list": "minikube profile list -o json",
         },
+        "cost_tiers": {"status": "expensive", "profile_list": "expensive"},
         "category": "containers_virtualization",
         "format": "json",
     },
@@ -75,6 +81,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "kind --version",
             "clusters": "kind get clusters",
         },
+        "cost_tiers": {"clusters": "expensive"},
         "category": "containers_virtualization",
         "format": "auto",
     },
@@ -84,6 +91,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "global_status": "vagrant global-status",
             "plugin_list": "vagrant plugin list",
         },
+        "cost_tiers": {"global_status": "expensive", "plugin_list": "expensive"},
         "category": "containers_virtualization",
         "format": "auto",
     },
@@ -94,6 +102,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "configure_list": "aws configure list",
             "sts_identity": "aws sts get-caller-identity",
         },
+        "cost_tiers": {"sts_identity": "expensive"},
         "category": "cloud_tools",
         "format": "json",
     },
@@ -103,6 +112,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "info": "gcloud info --format=json",
             "config_list": "gcloud config list --format=json",
         },
+        "cost_tiers": {"info": "expensive", "config_list": "expensive"},
         "category": "cloud_tools",
         "format": "json",
     },
@@ -112,6 +122,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "account_show": "az account show",
             "config": "az config show",
         },
+        "cost_tiers": {"account_show": "expensive"},
         "category": "cloud_tools",
         "format": "json",
     },
@@ -120,6 +131,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "terraform version -json",
             "providers": "terraform providers",
         },
+        "cost_tiers": {"providers": "expensive"},
         "category": "cloud_tools",
         "format": "json",
     },
@@ -129,6 +141,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "config": "ansible-config dump",
             "inventory": "ansible-inventory --list",
         },
+        "cost_tiers": {"config": "expensive", "inventory": "expensive"},
         "category": "cloud_tools",
         "format": "auto",
     },
@@ -138,6 +151,7 @@ DEVOPS_COMMANDS: dict[str, dict[str, Any]] = {
             "config": "puppet config print",
             "module_list": "puppet module list",
         },
+        "cost_tiers": {"module_list": "expensive"},
         "category": "cloud_tools",
         "format": "auto",
     },
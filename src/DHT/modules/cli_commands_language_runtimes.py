@@ -15,6 +15,7 @@ This module contains CLI command definitions for language runtimes.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from cli_commands_registry.py to reduce file size
 # - Contains language runtime commands (python, node, java, ruby, go, rust)
+# - Slow commands declare an "expensive" cost tier via "cost_tiers"
 #
 
 from typing import Any
@@ -27,6 +28,7 @@ LANGUAGE_RUNTIME_COMMANDS: dict[str, dict[str, Any]] = {
             "prefix": 'python -c "import sys; print(sys.prefix)"',
             "packages": "python -m pip list --format=json",
         },
+        "cost_tiers": {"packages": "expensive"},
         "category": "language_runtimes",
         "format": "auto",
     },
@@ -37,6 +39,7 @@ LANGUAGE_RUNTIME_COMMANDS: dict[str, dict[str, Any]] = {
             "prefix": 'python3 -c "import sys; print(sys.prefix)"',
             "packages": "python3 -m pip list --format=json",
         },
+        "cost_tiers": {"packages": "expensive"},
         "category": "language_runtimes",
         "format": "auto",
     },
@@ -47,6 +50,7 @@ LANGUAGE_RUNTIME_COMMANDS: dict[str, dict[str, Any]] = {
             "executable": 'node -p "process.execPath"',
             "modules": "npm list -g --json --depth=0",
         },
+        "cost_tiers": {"modules": "expensive"},
         "category": "language_runtimes",
         "format": "auto",
     },
@@ -75,6 +79,7 @@ LANGUAGE_RUNTIME_COMMANDS: dict[str, dict[str, Any]] = {
             "gopath": "go env GOPATH",
             "goroot": "go env GOROOT",
         },
+        "cost_tiers": {"env": "expensive"},
         "category": "language_runtimes",
         "format": "auto",
     },
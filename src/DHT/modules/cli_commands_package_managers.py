@@ -17,6 +17,7 @@ both language-specific and system package managers.
 # - Extracted from cli_commands_registry.py to reduce file size
 # - Contains language-specific package managers (pip, npm, cargo, etc.)
 # - Contains system package managers (brew, apt, yum, etc.)
+# - Slow commands declare an "expensive" cost tier via "cost_tiers"
 #
 
 from typing import Any
@@ -30,6 +31,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "inspect": "pip inspect --json",
             "config": "pip config list",
         },
+        "cost_tiers": {"list": "expensive", "inspect": "expensive"},
         "category": "package_managers.language.python",
         "format": "json",
     },
@@ -40,6 +42,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "inspect": "pip3 inspect",
             "config": "pip3 config list",
         },
+        "cost_tiers": {"list": "expensive", "inspect": "expensive"},
         "category": "package_managers.language.python",
         "format": "json",
     },
@@ -50,6 +53,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "tool_list": "uv tool list",
             "python_list": "uv python list",
         },
+        "cost_tiers": {"pip_list": "expensive", "python_list": "expensive"},
         "category": "package_managers.language.python",
         "format": "auto",
     },
@@ -60,6 +64,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "config": "npm config list --json",
             "registry": "npm config get registry",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.language.javascript",
         "format": "json",
     },
@@ -69,6 +74,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "yarn global list --json",
             "config": "yarn config list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.language.javascript",
         "format": "auto",
     },
@@ -78,6 +84,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "pnpm list -g --json",
             "config": "pnpm config list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.language.javascript",
         "format": "json",
     },
@@ -87,6 +94,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "installed": "cargo install --list",
             "search_paths": "cargo --list",
         },
+        "cost_tiers": {"installed": "expensive"},
         "category": "package_managers.language.rust",
         "format": "auto",
     },
@@ -96,6 +104,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "gem list --local",
             "environment": "gem environment",
         },
+        "cost_tiers": {"list": "expensive", "environment": "expensive"},
         "category": "package_managers.language.ruby",
         "format": "auto",
     },
@@ -105,6 +114,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "config": "bundle config",
             "list": "bundle list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.language.ruby",
         "format": "auto",
     },
@@ -114,6 +124,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "effective_pom": "mvn help:effective-pom",
             "dependency_tree": "mvn dependency:tree",
         },
+        "cost_tiers": {"effective_pom": "expensive", "dependency_tree": "expensive"},
         "category": "package_managers.language.java",
         "format": "auto",
     },
@@ -123,6 +134,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "properties": "gradle properties",
             "tasks": "gradle tasks --all",
         },
+        "cost_tiers": {"properties": "expensive", "tasks": "expensive"},
         "category": "package_managers.language.java",
         "format": "auto",
     },
@@ -135,6 +147,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "prefix": "brew --prefix",
             "tap_list": "brew tap",
         },
+        "cost_tiers": {"list": "expensive", "config": "expensive"},
         "category": "package_managers.system",
         "platforms": ["macos", "linux"],
         "format": "auto",
@@ -146,6 +159,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "sources": "apt-cache policy",
             "update_available": "apt list --upgradable 2>/dev/null",
         },
+        "cost_tiers": {"list": "expensive", "sources": "expensive", "update_available": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -165,6 +179,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "dpkg -l",
             "architecture": "dpkg --print-architecture",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -175,6 +190,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "yum list installed",
             "repolist": "yum repolist",
         },
+        "cost_tiers": {"list": "expensive", "repolist": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -185,6 +201,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "dnf list installed",
             "repolist": "dnf repolist",
         },
+        "cost_tiers": {"list": "expensive", "repolist": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -195,6 +212,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "rpm -qa",
             "verify": "rpm --verify --all",
         },
+        "cost_tiers": {"list": "expensive", "verify": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -205,6 +223,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "zypper packages --installed-only",
             "repos": "zypper repos",
         },
+        "cost_tiers": {"list": "expensive", "repos": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -215,6 +234,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "pacman -Q",
             "info": "pacman -Qi",
         },
+        "cost_tiers": {"list": "expensive", "info": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -225,6 +245,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "snap list",
             "services": "snap services",
         },
+        "cost_tiers": {"list": "expensive", "services": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -235,6 +256,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "flatpak list",
             "remotes": "flatpak remotes",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.system",
         "platforms": ["linux"],
         "format": "auto",
@@ -245,6 +267,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "choco list --local-only",
             "sources": "choco source list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.system",
         "platforms": ["windows"],
         "format": "auto",
@@ -255,6 +278,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "scoop list",
             "buckets": "scoop bucket list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "package_managers.system",
         "platforms": ["windows"],
         "format": "auto",
@@ -265,6 +289,7 @@ PACKAGE_MANAGER_COMMANDS: dict[str, dict[str, Any]] = {
             "list": "winget list",
             "sources": "winget source list",
         },
+        "cost_tiers": {"list": "expensive", "sources": "expensive"},
         "category": "package_managers.system",
         "platforms": ["windows"],
         "format": "auto",
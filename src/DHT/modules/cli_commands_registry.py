@@ -10,6 +10,9 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Refactored to use helper modules to reduce file size
 # - Imports command definitions from specialized modules
 # - Maintains backward compatibility with original API
+# - Registry is loaded on first use instead of at import
+# - Platform and category queries use indexes built once instead of full scans
+# - Added get_all_commands()
 #
 
 """
@@ -21,33 +24,111 @@ development tools. It includes:
 - Category assignments matching the system taxonomy
 - Format specifications for output parsing
 - Platform restrictions for platform-specific tools
+- Cost tiers marking slow commands for tiered diagnostics
 
 The registry is designed to be extensible and integrate with the system
 taxonomy for platform-aware filtering.
 """
 
+import threading
+from functools import cache, lru_cache
+from types import MappingProxyType
 from typing import Any
 
 from . import system_taxonomy
-from .cli_commands_build_tools import BUILD_TOOLS_COMMANDS
-from .cli_commands_devops import DEVOPS_COMMANDS
-from .cli_commands_language_runtimes import LANGUAGE_RUNTIME_COMMANDS
-from .cli_commands_package_managers import PACKAGE_MANAGER_COMMANDS
-from .cli_commands_utilities import UTILITY_COMMANDS
 
-# Import command definitions from helper modules
-from .cli_commands_version_control import VERSION_CONTROL_COMMANDS
+_registry: dict[str, dict[str, Any]] | None = None
+_registry_lock = threading.Lock()
+
+
+def _load_registry() -> dict[str, dict[str, Any]]:
+    """Import the command definition modules and merge them, once."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                # Import command definitions from helper modules
+                from .cli_commands_build_tools import BUILD_TOOLS_COMMANDS
+                from .cli_commands_devops import DEVOPS_COMMANDS
+                from .cli_commands_language_runtimes import LANGUAGE_RUNTIME_COMMANDS
+                from .cli_commands_package_managers import PACKAGE_MANAGER_COMMANDS
+                from .cli_commands_utilities import UTILITY_COMMANDS
+                from .cli_commands_version_control import VERSION_CONTROL_COMMANDS
+
+                # Combine all commands into the main registry
+                registry: dict[str, dict[str, Any]] = {}
+                registry.update(VERSION_CONTROL_COMMANDS)
+                registry.update(LANGUAGE_RUNTIME_COMMANDS)
+                registry.update(PACKAGE_MANAGER_COMMANDS)
+                registry.update(BUILD_TOOLS_COMMANDS)
+                registry.update(DEVOPS_COMMANDS)
+                registry.update(UTILITY_COMMANDS)
+                _registry = registry
+    return _registry
+
+
+def __getattr__(name: str) -> Any:
+    """Load CLI_COMMANDS on first access instead of at import."""
+    if name == "CLI_COMMANDS":
+        return _load_registry()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_all_commands() -> dict[str, dict[str, Any]]:
+    """
+    Get the complete command registry.
+
+    Returns:
+        dict: Tool name -> command definition
+    """
+    return _load_registry()
+
+
+@cache
+def _platform_index(platform: str) -> MappingProxyType[str, dict[str, Any]]:
+    """Commands available on a platform, computed once per platform."""
+    filtered_commands = {}
+
+    for cmd_name, cmd_def in _load_registry().items():
+        # Check if command has platform restrictions
+        if "platforms" in cmd_def:
+            # If platform is restricted, check if current platform is allowed
+            if platform in cmd_def["platforms"]:
+                filtered_commands[cmd_name] = cmd_def
+        else:
+            # No platform restrictions, check with system taxonomy
+            if system_taxonomy.is_tool_available_on_platform(cmd_name, platform):
+                filtered_commands[cmd_name] = cmd_def
+
+    return MappingProxyType(filtered_commands)
+
 
-# Combine all commands into the main registry
-CLI_COMMANDS: dict[str, dict[str, Any]] = {}
+class _CategoryNode:
+    """Node of the category-prefix trie."""
 
-# Merge all command dictionaries
-CLI_COMMANDS.update(VERSION_CONTROL_COMMANDS)
-CLI_COMMANDS.update(LANGUAGE_RUNTIME_COMMANDS)
-CLI_COMMANDS.update(PACKAGE_MANAGER_COMMANDS)
-CLI_COMMANDS.update(BUILD_TOOLS_COMMANDS)
-CLI_COMMANDS.update(DEVOPS_COMMANDS)
-CLI_COMMANDS.update(UTILITY_COMMANDS)
+    __slots__ = ("children", "tools", "subtree")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _CategoryNode] = {}
+        # Tools whose category is exactly this node
+        self.tools: list[str] = []
+        # Tools at this node or below, in registry order
+        self.subtree: list[str] = []
+
+
+@lru_cache(maxsize=1)
+def _category_trie() -> tuple[_CategoryNode, MappingProxyType[str, int]]:
+    """Build the category-prefix trie and the registry order of each tool."""
+    root = _CategoryNode()
+    order = {}
+    for position, (cmd_name, cmd_def) in enumerate(_load_registry().items()):
+        order[cmd_name] = position
+        node = root
+        for part in cmd_def.get("category", "").split("."):
+            node = node.children.setdefault(part, _CategoryNode())
+            node.subtree.append(cmd_name)
+        node.tools.append(cmd_name)
+    return root, MappingProxyType(order)
 
 
 def get_platform_specific_commands(platform: str | None = None) -> dict[str, dict[str, Any]]:
@@ -64,20 +145,7 @@ def get_platform_specific_commands(platform: str | None = None) -> dict[str, dic
     if not platform:
         platform = system_taxonomy.get_current_platform()
 
-    filtered_commands = {}
-
-    for cmd_name, cmd_def in CLI_COMMANDS.items():
-        # Check if command has platform restrictions
-        if "platforms" in cmd_def:
-            # If platform is restricted, check if current platform is allowed
-            if platform in cmd_def["platforms"]:
-                filtered_commands[cmd_name] = cmd_def
-        else:
-            # No platform restrictions, check with system taxonomy
-            if system_taxonomy.is_tool_available_on_platform(cmd_name, platform):
-                filtered_commands[cmd_name] = cmd_def
-
-    return filtered_commands
+    return dict(_platform_index(platform))
 
 
 def get_commands_by_category(category: str | None) -> dict[str, dict[str, Any]]:
@@ -94,16 +162,22 @@ def get_commands_by_category(category: str | None) -> dict[str, dict[str, Any]]:
     if category is None:
         return {}
 
-    filtered_commands = {}
-
-    for cmd_name, cmd_def in CLI_COMMANDS.items():
-        cmd_category = cmd_def.get("category", "")
-
-        # Check for exact match or if command category starts with requested category
-        if cmd_category == category or cmd_category.startswith(category + "."):
-            filtered_commands[cmd_name] = cmd_def
-        # Also check if requested category is a subcategory of command category
-        elif category.startswith(cmd_category + "."):
-            filtered_commands[cmd_name] = cmd_def
+    root, order = _category_trie()
+    registry = _load_registry()
+
+    matches: list[str] = []
+    node = root
+    parts = category.split(".")
+    for depth, part in enumerate(parts):
+        child = node.children.get(part)
+        if child is None:
+            break
+        node = child
+        if depth < len(parts) - 1:
+            # Commands filed under an ancestor of the requested category also match
+            matches.extend(node.tools)
+        else:
+            # The requested category itself and everything below it
+            matches.extend(node.subtree)
 
-    return filtered_commands
+    return {name: registry[name] for name in sorted(matches, key=order.__getitem__)}
@@ -18,6 +18,7 @@ network tools, system tools, archive managers, testing tools, and more.
 # - Contains network tools, system tools, archive managers
 # - Contains testing tools, database tools, text processing tools
 # - Contains documentation tools and CI/CD tools
+# - Slow commands declare an "expensive" cost tier via "cost_tiers"
 #
 
 from typing import Any
@@ -46,6 +47,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "ciphers": "openssl ciphers -v",
             "engines": "openssl engine -v",
         },
+        "cost_tiers": {"ciphers": "expensive"},
         "category": "network_tools",
         "format": "auto",
     },
@@ -54,6 +56,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "ssh -V 2>&1",
             "config": "ssh -G localhost",
         },
+        "cost_tiers": {"config": "expensive"},
         "category": "network_tools",
         "format": "auto",
     },
@@ -87,6 +90,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "status": "systemctl status",
             "list_units": "systemctl list-units --type=service",
         },
+        "cost_tiers": {"status": "expensive", "list_units": "expensive"},
         "category": "system_tools",
         "platforms": ["linux"],
         "format": "auto",
@@ -127,6 +131,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "du --version 2>&1 || du -h .",
             "summary": "du -sh .",
         },
+        "cost_tiers": {"summary": "expensive"},
         "category": "system_tools",
         "format": "auto",
     },
@@ -204,6 +209,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "markers": "pytest --markers",
             "fixtures": "pytest --fixtures",
         },
+        "cost_tiers": {"markers": "expensive", "fixtures": "expensive"},
         "category": "testing_tools",
         "format": "auto",
     },
@@ -368,6 +374,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "circleci version",
             "config_validate": "circleci config validate",
         },
+        "cost_tiers": {"config_validate": "expensive"},
         "category": "ci_cd_tools",
         "format": "auto",
     },
@@ -376,6 +383,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "gitlab-runner --version",
             "list": "gitlab-runner list",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "ci_cd_tools",
         "format": "auto",
     },
@@ -385,6 +393,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "auth_status": "gh auth status",
             "repo_view": "gh repo view --json name,description,url",
         },
+        "cost_tiers": {"auth_status": "expensive", "repo_view": "expensive"},
         "category": "ci_cd_tools",
         "format": "auto",
     },
@@ -393,6 +402,7 @@ UTILITY_COMMANDS: dict[str, dict[str, Any]] = {
             "version": "act --version",
             "list": "act -l",
         },
+        "cost_tiers": {"list": "expensive"},
         "category": "ci_cd_tools",
         "format": "auto",
     },
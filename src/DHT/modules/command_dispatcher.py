@@ -281,6 +281,9 @@ class CommandDispatcher:
             parser.add_argument("--ignore", nargs="+", help="Skip matching packages")
             parser.add_argument("--only-fs", nargs="+", help="Only run in packages with matching files")
             parser.add_argument("--ignore-fs", nargs="+", help="Skip packages with matching files")
+            parser.add_argument(
+                "-j", "--jobs", type=int, default=1, help="Number of members to run in parallel ('run' only)"
+            )
 
         elif command in ["workspace", "w"]:
             parser = argparse.ArgumentParser(prog=f"dhtl {command}")
@@ -339,7 +342,7 @@ class CommandDispatcher:
             "Development": ["build", "test", "lint", "format", "fmt", "check", "coverage", "doc"],
             "Version Control": ["commit", "tag", "bump", "clone", "fork"],
             "Deployment": ["publish", "workflows", "deploy_project_in_container"],
-            "Utilities": ["env", "diagnostics", "guardian", "bin"],
+            "Utilities": ["env", "diagnostics", "snapshot", "cache", "guardian", "bin"],
             "Runtime": ["run", "script", "python", "node"],
             "Help": ["help", "version"],
         }
@@ -10,6 +10,10 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Central registry for all DHT commands
 # - Maps command names to their implementations
 # - Replaces shell-based command dispatch
+# - Registers `dhtl snapshot` for comparing environment snapshots
+# - Registers `dhtl cache` for the shared wheel cache
+# - `dhtl snapshot` also bundles snapshots and reproduces them offline
+# - `dhtl snapshot gc` removes unreferenced snapshot blobs
 #
 
 """
@@ -108,6 +112,12 @@ class CommandRegistry:
         # Diagnostics
         self.register("diagnostics", self._diagnostics_command, "Run diagnostics")
 
+        # Environment snapshots
+        self.register("snapshot", self._snapshot_command, "Compare, bundle, reproduce and clean up snapshots")
+
+        # Shared wheel cache
+        self.register("cache", self._cache_command, "Show or prune the shared wheel cache")
+
         # Restore commands (from dhtl_commands_1.py)
         self.register("restore", self._restore_command, "Restore dependencies")
 
@@ -200,6 +210,18 @@ class CommandRegistry:
 
         return diagnostics_command(*args, **kwargs)
 
+    def _snapshot_command(self, *args: Any, **kwargs: Any) -> int:
+        """Manage environment snapshots."""
+        from .dhtl_snapshot import snapshot_command
+
+        return snapshot_command(*args, **kwargs)
+
+    def _cache_command(self, *args: Any, **kwargs: Any) -> int:
+        """Manage the shared wheel cache."""
+        from .dhtl_cache import cache_command
+
+        return cache_command(*args, **kwargs)
+
     def _restore_command(self, args: list[str] | None = None) -> int:
         """Restore dependencies."""
         from .dhtl_commands_1 import restore_command
@@ -298,7 +320,7 @@ class CommandRegistry:
             "Version Control": ["commit", "tag", "bump", "clone", "fork"],
             "Deployment": ["publish", "deploy_project_in_container", "workflows"],
             "Docker": ["docker"],
-            "Utilities": ["env", "diagnostics", "restore", "guardian"],
+            "Utilities": ["env", "diagnostics", "snapshot", "cache", "restore", "guardian"],
             "Help": ["help", "version"],
         }
 
@@ -11,6 +11,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Add progress tracking and error aggregation
 # - Use 30 minute timeout as per CLAUDE.md
 # - Improve modularity and reduce complexity
+# - Add optional concurrent execution in members via the asyncio subprocess engine
 #
 
 """
@@ -26,6 +27,8 @@ from collections.abc import Callable
 from pathlib import Path
 from typing import Any, cast
 
+from ..async_subprocess_utils import run_subprocesses
+
 try:
     import tomllib
 except ImportError:
@@ -134,6 +137,7 @@ class WorkspaceBase:
         operation_name: str,
         build_command_func: Callable[[Path], list[str]],
         timeout: int | None = None,
+        max_concurrency: int = 1,
     ) -> dict[str, Any]:
         """
         Execute a command in multiple workspace members.
@@ -143,6 +147,7 @@ class WorkspaceBase:
             operation_name: Name of the operation (for logging)
             build_command_func: Function that builds command for a member
             timeout: Command timeout in seconds
+            max_concurrency: Number of members to run at once (1 runs sequentially)
 
         Returns:
             Result dictionary with success status and details
@@ -154,44 +159,50 @@ class WorkspaceBase:
         all_success = True
         total = len(members)
 
-        for idx, member in enumerate(members, 1):
-            # Progress indicator
-            self.logger.info(f"[{idx}/{total}] {operation_name} in {member.name}...")
-
-            try:
-                cmd = build_command_func(member)
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                    timeout=timeout,
-                    # Never use shell=True for security
-                    shell=False,
-                )
-
-                success = result.returncode == 0
-                results[str(member)] = {
-                    "success": success,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "returncode": result.returncode,
-                }
+        if max_concurrency > 1 and total > 1:
+            results = self._execute_in_members_concurrently(
+                members, operation_name, build_command_func, timeout, max_concurrency
+            )
+            all_success = all(r.get("success", False) for r in results.values())
+        else:
+            for idx, member in enumerate(members, 1):
+                # Progress indicator
+                self.logger.info(f"[{idx}/{total}] {operation_name} in {member.name}...")
 
-                if not success:
+                try:
+                    cmd = build_command_func(member)
+                    result = subprocess.run(
+                        cmd,
+                        capture_output=True,
+                        text=True,
+                        check=False,
+                        timeout=timeout,
+                        # Never use shell=True for security
+                        shell=False,
+                    )
+
+                    success = result.returncode == 0
+                    results[str(member)] = {
+                        "success": success,
+                        "stdout": result.stdout,
+                        "stderr": result.stderr,
+                        "returncode": result.returncode,
+                    }
+
+                    if not success:
+                        all_success = False
+                        self.logger.error(f"Failed in {member.name}: {result.stderr.strip()}")
+                    else:
+                        self.logger.info(f"✓ Success in {member.name}")
+
+                except subprocess.TimeoutExpired:
+                    results[str(member)] = {"success": False, "error": f"Timed out after {timeout} seconds"}
                     all_success = False
-                    self.logger.error(f"Failed in {member.name}: {result.stderr.strip()}")
-                else:
-                    self.logger.info(f"✓ Success in {member.name}")
-
-            except subprocess.TimeoutExpired:
-                results[str(member)] = {"success": False, "error": f"Timed out after {timeout} seconds"}
-                all_success = False
-                self.logger.error(f"Timeout in {member.name}")
-            except Exception as e:
-                results[str(member)] = {"success": False, "error": str(e)}
-                all_success = False
-                self.logger.error(f"Error in {member.name}: {e}")
+                    self.logger.error(f"Timeout in {member.name}")
+                except Exception as e:
+                    results[str(member)] = {"success": False, "error": str(e)}
+                    all_success = False
+                    self.logger.error(f"Error in {member.name}: {e}")
 
         # Summary
         failed_count = len([r for r in results.values() if not r.get("success", False)])
@@ -206,6 +217,52 @@ class WorkspaceBase:
             "failed_count": failed_count,
         }
 
+    def _execute_in_members_concurrently(
+        self,
+        members: list[Path],
+        operation_name: str,
+        build_command_func: Callable[[Path], list[str]],
+        timeout: int,
+        max_concurrency: int,
+    ) -> dict[str, Any]:
+        """Run member commands concurrently on the event loop, keyed like execute_in_members."""
+        self.logger.info(f"{operation_name} in {len(members)} members ({max_concurrency} at a time)...")
+
+        results: dict[str, Any] = {}
+        commands: list[list[str]] = []
+        runnable: list[Path] = []
+        for member in members:
+            try:
+                commands.append(build_command_func(member))
+                runnable.append(member)
+            except Exception as e:
+                results[str(member)] = {"success": False, "error": str(e)}
+                self.logger.error(f"Error in {member.name}: {e}")
+
+        outcomes = run_subprocesses(commands, max_concurrency=max_concurrency, timeout=timeout)
+
+        for idx, (member, outcome) in enumerate(zip(runnable, outcomes, strict=True), 1):
+            prefix = f"[{idx}/{len(runnable)}]"
+            if outcome.get("timed_out"):
+                results[str(member)] = {"success": False, "error": f"Timed out after {timeout} seconds"}
+                self.logger.error(f"{prefix} Timeout in {member.name}")
+            elif "error" in outcome:
+                results[str(member)] = {"success": False, "error": outcome["error"]}
+                self.logger.error(f"{prefix} Error in {member.name}: {outcome['error']}")
+            else:
+                results[str(member)] = {
+                    "success": outcome["success"],
+                    "stdout": outcome["stdout"],
+                    "stderr": outcome["stderr"],
+                    "returncode": outcome["returncode"],
+                }
+                if outcome["success"]:
+                    self.logger.info(f"{prefix} ✓ Success in {member.name}")
+                else:
+                    self.logger.error(f"{prefix} Failed in {member.name}: {outcome['stderr'].strip()}")
+
+        return results
+
     def execute_shell_in_directory(
         self, directory: Path, args: list[str], timeout: int | None = None
     ) -> dict[str, Any]:
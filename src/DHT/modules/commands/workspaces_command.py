@@ -11,6 +11,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Handles running commands across all workspace members
 # - Integrates with Prefect runner
 # - Refactored to use WorkspaceBase to reduce complexity
+# - Added jobs option to run scripts in several members at once
 #
 
 """
@@ -64,6 +65,7 @@ class WorkspacesCommand(WorkspaceBase):
         ignore: list[str] | None = None,
         only_fs: list[str] | None = None,
         ignore_fs: list[str] | None = None,
+        jobs: int = 1,
         **kwargs: Any,
     ) -> dict[str, Any]:
         """
@@ -77,6 +79,7 @@ class WorkspacesCommand(WorkspaceBase):
             ignore: Skip packages matching these patterns
             only_fs: Only run in packages with files matching these patterns
             ignore_fs: Skip packages with files matching these patterns
+            jobs: Number of members to run 'run' in concurrently
             **kwargs: Additional arguments
 
         Returns:
@@ -106,7 +109,7 @@ class WorkspacesCommand(WorkspaceBase):
 
         # Route to appropriate handler
         handlers: dict[str, Callable[[], dict[str, Any]]] = {
-            "run": lambda: self._handle_run(filtered_members, script, args),
+            "run": lambda: self._handle_run(filtered_members, script, args, jobs),
             "exec": lambda: self._handle_exec(filtered_members, script, args),
             "upgrade": lambda: self._handle_package_operation(filtered_members, "upgrade", script, args),
             "remove": lambda: self._handle_package_operation(filtered_members, "remove", script, args),
@@ -121,7 +124,9 @@ class WorkspacesCommand(WorkspaceBase):
 
         return handler()
 
-    def _handle_run(self, members: list[Path], script: str | None, args: list[str] | None) -> dict[str, Any]:
+    def _handle_run(
+        self, members: list[Path], script: str | None, args: list[str] | None, jobs: int = 1
+    ) -> dict[str, Any]:
         """Handle 'run' subcommand."""
         if not script:
             return {"success": False, "error": "Script name required for 'run' subcommand"}
@@ -132,7 +137,7 @@ class WorkspacesCommand(WorkspaceBase):
                 cmd.extend(args)
             return cmd
 
-        return self.execute_in_members(members, f"Running '{script}'", build_command)
+        return self.execute_in_members(members, f"Running '{script}'", build_command, max_concurrency=jobs)
 
     def _handle_exec(self, members: list[Path], script: str | None, args: list[str] | None) -> dict[str, Any]:
         """Handle 'exec' subcommand."""
@@ -200,6 +205,7 @@ class WorkspacesCommand(WorkspaceBase):
 
             operation_name = "Removing packages"
 
+        # Members share the workspace lock file, so these always run one at a time
         return self.execute_in_members(members, operation_name, build_command)
 
 
@@ -16,6 +16,9 @@ Licensed under the MIT License. See LICENSE file for details.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains dependency installation logic for various package managers
+# - uv and pip installs use the shared wheel cache and report how many packages came from it
+# - Dependencies can be installed offline, exclusively from the wheels of a snapshot bundle
+# - Installs lock the wheel cache against pruning and enforce its size limit first
 #
 
 
@@ -25,6 +28,8 @@ from prefect import get_run_logger, task
 
 from DHT.modules.environment_snapshot_models import EnvironmentSnapshot, ReproductionResult
 from DHT.modules.guardian_prefect import ResourceLimits, run_with_guardian
+from DHT.modules.snapshot_bundle import ExtractedBundle
+from DHT.modules.wheel_cache import get_wheel_cache
 
 
 class DependenciesInstaller:
@@ -32,33 +37,51 @@ class DependenciesInstaller:
 
     @task(name="install_project_dependencies", description="Install project dependencies")
     def install_project_dependencies(
-        self, snapshot: EnvironmentSnapshot, result: ReproductionResult, target_path: Path
+        self,
+        snapshot: EnvironmentSnapshot,
+        result: ReproductionResult,
+        target_path: Path,
+        bundle: ExtractedBundle | None = None,
     ) -> Any:
-        """Install project dependencies."""
+        """Install project dependencies, from a snapshot bundle only when one is given."""
         logger = get_run_logger()
 
+        if bundle is not None:
+            self._install_from_bundle(snapshot, bundle, result, target_path)
+            return
+
+        wheel_cache = get_wheel_cache()
+
         try:
             if "uv.lock" in snapshot.lock_files:
                 # Use UV sync
-                cmd_result = run_with_guardian(
-                    ["uv", "sync"], limits=ResourceLimits(memory_mb=2048, timeout=600), cwd=str(target_path)
-                )
+                with wheel_cache.installing() as cache_env:
+                    cmd_result = run_with_guardian(
+                        ["uv", "sync"],
+                        limits=ResourceLimits(memory_mb=2048, timeout=600),
+                        cwd=str(target_path),
+                        env=cache_env,
+                    )
 
                 if cmd_result.success:
-                    result.actions_completed.append("Installed dependencies via UV sync")
+                    usage = wheel_cache.record_install("uv", f"{cmd_result.stdout}\n{cmd_result.stderr}")
+                    result.actions_completed.append(f"Installed dependencies via UV sync ({usage.summary()})")
                 else:
                     result.actions_failed.append(f"UV sync failed: {cmd_result.stderr}")
 
             elif "requirements.txt" in snapshot.lock_files:
                 # Use pip install
-                cmd_result = run_with_guardian(
-                    ["pip", "install", "-r", "requirements.txt"],
-                    limits=ResourceLimits(memory_mb=2048, timeout=600),
-                    cwd=str(target_path),
-                )
+                with wheel_cache.installing() as cache_env:
+                    cmd_result = run_with_guardian(
+                        ["pip", "install", "-r", "requirements.txt"],
+                        limits=ResourceLimits(memory_mb=2048, timeout=600),
+                        cwd=str(target_path),
+                        env=cache_env,
+                    )
 
                 if cmd_result.success:
-                    result.actions_completed.append("Installed dependencies via pip")
+                    usage = wheel_cache.record_install("pip", f"{cmd_result.stdout}\n{cmd_result.stderr}")
+                    result.actions_completed.append(f"Installed dependencies via pip ({usage.summary()})")
                 else:
                     result.actions_failed.append(f"Pip install failed: {cmd_result.stderr}")
 
@@ -101,6 +124,53 @@ class DependenciesInstaller:
             logger.error(f"Failed to install dependencies: {e}")
             result.actions_failed.append(f"dependency_installation_error: {str(e)}")
 
+    def _install_from_bundle(
+        self, snapshot: EnvironmentSnapshot, bundle: ExtractedBundle, result: ReproductionResult, target_path: Path
+    ) -> None:
+        """Install the bundled package versions into the target's virtual environment without any index."""
+        manifest = bundle.manifest
+        if manifest.missing:
+            result.warnings.append(f"Bundle lacks locked packages: {', '.join(manifest.missing)}")
+        if not manifest.wheels:
+            result.warnings.append("Bundle contains no wheels; no dependencies installed")
+            return
+
+        venv_path = Path(target_path) / ".venv"
+        limits = ResourceLimits(memory_mb=2048, timeout=600)
+        with get_wheel_cache().installing() as cache_env:
+            env = {**cache_env, "UV_OFFLINE": "1", "UV_PYTHON_DOWNLOADS": "never"}
+
+            if not venv_path.exists():
+                venv_cmd = ["uv", "venv", str(venv_path)]
+                if snapshot.python_version:
+                    venv_cmd += ["--python", snapshot.python_version]
+                cmd_result = run_with_guardian(venv_cmd, limits=limits, cwd=str(target_path), env=env)
+                if not cmd_result.success:
+                    result.actions_failed.append(f"Creating virtual environment failed: {cmd_result.stderr}")
+                    return
+
+            cmd_result = run_with_guardian(
+                [
+                    "uv",
+                    "pip",
+                    "install",
+                    "--offline",
+                    "--no-index",
+                    "--find-links",
+                    str(bundle.wheels_dir),
+                    "-r",
+                    str(bundle.requirements_path),
+                ],
+                limits=limits,
+                cwd=str(target_path),
+                env={**env, "VIRTUAL_ENV": str(venv_path)},
+            )
+            if cmd_result.success:
+                packages = manifest.requirements().count("\n")
+                result.actions_completed.append(f"Installed {packages} packages offline from bundle")
+            else:
+                result.actions_failed.append(f"Offline install from bundle failed: {cmd_result.stderr}")
+
 
 # Export public API
 __all__ = ["DependenciesInstaller"]
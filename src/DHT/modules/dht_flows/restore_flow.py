@@ -11,6 +11,11 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Converted from dhtl_commands_1.sh shell script
 # - Added proper error handling and resource management
 # - Updated find_project_root to use common_utils implementation
+# - Install guardian limits are now learned from previous runs (600s cold start)
+# - verify_installation reads the Python version from pyvenv.cfg and imports all modules in one interpreter
+# - install_dependencies uses the shared wheel cache and reports its hit rate
+# - Install history is kept per project root
+# - Installs lock the wheel cache against pruning and enforce its size limit first
 #
 
 """
@@ -21,6 +26,7 @@ with a modern Prefect flow that provides better error handling,
 parallel execution, and resource management.
 """
 
+import json
 import os
 import subprocess
 import sys
@@ -30,10 +36,28 @@ from typing import Any
 from prefect import flow, get_run_logger, task
 
 from ..common_utils import find_project_root as find_project_root_util
-from ..guardian_prefect import GuardianConfig, run_with_guardian
+from ..guardian_prefect import GuardianConfig, adaptive_guardian_config, run_with_guardian
+from ..site_packages_scanner import scan_venv
 from ..uv_manager import UVManager
+from ..wheel_cache import get_wheel_cache
 from .utils import get_default_resource_limits, get_venv_pip_path, get_venv_python_path
 
+# Imports every module named in argv and prints {module: importable} as JSON.
+# Any exception counts as a failure: a missing transitive dependency or a
+# broken compiled extension must fail verification, not just a missing package.
+_IMPORT_CHECK_SCRIPT = """
+import importlib, json, os, sys
+out, sys.stdout = sys.stdout, open(os.devnull, "w")
+results = {}
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+        results[name] = True
+    except BaseException:
+        results[name] = False
+out.write("\\n" + json.dumps(results) + "\\n")
+"""
+
 
 @task(name="find-project-root", retries=2)
 def find_project_root(start_path: Path | None = None) -> Path:
@@ -184,29 +208,41 @@ def install_dependencies(
     if upgrade:
         cmd_parts.append("--upgrade")
 
-    # Run installation with guardian limits
+    # Run installation with guardian limits learned from previous installs,
+    # starting from 10 minutes until enough history has been recorded
     default_limits = get_default_resource_limits()
-    guardian_config = GuardianConfig(
-        memory_limit_mb=default_limits["memory_limit_mb"],
-        timeout_seconds=600,  # 10 minutes for installation
-        check_interval=1.0,
-    )
-
-    result = run_with_guardian(
+    guardian_config = adaptive_guardian_config(
         ["uv"] + cmd_parts,
-        config=guardian_config,
+        fallback=GuardianConfig(
+            memory_limit_mb=default_limits["memory_limit_mb"],
+            timeout_seconds=600,
+            check_interval=1.0,
+        ),
         cwd=str(project_root),
-        env={**os.environ, "VIRTUAL_ENV": str(venv_path)},
     )
 
+    wheel_cache = get_wheel_cache()
+    with wheel_cache.installing() as cache_env:
+        result = run_with_guardian(
+            ["uv"] + cmd_parts,
+            config=guardian_config,
+            cwd=str(project_root),
+            env={**os.environ, **cache_env, "VIRTUAL_ENV": str(venv_path)},
+        )
+
     if result.return_code != 0:
         raise RuntimeError(f"Dependency installation failed: {result.stderr}")
 
+    cache_usage = wheel_cache.record_install("uv", f"{result.stdout}\n{result.stderr}")
+    logger.info(f"Package cache: {cache_usage.summary()}")
+
     return {
         "success": True,
         "message": "Dependencies installed successfully",
         "stdout": result.stdout,
         "install_time": result.execution_time,
+        "cache_hits": cache_usage.hits,
+        "cache_misses": cache_usage.misses,
     }
 
 
@@ -234,7 +270,9 @@ def install_dht_dependencies(venv_path: Path) -> dict[str, Any]:
 
     cmd = [str(pip_path), "install"] + dht_deps
 
-    guardian_config = GuardianConfig(memory_limit_mb=1024, timeout_seconds=300, check_interval=1.0)
+    guardian_config = adaptive_guardian_config(
+        cmd, fallback=GuardianConfig(memory_limit_mb=1024, timeout_seconds=300, check_interval=1.0)
+    )
 
     result = run_with_guardian(cmd, config=guardian_config)
 
@@ -267,8 +305,15 @@ def verify_installation(project_root: Path, venv_path: Path) -> dict[str, Any]:
     except FileNotFoundError:
         return {"success": False, "error": "Python executable not found in virtual environment"}
 
-    # Check Python version
-    version_result = subprocess.run([str(python_path), "--version"], capture_output=True, text=True)
+    # Read what is installed straight from site-packages
+    inventory = scan_venv(venv_path)
+
+    # Check Python version, recorded in pyvenv.cfg by venv and uv
+    if inventory.python_version:
+        python_version = f"Python {inventory.python_version}"
+    else:
+        version_result = subprocess.run([str(python_path), "--version"], capture_output=True, text=True)
+        python_version = version_result.stdout.strip()
 
     # Try to import key packages
     test_imports = []
@@ -279,17 +324,23 @@ def verify_installation(project_root: Path, venv_path: Path) -> dict[str, Any]:
 
     test_imports.extend(["prefect", "yaml", "requests"])
 
-    import_results = {}
-    for package in test_imports:
-        result = subprocess.run([str(python_path), "-c", f"import {package}"], capture_output=True)
-        import_results[package] = result.returncode == 0
+    # Import everything for real, in a single interpreter start
+    import_results = dict.fromkeys(test_imports, False)
+    result = subprocess.run(
+        [str(python_path), "-c", _IMPORT_CHECK_SCRIPT, *test_imports], capture_output=True, text=True
+    )
+    try:
+        import_results.update(json.loads(result.stdout.strip().splitlines()[-1]))
+    except (IndexError, ValueError, TypeError):
+        logger.warning(f"Import check failed to run: {result.stderr.strip()}")
 
     all_imports_ok = all(import_results.values())
 
     return {
         "success": all_imports_ok,
-        "python_version": version_result.stdout.strip(),
+        "python_version": python_version,
         "import_results": import_results,
+        "packages_installed": len(inventory.distributions),
         "venv_path": str(venv_path),
     }
 
@@ -20,6 +20,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Implements validation checksum generation
 # - Implements configuration merging for platform overrides
 # - Refactored to extract functionality into separate modules
+# - Requests only version probes from the diagnostic reporter
 #
 
 """
@@ -39,11 +40,13 @@ from pathlib import Path
 try:
     # Try absolute import first (when running as installed package)
     from DHT import diagnostic_reporter_v2
+    from DHT.diagnostic_tiers import DEPTH_VERSIONS_ONLY
     from DHT.modules import project_analyzer
 except ImportError:
     try:
         # Try relative import (when running from within package)
         from .. import diagnostic_reporter_v2
+        from ..diagnostic_tiers import DEPTH_VERSIONS_ONLY
         from . import project_analyzer
     except ImportError:
         # Try direct import (when modules are in path) - already imported above
@@ -160,7 +163,9 @@ class DHTConfig:
         # Add platform-specific overrides if we detect differences
         if include_system_info:
             system_info = diagnostic_reporter_v2.build_system_report(
-                include_system_info=True, categories=["build_tools", "compilers", "package_managers"]
+                include_system_info=True,
+                categories=["build_tools", "compilers", "package_managers"],
+                depth=DEPTH_VERSIONS_ONLY,
             )
             config["platform_overrides"] = self.platform_utils.generate_platform_overrides(project_info, system_info)
 
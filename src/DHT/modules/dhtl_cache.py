@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Dhtl Cache module.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created `dhtl cache` command group
+# - Adds `dhtl cache stats` and `dhtl cache prune` for the shared wheel cache
+#
+
+"""
+DHT Cache Commands.
+
+Inspect and prune the package cache shared by uv and pip installs.
+"""
+
+import argparse
+import json
+from typing import Any
+
+from .dhtl_error_handling import log_error, log_success
+
+
+def cache_stats_command(argv: list[str]) -> int:
+    """
+    Show the size, entries and hit rate of the wheel cache.
+
+    Usage: dhtl cache stats [--format text|json] [--reset]
+    """
+    from .wheel_cache import get_wheel_cache
+
+    parser = argparse.ArgumentParser(prog="dhtl cache stats", description="Show wheel cache statistics")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument("--reset", action="store_true", help="Reset the hit and miss counters afterwards")
+    args = parser.parse_args(argv)
+
+    cache = get_wheel_cache()
+    try:
+        stats = cache.stats()
+    except OSError as e:
+        log_error(f"Cannot read wheel cache {cache.root}: {e}")
+        return 1
+
+    print(json.dumps(stats.to_dict(), indent=2) if args.format == "json" else stats.summary())
+    if args.reset:
+        cache.reset_stats()
+    return 0
+
+
+def cache_prune_command(argv: list[str]) -> int:
+    """
+    Evict least recently used packages until the wheel cache fits its size limit.
+
+    Installs already enforce DHT_WHEEL_CACHE_MAX_MB when they start, at most
+    once an hour unless the cache was last measured over it; this command
+    applies a limit right away, waiting for running installs to finish.
+
+    Usage: dhtl cache prune [--max-size MB] [--dry-run]
+    """
+    from .wheel_cache import get_wheel_cache
+
+    parser = argparse.ArgumentParser(prog="dhtl cache prune", description="Shrink the wheel cache")
+    parser.add_argument(
+        "--max-size",
+        type=float,
+        help="Target size in MiB (default: DHT_WHEEL_CACHE_MAX_MB or 10240, which installs also enforce)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be removed")
+    args = parser.parse_args(argv)
+
+    cache = get_wheel_cache()
+    max_bytes = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+    try:
+        result = cache.prune(max_bytes, dry_run=args.dry_run)
+    except OSError as e:
+        log_error(f"Cannot prune wheel cache {cache.root}: {e}")
+        return 1
+
+    if args.dry_run:
+        for path in result.removed:
+            print(path)
+    verb = "Would free" if args.dry_run else "Freed"
+    log_success(
+        f"{verb} {result.freed_bytes / 1024 / 1024:.1f} MiB ({len(result.removed)} entries); "
+        f"cache size {result.size_after / 1024 / 1024:.1f} MiB"
+    )
+    return 0
+
+
+SUBCOMMANDS = {"stats": cache_stats_command, "prune": cache_prune_command}
+
+
+def cache_command(*args: Any, **kwargs: Any) -> int:
+    """Run a `dhtl cache` subcommand."""
+    argv = list(args[0]) if args and isinstance(args[0], list) else [str(arg) for arg in args]
+    if not argv or argv[0] not in SUBCOMMANDS:
+        log_error(f"Usage: dhtl cache {{{','.join(SUBCOMMANDS)}}} ...")
+        return 1
+    return SUBCOMMANDS[argv[0]](argv[1:])
+
+
+__all__ = ["cache_command", "cache_stats_command", "cache_prune_command"]
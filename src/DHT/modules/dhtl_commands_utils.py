@@ -15,10 +15,13 @@ This module contains utilities shared by multiple dhtl command modules.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Created to share common functionality between command modules
 # - Contains parse_requirements and other shared utilities
+# - count_site_packages reads the venv inventory from the site-packages scanner
 #
 
 from pathlib import Path
 
+from DHT.modules.site_packages_scanner import scan_venv
+
 
 def parse_requirements(requirements_path: Path) -> list[str]:
     """Parse requirements.txt file and return list of dependencies.
@@ -60,20 +63,7 @@ def count_site_packages(venv_path: Path) -> int:
     Returns:
         Number of installed packages
     """
-    site_packages = venv_path / "lib"
-    package_count = 0
-
-    if site_packages.exists():
-        # Look for python directories (python3.X)
-        for python_dir in site_packages.iterdir():
-            if python_dir.name.startswith("python"):
-                sp_dir = python_dir / "site-packages"
-                if sp_dir.exists():
-                    # Count .dist-info directories
-                    package_count = len(list(sp_dir.glob("*.dist-info")))
-                    break
-
-    return package_count
+    return len(scan_venv(venv_path).distributions)
 
 
 __all__ = ["parse_requirements", "count_site_packages"]
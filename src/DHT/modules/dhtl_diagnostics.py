@@ -11,6 +11,8 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Implements diagnostics command functionality
 # - Provides system and project health checks
 # - Maintains compatibility with shell version
+# - Tool versions are looked up through the PATH index and tool version cache
+# - Adds `dhtl diagnostics merge` to aggregate many reports into a tool version matrix
 #
 
 """
@@ -19,19 +21,78 @@ DHT Diagnostics Module.
 Provides system and project diagnostics to identify potential issues.
 """
 
+import argparse
 import os
 import platform
 import shutil
 import subprocess
 import sys
+from functools import partial
+from pathlib import Path
 from typing import Any
 
 from .common_utils import find_project_root, find_virtual_env
 from .dhtl_error_handling import log_error, log_info, log_success, log_warning
+from .path_index import which
+from .tool_version_cache import cached_probe
+
+
+def _version_output(tool_path: str) -> str | None:
+    """Run `<tool> --version` and return its stdout, None on failure."""
+    result = subprocess.run([tool_path, "--version"], capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else None
+
+
+def diagnostics_merge_command(argv: list[str]) -> int:
+    """
+    Aggregate diagnostic reports from many machines into a tool version matrix.
+
+    Usage: dhtl diagnostics merge REPORT_OR_DIR... [--format table|json|csv] [--output FILE]
+    """
+    from DHT.diagnostic_export import merge_reports
+
+    parser = argparse.ArgumentParser(
+        prog="dhtl diagnostics merge",
+        description="Aggregate diagnostic reports (rows, JSON or YAML) into a tool version matrix",
+    )
+    parser.add_argument("reports", nargs="+", help="Report files or directories containing reports")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table", help="Output format")
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    matrix = merge_reports(args.reports)
+    if not matrix.hosts:
+        log_error("No diagnostic reports could be read")
+        for path, error in matrix.errors.items():
+            log_error(f"  {path}: {error}")
+        return 1
+
+    if args.format == "json":
+        import json
+
+        output = json.dumps(matrix.to_dict(), indent=2)
+    elif args.format == "csv":
+        output = matrix.to_csv()
+    else:
+        output = matrix.to_table()
+
+    if args.output:
+        Path(args.output).write_text(output)
+        log_success(f"Version matrix for {len(matrix.hosts)} report(s) saved to: {args.output}")
+    else:
+        print(output)
+
+    for path, error in matrix.errors.items():
+        log_warning(f"Skipped {path}: {error}")
+    return 0
 
 
 def diagnostics_command(*args: Any, **kwargs: Any) -> int:
-    """Run system and project diagnostics."""
+    """Run system and project diagnostics, or `merge` reports from many machines."""
+    argv = list(args[0]) if args and isinstance(args[0], list) else [str(arg) for arg in args]
+    if argv and argv[0] == "merge":
+        return diagnostics_merge_command(argv[1:])
+
     log_info("🔍 Running DHT Diagnostics...")
     log_info("=" * 60)
 
@@ -59,11 +120,12 @@ def diagnostics_command(*args: Any, **kwargs: Any) -> int:
     }
 
     for tool, description in tools.items():
-        if shutil.which(tool):
+        tool_path = which(tool)
+        if tool_path:
             try:
-                result = subprocess.run([tool, "--version"], capture_output=True, text=True)
-                version = result.stdout.strip().split("\n")[0]
-                log_success(f"  ✓ {tool}: {version}")
+                output = cached_probe(tool_path, ["--version"], partial(_version_output, tool_path))
+                version = output.strip().split("\n")[0] if output else ""
+                log_success(f"  ✓ {tool}: {version or 'Found'}")
             except Exception:
                 log_success(f"  ✓ {tool}: Found")
         else:
@@ -10,6 +10,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Python replacement for dhtl_guardian_1.sh
 # - Provides process guardian functionality
 # - Manages resource limits and process monitoring
+# - Records each run in the guardian history
 #
 
 """
@@ -20,8 +21,10 @@ Provides process guardian functionality for resource management.
 
 import os
 import subprocess
+import time
 
 from .dhtl_error_handling import log_error, log_info
+from .guardian_history import record_guardian_run
 
 
 class ProcessGuardian:
@@ -39,13 +42,17 @@ class ProcessGuardian:
         # TODO: Implement actual resource limiting
         log_info(f"Running command with {mem_limit}MB memory limit")
 
+        start_time = time.time()
         try:
             result = subprocess.run(command, check=False)
-            return result.returncode
         except Exception as e:
             log_error(f"Error running command: {e}")
+            record_guardian_run(command, None, {"returncode": 1, "duration": time.time() - start_time, "error": str(e)})
             return 1
 
+        record_guardian_run(command, None, {"returncode": result.returncode, "duration": time.time() - start_time})
+        return result.returncode
+
 
 # Export functions
 def run_with_guardian(command: str, name: str, mem_limit: int, *args: str) -> int:
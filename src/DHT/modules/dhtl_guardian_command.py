@@ -11,6 +11,8 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Implements guardian command for process management
 # - Uses Prefect-based guardian system
 # - Integrated with DHT command dispatcher
+# - Added stats subcommand reporting run history percentiles
+# - guardian run learns unspecified limits from run history
 #
 
 """
@@ -20,6 +22,7 @@ Provides process management with resource limits using Prefect.
 """
 
 import sys
+import time
 from pathlib import Path
 from typing import Any
 
@@ -29,8 +32,10 @@ except ImportError:
     yaml = None  # type: ignore[assignment]
 
 from .dhtl_error_handling import log_error, log_info, log_success, log_warning
+from .guardian_history import GuardianHistory
 from .guardian_prefect import (
     ResourceLimits,
+    adaptive_guardian_config,
     guardian_batch_flow,
     guardian_sequential_flow,
     load_command_file,
@@ -58,6 +63,8 @@ def guardian_command(args: list[str]) -> int:
         return guardian_config(remaining_args)
     elif subcommand == "status":
         return guardian_status(remaining_args)
+    elif subcommand == "stats":
+        return guardian_stats(remaining_args)
     else:
         log_error(f"Unknown guardian subcommand: {subcommand}")
         show_guardian_help()
@@ -76,12 +83,18 @@ Subcommands:
   batch <file>        Run commands from file with resource management
   config              Show/set guardian configuration
   status              Show guardian status and resources
+  stats               Show per-command duration and memory history
 
 Run options:
-  --memory <MB>       Memory limit in MB (default: 2048)
-  --timeout <sec>     Timeout in seconds (default: 900)
+  --memory <MB>       Memory limit in MB (default: learned from history, else 2048)
+  --timeout <sec>     Timeout in seconds (default: learned from history, else 900)
   --cpu <percent>     CPU limit percentage (default: 100)
 
+Stats options:
+  --command <text>    Only show commands containing text
+  --window <N>        Recent runs per command to include (default: 200)
+  --prune             Drop runs older than the window from the history
+
 Batch options:
   --size <N>          Batch size for parallel execution (default: 5)
   --sequential        Run commands sequentially
@@ -91,6 +104,7 @@ Examples:
   dhtl guardian run "python script.py" --memory 1024 --timeout 600
   dhtl guardian batch commands.yaml --size 10
   dhtl guardian config --set memory=4096
+  dhtl guardian stats --command "uv sync"
 """)
 
 
@@ -103,8 +117,8 @@ def guardian_run(args: list[str]) -> int:
 
     # Parse command and options
     command = args[0]
-    memory_mb = 2048
-    timeout = 900
+    memory_mb: int | None = None
+    timeout: int | None = None
     cpu_percent = 100
 
     i = 1
@@ -132,6 +146,12 @@ def guardian_run(args: list[str]) -> int:
                 return 1
         i += 1
 
+    # Limits not given on the command line are learned from previous runs
+    if memory_mb is None or timeout is None:
+        learned = adaptive_guardian_config(command)
+        memory_mb = learned.memory_limit_mb if memory_mb is None else memory_mb
+        timeout = learned.timeout_seconds if timeout is None else timeout
+
     log_info("Running command with guardian protection:")
     log_info(f"  Command: {command}")
     log_info(f"  Memory: {memory_mb}MB")
@@ -345,6 +365,59 @@ def guardian_status(args: list[str]) -> int:
     return 0
 
 
+def guardian_stats(args: list[str]) -> int:
+    """Show p50/p95 duration and memory per command from the run history."""
+    command_filter: str | None = None
+    window = 200
+    prune = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == "--command" and i + 1 < len(args):
+            command_filter = args[i + 1]
+            i += 1
+        elif args[i] == "--window" and i + 1 < len(args):
+            try:
+                window = int(args[i + 1])
+                i += 1
+            except ValueError:
+                log_error(f"Invalid window value: {args[i + 1]}")
+                return 1
+        elif args[i] == "--prune":
+            prune = True
+        i += 1
+
+    history = GuardianHistory()
+    if not history.db_path.exists():
+        log_warning(f"No guardian history found at {history.db_path}")
+        return 0
+
+    if prune:
+        removed = history.prune(keep_per_command=window)
+        log_success(f"Pruned {removed} old runs from guardian history")
+
+    stats = history.stats(window=window, command_filter=command_filter)
+    if not stats:
+        log_info("No guarded runs recorded yet")
+        return 0
+
+    log_info(f"📈 Guardian Run History ({history.db_path})")
+    print(
+        f"{'RUNS':>5} {'FAIL':>5} {'P50 TIME':>9} {'P95 TIME':>9} {'P50 MEM':>9} {'P95 MEM':>9} {'LAST RUN':>16}  COMMAND"
+    )
+    for entry in stats:
+        p50_mem = f"{entry.p50_memory_mb:.0f}MB" if entry.p50_memory_mb is not None else "-"
+        p95_mem = f"{entry.p95_memory_mb:.0f}MB" if entry.p95_memory_mb is not None else "-"
+        last_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.last_run))
+        command = entry.command if len(entry.command) <= 60 else entry.command[:57] + "..."
+        print(
+            f"{entry.runs:>5} {entry.failures:>5} {entry.p50_duration:>8.2f}s {entry.p95_duration:>8.2f}s "
+            f"{p50_mem:>9} {p95_mem:>9} {last_run:>16}  {command}"
+        )
+
+    return 0
+
+
 # For backward compatibility
 def placeholder_command(*args: Any, **kwargs: Any) -> int:
     """Placeholder command implementation."""
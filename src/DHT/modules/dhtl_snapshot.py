@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Dhtl Snapshot module.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created `dhtl snapshot` command group
+# - Adds `dhtl snapshot diff A B` and baseline drift reports over many snapshots
+# - Adds `dhtl snapshot bundle` and `dhtl snapshot reproduce` for offline reproduction
+# - Adds `dhtl snapshot gc` to remove blobs no snapshot references any more
+#
+
+"""
+DHT Snapshot Commands.
+
+Inspect environment snapshots saved by the environment reproducer, bundle
+them with their wheels for offline reproduction, and clean up the blob
+store they keep file contents in.
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from .dhtl_error_handling import log_error, log_success, log_warning
+
+
+def snapshot_diff_command(argv: list[str]) -> int:
+    """
+    Compare snapshots.
+
+    Usage: dhtl snapshot diff BASELINE SNAPSHOT... [--format text|json] [--no-contents] [--exit-code]
+
+    With one SNAPSHOT the two are diffed in detail; with several (or a
+    directory) each is compared against BASELINE and a drift report is printed.
+    """
+    from .snapshot_diff import diff_against_baseline, diff_snapshots
+
+    parser = argparse.ArgumentParser(
+        prog="dhtl snapshot diff", description="Compare environment snapshots against a baseline"
+    )
+    parser.add_argument("baseline", help="Baseline snapshot file")
+    parser.add_argument("snapshots", nargs="+", help="Snapshot files or directories of snapshots")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument("--no-contents", action="store_true", help="Do not diff the contents of changed files")
+    parser.add_argument("--exit-code", action="store_true", help="Exit with 1 when snapshots differ")
+    args = parser.parse_args(argv)
+
+    baseline = Path(args.baseline)
+    paths: list[Path] = []
+    for entry in map(Path, args.snapshots):
+        if entry.is_dir():
+            paths.extend(
+                sorted(
+                    p
+                    for p in entry.iterdir()
+                    if p.is_file() and p.suffix in (".json", ".yaml", ".yml", ".dhtsnap") and p != baseline
+                )
+            )
+        else:
+            paths.append(entry)
+
+    try:
+        if len(paths) == 1 and not Path(args.snapshots[0]).is_dir():
+            diff = diff_snapshots(baseline, paths[0], with_contents=not args.no_contents)
+            print(json.dumps(diff.to_dict(), indent=2) if args.format == "json" else diff.summary())
+            return 1 if args.exit_code and diff.has_changes else 0
+
+        report = diff_against_baseline(baseline, paths, with_contents=not args.no_contents and args.format == "json")
+    except (OSError, ValueError) as e:
+        log_error(f"Cannot compare snapshots: {e}")
+        return 1
+
+    print(json.dumps(report.to_dict(), indent=2) if args.format == "json" else report.summary())
+    for path, error in report.errors.items():
+        log_warning(f"Skipped {path}: {error}")
+    return 1 if args.exit_code and report.drifted() else 0
+
+
+def snapshot_bundle_command(argv: list[str]) -> int:
+    """
+    Package a snapshot and the wheels of its lock file into one archive.
+
+    Usage: dhtl snapshot bundle SNAPSHOT [-o OUTPUT] [--strict]
+
+    Wheels are taken from the local uv caches; locked packages that are not
+    cached are reported, or fail the command with --strict.
+    """
+    from .environment_snapshot_io import EnvironmentSnapshotIO
+    from .snapshot_bundle import BUNDLE_SUFFIX, create_bundle
+
+    parser = argparse.ArgumentParser(
+        prog="dhtl snapshot bundle", description="Bundle a snapshot with its wheels for offline reproduction"
+    )
+    parser.add_argument("snapshot", help="Snapshot file")
+    parser.add_argument("-o", "--output", help=f"Bundle file (default: the snapshot path with {BUNDLE_SUFFIX})")
+    parser.add_argument("--strict", action="store_true", help="Fail if a locked package is not in the uv caches")
+    args = parser.parse_args(argv)
+
+    output = Path(args.output) if args.output else Path(args.snapshot).with_suffix(BUNDLE_SUFFIX)
+    try:
+        snapshot = EnvironmentSnapshotIO().load_snapshot(Path(args.snapshot))
+        manifest = create_bundle(snapshot, output, strict=args.strict)
+    except (OSError, ValueError) as e:
+        log_error(f"Cannot bundle snapshot: {e}")
+        return 1
+
+    for pin in manifest.missing:
+        log_warning(f"Not in the local uv cache, not bundled: {pin}")
+    log_success(f"Bundled {len(manifest.wheels)} wheels with snapshot {manifest.snapshot_id} into {output}")
+    return 0
+
+
+def snapshot_reproduce_command(argv: list[str]) -> int:
+    """
+    Reproduce a bundled snapshot offline.
+
+    Usage: dhtl snapshot reproduce BUNDLE TARGET [--strict] [--checkpoint FILE]
+
+    Project files are restored into TARGET and dependencies are installed
+    from the bundled wheels only, without contacting a package index.
+    """
+    from .environment_reproducer import EnvironmentReproducer
+    from .snapshot_bundle import open_bundle
+
+    parser = argparse.ArgumentParser(
+        prog="dhtl snapshot reproduce", description="Reproduce a bundled snapshot without network access"
+    )
+    parser.add_argument("bundle", help="Bundle file created by `dhtl snapshot bundle`")
+    parser.add_argument("target", help="Directory to reproduce the project environment in")
+    parser.add_argument("--strict", action="store_true", help="Require exact tool versions")
+    parser.add_argument("--checkpoint", help="Checkpoint file, to resume a failed reproduction")
+    args = parser.parse_args(argv)
+
+    reproducer = EnvironmentReproducer()
+    with tempfile.TemporaryDirectory(prefix="dht-bundle-") as workdir:
+        try:
+            bundle = open_bundle(Path(args.bundle), Path(workdir))
+            snapshot = reproducer.load_environment_snapshot(bundle.snapshot_path)
+        except (OSError, ValueError) as e:
+            log_error(f"Cannot open bundle: {e}")
+            return 1
+
+        result = reproducer.reproduce_environment(
+            snapshot,
+            Path(args.target),
+            strict_mode=args.strict,
+            auto_install=False,
+            checkpoint=Path(args.checkpoint) if args.checkpoint else None,
+            bundle=bundle,
+        )
+
+    for warning in result.warnings:
+        log_warning(warning)
+    for failure in result.actions_failed:
+        log_error(failure)
+    if not result.success:
+        return 1
+    log_success(f"Reproduced snapshot {snapshot.snapshot_id} offline in {args.target}")
+    return 0
+
+
+def snapshot_gc_command(argv: list[str]) -> int:
+    """
+    Remove blobs no snapshot in a directory references any more.
+
+    Usage: dhtl snapshot gc [DIR] [--min-age SECONDS] [--dry-run]
+
+    DIR defaults to .dht/snapshots, where reproductions save their snapshots.
+    Nothing is removed if any snapshot in DIR cannot be read.
+    """
+    from .snapshot_blob_store import DEFAULT_BLOB_DIR, GC_MIN_AGE, gc_snapshot_dir
+
+    parser = argparse.ArgumentParser(
+        prog="dhtl snapshot gc", description="Remove unreferenced blobs from a snapshot directory"
+    )
+    parser.add_argument("directory", nargs="?", default=".dht/snapshots", help="Snapshot directory")
+    parser.add_argument(
+        "--min-age",
+        type=float,
+        default=GC_MIN_AGE,
+        help=f"Keep unreferenced blobs younger than this many seconds (default: {GC_MIN_AGE:.0f})",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    args = parser.parse_args(argv)
+
+    directory = Path(args.directory)
+    if not (directory / DEFAULT_BLOB_DIR).is_dir():
+        log_warning(f"No blob store in {directory}, nothing to collect")
+        return 0
+    try:
+        result = gc_snapshot_dir(directory, min_age=args.min_age, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        log_error(f"Cannot collect snapshot blobs: {e}")
+        return 1
+
+    verb = "Would remove" if args.dry_run else "Removed"
+    log_success(
+        f"{verb} {result.removed} blobs ({result.freed_bytes / 1024:.1f} KiB); "
+        f"kept {result.kept}, {result.referenced} referenced by snapshots"
+    )
+    return 0
+
+
+SUBCOMMANDS = {
+    "diff": snapshot_diff_command,
+    "bundle": snapshot_bundle_command,
+    "reproduce": snapshot_reproduce_command,
+    "gc": snapshot_gc_command,
+}
+
+
+def snapshot_command(*args: Any, **kwargs: Any) -> int:
+    """Run a `dhtl snapshot` subcommand."""
+    argv = list(args[0]) if args and isinstance(args[0], list) else [str(arg) for arg in args]
+    if not argv or argv[0] not in SUBCOMMANDS:
+        log_error(f"Usage: dhtl snapshot {{{','.join(SUBCOMMANDS)}}} ...")
+        return 1
+    return SUBCOMMANDS[argv[0]](argv[1:])
+
+
+__all__ = [
+    "snapshot_command",
+    "snapshot_diff_command",
+    "snapshot_bundle_command",
+    "snapshot_reproduce_command",
+    "snapshot_gc_command",
+]
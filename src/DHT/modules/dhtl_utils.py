@@ -13,6 +13,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Contains utility functions like linting
 # - Maintains compatibility with existing functionality
 # - Uses error handling from dhtl_error_handling.py
+# - Lint tool lookup uses the shared PATH index
 #
 
 """
@@ -22,11 +23,11 @@ Contains utility functions for DHT including file searching and linting.
 """
 
 import os
-import shutil
 from pathlib import Path
 
 # Import from our error handling module
 from .dhtl_error_handling import log_error, log_info, log_success, log_warning
+from .path_index import which
 
 
 def file_exists_in_tree(directory: str, filename: str, max_depth: int = 4) -> bool:
@@ -139,7 +140,7 @@ class LintCommand:
             elif (venv_scripts_path / "pre-commit.exe").exists():
                 tools["precommit_cmd"] = str(venv_scripts_path / "pre-commit.exe")
                 tools["use_precommit"] = True
-            elif shutil.which("pre-commit"):
+            elif which("pre-commit"):
                 tools["precommit_cmd"] = "pre-commit"
                 tools["use_precommit"] = True
                 log_warning("Using global pre-commit.")
@@ -158,7 +159,7 @@ class LintCommand:
             elif (venv_scripts_path / "ruff.exe").exists():
                 tools["ruff_cmd"] = str(venv_scripts_path / "ruff.exe")
                 tools["use_ruff"] = True
-            elif shutil.which("ruff"):
+            elif which("ruff"):
                 tools["ruff_cmd"] = "ruff"
                 tools["use_ruff"] = True
                 log_warning("Using global ruff.")
@@ -170,7 +171,7 @@ class LintCommand:
             elif (venv_scripts_path / "black.exe").exists():
                 tools["black_cmd"] = str(venv_scripts_path / "black.exe")
                 tools["use_black"] = True
-            elif shutil.which("black"):
+            elif which("black"):
                 tools["black_cmd"] = "black"
                 tools["use_black"] = True
                 log_warning("Using global black.")
@@ -182,13 +183,13 @@ class LintCommand:
             elif (venv_scripts_path / "mypy.exe").exists():
                 tools["mypy_cmd"] = str(venv_scripts_path / "mypy.exe")
                 tools["use_mypy"] = True
-            elif shutil.which("mypy"):
+            elif which("mypy"):
                 tools["mypy_cmd"] = "mypy"
                 tools["use_mypy"] = True
                 log_warning("Using global mypy.")
 
             # Check shellcheck
-            if shutil.which("shellcheck"):
+            if which("shellcheck"):
                 tools["shellcheck_cmd"] = "shellcheck"
                 tools["use_shellcheck"] = True
             elif (venv_bin_path / "shellcheck").exists():
@@ -19,6 +19,7 @@ image building, container management, and log streaming.
 # - Implements image building and container management
 # - Implements log streaming and port checking
 # - Adds comprehensive error handling
+# - run_container can mount DHT's shared wheel cache so installs in containers reuse downloads
 #
 
 import logging
@@ -33,6 +34,8 @@ import docker.errors
 from docker.models.containers import Container
 from prefect import task
 
+from .wheel_cache import get_wheel_cache
+
 
 class DockerError(Exception):
     """Custom exception for Docker-related errors."""
@@ -164,6 +167,7 @@ class DockerManager:
         volumes: dict[str, dict[str, str]] | None = None,
         detach: bool = True,
         remove: bool = False,
+        package_cache: bool = False,
     ) -> Container:
         """
         Run a Docker container.
@@ -177,12 +181,20 @@ class DockerManager:
             volumes: Volume mapping
             detach: Run in background
             remove: Remove container when stopped
+            package_cache: Mount DHT's shared wheel cache and point uv and pip at it
 
         Returns:
             Container object
         """
         self.check_docker_requirements()
 
+        if package_cache:
+            wheel_cache = get_wheel_cache()
+            cache_volumes = wheel_cache.container_volumes()
+            if cache_volumes:
+                volumes = {**cache_volumes, **(volumes or {})}
+                environment = {**wheel_cache.container_env(), **(environment or {})}
+
         try:
             # Check if container with same name exists
             try:
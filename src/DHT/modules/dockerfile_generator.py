@@ -19,6 +19,7 @@ based on project type, dependencies, and requirements.
 # - Implements Python version detection from project files
 # - Implements Dockerfile generation with templates
 # - Adds support for multi-stage builds
+# - Optional BuildKit cache mounts keep uv's downloads and built wheels across image builds
 #
 
 import logging
@@ -33,6 +34,11 @@ except ImportError:
     import tomli as tomllib  # Python 3.10 and below
 from prefect import task
 
+from .wheel_cache import CONTAINER_CACHE_DIR
+
+# BuildKit cache shared by every image DHT generates, whatever the project
+BUILD_CACHE_ID = "dht-wheels"
+
 
 class ProjectType(Enum):
     """Enumeration of project types."""
@@ -473,7 +479,11 @@ CMD {cmd}
 
     @task
     def generate_dockerfile(
-        self, project_info: dict[str, Any], multi_stage: bool = False, production: bool = False
+        self,
+        project_info: dict[str, Any],
+        multi_stage: bool = False,
+        production: bool = False,
+        cache_mounts: bool = False,
     ) -> str:
         """
         Generate Dockerfile based on project info.
@@ -482,6 +492,8 @@ CMD {cmd}
             project_info: Project information
             multi_stage: Use multi-stage build
             production: Production optimizations
+            cache_mounts: Run uv with a BuildKit cache mount shared by all DHT images,
+                so rebuilds reuse downloaded and built wheels (requires BuildKit)
 
         Returns:
             Dockerfile content
@@ -537,8 +549,20 @@ RUN npm run build
             # Insert after copying files
             dockerfile = dockerfile.replace("COPY . .", f"COPY . .\n{frontend_steps}")
 
+        if cache_mounts:
+            dockerfile = self._add_cache_mounts(dockerfile)
+
         return dockerfile
 
+    def _add_cache_mounts(self, dockerfile: str) -> str:
+        """Make the uv commands of a Dockerfile use the shared BuildKit cache mount."""
+        mount = f"--mount=type=cache,id={BUILD_CACHE_ID},target={CONTAINER_CACHE_DIR}"
+        # The cache mount is another filesystem, so uv copies instead of hard-linking
+        cache_env = f'ENV UV_CACHE_DIR="{CONTAINER_CACHE_DIR}/uv" UV_LINK_MODE=copy'
+        dockerfile = re.sub(r"^RUN uv ", f"RUN {mount} uv ", dockerfile, flags=re.MULTILINE)
+        dockerfile = dockerfile.replace("WORKDIR /app\n", f"{cache_env}\nWORKDIR /app\n", 1)
+        return f"# syntax=docker/dockerfile:1\n{dockerfile}"
+
     def validate_dockerfile(self, dockerfile_content: str) -> list[str]:
         """
         Validate Dockerfile content.
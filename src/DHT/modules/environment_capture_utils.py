@@ -21,20 +21,21 @@ environment variables.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains environment capture utilities
+# - Python packages of the running interpreter are listed in-process from importlib.metadata
+# - `uv pip list` only runs for an active virtualenv that is not the running interpreter
+# - A foreign active virtualenv is read from disk by the site-packages scanner instead of `uv pip list`
 #
 
 
-import json
 import logging
 import os
-import subprocess
-import sys
 from pathlib import Path
 
 from prefect import get_run_logger
 
 from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
-from DHT.modules.uv_prefect_tasks import check_uv_available
+from DHT.modules.package_inventory import active_virtualenv, current_environment_packages, is_current_environment
+from DHT.modules.site_packages_scanner import scan_venv
 
 
 class EnvironmentCaptureUtils:
@@ -78,36 +79,21 @@ class EnvironmentCaptureUtils:
         logger = self._get_logger()
 
         try:
-            # Get installed packages using pip list
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "list", "--format=json"], capture_output=True, text=True, timeout=30
-            )
-
-            if result.returncode == 0:
-                packages = json.loads(result.stdout)
-                for pkg in packages:
-                    snapshot.python_packages[pkg["name"]] = pkg["version"]
-
+            # The running interpreter's packages are read in-process, no pip subprocess
+            snapshot.python_packages.update(current_environment_packages())
         except Exception as e:
             logger.warning(f"Failed to capture Python packages: {e}")
 
-        # Try to get UV packages if available
-        try:
-            uv_check = check_uv_available()
-            if uv_check["available"]:
-                # Get UV managed packages
-                result = subprocess.run(
-                    ["uv", "pip", "list", "--format=json"], capture_output=True, text=True, timeout=30
-                )
-
-                if result.returncode == 0:
-                    uv_packages = json.loads(result.stdout)
-                    for pkg in uv_packages:
-                        # UV packages take precedence as they're more precisely managed
-                        snapshot.python_packages[pkg["name"]] = pkg["version"]
+        # A different active virtualenv is read from its site-packages
+        venv = active_virtualenv()
+        if venv is None or is_current_environment(venv):
+            return
 
+        try:
+            # The project venv's packages take precedence as they're more precisely managed
+            snapshot.python_packages.update(scan_venv(venv).packages())
         except Exception as e:
-            logger.debug(f"UV package listing failed: {e}")
+            logger.debug(f"Virtualenv package scan failed: {e}")
 
     def capture_environment_variables(self, snapshot: EnvironmentSnapshot) -> None:
         """Capture relevant environment variables."""
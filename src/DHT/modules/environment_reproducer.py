@@ -15,6 +15,11 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Supports tool isolation and platform normalization
 # - Creates reproducible lock files and configuration snapshots
 # - Integrates with UV, diagnostic reporter, and environment configurator
+# - Tools whose version probe timed out are noted instead of recorded with no version
+# - Saved snapshots keep lock and config file contents in a shared blob store
+# - Snapshot capture runs its independent phases concurrently and records per-phase timings
+# - Reproduction is compiled into a plan of verify/restore/install steps run concurrently and resumable
+# - Reproduction can install dependencies offline, exclusively from a snapshot bundle
 #
 
 """
@@ -40,12 +45,15 @@ import logging
 import platform
 import sys
 import tempfile
+import time
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from prefect import flow, get_run_logger, task
 
+from DHT.modules.capture_phases import CAPTURE_WORKERS, CapturePhase, run_phases
 from DHT.modules.dependencies_installer import DependenciesInstaller
 from DHT.modules.environment_capture_utils import EnvironmentCaptureUtils
 from DHT.modules.environment_configurator import EnvironmentConfigurator
@@ -61,6 +69,9 @@ from DHT.modules.platform_normalizer import get_platform_info
 from DHT.modules.project_capture_utils import ProjectCaptureUtils
 from DHT.modules.reproduction_artifacts import ReproductionArtifactCreator
 from DHT.modules.reproduction_flow_utils import ReproductionFlowUtils
+from DHT.modules.reproduction_plan import PLAN_WORKERS, PlanStep, execute_plan
+from DHT.modules.snapshot_blob_store import DEFAULT_BLOB_DIR
+from DHT.modules.snapshot_bundle import ExtractedBundle
 from DHT.modules.tool_version_manager import ToolVersionManager
 
 # Note: EnvironmentSnapshot and ReproductionResult are now imported from environment_snapshot_models.py
@@ -101,15 +112,24 @@ class EnvironmentReproducer:
         return self.logger or logging.getLogger(__name__)
 
     def _capture_environment_snapshot_impl(
-        self, project_path: Path | None = None, include_system_info: bool = True, include_configs: bool = True
+        self,
+        project_path: Path | None = None,
+        include_system_info: bool = True,
+        include_configs: bool = True,
+        max_workers: int = CAPTURE_WORKERS,
     ) -> EnvironmentSnapshot:
         """
         Capture a complete snapshot of the current environment.
 
+        Package listing, tool probes, environment variables, project analysis,
+        lock file generation and config file reads run as concurrent phases;
+        their durations are recorded in snapshot.capture_timings.
+
         Args:
             project_path: Optional project path to include project-specific info
             include_system_info: Whether to include detailed system information
             include_configs: Whether to include configuration files
+            max_workers: Maximum number of phases running at once; 1 captures sequentially
 
         Returns:
             EnvironmentSnapshot with all environment details
@@ -134,20 +154,28 @@ class EnvironmentReproducer:
             python_executable=sys.executable,
         )
 
-        # Capture Python environment
-        self.env_capture_utils.capture_python_packages(snapshot)
-
-        # Capture system tools
-        self._capture_system_tools(snapshot)
-
-        # Capture environment variables
-        self.env_capture_utils.capture_environment_variables(snapshot)
+        # Independent phases run concurrently; lock generation waits for the project analysis
+        phases = [
+            CapturePhase("python_packages", lambda: self.env_capture_utils.capture_python_packages(snapshot)),
+            CapturePhase("system_tools", lambda: self._capture_system_tools(snapshot)),
+            CapturePhase(
+                "environment_variables", lambda: self.env_capture_utils.capture_environment_variables(snapshot)
+            ),
+        ]
 
         # Capture project-specific information if provided
         if project_path:
             project_path = Path(project_path)
             if project_path.exists():
-                self.project_capture_utils.capture_project_info(snapshot, project_path, include_configs)
+                phases += self.project_capture_utils.capture_phases(snapshot, project_path, include_configs)
+
+        start = time.perf_counter()
+        results = run_phases(phases, max_workers=max_workers)
+        for result in results.values():
+            if result.error:
+                logger.warning(f"Snapshot capture phase {result.name} failed: {result.error}")
+            snapshot.capture_timings[result.name] = round(result.duration, 4)
+        snapshot.capture_timings["total"] = round(time.perf_counter() - start, 4)
 
         # Generate reproduction steps
         self.steps_generator.generate_reproduction_steps(snapshot)
@@ -177,8 +205,72 @@ class EnvironmentReproducer:
         tools_info = self.tool_manager.capture_tool_versions()
 
         for tool_name, info in tools_info.items():
-            snapshot.tool_versions[tool_name] = info["version"]
             snapshot.tool_paths[tool_name] = info["path"]
+            if info.get("timed_out"):
+                logger.warning(f"Could not capture {tool_name} version: {info.get('error')}")
+                snapshot.platform_notes.append(f"{tool_name} version not captured: version probe timed out")
+                continue
+            snapshot.tool_versions[tool_name] = info["version"]
+
+    def _build_reproduction_plan(
+        self,
+        snapshot: EnvironmentSnapshot,
+        target_path: Path | None,
+        strict_mode: bool,
+        auto_install: bool,
+        bundle: ExtractedBundle | None = None,
+    ) -> list[PlanStep]:
+        """
+        Compile the reproduction of a snapshot into plan steps.
+
+        Platform, Python and every tool are verified independently. Project
+        files are restored alongside; dependencies are installed once the
+        files, Python and tools are in place (always when installing from
+        a bundle), and configurations are verified once the files are restored.
+        """
+        verification = self.env_verification_utils
+        steps = [
+            PlanStep("platform", "verify", lambda r: verification.verify_platform_compatibility(snapshot, r)),
+            PlanStep("python", "verify", lambda r: verification.verify_python_version(snapshot, r, auto_install)),
+        ]
+        tool_steps = [
+            PlanStep(
+                f"tool:{tool}",
+                "verify",
+                partial(verification.verify_tool, tool, version, strict_mode=strict_mode, auto_install=auto_install),
+            )
+            for tool, version in snapshot.tool_versions.items()
+        ]
+        steps += tool_steps
+
+        restores: tuple[str, ...] = ()
+        if target_path and snapshot.project_path:
+            steps.append(
+                PlanStep("restore_files", "restore", lambda r: self._restore_project_files(snapshot, r, target_path))
+            )
+            restores = ("restore_files",)
+            if auto_install or bundle is not None:
+                steps.append(
+                    PlanStep(
+                        "install_dependencies",
+                        "install",
+                        lambda r: self.deps_installer.install_project_dependencies(
+                            snapshot, r, target_path, bundle=bundle
+                        ),
+                        requires=(*restores, "python", *(step.name for step in tool_steps)),
+                    )
+                )
+
+        if target_path:
+            steps.append(
+                PlanStep(
+                    "verify_configs",
+                    "verify",
+                    lambda r: self._verify_configurations(snapshot, r, target_path),
+                    requires=restores,
+                )
+            )
+        return steps
 
     def _reproduce_environment_impl(
         self,
@@ -186,15 +278,27 @@ class EnvironmentReproducer:
         target_path: Path | None = None,
         strict_mode: bool = True,
         auto_install: bool = False,
+        checkpoint: Path | None = None,
+        max_workers: int = PLAN_WORKERS,
+        bundle: ExtractedBundle | None = None,
     ) -> ReproductionResult:
         """
         Reproduce an environment from a snapshot.
 
+        Independent verification, restore and install steps run concurrently.
+        With a checkpoint, a reproduction that failed can be run again and
+        skips the restore and install steps that already succeeded; the
+        checkpoint is removed once the reproduction succeeds. With a bundle,
+        dependencies are installed offline from the bundled wheels only.
+
         Args:
             snapshot: Environment snapshot to reproduce
             target_path: Target directory for reproduction
             strict_mode: Whether to require exact version matches
             auto_install: Whether to automatically install missing tools
+            checkpoint: Optional file recording completed steps, to resume from
+            max_workers: Maximum number of steps running at once
+            bundle: Opened bundle of this snapshot to install dependencies from
 
         Returns:
             ReproductionResult with verification details
@@ -203,24 +307,28 @@ class EnvironmentReproducer:
         logger.info(f"Reproducing environment from snapshot {snapshot.snapshot_id}")
 
         result = ReproductionResult(success=False, snapshot_id=snapshot.snapshot_id, platform=platform.system().lower())
+        start = time.perf_counter()
 
         try:
-            # 1. Verify platform compatibility
-            self.env_verification_utils.verify_platform_compatibility(snapshot, result)
-
-            # 2. Verify Python version
-            self.env_verification_utils.verify_python_version(snapshot, result, auto_install)
-
-            # 3. Verify tools
-            self.env_verification_utils.verify_tools(snapshot, result, strict_mode, auto_install)
-
-            # 4. Reproduce project environment if specified
-            if target_path and snapshot.project_path:
-                self._reproduce_project_environment(snapshot, result, target_path, auto_install)
-
-            # 5. Verify configurations
-            if target_path:
-                self._verify_configurations(snapshot, result, target_path)
+            if bundle is not None and bundle.manifest.snapshot_id != snapshot.snapshot_id:
+                raise ValueError(
+                    f"Bundle was made for snapshot {bundle.manifest.snapshot_id}, not {snapshot.snapshot_id}"
+                )
+            steps = self._build_reproduction_plan(snapshot, target_path, strict_mode, auto_install, bundle)
+            key = {
+                "snapshot_id": snapshot.snapshot_id,
+                "target_path": str(Path(target_path).resolve()) if target_path else None,
+                "strict_mode": strict_mode,
+                "auto_install": auto_install,
+                "offline": bundle is not None,
+            }
+            report = execute_plan(steps, result, checkpoint=checkpoint, checkpoint_key=key, max_workers=max_workers)
+            result.step_timings = report.timings
+            result.resumed_steps = report.resumed
+            result.critical_path = report.critical_path
+            if report.resumed:
+                logger.info(f"Resumed from checkpoint, skipping: {', '.join(report.resumed)}")
+            logger.info(f"Reproduction critical path: {' -> '.join(report.critical_path)} ({report.total:.2f}s)")
 
             # Determine overall success
             result.success = (
@@ -230,12 +338,16 @@ class EnvironmentReproducer:
                 and all(result.versions_verified.values())
             )
 
+            if result.success and checkpoint is not None:
+                Path(checkpoint).unlink(missing_ok=True)
+
             logger.info(f"Environment reproduction {'succeeded' if result.success else 'failed'}")
 
         except Exception as e:
             logger.error(f"Environment reproduction failed: {e}")
             result.actions_failed.append(f"reproduction_error: {str(e)}")
 
+        result.execution_time = time.perf_counter() - start
         return result
 
     @task(name="reproduce_environment", description="Reproduce environment from snapshot")
@@ -245,47 +357,40 @@ class EnvironmentReproducer:
         target_path: Path | None = None,
         strict_mode: bool = True,
         auto_install: bool = False,
+        checkpoint: Path | None = None,
+        bundle: ExtractedBundle | None = None,
     ) -> ReproductionResult:
         """Prefect task wrapper for reproduce_environment."""
-        return self._reproduce_environment_impl(snapshot, target_path, strict_mode, auto_install)
+        return self._reproduce_environment_impl(
+            snapshot, target_path, strict_mode, auto_install, checkpoint, bundle=bundle
+        )
 
-    def _reproduce_project_environment(
-        self, snapshot: EnvironmentSnapshot, result: ReproductionResult, target_path: Path, auto_install: bool
+    def _restore_project_files(
+        self, snapshot: EnvironmentSnapshot, result: ReproductionResult, target_path: Path
     ) -> None:
-        """Reproduce the project environment."""
-        logger = self._get_logger()
-
-        try:
-            target_path = Path(target_path)
-            target_path.mkdir(parents=True, exist_ok=True)
-
-            # Restore lock files
-            for filename, content in snapshot.lock_files.items():
-                lock_file_path = target_path / filename
-                lock_file_path.write_text(content, encoding="utf-8")
-
-                # Verify checksum
-                actual_checksum = hashlib.sha256(content.encode()).hexdigest()
-                expected_checksum = snapshot.checksums.get(filename)
-
-                if expected_checksum and actual_checksum == expected_checksum:
-                    result.actions_completed.append(f"Restored {filename}")
-                else:
-                    result.warnings.append(f"Checksum mismatch for {filename}")
-
-            # Restore configuration files
-            for filename, content in snapshot.config_files.items():
-                config_file_path = target_path / filename
-                config_file_path.write_text(content, encoding="utf-8")
-                result.actions_completed.append(f"Restored config {filename}")
-
-            # Install dependencies if auto_install is enabled
-            if auto_install:
-                self.deps_installer.install_project_dependencies(snapshot, result, target_path)
-
-        except Exception as e:
-            logger.error(f"Failed to reproduce project environment: {e}")
-            result.actions_failed.append(f"project_reproduction_error: {str(e)}")
+        """Write the snapshot's lock and configuration files into the target directory."""
+        target_path = Path(target_path)
+        target_path.mkdir(parents=True, exist_ok=True)
+
+        # Restore lock files
+        for filename, content in snapshot.lock_files.items():
+            lock_file_path = target_path / filename
+            lock_file_path.write_text(content, encoding="utf-8")
+
+            # Verify checksum
+            actual_checksum = hashlib.sha256(content.encode()).hexdigest()
+            expected_checksum = snapshot.checksums.get(filename)
+
+            if expected_checksum and actual_checksum == expected_checksum:
+                result.actions_completed.append(f"Restored {filename}")
+            else:
+                result.warnings.append(f"Checksum mismatch for {filename}")
+
+        # Restore configuration files
+        for filename, content in snapshot.config_files.items():
+            config_file_path = target_path / filename
+            config_file_path.write_text(content, encoding="utf-8")
+            result.actions_completed.append(f"Restored config {filename}")
 
     def _verify_configurations(
         self, snapshot: EnvironmentSnapshot, result: ReproductionResult, target_path: Path
@@ -298,10 +403,10 @@ class EnvironmentReproducer:
         result.config_differences = config_results["differences"]
 
     def _save_environment_snapshot_impl(
-        self, snapshot: EnvironmentSnapshot, output_path: Path, format: str = "json"
+        self, snapshot: EnvironmentSnapshot, output_path: Path, format: str = "json", blob_store: Path | None = None
     ) -> Path:
-        """Save environment snapshot to file."""
-        saved_path = self.snapshot_io.save_snapshot(snapshot, output_path, format)
+        """Save environment snapshot to file, optionally keeping file contents in a blob store."""
+        saved_path = self.snapshot_io.save_snapshot(snapshot, output_path, format, blob_store=blob_store)
         return Path(saved_path) if not isinstance(saved_path, Path) else saved_path
 
     @task(name="save_environment_snapshot", description="Save environment snapshot to file")
@@ -369,7 +474,9 @@ class EnvironmentReproducer:
             # Step 2: Save snapshot if requested
             if save_snapshot:
                 snapshot_file = output_dir / f"{snapshot.snapshot_id}.json"
-                saved_path = self._save_environment_snapshot_impl(snapshot=snapshot, output_path=snapshot_file)
+                saved_path = self._save_environment_snapshot_impl(
+                    snapshot=snapshot, output_path=snapshot_file, blob_store=output_dir / DEFAULT_BLOB_DIR
+                )
                 results["snapshot_file"] = str(saved_path)
                 results["steps"].append("save_snapshot")
                 logger.info(f"Snapshot saved to {saved_path}")
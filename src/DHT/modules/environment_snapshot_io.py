@@ -18,10 +18,14 @@ various formats (JSON, YAML).
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains snapshot serialization and deserialization logic
+# - Lock and config file contents can be kept in a content-addressed blob store
+# - Added binary container format with per-section loading through load_section
+# - Capture phase timings are saved in the metadata section
 #
 
 
 import json
+import os
 from pathlib import Path
 from typing import Any
 
@@ -29,20 +33,32 @@ import yaml
 from prefect import get_run_logger, task
 
 from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.snapshot_blob_store import BlobStore, externalize_files, resolve_files
+from DHT.modules.snapshot_container import SnapshotContainer, is_container, write_container
 
 
 class EnvironmentSnapshotIO:
     """Handles environment snapshot I/O operations."""
 
     @task(name="save_environment_snapshot", description="Save environment snapshot to file")
-    def save_snapshot(self, snapshot: EnvironmentSnapshot, output_path: Path, format: str = "json") -> Path:
+    def save_snapshot(
+        self,
+        snapshot: EnvironmentSnapshot,
+        output_path: Path,
+        format: str = "json",
+        blob_store: Path | None = None,
+        compression: str = "zlib",
+    ) -> Path:
         """
         Save environment snapshot to file.
 
         Args:
             snapshot: Environment snapshot to save
             output_path: Path to save the snapshot
-            format: Output format ('json' or 'yaml')
+            format: Output format ('json', 'yaml' or 'binary')
+            blob_store: Blob store directory; when given, lock and config file
+                contents are stored there once and the snapshot references them
+            compression: Section compression of the binary format ('zlib', 'zstd' or 'none')
 
         Returns:
             Path to saved snapshot file
@@ -54,11 +70,18 @@ class EnvironmentSnapshotIO:
 
         # Convert snapshot to dictionary
         snapshot_dict = self._snapshot_to_dict(snapshot)
+        if blob_store is not None:
+            project = externalize_files(snapshot_dict["project"], BlobStore(blob_store))
+            # Relative, so a snapshot directory can be moved together with its store
+            project["blob_store"] = os.path.relpath(Path(blob_store).resolve(), output_path.resolve().parent)
+            snapshot_dict["project"] = project
 
         # Save in requested format
         if format.lower() == "yaml":
             with open(output_path, "w") as f:
                 yaml.dump(snapshot_dict, f, default_flow_style=False, sort_keys=False)
+        elif format.lower() == "binary":
+            write_container(snapshot_dict, output_path, compression)
         else:
             with open(output_path, "w") as f:
                 json.dump(snapshot_dict, f, indent=2, sort_keys=True)
@@ -67,12 +90,13 @@ class EnvironmentSnapshotIO:
         return output_path
 
     @task(name="load_environment_snapshot", description="Load environment snapshot from file")
-    def load_snapshot(self, snapshot_path: Path) -> EnvironmentSnapshot:
+    def load_snapshot(self, snapshot_path: Path, blob_store: Path | None = None) -> EnvironmentSnapshot:
         """
         Load environment snapshot from file.
 
         Args:
             snapshot_path: Path to snapshot file
+            blob_store: Blob store directory, overriding the one recorded in the snapshot
 
         Returns:
             EnvironmentSnapshot object
@@ -82,17 +106,60 @@ class EnvironmentSnapshotIO:
         if not snapshot_path.exists():
             raise FileNotFoundError(f"Snapshot file not found: {snapshot_path}")
 
-        # Determine format by extension
-        if snapshot_path.suffix.lower() in [".yaml", ".yml"]:
+        # Determine format by content for binary containers, by extension otherwise
+        if is_container(snapshot_path):
+            data = SnapshotContainer(snapshot_path).to_dict()
+        elif snapshot_path.suffix.lower() in [".yaml", ".yml"]:
             with open(snapshot_path) as f:
                 data = yaml.safe_load(f)
         else:
             with open(snapshot_path) as f:
                 data = json.load(f)
 
+        data["project"] = self._resolve_project(data["project"], snapshot_path, blob_store)
+
         # Reconstruct snapshot object
         return self._dict_to_snapshot(data)
 
+    def load_section(self, snapshot_path: Path, section: str, blob_store: Path | None = None) -> dict[str, Any]:
+        """
+        Load one section of a snapshot without building the whole snapshot.
+
+        Binary containers decode only the requested section; JSON and YAML
+        files have to be parsed in full.
+
+        Args:
+            snapshot_path: Path to snapshot file
+            section: 'metadata', 'environment', 'project' or 'reproduction'
+            blob_store: Blob store directory, overriding the one recorded in the snapshot
+
+        Returns:
+            The section dictionary, e.g. load_section(path, "environment")["tool_versions"]
+        """
+        snapshot_path = Path(snapshot_path)
+
+        if not snapshot_path.exists():
+            raise FileNotFoundError(f"Snapshot file not found: {snapshot_path}")
+
+        if is_container(snapshot_path):
+            data = SnapshotContainer(snapshot_path).section(section)
+        elif snapshot_path.suffix.lower() in [".yaml", ".yml"]:
+            with open(snapshot_path) as f:
+                data = yaml.safe_load(f)[section]
+        else:
+            with open(snapshot_path) as f:
+                data = json.load(f)[section]
+
+        if section == "project":
+            data = self._resolve_project(data, snapshot_path, blob_store)
+        return dict(data)
+
+    def _resolve_project(self, project: dict[str, Any], snapshot_path: Path, blob_store: Path | None) -> dict[str, Any]:
+        """Replace blob references in the project section by file contents."""
+        if blob_store is None and project.get("blob_store"):
+            blob_store = snapshot_path.parent / project["blob_store"]
+        return resolve_files(project, BlobStore(blob_store) if blob_store is not None else None)
+
     def _snapshot_to_dict(self, snapshot: EnvironmentSnapshot) -> dict[str, Any]:
         """Convert snapshot object to dictionary."""
         return {
@@ -102,6 +169,7 @@ class EnvironmentSnapshotIO:
                 "architecture": snapshot.architecture,
                 "dht_version": snapshot.dht_version,
                 "snapshot_id": snapshot.snapshot_id,
+                "capture_timings": snapshot.capture_timings,
             },
             "environment": {
                 "python_version": snapshot.python_version,
@@ -151,6 +219,7 @@ class EnvironmentSnapshotIO:
             checksums=project["checksums"],
             reproduction_steps=reproduction["steps"],
             platform_notes=reproduction["platform_notes"],
+            capture_timings=metadata.get("capture_timings", {}),
         )
 
 
@@ -17,6 +17,8 @@ This module contains the data models used by the environment reproducer.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains EnvironmentSnapshot and ReproductionResult dataclasses
+# - EnvironmentSnapshot records how long each capture phase took
+# - ReproductionResult reports per-step timings, resumed steps and the critical path of the reproduction plan
 #
 
 
@@ -63,6 +65,9 @@ class EnvironmentSnapshot:
     reproduction_steps: list[str] = field(default_factory=list)
     platform_notes: list[str] = field(default_factory=list)
 
+    # Capture phase -> seconds it took, plus "total" for the whole capture
+    capture_timings: dict[str, float] = field(default_factory=dict)
+
 
 @dataclass
 class ReproductionResult:
@@ -87,4 +92,9 @@ class ReproductionResult:
     actions_failed: list[str] = field(default_factory=list)
     warnings: list[str] = field(default_factory=list)
 
+    # Reproduction plan execution
+    step_timings: dict[str, float] = field(default_factory=dict)  # step -> seconds
+    resumed_steps: list[str] = field(default_factory=list)  # steps reused from a checkpoint
+    critical_path: list[str] = field(default_factory=list)  # slowest chain of dependent steps
+
     execution_time: float = 0.0
@@ -18,18 +18,28 @@ match expected configurations and dependencies.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains environment validation and verification functions
+# - verify_tools skips version probes for executables missing from the PATH index
+# - verify_tools reads version output through the persistent tool version cache
+# - verify_tools probes tools concurrently with per-probe timeouts and an overall deadline
+# - verify_python_packages lists the running interpreter's packages in-process
+# - verify_python_packages reads other virtualenvs from disk instead of running their pip
 #
 
 
 import re
 import subprocess
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from packaging import version
 from prefect import get_run_logger, task
 
+from DHT.modules.package_inventory import get_installed_packages
+from DHT.modules.parallel_probes import PROBE_DEADLINE, PROBE_TIMEOUT, Probe, run_probes
+from DHT.modules.path_index import which
 from DHT.modules.platform_normalizer import get_tool_command
+from DHT.modules.tool_version_cache import cached_probe
 
 
 class EnvironmentValidator:
@@ -92,18 +102,33 @@ class EnvironmentValidator:
 
     @task(name="verify_tools")
     def verify_tools(
-        self, expected_tools: dict[str, str], platform_name: str | None = None
+        self,
+        expected_tools: dict[str, str],
+        platform_name: str | None = None,
+        probe_timeout: float = PROBE_TIMEOUT,
+        deadline: float = PROBE_DEADLINE,
     ) -> dict[str, dict[str, Any]]:
         """
         Verify tool versions match expected versions.
 
+        Version commands run concurrently. A tool whose probe times out, or
+        is still running when the deadline passes, gets a result with
+        "timed_out" set instead of blocking the remaining tools.
+
+        Args:
+            expected_tools: Tool name -> expected version
+            platform_name: Platform to map tool commands for, current if None
+            probe_timeout: Timeout in seconds for each version command
+            deadline: Wall-clock budget in seconds for all probes
+
         Returns:
             Dict mapping tool name to verification result
         """
         logger = get_run_logger()
         results: dict[str, Any] = {}
+        probes: dict[str, Probe] = {}
 
-        for tool, expected_version in expected_tools.items():
+        for tool in expected_tools:
             logger.info(f"Verifying {tool} version...")
 
             # Get tool command for platform
@@ -117,45 +142,68 @@ class EnvironmentValidator:
                 }
                 continue
 
-            # Check if tool is installed
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    results[tool] = {
-                        "installed": False,
-                        "version": None,
-                        "matched": False,
-                        "warning": f"{tool} not found or returned error",
-                    }
-                    continue
-
-                # Extract version
-                output = result.stdout + result.stderr
-                actual_version = self._extract_tool_version(tool, output)
-
-                if not actual_version:
-                    results[tool] = {
-                        "installed": True,
-                        "version": "unknown",
-                        "matched": False,
-                        "warning": f"Could not parse {tool} version from output",
-                    }
-                    continue
-
-                # Compare versions
-                is_match, warnings = self._compare_versions(tool, expected_version, actual_version)
+            # Skip the version probe entirely when the executable is not on PATH
+            if which(cmd[0]) is None:
+                results[tool] = {
+                    "installed": False,
+                    "version": None,
+                    "matched": False,
+                    "warning": f"{tool} not found or returned error",
+                }
+                continue
 
+            # Reuse cached output while the binary is unchanged
+            probes[tool] = partial(self._cached_version_command, cmd)
+
+        for tool, probe in run_probes(probes, probe_timeout=probe_timeout, deadline=deadline).items():
+            if probe.timed_out:
+                logger.warning(f"Version probe for {tool} did not finish: {probe.error}")
                 results[tool] = {
                     "installed": True,
-                    "version": actual_version,
-                    "matched": is_match,
-                    "warnings": warnings,
+                    "version": None,
+                    "matched": False,
+                    "timed_out": True,
+                    "error": probe.error,
                 }
+                continue
 
-            except Exception as e:
-                results[tool] = {"installed": False, "version": None, "matched": False, "error": str(e)}
+            if probe.error:
+                results[tool] = {"installed": False, "version": None, "matched": False, "error": probe.error}
+                continue
 
-        return results
+            if probe.output is None:
+                results[tool] = {
+                    "installed": False,
+                    "version": None,
+                    "matched": False,
+                    "warning": f"{tool} not found or returned error",
+                }
+                continue
+
+            # Extract version
+            actual_version = self._extract_tool_version(tool, probe.output)
+
+            if not actual_version:
+                results[tool] = {
+                    "installed": True,
+                    "version": "unknown",
+                    "matched": False,
+                    "warning": f"Could not parse {tool} version from output",
+                }
+                continue
+
+            # Compare versions
+            is_match, warnings = self._compare_versions(tool, expected_tools[tool], actual_version)
+
+            results[tool] = {
+                "installed": True,
+                "version": actual_version,
+                "matched": is_match,
+                "warnings": warnings,
+            }
+
+        # Report in the order the tools were requested
+        return {tool: results[tool] for tool in expected_tools}
 
     @task(name="verify_python_packages")
     def verify_python_packages(
@@ -165,22 +213,9 @@ class EnvironmentValidator:
         logger = get_run_logger()
         results: dict[str, Any] = {}
 
-        # Get installed packages
+        # Get installed packages, in-process unless another interpreter is requested
         try:
-            if python_executable:
-                cmd = [python_executable, "-m", "pip", "list", "--format=json"]
-            else:
-                cmd = ["python3", "-m", "pip", "list", "--format=json"]
-
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"Failed to list packages: {result.stderr}")
-                return results
-
-            import json
-
-            installed_packages = {pkg["name"].lower(): pkg["version"] for pkg in json.loads(result.stdout)}
-
+            installed_packages = {name.lower(): ver for name, ver in get_installed_packages(python_executable).items()}
         except Exception as e:
             logger.error(f"Error getting installed packages: {e}")
             return results
@@ -208,6 +243,17 @@ class EnvironmentValidator:
 
         return results
 
+    def _cached_version_command(self, cmd: list[str], timeout: float = PROBE_TIMEOUT) -> str | None:
+        """Run a version command through the tool version cache."""
+        return cached_probe(cmd[0], cmd[1:], partial(self._run_version_command, cmd, timeout))
+
+    def _run_version_command(self, cmd: list[str], timeout: float = PROBE_TIMEOUT) -> str | None:
+        """Run a version command and return its combined output, None on failure."""
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            return None
+        return result.stdout + result.stderr
+
     def _extract_tool_version(self, tool: str, output: str) -> str | None:
         """Extract version from tool output."""
         if tool in self.version_extractors:
@@ -20,6 +20,7 @@ including platform, Python version, and tool version verification.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains environment verification utilities
+# - Tools can be verified one at a time with verify_tool, so reproduction plans can check them concurrently
 #
 
 
@@ -122,49 +123,55 @@ class EnvironmentVerificationUtils:
     ) -> Any:
         """Verify tool versions."""
         for tool, expected_version in snapshot.tool_versions.items():
-            # Check if tool is installed
-            tool_path = shutil.which(tool)
-            if not tool_path:
-                result.missing_tools.append(tool)
-                result.tools_verified[tool] = False
+            self.verify_tool(tool, expected_version, result, strict_mode, auto_install)
 
-                if auto_install:
-                    self._install_tool(tool, expected_version, result)
-                continue
+    def verify_tool(
+        self, tool: str, expected_version: str, result: ReproductionResult, strict_mode: bool, auto_install: bool
+    ) -> None:
+        """Verify one tool's presence and version, suggesting an install if it is missing."""
+        # Check if tool is installed
+        tool_path = shutil.which(tool)
+        if not tool_path:
+            result.missing_tools.append(tool)
+            result.tools_verified[tool] = False
+
+            if auto_install:
+                self._install_tool(tool, expected_version, result)
+            return
+
+        # Get current version
+        try:
+            version_cmd = get_tool_command(tool)
+            if version_cmd:
+                proc_result = subprocess.run(version_cmd, capture_output=True, text=True, timeout=10)
 
-            # Get current version
-            try:
-                version_cmd = get_tool_command(tool)
-                if version_cmd:
-                    proc_result = subprocess.run(version_cmd, capture_output=True, text=True, timeout=10)
+                if proc_result.returncode == 0:
+                    current_version = self.tool_manager.extract_version_from_output(
+                        proc_result.stdout + proc_result.stderr
+                    )
 
-                    if proc_result.returncode == 0:
-                        current_version = self.tool_manager.extract_version_from_output(
-                            proc_result.stdout + proc_result.stderr
+                    if current_version:
+                        # Check version compatibility
+                        versions_match = self.tool_manager.compare_versions(
+                            expected_version, current_version, tool, strict_mode
                         )
 
-                        if current_version:
-                            # Check version compatibility
-                            versions_match = self.tool_manager.compare_versions(
-                                expected_version, current_version, tool, strict_mode
-                            )
-
-                            result.tools_verified[tool] = True
-                            result.versions_verified[tool] = versions_match
-
-                            if not versions_match:
-                                result.version_mismatches[tool] = (expected_version, current_version)
-                        else:
-                            result.tools_verified[tool] = True
-                            result.versions_verified[tool] = False
-                            result.warnings.append(f"Could not determine {tool} version")
+                        result.tools_verified[tool] = True
+                        result.versions_verified[tool] = versions_match
+
+                        if not versions_match:
+                            result.version_mismatches[tool] = (expected_version, current_version)
                     else:
-                        result.tools_verified[tool] = False
-                        result.warnings.append(f"Failed to check {tool} version")
+                        result.tools_verified[tool] = True
+                        result.versions_verified[tool] = False
+                        result.warnings.append(f"Could not determine {tool} version")
+                else:
+                    result.tools_verified[tool] = False
+                    result.warnings.append(f"Failed to check {tool} version")
 
-            except Exception as e:
-                result.tools_verified[tool] = False
-                result.warnings.append(f"Error checking {tool}: {e}")
+        except Exception as e:
+            result.tools_verified[tool] = False
+            result.warnings.append(f"Error checking {tool}: {e}")
 
     def _install_tool(self, tool: str, version: str, result: ReproductionResult) -> Any:
         """Attempt to install a missing tool."""
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+file_hashing.py - Streaming and parallel sha256 hashing of project files.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to hash lock and config files in fixed-size chunks instead of through str.encode()
+# - Newlines are normalized while streaming, so checksums match the ones recorded in snapshots
+# - Added hash_files to hash many files on a thread pool
+# - Added read_text_with_checksum for files whose content is embedded anyway
+#
+
+"""
+file_hashing.py - Streaming and parallel sha256 hashing of project files.
+
+Snapshot checksums are the sha256 of a file read as text with universal
+newlines and encoded as UTF-8. Computing them as
+hashlib.sha256(path.read_text().encode()) holds the decoded string and an
+encoded copy of it in memory at the same time, which for a large lock file
+is two full copies just to produce 64 hex characters.
+
+file_checksum produces the same digest by reading the file into a reused
+buffer chunk by chunk and translating \\r\\n and lone \\r to \\n on the fly
+(including a \\r\\n split across two chunks), so memory stays at one chunk
+whatever the file size. Content only needs to be read into a string when
+a snapshot embeds it; read_text_with_checksum then hashes the bytes it
+read before decoding them, so the checksum always matches the content
+without encoding it a second time.
+
+hashlib releases the GIL while digesting large buffers, so hash_files can
+hash many files concurrently on a small thread pool.
+"""
+
+import hashlib
+import io
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per chunk
+CHUNK_SIZE = 1024 * 1024
+
+# Default pool size for hash_files
+HASH_WORKERS = 4
+
+
+def _normalize_newlines(data: bytes) -> bytes:
+    """Translate \\r\\n and \\r to \\n."""
+    if b"\r" not in data:
+        return data
+    return data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def _digest_normalized(f: io.RawIOBase, chunk_size: int) -> str:
+    """Hash an open binary file, translating \\r\\n and \\r to \\n."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    pending_cr = False
+    while True:
+        n = f.readinto(buffer)
+        if not n:
+            break
+        if buffer.find(b"\r", 0, n) < 0 and not pending_cr:
+            # Common case: nothing to translate, hash straight from the buffer
+            digest.update(view[:n])
+            continue
+        chunk = (b"\r" if pending_cr else b"") + bytes(view[:n])
+        # A trailing \r may be the first half of a \r\n split across chunks
+        pending_cr = chunk.endswith(b"\r")
+        if pending_cr:
+            chunk = chunk[:-1]
+        digest.update(_normalize_newlines(chunk))
+    if pending_cr:
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def file_checksum(path: Path | str, normalize_newlines: bool = True, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Return the sha256 of a file without loading it into memory.
+
+    Args:
+        path: File to hash
+        normalize_newlines: Hash the file as read with universal newlines, like
+            snapshot checksums; False hashes the raw bytes
+        chunk_size: Bytes read at a time
+
+    Returns:
+        str: Hex digest
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb", buffering=0) as f:
+        if normalize_newlines:
+            return _digest_normalized(f, chunk_size)
+        file_digest = getattr(hashlib, "file_digest", None)  # Python 3.11+
+        if file_digest is not None:
+            return str(file_digest(f, "sha256").hexdigest())
+        digest = hashlib.sha256()
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def read_text_with_checksum(path: Path | str) -> tuple[str, str]:
+    """
+    Read a UTF-8 text file with universal newlines together with its checksum.
+
+    Returns:
+        tuple: (content, hex digest); the digest equals file_checksum(path)
+
+    Raises:
+        OSError: If the file cannot be read
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
+    data = _normalize_newlines(Path(path).read_bytes())
+    checksum = hashlib.sha256(data).hexdigest()
+    return data.decode("utf-8"), checksum
+
+
+def hash_files(
+    paths: Iterable[Path | str], normalize_newlines: bool = True, max_workers: int = HASH_WORKERS
+) -> dict[Path, str]:
+    """
+    Hash many files concurrently.
+
+    Args:
+        paths: Files to hash
+        normalize_newlines: See file_checksum
+        max_workers: Maximum number of files hashed at once
+
+    Returns:
+        dict: Path -> hex digest, in the order of paths. Files that cannot be
+        read are left out.
+    """
+    files = [Path(path) for path in paths]
+    if not files:
+        return {}
+
+    def checksum(path: Path) -> str | None:
+        try:
+            return file_checksum(path, normalize_newlines)
+        except OSError as e:
+            logger.debug(f"Could not hash {path}: {e}")
+            return None
+
+    workers = max(1, min(max_workers, len(files)))
+    if workers == 1:
+        digests = [checksum(path) for path in files]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            digests = list(executor.map(checksum, files))
+    return {path: digest for path, digest in zip(files, digests, strict=True) if digest is not None}
+
+
+__all__ = [
+    "CHUNK_SIZE",
+    "HASH_WORKERS",
+    "file_checksum",
+    "hash_files",
+    "read_text_with_checksum",
+]
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+guardian_history.py - SQLite-backed history of guardian-supervised commands
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created persistent run history for guardian commands
+# - Records command fingerprint, cwd, duration, peak RSS, CPU time and exit reason
+# - Computes per-command p50/p95 duration and memory statistics
+# - Added learn_limits deriving per-command memory/timeout limits from history
+# - Install commands are fingerprinted per project and never learn a timeout below the cold start
+# - Every command is fingerprinted per working directory, not only installs
+#
+
+"""
+guardian_history.py - SQLite-backed history of guardian-supervised commands
+
+Every command run through the guardian is recorded in a local SQLite database
+so resource usage can be compared across runs. Commands are grouped by a
+fingerprint of their normalized argv and the directory they run in, since
+the same build or test command costs very different amounts in different
+projects.
+
+The database lives in the user cache directory by default. Set the
+DHT_GUARDIAN_HISTORY environment variable to a file path to relocate it,
+or to "off" to disable recording entirely.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import shlex
+import sqlite3
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .platform_normalizer import get_cache_directory
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ENV_VAR = "DHT_GUARDIAN_HISTORY"
+
+# Only the most recent runs of each command are used for statistics
+DEFAULT_STATS_WINDOW = 200
+
+# Package managers whose install commands never learn a timeout below the cold start
+_PACKAGE_MANAGERS = frozenset({"uv", "pip", "pip3", "poetry", "pdm", "npm", "yarn", "pnpm", "conda", "mamba"})
+_INSTALL_VERBS = frozenset({"sync", "install", "add", "update", "upgrade"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    command TEXT NOT NULL,
+    cwd TEXT,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    peak_memory_mb REAL,
+    cpu_time REAL,
+    return_code INTEGER NOT NULL,
+    exit_reason TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs (fingerprint, started_at);
+"""
+
+
+@dataclass
+class GuardianRunRecord:
+    """A single guarded command execution."""
+
+    fingerprint: str
+    command: str
+    cwd: str | None
+    started_at: float
+    duration: float
+    peak_memory_mb: float | None
+    cpu_time: float | None
+    return_code: int
+    exit_reason: str
+
+
+@dataclass
+class AdaptiveLimitPolicy:
+    """How learned guardian limits are derived from past runs of a command."""
+
+    # Fewer completed runs than this falls back to the cold-start limits
+    min_samples: int = 5
+    # Most recent runs considered when learning
+    window: int = 50
+    percentile: float = 95.0
+    # Learned timeout = percentile duration * factor + slack, within bounds
+    timeout_factor: float = 3.0
+    timeout_slack_seconds: float = 30.0
+    min_timeout_seconds: int = 60
+    max_timeout_seconds: int = 4 * 3600
+    # Learned memory = percentile peak RSS * factor + slack, within bounds
+    memory_factor: float = 1.5
+    memory_slack_mb: float = 256.0
+    min_memory_mb: int = 256
+    max_memory_mb: int | None = None  # Defaults to total system memory
+
+
+@dataclass
+class LearnedLimits:
+    """Guardian limits derived from a command's history."""
+
+    memory_limit_mb: int
+    timeout_seconds: int
+    samples: int
+
+
+@dataclass
+class CommandStats:
+    """Aggregated resource usage for one command fingerprint."""
+
+    fingerprint: str
+    command: str
+    runs: int
+    failures: int
+    p50_duration: float
+    p95_duration: float
+    p50_memory_mb: float | None
+    p95_memory_mb: float | None
+    last_run: float
+
+
+def normalize_command(command: str | Sequence[str]) -> list[str]:
+    """Split a command into argv form with the executable reduced to its basename."""
+    if isinstance(command, str):
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            argv = command.split()
+    else:
+        argv = list(command)
+    if argv:
+        argv[0] = os.path.basename(argv[0])
+    return argv
+
+
+def is_install_command(command: str | Sequence[str]) -> bool:
+    """Check whether a command installs dependencies (uv sync, pip install, python -m pip install, ...)."""
+    argv = normalize_command(command)
+    if len(argv) > 2 and argv[1] == "-m":
+        argv = argv[2:]
+    return bool(argv) and argv[0] in _PACKAGE_MANAGERS and any(arg in _INSTALL_VERBS for arg in argv[1:3])
+
+
+def _resolve_cwd(cwd: Path | str | None) -> str:
+    """Return the absolute working directory a command runs in."""
+    return str(Path(cwd).resolve()) if cwd else os.getcwd()
+
+
+def command_fingerprint(command: str | Sequence[str], cwd: Path | str | None = None) -> str:
+    """
+    Compute a stable fingerprint for a command.
+
+    The executable path is reduced to its basename so `/usr/bin/uv sync` and
+    `uv sync` share history. The resolved working directory is part of it:
+    `make` or `pytest` in a small project says nothing about the same command
+    in a large one, so limits are only learned from runs in the same project.
+
+    Args:
+        command: The command
+        cwd: Working directory it runs in (None for the current directory)
+    """
+    parts = normalize_command(command)
+    parts.append(_resolve_cwd(cwd))
+    normalized = "\0".join(parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation."""
+    if not values:
+        raise ValueError("percentile() requires at least one value")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[lower])
+    return float(ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower))
+
+
+def exit_reason_for(result: dict[str, Any]) -> str:
+    """Classify a guardian result dict into an exit reason."""
+    if result.get("error"):
+        return "error"
+    if result.get("killed"):
+        return str(result.get("reason") or "killed")
+    return "success" if result.get("returncode") == 0 else "failed"
+
+
+class GuardianHistory:
+    """Persistent store of guardian run records."""
+
+    def __init__(self, db_path: Path | str | None = None) -> None:
+        """Initialize the store, creating the database on first use."""
+        self.db_path = Path(db_path) if db_path is not None else default_history_path()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the store safe to use from the
+        # thread pool that runs guardian batch flows.
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, record: GuardianRunRecord) -> None:
+        """Store a run record."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (fingerprint, command, cwd, started_at, duration, peak_memory_mb, cpu_time,"
+                " return_code, exit_reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.fingerprint,
+                    record.command,
+                    record.cwd,
+                    record.started_at,
+                    record.duration,
+                    record.peak_memory_mb,
+                    record.cpu_time,
+                    record.return_code,
+                    record.exit_reason,
+                ),
+            )
+
+    def runs_for(self, fingerprint: str, limit: int = DEFAULT_STATS_WINDOW) -> list[GuardianRunRecord]:
+        """Return the most recent runs of a command, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT fingerprint, command, cwd, started_at, duration, peak_memory_mb, cpu_time, return_code,"
+                " exit_reason FROM runs WHERE fingerprint = ? ORDER BY started_at DESC LIMIT ?",
+                (fingerprint, limit),
+            ).fetchall()
+        return [GuardianRunRecord(*row) for row in rows]
+
+    def stats(self, window: int = DEFAULT_STATS_WINDOW, command_filter: str | None = None) -> list[CommandStats]:
+        """
+        Compute per-command statistics over the most recent runs.
+
+        Args:
+            window: Number of most recent runs per command to include
+            command_filter: Only include commands containing this substring
+
+        Returns:
+            Statistics sorted by p95 duration, slowest first
+        """
+        query = (
+            "SELECT fingerprint, command, started_at, duration, peak_memory_mb, exit_reason FROM ("
+            " SELECT *, ROW_NUMBER() OVER (PARTITION BY fingerprint ORDER BY started_at DESC) AS rn FROM runs"
+            ") WHERE rn <= ?"
+        )
+        params: list[Any] = [window]
+        if command_filter:
+            query += " AND command LIKE ?"
+            params.append(f"%{command_filter}%")
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        grouped: dict[str, list[tuple[Any, ...]]] = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(row)
+
+        results = []
+        for fingerprint, group in grouped.items():
+            durations = [row[3] for row in group]
+            memory = [row[4] for row in group if row[4] is not None]
+            latest = max(group, key=lambda row: row[2])
+            results.append(
+                CommandStats(
+                    fingerprint=fingerprint,
+                    command=latest[1],
+                    runs=len(group),
+                    failures=sum(1 for row in group if row[5] != "success"),
+                    p50_duration=percentile(durations, 50),
+                    p95_duration=percentile(durations, 95),
+                    p50_memory_mb=percentile(memory, 50) if memory else None,
+                    p95_memory_mb=percentile(memory, 95) if memory else None,
+                    last_run=latest[2],
+                )
+            )
+
+        results.sort(key=lambda s: s.p95_duration, reverse=True)
+        return results
+
+    def prune(self, keep_per_command: int = DEFAULT_STATS_WINDOW) -> int:
+        """Delete all but the newest runs of each command; returns rows removed."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM runs WHERE id IN (SELECT id FROM ("
+                " SELECT id, ROW_NUMBER() OVER (PARTITION BY fingerprint ORDER BY started_at DESC) AS rn FROM runs"
+                ") WHERE rn > ?)",
+                (keep_per_command,),
+            )
+            return cursor.rowcount
+
+
+def learn_limits(
+    command: str | Sequence[str],
+    cold_memory_mb: int,
+    cold_timeout_seconds: int,
+    policy: AdaptiveLimitPolicy | None = None,
+    history: GuardianHistory | None = None,
+    cwd: Path | str | None = None,
+) -> LearnedLimits | None:
+    """
+    Derive memory and timeout limits for a command from its past runs.
+
+    Only runs that finished on their own (success or failure) are used as
+    samples. If the guardian killed a recent run for exceeding a limit, that
+    limit is never learned below the cold-start value or twice what the
+    killed run reached, so a spuriously killed build is not killed again.
+    Install commands never learn a timeout below the cold-start value, since a
+    cache miss can make the next install far slower than any recorded one.
+
+    Args:
+        command: Command about to be run
+        cold_memory_mb: Memory limit to use without enough history
+        cold_timeout_seconds: Timeout to use without enough history
+        policy: Margins and bounds for learned limits
+        history: Store to read from (defaults to the user history database)
+        cwd: Working directory the command will run in
+
+    Returns:
+        LearnedLimits, or None if there is not enough history (cold start)
+    """
+    policy = policy or AdaptiveLimitPolicy()
+    if history is None:
+        if not history_enabled():
+            return None
+        history = GuardianHistory()
+    if not history.db_path.exists():
+        return None
+
+    try:
+        runs = history.runs_for(command_fingerprint(command, cwd), limit=policy.window)
+    except sqlite3.Error as e:
+        logger.debug(f"Could not read guardian history: {e}")
+        return None
+
+    completed = [run for run in runs if run.exit_reason in ("success", "failed")]
+    if len(completed) < policy.min_samples:
+        return None
+
+    durations = [run.duration for run in completed]
+    timeout = percentile(durations, policy.percentile) * policy.timeout_factor + policy.timeout_slack_seconds
+    timeout = min(max(timeout, policy.min_timeout_seconds), policy.max_timeout_seconds)
+    if is_install_command(command):
+        timeout = max(timeout, cold_timeout_seconds)
+
+    max_memory_mb = policy.max_memory_mb
+    if max_memory_mb is None:
+        try:
+            import psutil
+
+            max_memory_mb = int(psutil.virtual_memory().total / (1024 * 1024))
+        except Exception:
+            max_memory_mb = max(cold_memory_mb, policy.min_memory_mb)
+
+    peaks = [run.peak_memory_mb for run in completed if run.peak_memory_mb]
+    memory = percentile(peaks, policy.percentile) * policy.memory_factor + policy.memory_slack_mb if peaks else 0.0
+    memory = min(max(memory, policy.min_memory_mb), max_memory_mb)
+
+    for run in runs:
+        if run.exit_reason == "timeout":
+            timeout = max(timeout, cold_timeout_seconds, run.duration * 2)
+        elif run.exit_reason == "memory":
+            memory = max(memory, cold_memory_mb, (run.peak_memory_mb or 0.0) * 2)
+
+    return LearnedLimits(
+        memory_limit_mb=int(math.ceil(memory)), timeout_seconds=int(math.ceil(timeout)), samples=len(completed)
+    )
+
+
+def default_history_path() -> Path:
+    """Return the history database path, honouring DHT_GUARDIAN_HISTORY."""
+    override = os.environ.get(HISTORY_ENV_VAR)
+    if override and override.lower() != "off":
+        return Path(override).expanduser()
+    return get_cache_directory() / "dht" / "guardian_history.db"
+
+
+def history_enabled() -> bool:
+    """Check whether guardian runs should be recorded."""
+    return os.environ.get(HISTORY_ENV_VAR, "").lower() != "off"
+
+
+def record_guardian_run(
+    command: str | Sequence[str],
+    cwd: Path | str | None,
+    result: dict[str, Any],
+    history: GuardianHistory | None = None,
+) -> None:
+    """
+    Record a guardian result dict in the history store.
+
+    Recording is best effort: failures are logged and never propagate to the
+    guarded command's caller.
+
+    Args:
+        command: The command that was run
+        cwd: Working directory it ran in (None for the current directory)
+        result: Result dict as produced by run_command_with_limits
+        history: Store to write to (defaults to the user history database)
+    """
+    if history is None and not history_enabled():
+        return
+
+    try:
+        duration = float(result.get("duration", 0.0))
+        command_text = command if isinstance(command, str) else shlex.join(command)
+        record = GuardianRunRecord(
+            fingerprint=command_fingerprint(command, cwd),
+            command=command_text,
+            cwd=_resolve_cwd(cwd),
+            started_at=time.time() - duration,
+            duration=duration,
+            peak_memory_mb=result.get("peak_memory_mb"),
+            cpu_time=result.get("cpu_time"),
+            return_code=int(result.get("returncode", -1)),
+            exit_reason=exit_reason_for(result),
+        )
+        (history or GuardianHistory()).record(record)
+    except Exception as e:
+        logger.debug(f"Failed to record guardian run: {e}")
+
+
+__all__ = [
+    "HISTORY_ENV_VAR",
+    "GuardianRunRecord",
+    "AdaptiveLimitPolicy",
+    "LearnedLimits",
+    "CommandStats",
+    "GuardianHistory",
+    "normalize_command",
+    "is_install_command",
+    "command_fingerprint",
+    "percentile",
+    "exit_reason_for",
+    "learn_limits",
+    "default_history_path",
+    "history_enabled",
+    "record_guardian_run",
+]
@@ -13,6 +13,7 @@ This module replaces the shell-based guardian with a Prefect-based implementatio
 that provides better resource management, error handling, and task orchestration.
 """
 
+import asyncio
 import os
 import shlex
 import subprocess
@@ -29,7 +30,10 @@ try:
     import yaml
 except ImportError:
     yaml = None  # type: ignore[assignment]
+from .async_subprocess_utils import kill_process_group
+from .guardian_history import AdaptiveLimitPolicy, learn_limits, record_guardian_run
 from .prefect_compat import flow, get_run_logger, task
+from .resource_sampler import current_resources
 
 
 @dataclass
@@ -79,15 +83,7 @@ def check_system_resources() -> dict[str, float]:
     """Check current system resource usage"""
     logger = get_run_logger()
 
-    memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent(interval=1)
-
-    resources = {
-        "memory_available_mb": memory.available / (1024 * 1024),
-        "memory_percent": memory.percent,
-        "cpu_percent": cpu_percent,
-        "disk_percent": psutil.disk_usage("/").percent,
-    }
+    resources = current_resources()
 
     logger.info(f"System resources: {resources}")
     return resources
@@ -107,8 +103,9 @@ def validate_command(cmd: str | list[str], limits: Any) -> bool:
         logger.error("Empty command provided")
         return False
 
-    # Check available resources
-    resources = check_system_resources()
+    # Check available resources from the shared rolling snapshot rather than
+    # the check_system_resources task, so pre-flight validation never blocks
+    resources = current_resources()
 
     if resources["memory_available_mb"] < limits.memory_mb:
         logger.warning(
@@ -188,10 +185,12 @@ def run_command_with_limits(
         else:
             logger.info(f"Command completed successfully in {duration:.2f}s")
 
+        record_guardian_run(cmd, working_dir, result)
         return result
 
     except Exception as e:
         logger.error(f"Error executing command: {e}")
+        record_guardian_run(cmd, working_dir, {"returncode": -1, "duration": time.time() - start_time, "error": str(e)})
         raise
 
 
@@ -200,6 +199,7 @@ def monitor_process(process: subprocess.Popen[str], limits: Any) -> dict[str, An
     logger = get_run_logger()
     start_time = time.time()
     peak_memory_mb = 0.0
+    cpu_time = 0.0
 
     try:
         # Create a Process object for monitoring
@@ -219,6 +219,7 @@ def monitor_process(process: subprocess.Popen[str], limits: Any) -> dict[str, An
                     "killed": True,
                     "reason": "timeout",
                     "peak_memory_mb": peak_memory_mb,
+                    "cpu_time": cpu_time,
                 }
 
             # Check memory usage
@@ -226,6 +227,8 @@ def monitor_process(process: subprocess.Popen[str], limits: Any) -> dict[str, An
                 memory_info = psutil_process.memory_info()
                 memory_mb = memory_info.rss / (1024 * 1024)
                 peak_memory_mb = max(peak_memory_mb, memory_mb)
+                cpu_times = psutil_process.cpu_times()
+                cpu_time = cpu_times.user + cpu_times.system
 
                 if memory_mb > limits.memory_mb:
                     logger.error(f"Process exceeded memory limit: {memory_mb:.2f}MB > {limits.memory_mb}MB")
@@ -238,6 +241,7 @@ def monitor_process(process: subprocess.Popen[str], limits: Any) -> dict[str, An
                         "killed": True,
                         "reason": "memory",
                         "peak_memory_mb": peak_memory_mb,
+                        "cpu_time": cpu_time,
                     }
             except psutil.NoSuchProcess:
                 # Process might have ended
@@ -255,6 +259,7 @@ def monitor_process(process: subprocess.Popen[str], limits: Any) -> dict[str, An
             "killed": False,
             "reason": None,
             "peak_memory_mb": peak_memory_mb,
+            "cpu_time": cpu_time,
         }
 
     except Exception as e:
@@ -297,6 +302,45 @@ def kill_process_tree(pid: int) -> None:
         pass
 
 
+def adaptive_guardian_config(
+    command: str | list[str],
+    fallback: GuardianConfig | None = None,
+    policy: AdaptiveLimitPolicy | None = None,
+    cwd: str | None = None,
+) -> GuardianConfig:
+    """
+    Build a GuardianConfig with limits learned from past runs of the command.
+
+    Commands with enough recorded history get a timeout and memory limit
+    derived from their observed p95 duration and peak memory plus safety
+    margins, so quick commands fail fast when they hang and heavy builds get
+    the headroom they actually need. Without enough history the fallback
+    (cold-start) configuration is returned unchanged.
+
+    Args:
+        command: Command about to be run
+        fallback: Cold-start configuration (defaults to GuardianConfig())
+        policy: Margins and bounds for learned limits
+        cwd: Working directory the command will run in
+
+    Returns:
+        GuardianConfig to run the command with
+    """
+    if fallback is None:
+        fallback = GuardianConfig()
+
+    learned = learn_limits(command, fallback.memory_limit_mb, fallback.timeout_seconds, policy, cwd=cwd)
+    if learned is None:
+        return fallback
+
+    return GuardianConfig(
+        memory_limit_mb=learned.memory_limit_mb,
+        timeout_seconds=learned.timeout_seconds,
+        check_interval=fallback.check_interval,
+        cpu_limit_percent=fallback.cpu_limit_percent,
+    )
+
+
 def run_with_guardian(
     command: list[str],
     limits: Any | None = None,  # 'ResourceLimits' type for compatibility
@@ -312,7 +356,7 @@ def run_with_guardian(
 
     Args:
         command: Command to run as list of strings
-        config: Guardian configuration
+        config: Guardian configuration (learned from run history if omitted)
         cwd: Working directory
         env: Environment variables
 
@@ -321,7 +365,7 @@ def run_with_guardian(
     """
     # Handle both old ResourceLimits and new GuardianConfig for compatibility
     if limits is None and config is None:
-        config = GuardianConfig()
+        config = adaptive_guardian_config(command, cwd=cwd)
 
     if config is not None:
         # Convert GuardianConfig to internal format
@@ -364,6 +408,122 @@ def run_with_guardian(
     )
 
 
+async def run_with_guardian_async(
+    command: list[str],
+    config: GuardianConfig | None = None,
+    cwd: str | None = None,
+    env: dict[str, str] | None = None,
+) -> GuardianResult:
+    """
+    Run a command with guardian resource limits on the asyncio event loop.
+
+    Unlike run_with_guardian this does not occupy a thread per process, so many
+    guarded commands can be awaited concurrently (e.g. with asyncio.gather).
+    The child runs in its own process group, which is killed as a whole when
+    the timeout or memory limit is exceeded.
+
+    Args:
+        command: Command to run as list of strings
+        config: Guardian configuration (learned from run history if omitted)
+        cwd: Working directory
+        env: Extra environment variables
+
+    Returns:
+        GuardianResult with execution details
+    """
+    if config is None:
+        config = adaptive_guardian_config(command, cwd=cwd)
+
+    cmd_env = os.environ.copy()
+    if env:
+        cmd_env.update(env)
+
+    own_group = sys.platform != "win32"
+    start_time = time.time()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=cmd_env,
+            start_new_session=own_group,
+        )
+    except OSError as e:
+        return GuardianResult(return_code=-1, stdout="", stderr=str(e), execution_time=time.time() - start_time)
+
+    communicate = asyncio.ensure_future(process.communicate())
+    peak_memory_mb = 0.0
+    cpu_time = 0.0
+    kill_reason: str | None = None
+
+    try:
+        psutil_process: psutil.Process | None = psutil.Process(process.pid)
+    except psutil.NoSuchProcess:
+        psutil_process = None
+
+    try:
+        while not communicate.done():
+            await asyncio.wait({communicate}, timeout=config.check_interval)
+            if communicate.done():
+                break
+
+            if time.time() - start_time > config.timeout_seconds:
+                kill_reason = "timeout"
+            elif psutil_process is not None:
+                try:
+                    memory_mb = psutil_process.memory_info().rss / (1024 * 1024)
+                    peak_memory_mb = max(peak_memory_mb, memory_mb)
+                    cpu_times = psutil_process.cpu_times()
+                    cpu_time = cpu_times.user + cpu_times.system
+                    if memory_mb > config.memory_limit_mb:
+                        kill_reason = "memory"
+                except psutil.NoSuchProcess:
+                    psutil_process = None
+
+            if kill_reason is not None:
+                kill_process_group(process, own_group)
+                break
+
+        stdout_bytes, stderr_bytes = await communicate
+    except asyncio.CancelledError:
+        kill_process_group(process, own_group)
+        await asyncio.shield(process.wait())
+        raise
+    stdout = stdout_bytes.decode("utf-8", errors="replace") if stdout_bytes else ""
+    stderr = stderr_bytes.decode("utf-8", errors="replace") if stderr_bytes else ""
+
+    if kill_reason == "timeout":
+        stderr = f"Process killed due to timeout ({config.timeout_seconds}s)"
+    elif kill_reason == "memory":
+        stderr = f"Process killed due to memory limit ({config.memory_limit_mb}MB)"
+
+    return_code = -1 if kill_reason else (process.returncode if process.returncode is not None else -1)
+    execution_time = time.time() - start_time
+    record_guardian_run(
+        command,
+        cwd,
+        {
+            "returncode": return_code,
+            "duration": execution_time,
+            "peak_memory_mb": peak_memory_mb,
+            "cpu_time": cpu_time,
+            "killed": kill_reason is not None,
+            "reason": kill_reason,
+        },
+    )
+
+    return GuardianResult(
+        return_code=return_code,
+        stdout=stdout,
+        stderr=stderr,
+        execution_time=execution_time,
+        peak_memory_mb=peak_memory_mb,
+        was_killed=kill_reason is not None,
+        kill_reason=kill_reason,
+    )
+
+
 @flow(name="guardian-sequential", description="Run commands sequentially with resource management")
 def guardian_sequential_flow(
     commands: list[str | dict[str, Any]], stop_on_failure: bool = True, default_limits: Any | None = None
@@ -555,7 +715,9 @@ __all__ = [
     "validate_command",
     "run_command_with_limits",
     "monitor_process",
+    "adaptive_guardian_config",
     "run_with_guardian",
+    "run_with_guardian_async",
     "guardian_sequential_flow",
     "guardian_batch_flow",
     "save_results",
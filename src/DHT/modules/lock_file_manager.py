@@ -18,18 +18,22 @@ for deterministic dependency resolution.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains lock file generation and parsing utilities
+# - Lock files are parsed by lock_file_parsers into a normalized dependency graph
+# - `uv lock` only runs when its inputs changed; verification reuses cached checksums
+# - Lock files read from disk are hashed from the bytes read instead of re-encoding their content
 #
 
 
 import hashlib
-import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
 
 from prefect import get_run_logger, task
 
+from DHT.modules.file_hashing import read_text_with_checksum
+from DHT.modules.lock_file_parsers import DependencyGraph, parse_lock_content, parse_lock_file
+from DHT.modules.lock_verification_cache import get_lock_verification_cache
 from DHT.modules.uv_prefect_tasks import generate_lock_file
 
 
@@ -68,21 +72,28 @@ class LockFileManager:
 
         # Python projects
         if project_type in ["python", "hybrid"]:
-            # Generate UV lock file
+            # Generate UV lock file, unless it already matches pyproject.toml
             if (project_path / "pyproject.toml").exists():
-                logger.info("Generating UV lock file...")
+                cache = get_lock_verification_cache()
                 try:
-                    lock_result = generate_lock_file(project_path)
+                    if cache.is_lock_fresh(project_path):
+                        logger.info("UV lock file is up to date with its inputs, skipping uv lock")
+                        lock_result = {"success": True}
+                    else:
+                        logger.info("Generating UV lock file...")
+                        lock_result = generate_lock_file(project_path)
+                        if lock_result["success"]:
+                            cache.record_lock(project_path)
                     if lock_result["success"]:
-                        lock_content = (project_path / "uv.lock").read_text()
-                        lock_files["uv.lock"] = self._create_lock_info("uv.lock", lock_content)
+                        lock_files["uv.lock"] = self._lock_info_from_file("uv.lock", project_path / "uv.lock")
                 except Exception as e:
                     logger.warning(f"Failed to generate UV lock file: {e}")
 
             # Generate requirements.txt if pip is used
             if (project_path / "requirements.txt").exists():
-                lock_content = (project_path / "requirements.txt").read_text()
-                lock_files["requirements.txt"] = self._create_lock_info("requirements.txt", lock_content)
+                lock_files["requirements.txt"] = self._lock_info_from_file(
+                    "requirements.txt", project_path / "requirements.txt"
+                )
 
         # Node.js projects
         if project_type in ["nodejs", "hybrid"]:
@@ -91,31 +102,35 @@ class LockFileManager:
                 for lock_file in ["package-lock.json", "yarn.lock", "pnpm-lock.yaml"]:
                     lock_path = project_path / lock_file
                     if lock_path.exists():
-                        lock_content = lock_path.read_text()
-                        lock_files[lock_file] = self._create_lock_info(lock_file, lock_content)
+                        lock_files[lock_file] = self._lock_info_from_file(lock_file, lock_path)
                         break
 
         logger.info(f"Generated {len(lock_files)} lock files")
         return lock_files
 
-    def _create_lock_info(self, filename: str, content: str) -> LockFileInfo:
-        """Create lock file information."""
-        checksum = hashlib.sha256(content.encode()).hexdigest()
+    def _lock_info_from_file(self, filename: str, path: Path) -> LockFileInfo:
+        """Create lock file information for a file on disk, hashing the bytes read instead of re-encoding them."""
+        content, checksum = read_text_with_checksum(path)
+        return self._create_lock_info(filename, content, checksum)
+
+    def _create_lock_info(self, filename: str, content: str, checksum: str | None = None) -> LockFileInfo:
+        """Create lock file information; checksum is computed from content unless already known."""
+        if checksum is None:
+            checksum = hashlib.sha256(content.encode()).hexdigest()
 
         # Count packages
         package_count = 0
         if filename == "requirements.txt":
             package_count = len([line for line in content.splitlines() if line.strip() and not line.startswith("#")])
-        elif filename == "uv.lock":
-            # UV lock files have a specific structure
+        elif filename in ("uv.lock", "poetry.lock"):
+            # One [[package]] table per package; no need to parse the TOML
             package_count = content.count("[[package]]")
-        elif filename == "package-lock.json":
+        elif filename in ("package-lock.json", "yarn.lock", "Pipfile.lock"):
             try:
-                data = json.loads(content)
-                package_count = len(data.get("dependencies", {}))
-            except (json.JSONDecodeError, TypeError) as e:
-                # Invalid JSON or unexpected structure - log but continue
-                print(f"Warning: Could not parse package-lock.json: {e}")
+                package_count = len(parse_lock_content(filename, content))
+            except ValueError as e:
+                # Malformed lock file - log but continue
+                print(f"Warning: Could not parse {filename}: {e}")
 
         return LockFileInfo(
             filename=filename,
@@ -127,9 +142,12 @@ class LockFileManager:
 
     @task(name="verify_lock_files")
     def verify_lock_files(self, project_path: Path, expected_lock_files: dict[str, LockFileInfo]) -> dict[str, bool]:
-        """Verify lock files match expected checksums."""
+        """Verify lock files match expected checksums, re-hashing only files changed since the last run."""
         logger = get_run_logger()
         verification_results = {}
+        project_path = Path(project_path)
+        cache = get_lock_verification_cache()
+        checksums = cache.checksums(project_path / filename for filename in expected_lock_files)
 
         for filename, expected_info in expected_lock_files.items():
             lock_path = project_path / filename
@@ -139,8 +157,11 @@ class LockFileManager:
                 verification_results[filename] = False
                 continue
 
-            actual_content = lock_path.read_text()
-            actual_checksum = hashlib.sha256(actual_content.encode()).hexdigest()
+            actual_checksum = checksums.get(lock_path)
+            if actual_checksum is None:
+                logger.warning(f"Lock file {filename} could not be read")
+                verification_results[filename] = False
+                continue
 
             if actual_checksum == expected_info.checksum:
                 verification_results[filename] = True
@@ -153,29 +174,37 @@ class LockFileManager:
                     f"got {actual_checksum[:8]}..."
                 )
 
+        cache.save()
         return verification_results
 
-    def _parse_uv_lock(self, content: str) -> dict[str, str]:
-        """Parse UV lock file to extract package versions."""
-        packages: dict[str, str] = {}
+    def dependency_graph(self, filename: str, content: str) -> DependencyGraph:
+        """
+        Parse lock file content into the normalized dependency graph.
 
-        # UV lock files use TOML format
-        lines = content.splitlines()
-        current_package: dict[str, Any] | None = None
+        Raises:
+            ValueError: If the format is not supported or the content is malformed
+        """
+        return parse_lock_content(filename, content)
 
-        for line in lines:
-            line = line.strip()
-            if line == "[[package]]":
-                current_package = {}
-            elif line.startswith("name = ") and current_package is not None:
-                name = line.split('"')[1]
-                current_package["name"] = name
-            elif line.startswith("version = ") and current_package is not None:
-                version = line.split('"')[1]
-                if "name" in current_package:
-                    packages[current_package["name"]] = version
+    def parse_lock_file(self, lock_path: Path) -> DependencyGraph:
+        """
+        Parse a lock file from disk into the normalized dependency graph.
 
-        return packages
+        Raises:
+            ValueError: If the format is not supported or the file is malformed
+        """
+        return parse_lock_file(lock_path)
+
+    def _versions(self, filename: str, content: str) -> dict[str, str]:
+        """Return package -> version for a lock file, empty if it cannot be parsed."""
+        try:
+            return parse_lock_content(filename, content).versions()
+        except ValueError:
+            return {}
+
+    def _parse_uv_lock(self, content: str) -> dict[str, str]:
+        """Parse UV lock file to extract package versions."""
+        return self._versions("uv.lock", content)
 
     def _parse_requirements_txt(self, content: str) -> dict[str, str]:
         """Parse requirements.txt to extract package versions."""
@@ -200,80 +229,20 @@ class LockFileManager:
         return packages
 
     def _parse_package_lock_json(self, content: str) -> dict[str, str]:
-        """Parse package-lock.json to extract package versions."""
-        try:
-            data = json.loads(content)
-            packages: dict[str, str] = {}
-
-            for name, info in data.get("dependencies", {}).items():
-                if isinstance(info, dict) and "version" in info:
-                    packages[name] = info["version"]
-
-            return packages
-        except Exception:
-            return {}
+        """Parse package-lock.json (lockfile v1, v2 or v3) to extract package versions."""
+        return self._versions("package-lock.json", content)
 
     def _parse_yarn_lock(self, content: str) -> dict[str, str]:
-        """Parse yarn.lock to extract package versions."""
-        packages: dict[str, str] = {}
-
-        # Simplified yarn.lock parsing
-        lines = content.splitlines()
-        current_package = None
-
-        for line in lines:
-            if line and not line.startswith(" "):
-                # Package declaration line
-                if "@" in line and ":" in line:
-                    # Extract package name
-                    parts = line.split("@")
-                    if len(parts) >= 2:
-                        current_package = parts[0].strip('"')
-            elif line.strip().startswith("version ") and current_package:
-                # Version line
-                version = line.strip().split('"')[1]
-                packages[current_package] = version
-                current_package = None
-
-        return packages
+        """Parse yarn.lock to extract package versions, keeping npm scopes in names."""
+        return self._versions("yarn.lock", content)
 
     def _parse_pipfile_lock(self, content: str) -> dict[str, str]:
         """Parse Pipfile.lock to extract package versions."""
-        try:
-            data = json.loads(content)
-            packages: dict[str, str] = {}
-
-            # Combine default and develop dependencies
-            for section in ["default", "develop"]:
-                for name, info in data.get(section, {}).items():
-                    if isinstance(info, dict) and "version" in info:
-                        packages[name] = info["version"]
-
-            return packages
-        except Exception:
-            return {}
+        return self._versions("Pipfile.lock", content)
 
     def _parse_poetry_lock(self, content: str) -> dict[str, str]:
         """Parse poetry.lock to extract package versions."""
-        packages: dict[str, str] = {}
-
-        # Poetry lock files use TOML format
-        lines = content.splitlines()
-        current_package: dict[str, Any] | None = None
-
-        for line in lines:
-            line = line.strip()
-            if line == "[[package]]":
-                current_package = {}
-            elif line.startswith("name = ") and current_package is not None:
-                name = line.split('"')[1]
-                current_package["name"] = name
-            elif line.startswith("version = ") and current_package is not None:
-                version = line.split('"')[1]
-                if "name" in current_package:
-                    packages[current_package["name"]] = version
-
-        return packages
+        return self._versions("poetry.lock", content)
 
 
 # Export public API
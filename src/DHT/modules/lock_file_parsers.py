@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+lock_file_parsers.py - Structured lock file parsing into a normalized dependency graph
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created parsers for uv.lock, poetry.lock, package-lock.json (v1-v3), yarn.lock (v1 and berry),
+#   Pipfile.lock and requirements.txt
+# - All formats produce the same DependencyGraph of packages, sources, hashes and dependency edges
+# - TOML locks are parsed one [[package]] table at a time from a line stream
+#
+
+"""
+lock_file_parsers.py - Structured lock file parsing into a normalized dependency graph
+
+The previous lock parsing scanned lines for `name = ` and `version = `, which
+broke on nested tables, scoped npm packages and current package-lock formats.
+Each parser here reads its format properly and emits LockedPackage records
+into a DependencyGraph, so callers get the same model - name, version, source,
+hashes and dependency edges - whatever the ecosystem.
+
+TOML locks (uv, poetry) are split at their `[[package]]` headers and each
+table is parsed on its own while the file is read line by line, so memory is
+bounded by the largest package entry rather than the whole lock. yarn.lock and
+requirements.txt are parsed line by line. JSON locks are decoded by the C json
+parser in one pass.
+"""
+
+import json
+import re
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+from DHT.modules.package_inventory import canonical_name
+
+PYPI = "pypi"
+NPM = "npm"
+
+
+@dataclass(frozen=True)
+class LockedPackage:
+    """One resolved package of a lock file."""
+
+    name: str
+    version: str
+    source: str = ""
+    hashes: tuple[str, ...] = ()
+    dependencies: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "source": self.source,
+            "hashes": list(self.hashes),
+            "dependencies": list(self.dependencies),
+        }
+
+
+@dataclass
+class DependencyGraph:
+    """Packages of a lock file and the dependency edges between them."""
+
+    format: str
+    ecosystem: str
+    packages: list[LockedPackage] = field(default_factory=list)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    _by_name: dict[str, list[LockedPackage]] = field(default_factory=dict, repr=False)
+
+    def add(self, package: LockedPackage) -> None:
+        """Add a package; the first package added under a name is its primary version."""
+        self.packages.append(package)
+        self._by_name.setdefault(package.name, []).append(package)
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> LockedPackage | None:
+        """Return the primary package of a name."""
+        found = self._by_name.get(name)
+        return found[0] if found else None
+
+    def all_versions(self, name: str) -> list[str]:
+        """Return every locked version of a name (npm can install several)."""
+        return [package.version for package in self._by_name.get(name, [])]
+
+    def versions(self) -> dict[str, str]:
+        """Return name -> primary version."""
+        return {name: found[0].version for name, found in self._by_name.items()}
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        """Yield (package, dependency) name pairs."""
+        for package in self.packages:
+            for dependency in package.dependencies:
+                yield package.name, dependency
+
+    def dependents(self, name: str) -> set[str]:
+        """Return the names of packages depending directly on a name."""
+        return {package.name for package in self.packages if name in package.dependencies}
+
+    def roots(self) -> list[str]:
+        """Return names nothing else in the lock depends on."""
+        depended = {dependency for _, dependency in self.edges()}
+        return [name for name in self._by_name if name not in depended]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "format": self.format,
+            "ecosystem": self.ecosystem,
+            "metadata": self.metadata,
+            "packages": [package.to_dict() for package in self.packages],
+        }
+
+
+def _unique(items: Iterable[str]) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(item for item in items if item))
+
+
+# TOML locks ------------------------------------------------------------------------------------
+
+
+def iter_toml_tables(lines: Iterable[str], metadata: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Yield the [[package]] tables of a TOML lock file, parsing one table at a time.
+
+    Args:
+        lines: Lines of the lock file, e.g. an open file
+        metadata: Receives every top-level key outside [[package]] (lock version, [metadata], ...)
+
+    Yields:
+        dict: One parsed [[package]] table, including its sub-tables
+    """
+
+    def parse(chunk: list[str]) -> Iterator[dict[str, Any]]:
+        if not chunk:
+            return
+        data = tomllib.loads("".join(chunk))
+        packages = data.pop("package", [])
+        for key, value in data.items():
+            if isinstance(value, dict) and isinstance(metadata.get(key), dict):
+                metadata[key].update(value)
+            else:
+                metadata[key] = value
+        yield from packages
+
+    chunk: list[str] = []
+    for line in lines:
+        if line.startswith("[[package]]") and line.strip() == "[[package]]":
+            yield from parse(chunk)
+            chunk = []
+        chunk.append(line if line.endswith("\n") else line + "\n")
+    yield from parse(chunk)
+
+
+def _uv_source(source: dict[str, Any]) -> str:
+    for kind in ("registry", "git", "url", "path", "directory", "editable", "virtual"):
+        if kind in source:
+            return f"{kind}+{source[kind]}"
+    return ""
+
+
+def parse_uv_lock(lines: Iterable[str]) -> DependencyGraph:
+    """Parse uv.lock into a dependency graph."""
+    graph = DependencyGraph(format="uv.lock", ecosystem=PYPI)
+    for table in iter_toml_tables(lines, graph.metadata):
+        hashes = []
+        if isinstance(table.get("sdist"), dict):
+            hashes.append(table["sdist"].get("hash", ""))
+        hashes.extend(wheel.get("hash", "") for wheel in table.get("wheels", []))
+
+        dependencies = [dep["name"] for dep in table.get("dependencies", [])]
+        for group in ("optional-dependencies", "dev-dependencies"):
+            for deps in (table.get(group) or {}).values():
+                dependencies.extend(dep["name"] for dep in deps)
+
+        graph.add(
+            LockedPackage(
+                name=canonical_name(table["name"]),
+                version=str(table.get("version", "")),
+                source=_uv_source(table.get("source") or {}),
+                hashes=_unique(hashes),
+                dependencies=_unique(canonical_name(name) for name in dependencies),
+            )
+        )
+    return graph
+
+
+def parse_poetry_lock(lines: Iterable[str]) -> DependencyGraph:
+    """Parse poetry.lock into a dependency graph."""
+    graph = DependencyGraph(format="poetry.lock", ecosystem=PYPI)
+    tables = list(iter_toml_tables(lines, graph.metadata))
+    # poetry < 1.2 keeps file hashes under [metadata.files] at the end of the lock
+    legacy_files = (graph.metadata.get("metadata") or {}).get("files") or {}
+
+    for table in tables:
+        name = canonical_name(table["name"])
+        source = table.get("source") or {}
+        files = table.get("files") or legacy_files.get(table["name"]) or legacy_files.get(name) or []
+        graph.add(
+            LockedPackage(
+                name=name,
+                version=str(table.get("version", "")),
+                source=f"{source.get('type', '')}+{source.get('url', '')}" if source else "",
+                hashes=_unique(f.get("hash", "") for f in files),
+                dependencies=_unique(canonical_name(dep) for dep in (table.get("dependencies") or {})),
+            )
+        )
+    return graph
+
+
+# JSON locks ------------------------------------------------------------------------------------
+
+
+def _npm_name(install_path: str) -> str:
+    # "node_modules/@scope/a/node_modules/b" -> "b"; scoped names keep their scope
+    return install_path.rsplit("node_modules/", 1)[-1]
+
+
+def _npm_dependencies(info: dict[str, Any]) -> tuple[str, ...]:
+    names: list[str] = []
+    for key in ("dependencies", "optionalDependencies", "peerDependencies", "requires"):
+        value = info.get(key)
+        if isinstance(value, dict):
+            names.extend(name for name, spec in value.items() if not isinstance(spec, dict))
+    return _unique(names)
+
+
+def parse_package_lock_json(lines: Iterable[str]) -> DependencyGraph:
+    """Parse package-lock.json (lockfile versions 1, 2 and 3) into a dependency graph."""
+    data = json.loads("".join(lines))
+    graph = DependencyGraph(format="package-lock.json", ecosystem=NPM)
+    graph.metadata = {key: data.get(key) for key in ("name", "version", "lockfileVersion") if key in data}
+
+    if isinstance(data.get("packages"), dict):
+        # v2/v3: flat map keyed by install path; "" is the project itself
+        nested: list[LockedPackage] = []
+        for install_path, info in data["packages"].items():
+            if not install_path or not isinstance(info, dict) or "node_modules/" not in install_path:
+                continue
+            package = LockedPackage(
+                name=info.get("name") or _npm_name(install_path),
+                version=str(info.get("version", "")),
+                source=("link+" if info.get("link") else "") + info.get("resolved", ""),
+                hashes=_unique([info.get("integrity", "")]),
+                dependencies=_npm_dependencies(info),
+            )
+            # Hoisted installs are the primary version; nested copies are added after them
+            if install_path.count("node_modules/") == 1:
+                graph.add(package)
+            else:
+                nested.append(package)
+        for package in nested:
+            graph.add(package)
+        return graph
+
+    # v1: nested "dependencies" tree
+    def walk(dependencies: dict[str, Any], depth: int, pending: list[tuple[int, LockedPackage]]) -> None:
+        for name, info in dependencies.items():
+            if not isinstance(info, dict):
+                continue
+            pending.append(
+                (
+                    depth,
+                    LockedPackage(
+                        name=name,
+                        version=str(info.get("version", "")),
+                        source=info.get("resolved", ""),
+                        hashes=_unique([info.get("integrity", "")]),
+                        dependencies=_npm_dependencies({"requires": info.get("requires")}),
+                    ),
+                )
+            )
+            if isinstance(info.get("dependencies"), dict):
+                walk(info["dependencies"], depth + 1, pending)
+
+    pending: list[tuple[int, LockedPackage]] = []
+    walk(data.get("dependencies") or {}, 0, pending)
+    for _, package in sorted(pending, key=lambda item: item[0]):
+        graph.add(package)
+    return graph
+
+
+def parse_pipfile_lock(lines: Iterable[str]) -> DependencyGraph:
+    """Parse Pipfile.lock into a dependency graph (Pipfile.lock records no edges)."""
+    data = json.loads("".join(lines))
+    graph = DependencyGraph(format="Pipfile.lock", ecosystem=PYPI)
+    graph.metadata = dict(data.get("_meta") or {})
+    for section in ("default", "develop"):
+        for name, info in (data.get(section) or {}).items():
+            if not isinstance(info, dict):
+                continue
+            source = info.get("git") or info.get("path") or info.get("file") or info.get("index") or ""
+            graph.add(
+                LockedPackage(
+                    name=canonical_name(name),
+                    version=str(info.get("version", "")).removeprefix("=="),
+                    source=str(source),
+                    hashes=_unique(info.get("hashes") or []),
+                )
+            )
+    return graph
+
+
+# Line-based locks ------------------------------------------------------------------------------
+
+_YARN_VALUE = re.compile(r'^\s+"?([^"\s:]+)"?:?\s+"?([^"]*)"?\s*$')
+
+
+def _yarn_descriptor_name(descriptor: str) -> str:
+    # "@scope/name@^1.0.0" -> "@scope/name"; "name@npm:^1.0.0" -> "name"
+    descriptor = descriptor.strip().strip('"')
+    at = descriptor.find("@", 1)
+    return descriptor if at == -1 else descriptor[:at]
+
+
+def parse_yarn_lock(lines: Iterable[str]) -> DependencyGraph:
+    """Parse yarn.lock (classic v1 and berry) into a dependency graph."""
+    graph = DependencyGraph(format="yarn.lock", ecosystem=NPM)
+    entry: dict[str, Any] | None = None
+
+    def flush() -> None:
+        if entry and entry.get("name") and entry.get("version") is not None:
+            graph.add(
+                LockedPackage(
+                    name=entry["name"],
+                    version=entry["version"],
+                    source=entry.get("resolved", ""),
+                    hashes=_unique([entry.get("integrity", ""), entry.get("checksum", "")]),
+                    dependencies=_unique(entry.get("dependencies", [])),
+                )
+            )
+
+    section = None
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if not line[0].isspace():
+            flush()
+            entry = None
+            section = None
+            header = line.rstrip(":")
+            if header.startswith("__metadata"):
+                continue
+            entry = {"name": _yarn_descriptor_name(header.split(",")[0])}
+            continue
+        if entry is None:
+            continue
+        indent = len(line) - len(line.lstrip())
+        stripped = line.strip()
+        if indent <= 2:
+            if stripped.endswith(":"):
+                section = stripped[:-1]
+                continue
+            section = None
+            match = _YARN_VALUE.match(line)
+            if match:
+                entry[match.group(1)] = match.group(2)
+        elif section in ("dependencies", "optionalDependencies", "peerDependencies"):
+            match = _YARN_VALUE.match(line)
+            if match:
+                entry.setdefault("dependencies", []).append(match.group(1))
+    flush()
+    return graph
+
+
+_REQUIREMENT = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(?:(===?|~=|!=|<=|>=|<|>)\s*([^\s;,]+))?")
+
+
+def parse_requirements_txt(lines: Iterable[str]) -> DependencyGraph:
+    """Parse a (possibly hash-pinned) requirements.txt into a graph without edges."""
+    graph = DependencyGraph(format="requirements.txt", ecosystem=PYPI)
+    logical = ""
+    for raw in [*lines, ""]:
+        line = raw.split(" #", 1)[0].rstrip("\n").strip() if not raw.lstrip().startswith("#") else ""
+        if line.endswith("\\"):
+            logical += line[:-1] + " "
+            continue
+        logical += line
+        requirement, logical = logical.strip(), ""
+        if not requirement or requirement.startswith("-"):
+            continue
+        match = _REQUIREMENT.match(requirement)
+        if not match:
+            continue
+        operator, version = match.group(3), match.group(4) or ""
+        graph.add(
+            LockedPackage(
+                name=canonical_name(match.group(1)),
+                version=version if operator in ("==", "===") else f"{operator or ''}{version}" or "*",
+                hashes=_unique(re.findall(r"--hash[= ](\S+)", requirement)),
+            )
+        )
+    return graph
+
+
+PARSERS: dict[str, Callable[[Iterable[str]], DependencyGraph]] = {
+    "uv.lock": parse_uv_lock,
+    "poetry.lock": parse_poetry_lock,
+    "package-lock.json": parse_package_lock_json,
+    "yarn.lock": parse_yarn_lock,
+    "Pipfile.lock": parse_pipfile_lock,
+    "requirements.txt": parse_requirements_txt,
+}
+
+
+def parse_lock_content(filename: str, content: str) -> DependencyGraph:
+    """
+    Parse lock file content already in memory.
+
+    Raises:
+        ValueError: If the format is not supported or the content is malformed
+    """
+    parser = PARSERS.get(Path(filename).name)
+    if parser is None:
+        raise ValueError(f"Unsupported lock file format: {filename}")
+    try:
+        return parser(content.splitlines(keepends=True))
+    except (tomllib.TOMLDecodeError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed {filename}: {e}") from e
+
+
+def parse_lock_file(path: Path | str) -> DependencyGraph:
+    """
+    Parse a lock file from disk, streaming it line by line where the format allows.
+
+    Raises:
+        ValueError: If the format is not supported or the file is malformed
+    """
+    path = Path(path)
+    parser = PARSERS.get(path.name)
+    if parser is None:
+        raise ValueError(f"Unsupported lock file format: {path.name}")
+    with open(path, encoding="utf-8") as f:
+        try:
+            return parser(f)
+        except (tomllib.TOMLDecodeError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed {path}: {e}") from e
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    """Parse lock files and report package counts and parse times."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse lock files into a dependency graph")
+    parser.add_argument("lock_files", nargs="+", help="Lock files to parse")
+    parser.add_argument("--json", action="store_true", help="Print the normalized graph as JSON")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    for lock_file in args.lock_files:
+        start = time.perf_counter()
+        graph = parse_lock_file(lock_file)
+        elapsed = time.perf_counter() - start
+        if args.json:
+            print(json.dumps(graph.to_dict(), indent=2))
+        else:
+            edges = sum(1 for _ in graph.edges())
+            print(f"{lock_file}: {len(graph)} packages, {edges} edges in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+__all__ = [
+    "PYPI",
+    "NPM",
+    "LockedPackage",
+    "DependencyGraph",
+    "iter_toml_tables",
+    "parse_uv_lock",
+    "parse_poetry_lock",
+    "parse_package_lock_json",
+    "parse_pipfile_lock",
+    "parse_yarn_lock",
+    "parse_requirements_txt",
+    "PARSERS",
+    "parse_lock_content",
+    "parse_lock_file",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+lock_verification_cache.py - Cached lock file checksums and lock freshness checks
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created persistent (path, size, mtime) -> sha256 cache for lock file verification
+# - Records the resolver inputs a uv.lock was generated from, so `uv lock` only runs when they change
+# - Files are hashed in chunks by file_hashing instead of being read whole; changed files are hashed in parallel
+#
+
+"""
+lock_verification_cache.py - Cached lock file checksums and lock freshness checks
+
+Verifying lock files re-read and re-hashed every file on each run, and
+capturing a project ran `uv lock` unconditionally. Both are avoidable:
+
+- A file's checksum only changes when the file does, so checksums are cached
+  keyed by (resolved path, size, mtime_ns). Repeated verification costs a stat.
+- After `uv lock` succeeds, the digest of its inputs (pyproject.toml files of
+  the project and its workspace members, uv.toml, .python-version and the
+  UV_* resolver settings) is recorded together with the lock's checksum. The
+  lock is fresh while both still match; any edit to an input or to the lock
+  itself makes it stale and `uv lock` runs again.
+
+Checksums match the ones stored in snapshots: sha256 of the file read as text
+with universal newlines, encoded as UTF-8.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+from .file_hashing import file_checksum, hash_files
+from .platform_normalizer import get_cache_directory
+
+logger = logging.getLogger(__name__)
+
+# Path to the cache file, or "off" to disable caching
+CACHE_ENV_VAR = "DHT_LOCK_CACHE"
+
+# Least recently verified files are dropped once the cache grows past this many entries
+MAX_ENTRIES = 2048
+
+# Files modified this recently are hashed but not cached: a second edit within the
+# filesystem's timestamp granularity could keep the same size and mtime
+RACY_WINDOW = 2.0
+
+# Environment variables that change what `uv lock` resolves
+RESOLVER_ENV_VARS = (
+    "UV_INDEX",
+    "UV_INDEX_URL",
+    "UV_DEFAULT_INDEX",
+    "UV_EXTRA_INDEX_URL",
+    "UV_FIND_LINKS",
+    "UV_PRERELEASE",
+    "UV_RESOLUTION",
+    "UV_EXCLUDE_NEWER",
+    "UV_INDEX_STRATEGY",
+)
+
+_CACHE_FORMAT = 1
+
+
+def text_checksum(path: Path | str) -> str:
+    """Return the sha256 of a file as snapshots record it (universal newlines, UTF-8)."""
+    return file_checksum(path)
+
+
+def default_cache_path() -> Path:
+    """Return the cache file path, honouring DHT_LOCK_CACHE."""
+    override = os.environ.get(CACHE_ENV_VAR)
+    if override and override.lower() != "off":
+        return Path(override).expanduser()
+    return get_cache_directory() / "dht" / "lock_verification.json"
+
+
+def cache_enabled() -> bool:
+    """Check whether checksums and lock states should be cached."""
+    return os.environ.get(CACHE_ENV_VAR, "").lower() != "off"
+
+
+def lock_inputs(project_path: Path) -> list[Path]:
+    """
+    Return the files `uv lock` reads to resolve a project.
+
+    Args:
+        project_path: Project (or workspace root) directory
+
+    Returns:
+        Existing input files, in a stable order
+    """
+    project_path = Path(project_path)
+    inputs = [project_path / name for name in ("pyproject.toml", "uv.toml", ".python-version")]
+
+    try:
+        with open(project_path / "pyproject.toml", "rb") as f:
+            workspace = tomllib.load(f).get("tool", {}).get("uv", {}).get("workspace", {})
+    except (OSError, tomllib.TOMLDecodeError):
+        workspace = {}
+    excluded = {
+        Path(match).resolve()
+        for pattern in workspace.get("exclude", [])
+        for match in glob.glob(str(project_path / pattern))
+    }
+    for pattern in workspace.get("members", []):
+        for match in sorted(glob.glob(str(project_path / pattern))):
+            member = Path(match)
+            if member.resolve() not in excluded:
+                inputs.append(member / "pyproject.toml")
+
+    return [path for path in inputs if path.is_file()]
+
+
+class LockVerificationCache:
+    """On-disk cache of file checksums and of the inputs each lock was generated from."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Initialize the cache; the file is read lazily on first use."""
+        self.path = path or default_cache_path()
+        self._files: dict[str, dict[str, Any]] | None = None
+        self._locks: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._files is None:
+            files: dict[str, dict[str, Any]] = {}
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("format") == _CACHE_FORMAT:
+                    files = data.get("files", {})
+                    self._locks = data.get("locks", {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.debug(f"Ignoring unreadable lock verification cache {self.path}: {e}")
+            self._files = files
+        return self._files
+
+    def save(self) -> None:
+        """Persist the cache if anything changed."""
+        with self._lock:
+            if not self._dirty or not cache_enabled():
+                return
+            files = self._load()
+            if len(files) > MAX_ENTRIES:
+                newest = sorted(files.items(), key=lambda item: item[1].get("used_at", 0), reverse=True)
+                files.clear()
+                files.update(newest[:MAX_ENTRIES])
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".lock_verification.", suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"format": _CACHE_FORMAT, "files": files, "locks": self._locks}, f)
+                os.replace(tmp_name, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.debug(f"Could not write lock verification cache {self.path}: {e}")
+
+    def _cached(self, resolved: str, st: os.stat_result) -> str | None:
+        """Return the cached checksum of a file if it has not changed since it was hashed."""
+        if not cache_enabled():
+            return None
+        with self._lock:
+            entry = self._load().get(resolved)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                self.hits += 1
+                entry["used_at"] = time.time()
+                return str(entry["sha256"])
+        return None
+
+    def _store(self, resolved: str, st: os.stat_result, checksum: str) -> None:
+        """Cache a freshly computed checksum unless the file was modified too recently to trust its mtime."""
+        self.misses += 1
+        if not cache_enabled() or time.time() - st.st_mtime_ns / 1e9 < RACY_WINDOW:
+            return
+        with self._lock:
+            self._load()[resolved] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": checksum,
+                "used_at": time.time(),
+            }
+            self._dirty = True
+
+    def checksum(self, path: Path | str) -> str:
+        """
+        Return a file's checksum, hashing it only if it changed since it was last hashed.
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        resolved = os.path.realpath(path)
+        st = os.stat(resolved)
+        cached = self._cached(resolved, st)
+        if cached is not None:
+            return cached
+        checksum = text_checksum(resolved)
+        self._store(resolved, st, checksum)
+        return checksum
+
+    def checksums(self, paths: Iterable[Path | str]) -> dict[Path, str]:
+        """
+        Return the checksums of many files, hashing the changed ones in parallel.
+
+        Returns:
+            dict: Path -> checksum, in the order of paths. Files that cannot be
+            read are left out.
+        """
+        found: dict[Path, str | None] = {}
+        changed: dict[Path, tuple[str, os.stat_result]] = {}
+        for path in map(Path, paths):
+            try:
+                resolved = os.path.realpath(path)
+                st = os.stat(resolved)
+            except OSError:
+                continue
+            found[path] = self._cached(resolved, st)
+            if found[path] is None:
+                changed[path] = (resolved, st)
+
+        hashed = hash_files(resolved for resolved, _ in changed.values())
+        for path, (resolved, st) in changed.items():
+            checksum = hashed.get(Path(resolved))
+            if checksum is not None:
+                self._store(resolved, st, checksum)
+            found[path] = checksum
+        return {path: checksum for path, checksum in found.items() if checksum is not None}
+
+    def inputs_digest(self, project_path: Path) -> str:
+        """Return a digest of everything `uv lock` resolves a project from."""
+        project_path = Path(project_path)
+        digest = hashlib.sha256()
+        for path, checksum in self.checksums(lock_inputs(project_path)).items():
+            digest.update(f"{path.relative_to(project_path)}\0{checksum}\n".encode())
+        for name in RESOLVER_ENV_VARS:
+            if name in os.environ:
+                digest.update(f"${name}={os.environ[name]}\n".encode())
+        return digest.hexdigest()
+
+    def record_lock(self, project_path: Path, lock_name: str = "uv.lock") -> None:
+        """Record the inputs a freshly generated lock file corresponds to."""
+        project_path = Path(project_path)
+        lock_path = project_path / lock_name
+        with self._lock:
+            self._load()
+            self._locks[os.path.realpath(lock_path)] = {
+                "inputs": self.inputs_digest(project_path),
+                "lock": self.checksum(lock_path),
+                "recorded_at": time.time(),
+            }
+            self._dirty = True
+        self.save()
+
+    def is_lock_fresh(self, project_path: Path, lock_name: str = "uv.lock") -> bool:
+        """
+        Check whether a lock file still matches the inputs it was generated from.
+
+        Returns False when no generation was recorded for the lock, so a lock
+        DHT has not produced itself is regenerated once and then trusted.
+        """
+        if not cache_enabled():
+            return False
+        project_path = Path(project_path)
+        lock_path = project_path / lock_name
+        if not lock_path.is_file():
+            return False
+        with self._lock:
+            self._load()
+            state = self._locks.get(os.path.realpath(lock_path))
+        if not state:
+            return False
+        try:
+            return bool(
+                state["lock"] == self.checksum(lock_path) and state["inputs"] == self.inputs_digest(project_path)
+            )
+        except OSError:
+            return False
+
+
+_shared_cache: LockVerificationCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_lock_verification_cache() -> LockVerificationCache:
+    """Return the process-wide cache, re-created when DHT_LOCK_CACHE changes."""
+    global _shared_cache
+    path = default_cache_path()
+    cache = _shared_cache
+    if cache is None or cache.path != path:
+        with _shared_lock:
+            cache = _shared_cache
+            if cache is None or cache.path != path:
+                cache = LockVerificationCache(path)
+                _shared_cache = cache
+    return cache
+
+
+__all__ = [
+    "CACHE_ENV_VAR",
+    "MAX_ENTRIES",
+    "RESOLVER_ENV_VARS",
+    "text_checksum",
+    "default_cache_path",
+    "cache_enabled",
+    "lock_inputs",
+    "LockVerificationCache",
+    "get_lock_verification_cache",
+]
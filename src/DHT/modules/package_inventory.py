@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+package_inventory.py - Installed Python package inventory.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to list installed packages without a pip subprocess
+# - The running interpreter is inventoried in-process from importlib.metadata
+# - Only the METADATA header block is parsed, never the long description
+# - Other environments fall back to `pip list` / `uv pip list`
+# - Foreign virtual environments are read from disk by site_packages_scanner
+# - An interpreter only counts as the running one if it shares its venv or resolves to the same executable
+#
+
+"""
+package_inventory.py - Installed Python package inventory.
+
+`python -m pip list --format=json` takes seconds because it imports pip and
+builds its whole distribution model. For the interpreter DHT is running in
+the same answer is available in-process: importlib.metadata already knows
+every distribution on sys.path, and the name and version sit in the header
+block at the top of each METADATA file. Other virtual environments are
+read from disk by site_packages_scanner; only base interpreters other than
+the running one still go through a subprocess.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+from collections.abc import Iterable
+from importlib import metadata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Timeout in seconds for the subprocess fallback
+LIST_TIMEOUT = 30
+
+
+def canonical_name(name: str) -> str:
+    """Normalize a distribution name as in PEP 503 (case, `-`, `_`, `.`)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_metadata_headers(text: str) -> dict[str, str]:
+    """
+    Parse the header block of a METADATA or PKG-INFO file.
+
+    Stops at the first blank line, so the package description that follows
+    is never processed. Repeated headers keep their first value.
+
+    Args:
+        text: Contents of the metadata file
+
+    Returns:
+        dict: Header name -> value
+    """
+    headers: dict[str, str] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            break
+        if line[0] in " \t":
+            # Continuation line of a folded header
+            continue
+        key, sep, value = line.partition(":")
+        if sep and key not in headers:
+            headers[key] = value.strip()
+    return headers
+
+
+def inventory_distributions(distributions: Iterable[metadata.Distribution]) -> dict[str, str]:
+    """
+    Build a name -> version map from importlib.metadata distributions.
+
+    When a distribution is installed more than once, the first one found
+    wins, matching the one Python would import.
+
+    Args:
+        distributions: Distributions in sys.path order
+
+    Returns:
+        dict: Distribution name (as declared in its metadata) -> version
+    """
+    packages: dict[str, str] = {}
+    seen: set[str] = set()
+    for dist in distributions:
+        text = dist.read_text("METADATA") or dist.read_text("PKG-INFO")
+        if not text:
+            continue
+        headers = parse_metadata_headers(text)
+        name = headers.get("Name")
+        version = headers.get("Version")
+        if not name or not version:
+            continue
+        key = canonical_name(name)
+        if key in seen:
+            continue
+        seen.add(key)
+        packages[name] = version
+    return packages
+
+
+def current_environment_packages() -> dict[str, str]:
+    """List the packages importable by the running interpreter, in-process."""
+    return inventory_distributions(metadata.distributions())
+
+
+def is_current_environment(location: str | Path) -> bool:
+    """
+    Check whether an interpreter or environment directory is the running one.
+
+    A shared prefix is not enough: /usr/bin/python3.11 and /usr/bin/python3.12
+    both live in /usr but see different packages. An interpreter is the
+    running one if it belongs to the same virtual environment or, outside
+    virtual environments, resolves to the same executable.
+
+    Args:
+        location: Python executable or virtual environment root
+
+    Returns:
+        bool: True if packages can be listed in-process
+    """
+    # Imported here: the scanner reuses this module's metadata helpers
+    from .site_packages_scanner import is_virtualenv, venv_for_interpreter
+
+    path = Path(location)
+    if path.absolute() == Path(sys.executable).absolute():
+        return True
+    running_venv = Path(sys.prefix) if sys.prefix != sys.base_prefix else None
+    try:
+        venv = path if path.is_dir() else venv_for_interpreter(path)
+        if venv is not None or running_venv is not None:
+            return (
+                venv is not None
+                and running_venv is not None
+                and is_virtualenv(venv)
+                and venv.resolve() == running_venv.resolve()
+            )
+        return os.path.realpath(path) == os.path.realpath(sys.executable)
+    except OSError:
+        return False
+
+
+def active_virtualenv(cwd: Path | None = None) -> Path | None:
+    """
+    Return the virtual environment `uv pip` would operate on, if any.
+
+    That is $VIRTUAL_ENV when set, otherwise a `.venv` in the working directory.
+    """
+    virtual_env = os.environ.get("VIRTUAL_ENV")
+    if virtual_env:
+        return Path(virtual_env)
+    candidate = (cwd or Path.cwd()) / ".venv"
+    if (candidate / "pyvenv.cfg").exists():
+        return candidate
+    return None
+
+
+def list_packages_subprocess(command: list[str], timeout: float = LIST_TIMEOUT) -> dict[str, str]:
+    """
+    List packages with a `pip list --format=json` style command.
+
+    Args:
+        command: Full command, e.g. [python, "-m", "pip", "list", "--format=json"]
+        timeout: Timeout in seconds
+
+    Returns:
+        dict: Package name -> version
+
+    Raises:
+        RuntimeError: If the command fails
+    """
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"{command[0]} exited with code {result.returncode}")
+    return {pkg["name"]: pkg["version"] for pkg in json.loads(result.stdout)}
+
+
+def get_installed_packages(python_executable: str | Path | None = None) -> dict[str, str]:
+    """
+    List the packages installed for an interpreter.
+
+    The running interpreter (python_executable None or see
+    is_current_environment) is inventoried in-process, an interpreter inside another
+    virtual environment by scanning its site-packages, and any other
+    interpreter is asked through `python -m pip list`.
+
+    Args:
+        python_executable: Interpreter whose packages to list, current if None
+
+    Returns:
+        dict: Package name -> version
+
+    Raises:
+        RuntimeError: If the subprocess fallback fails
+    """
+    if python_executable is None or is_current_environment(python_executable):
+        return current_environment_packages()
+
+    # Imported here: the scanner reuses this module's metadata helpers
+    from .site_packages_scanner import scan_venv, venv_for_interpreter
+
+    venv = venv_for_interpreter(python_executable)
+    if venv is not None:
+        return scan_venv(venv).packages()
+    return list_packages_subprocess([str(python_executable), "-m", "pip", "list", "--format=json"])
+
+
+__all__ = [
+    "LIST_TIMEOUT",
+    "canonical_name",
+    "parse_metadata_headers",
+    "inventory_distributions",
+    "current_environment_packages",
+    "is_current_environment",
+    "active_virtualenv",
+    "list_packages_subprocess",
+    "get_installed_packages",
+]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+parallel_probes.py - Bounded concurrent execution of tool version probes.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to run tool version probes concurrently instead of one after another
+# - Each probe gets a per-probe timeout clamped to an overall deadline
+# - Probes that time out or miss the deadline are reported with an explicit marker
+#
+
+"""
+parallel_probes.py - Bounded concurrent execution of tool version probes.
+
+Verifying or capturing a dozen tools sequentially costs the sum of their
+start-up times, and a single hung binary (a docker CLI waiting on its
+daemon, for example) blocks the whole run. run_probes executes the probes
+on a small thread pool: each probe receives a timeout to pass on to
+subprocess.run, and whatever has not finished when the overall deadline
+passes is abandoned and reported as timed out, so callers always get a
+partial result back.
+"""
+
+import subprocess
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import dataclass
+
+# Default pool size; probes are process-bound, not CPU-bound
+PROBE_WORKERS = 8
+
+# Default timeout in seconds for a single probe
+PROBE_TIMEOUT = 10.0
+
+# Default wall-clock deadline in seconds for a whole batch of probes
+PROBE_DEADLINE = 60.0
+
+# A probe receives its timeout in seconds and returns its output, None on failure.
+# It signals a timeout by letting subprocess.TimeoutExpired propagate.
+Probe = Callable[[float], "str | None"]
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Outcome of one probe."""
+
+    output: str | None = None
+    timed_out: bool = False
+    error: str | None = None
+
+
+def _run_one(probe: Probe, probe_timeout: float, expires_at: float) -> ProbeResult:
+    """Run a probe with its timeout clamped to the time left before the deadline."""
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        return ProbeResult(timed_out=True, error="Deadline exceeded before the probe started")
+    timeout = min(probe_timeout, remaining)
+    try:
+        return ProbeResult(output=probe(timeout))
+    except subprocess.TimeoutExpired:
+        return ProbeResult(timed_out=True, error=f"Timed out after {timeout:.3g} seconds")
+    except Exception as e:
+        return ProbeResult(error=str(e))
+
+
+def run_probes(
+    probes: Mapping[str, Probe],
+    probe_timeout: float = PROBE_TIMEOUT,
+    deadline: float = PROBE_DEADLINE,
+    max_workers: int = PROBE_WORKERS,
+) -> dict[str, ProbeResult]:
+    """
+    Run probes concurrently and collect their results.
+
+    Args:
+        probes: Probe name -> probe callable
+        probe_timeout: Timeout in seconds for each probe
+        deadline: Wall-clock budget in seconds for the whole batch
+        max_workers: Maximum number of probes running at once
+
+    Returns:
+        dict: Probe name -> ProbeResult, in the order of probes. Probes
+        still running at the deadline are returned with timed_out set.
+    """
+    if not probes:
+        return {}
+
+    expires_at = time.monotonic() + deadline
+    results: dict[str, ProbeResult] = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(probes))))
+    try:
+        futures = {executor.submit(_run_one, probe, probe_timeout, expires_at): name for name, probe in probes.items()}
+        try:
+            for future in as_completed(futures, timeout=max(0.0, expires_at - time.monotonic())):
+                results[futures[future]] = future.result()
+        except FuturesTimeoutError:
+            pass
+    finally:
+        # Stragglers are bounded by their own clamped timeouts; do not wait for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    missed = ProbeResult(timed_out=True, error=f"Deadline of {deadline:g} seconds exceeded")
+    return {name: results.get(name, missed) for name in probes}
+
+
+__all__ = [
+    "PROBE_WORKERS",
+    "PROBE_TIMEOUT",
+    "PROBE_DEADLINE",
+    "Probe",
+    "ProbeResult",
+    "run_probes",
+]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+path_index.py - PATH-indexed executable lookup without spawning processes
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created PATH index built once per run with os.scandir
+# - Answers tool presence queries with a dict lookup instead of `which` forks
+# - Rescans automatically when PATH or a PATH directory changes
+#
+
+"""
+path_index.py - PATH-indexed executable lookup without spawning processes
+
+Tool detection used to shell out to `which <tool>` (and then `<tool> --version`)
+for every tool in the registry. This module scans each PATH directory once,
+recording executable name -> full path with the same first-match-wins
+precedence as the shell, so presence checks become dictionary lookups.
+"""
+
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PathIndex:
+    """Index of executables reachable through a PATH string."""
+
+    path: str
+    executables: dict[str, str] = field(default_factory=dict)
+    # PATH directory -> mtime_ns at scan time, used to detect installs/removals
+    directory_mtimes: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, path: str | None = None) -> PathIndex:
+        """Scan every directory on PATH and index its executables."""
+        path = os.environ.get("PATH", os.defpath) if path is None else path
+        index = cls(path=path)
+        pathext = _windows_pathext()
+
+        for directory in path.split(os.pathsep):
+            if not directory or directory in index.directory_mtimes:
+                continue
+            try:
+                index.directory_mtimes[directory] = os.stat(directory).st_mtime_ns
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+
+            for entry in entries:
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+
+                if pathext is not None:
+                    name = entry.name.lower()
+                    stem, ext = os.path.splitext(name)
+                    if ext not in pathext:
+                        continue
+                    index.executables.setdefault(name, entry.path)
+                    index.executables.setdefault(stem, entry.path)
+                elif os.access(entry.path, os.X_OK):
+                    index.executables.setdefault(entry.name, entry.path)
+
+        return index
+
+    def which(self, name: str) -> str | None:
+        """
+        Resolve an executable name like shutil.which, without touching the filesystem.
+
+        Names containing a directory separator are checked directly on disk.
+        """
+        if os.path.dirname(name):
+            return name if os.path.isfile(name) and os.access(name, os.X_OK) else None
+        if sys.platform == "win32":
+            name = name.lower()
+        return self.executables.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        """Check if an executable name is on PATH."""
+        return isinstance(name, str) and self.which(name) is not None
+
+    def is_stale(self) -> bool:
+        """Check whether PATH or any indexed directory changed since the scan."""
+        if os.environ.get("PATH", os.defpath) != self.path:
+            return True
+        for directory, mtime in self.directory_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+
+def _windows_pathext() -> set[str] | None:
+    """Return executable extensions on Windows, None elsewhere."""
+    if sys.platform == "win32":
+        pathext = os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD")
+        return {ext.lower() for ext in pathext.split(os.pathsep) if ext}
+    return None
+
+
+_index: PathIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_path_index(refresh: bool = False) -> PathIndex:
+    """
+    Return the shared PATH index, building it on first use.
+
+    The index is rebuilt when refresh is True or when the PATH environment
+    variable no longer matches the one it was built from.
+    """
+    global _index
+    index = _index
+    if refresh or index is None or index.path != os.environ.get("PATH", os.defpath):
+        with _index_lock:
+            index = _index
+            if refresh or index is None or index.path != os.environ.get("PATH", os.defpath):
+                index = PathIndex.build()
+                _index = index
+    return index
+
+
+def which(name: str) -> str | None:
+    """
+    Find an executable on PATH using the shared index.
+
+    A miss triggers a staleness check (one stat per PATH directory) and a
+    rescan if something changed, so tools installed during the run are found.
+    """
+    index = get_path_index()
+    found = index.which(name)
+    if found is None and index.is_stale():
+        found = get_path_index(refresh=True).which(name)
+    return found
+
+
+def is_tool_installed(name: str) -> bool:
+    """Check if an executable is on PATH."""
+    return which(name) is not None
+
+
+__all__ = [
+    "PathIndex",
+    "get_path_index",
+    "which",
+    "is_tool_installed",
+]
@@ -20,16 +20,19 @@ including configuration files, lock files, and project metadata.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains project information capture utilities
+# - Project capture is split into phases that the reproducer can run concurrently
+# - Config files are hashed from the bytes read instead of re-encoding their content
 #
 
-import hashlib
 import logging
 from pathlib import Path
 
 from prefect import get_run_logger
 
+from DHT.modules.capture_phases import CapturePhase, run_phases
 from DHT.modules.environment_configurator import EnvironmentConfigurator
 from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.file_hashing import read_text_with_checksum
 from DHT.modules.lock_file_manager import LockFileManager
 
 
@@ -53,11 +56,49 @@ class ProjectCaptureUtils:
 
     def capture_project_info(self, snapshot: EnvironmentSnapshot, project_path: Path, include_configs: bool) -> None:
         """Capture project-specific information."""
-        logger = self._get_logger()
-
+        run_phases(self.capture_phases(snapshot, project_path, include_configs), max_workers=1)
+
+    def capture_phases(
+        self, snapshot: EnvironmentSnapshot, project_path: Path, include_configs: bool
+    ) -> list[CapturePhase]:
+        """
+        Return the project capture work as phases for run_phases.
+
+        Lock file generation needs the project type found by the analysis;
+        config files are read independently of both.
+
+        Args:
+            snapshot: Snapshot to fill in
+            project_path: Project directory
+            include_configs: Whether to capture configuration files
+
+        Returns:
+            Phases named project_analysis, lock_files, config_files (if
+            requested) and project_checksums
+        """
         snapshot.project_path = str(project_path)
 
-        # Analyze project with configurator
+        phases = [
+            CapturePhase("project_analysis", lambda: self._analyze_project(snapshot, project_path)),
+            CapturePhase(
+                "lock_files", lambda: self._capture_lock_files(snapshot, project_path), requires=("project_analysis",)
+            ),
+        ]
+        if include_configs:
+            phases.append(CapturePhase("config_files", lambda: self._capture_config_files(snapshot, project_path)))
+        phases.append(
+            CapturePhase(
+                "project_checksums",
+                lambda: self._order_checksums(snapshot),
+                requires=tuple(phase.name for phase in phases if phase.name != "project_analysis"),
+            )
+        )
+        return phases
+
+    def _analyze_project(self, snapshot: EnvironmentSnapshot, project_path: Path) -> None:
+        """Detect the project type with the configurator."""
+        logger = self._get_logger()
+
         try:
             analysis = self.configurator.analyze_environment_requirements(
                 project_path=project_path, include_system_info=False
@@ -69,12 +110,12 @@ class ProjectCaptureUtils:
         except Exception as e:
             logger.warning(f"Failed to analyze project: {e}")
 
-        # Capture lock files
-        self._capture_lock_files(snapshot, project_path)
-
-        # Capture configuration files if requested
-        if include_configs:
-            self._capture_config_files(snapshot, project_path)
+    def _order_checksums(self, snapshot: EnvironmentSnapshot) -> None:
+        """List checksums lock files first, then config files, however the phases interleaved."""
+        ordered = [*snapshot.lock_files, *snapshot.config_files]
+        checksums = {name: snapshot.checksums[name] for name in ordered if name in snapshot.checksums}
+        checksums.update((name, value) for name, value in snapshot.checksums.items() if name not in checksums)
+        snapshot.checksums = checksums
 
     def _capture_lock_files(self, snapshot: EnvironmentSnapshot, project_path: Path) -> None:
         """Capture project lock files."""
@@ -112,9 +153,8 @@ class ProjectCaptureUtils:
             config_path = project_path / config_file
             if config_path.exists():
                 try:
-                    content = config_path.read_text(encoding="utf-8")
+                    content, checksum = read_text_with_checksum(config_path)
                     snapshot.config_files[config_file] = content
-                    checksum = hashlib.sha256(content.encode()).hexdigest()
                     snapshot.checksums[config_file] = checksum
                 except Exception as e:
                     logger.warning(f"Failed to read {config_file}: {e}")
@@ -18,6 +18,7 @@ reproduction flow including snapshot creation, saving, and verification.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains reproduction flow orchestration logic
+# - Snapshots are saved against a blob store shared by the output directory
 #
 
 import logging
@@ -29,6 +30,8 @@ from typing import Any, cast
 
 from prefect import get_run_logger
 
+from DHT.modules.snapshot_blob_store import DEFAULT_BLOB_DIR
+
 
 class ReproductionFlowUtils:
     """Utilities for orchestrating reproduction flows."""
@@ -98,7 +101,7 @@ class ReproductionFlowUtils:
             if save_snapshot:
                 snapshot_file = output_dir / f"{snapshot.snapshot_id}.json"
                 saved_path = self.reproducer._save_environment_snapshot_impl(
-                    snapshot=snapshot, output_path=snapshot_file
+                    snapshot=snapshot, output_path=snapshot_file, blob_store=output_dir / DEFAULT_BLOB_DIR
                 )
                 results["snapshot_file"] = str(saved_path)
                 results["steps"].append("save_snapshot")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+reproduction_plan.py - Environment reproduction as a resumable plan of concurrent steps.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to run reproduction steps (verify, restore, install) as a dependency graph
+# - Independent steps run concurrently; each writes to its own partial result, merged in plan order
+# - Completed restore and install steps are checkpointed so a failed reproduction can resume
+# - Reports per-step timings and the critical path
+# - Restore and install steps are skipped, and reported as failed, when a restore or install step they require failed
+#
+
+"""
+reproduction_plan.py - Environment reproduction as a resumable plan of concurrent steps.
+
+Reproducing an environment verifies the platform and Python, verifies (and
+possibly installs) each tool, restores project files, installs dependencies
+and verifies configurations. The reproducer compiles these into PlanSteps
+with explicit dependencies, and execute_plan runs them with run_phases, so
+tool checks run concurrently with each other and with file restoration.
+
+Every step writes into its own ReproductionResult. The partial results
+are merged into the final result in plan order, so the report reads the
+same however the steps interleaved.
+
+A restore or install step whose required restore or install step failed
+is not run: installing into a target whose lock files were never written
+would resolve fresh versions instead of reproducing the snapshot. The
+skipped step is reported as failed.
+
+With a checkpoint file, each finished restore or install step is recorded
+with its partial result. Running the same plan again (same snapshot,
+target and options) reuses the steps that succeeded, together with their
+results, and runs the rest. Verify steps always run again: they check the
+live environment, which has usually been fixed between the two runs. The
+reproducer removes the checkpoint once a reproduction succeeds.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from DHT.modules.capture_phases import CapturePhase, PhaseResult, critical_path, phase_order, run_phases
+from DHT.modules.environment_snapshot_models import ReproductionResult
+
+logger = logging.getLogger(__name__)
+
+# Default number of steps running at once; steps wait on subprocesses, not the CPU
+PLAN_WORKERS = 4
+
+STEP_KINDS = ("verify", "restore", "install")
+
+_CHECKPOINT_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """One reproduction step and the steps that must finish before it starts."""
+
+    name: str
+    kind: str  # "verify", "restore" or "install"
+    action: Callable[[ReproductionResult], Any]
+    requires: tuple[str, ...] = ()
+
+
+@dataclass
+class PlanReport:
+    """How a reproduction plan ran."""
+
+    timings: dict[str, float] = field(default_factory=dict)  # step -> seconds, for steps run this time
+    resumed: list[str] = field(default_factory=list)  # steps taken from the checkpoint
+    failed: list[str] = field(default_factory=list)
+    critical_path: list[str] = field(default_factory=list)
+    total: float = 0.0
+
+
+def _noop() -> None:
+    pass
+
+
+def step_failed(partial: ReproductionResult, error: str | None = None) -> bool:
+    """Check whether a step's partial result means the step has to run again."""
+    return error is not None or bool(partial.actions_failed) or bool(partial.missing_tools)
+
+
+def merge_result(result: ReproductionResult, partial: ReproductionResult) -> None:
+    """Add a step's partial result to the overall result."""
+    for f in fields(ReproductionResult):
+        value = getattr(partial, f.name)
+        if isinstance(value, dict):
+            getattr(result, f.name).update(value)
+        elif isinstance(value, list):
+            getattr(result, f.name).extend(value)
+
+
+def _partial_from_dict(data: Mapping[str, Any]) -> ReproductionResult:
+    partial = ReproductionResult(**{f.name: data[f.name] for f in fields(ReproductionResult) if f.name in data})
+    # JSON turns the (expected, actual) tuples into lists
+    partial.version_mismatches = {name: tuple(pair) for name, pair in partial.version_mismatches.items()}
+    return partial
+
+
+class _Checkpoint:
+    """Completed steps of a plan, persisted after every step."""
+
+    def __init__(self, path: Path | None, key: Mapping[str, Any]) -> None:
+        self.path = path
+        self.key = dict(key)
+        self.steps: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path is None:
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable reproduction checkpoint {path}: {e}")
+            return
+        if data.get("format") == _CHECKPOINT_FORMAT and data.get("key") == self.key:
+            self.steps = data.get("steps", {})
+        else:
+            logger.info(f"Reproduction checkpoint {path} belongs to a different plan, starting over")
+
+    def succeeded(self, name: str) -> ReproductionResult | None:
+        entry = self.steps.get(name)
+        if not entry or entry.get("status") != "ok":
+            return None
+        return _partial_from_dict(entry.get("result", {}))
+
+    def record(self, name: str, partial: ReproductionResult, ok: bool, duration: float) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            self.steps[name] = {"status": "ok" if ok else "failed", "duration": duration, "result": asdict(partial)}
+            data = {"format": _CHECKPOINT_FORMAT, "key": self.key, "steps": self.steps}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".checkpoint.", suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_name, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write reproduction checkpoint {self.path}: {e}")
+
+
+def execute_plan(
+    steps: Sequence[PlanStep],
+    result: ReproductionResult,
+    checkpoint: Path | None = None,
+    checkpoint_key: Mapping[str, Any] | None = None,
+    max_workers: int = PLAN_WORKERS,
+) -> PlanReport:
+    """
+    Run a reproduction plan and merge the step results into result.
+
+    Args:
+        steps: Plan steps
+        result: Result receiving every step's partial result, in plan order
+        checkpoint: File recording finished restore and install steps; None disables resuming
+        checkpoint_key: Identifies the plan (snapshot, target, options); a checkpoint
+            written for a different key is ignored
+        max_workers: Maximum number of steps running at once
+
+    Returns:
+        PlanReport with per-step timings, resumed and failed steps and the critical path
+
+    Raises:
+        ValueError: If a step has an unknown kind or the dependencies are invalid
+    """
+    for step in steps:
+        if step.kind not in STEP_KINDS:
+            raise ValueError(f"Unknown kind {step.kind!r} for reproduction step {step.name}")
+
+    state = _Checkpoint(checkpoint, checkpoint_key or {})
+    partials: dict[str, ReproductionResult] = {}
+
+    # A step is reused only if it succeeded and every restore/install step it builds on is reused too
+    by_name = {step.name: step for step in steps}
+    reused: set[str] = set()
+    for name in phase_order([CapturePhase(step.name, _noop, step.requires) for step in steps]):
+        step = by_name[name]
+        if step.kind == "verify" or not all(by_name[r].kind == "verify" or r in reused for r in step.requires):
+            continue
+        partial = state.succeeded(name)
+        if partial is not None:
+            partials[name] = partial
+            reused.add(name)
+
+    # Restore and install steps that failed or were skipped; a step only starts once its requirements finished
+    broken: set[str] = set()
+
+    def run_step(step: PlanStep) -> Callable[[], None]:
+        def run() -> None:
+            partial = ReproductionResult(success=False, snapshot_id=result.snapshot_id, platform=result.platform)
+            partials[step.name] = partial
+            blocked = [r for r in step.requires if r in broken]
+            if step.kind != "verify" and blocked:
+                logger.warning(f"Skipping reproduction step {step.name}: {', '.join(blocked)} failed")
+                partial.actions_failed.append(f"{step.name}_skipped: requires {', '.join(blocked)}")
+                broken.add(step.name)
+                return
+            start = time.perf_counter()
+            error = None
+            try:
+                step.action(partial)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                partial.actions_failed.append(f"{step.name}_error: {e}")
+                raise
+            finally:
+                if step.kind != "verify":
+                    ok = not step_failed(partial, error)
+                    if not ok:
+                        broken.add(step.name)
+                    state.record(step.name, partial, ok, time.perf_counter() - start)
+
+        return run
+
+    phases = [
+        CapturePhase(step.name, run_step(step), tuple(r for r in step.requires if r not in reused))
+        for step in steps
+        if step.name not in reused
+    ]
+    results: dict[str, PhaseResult] = run_phases(phases, max_workers=max_workers)
+
+    report = PlanReport(resumed=[step.name for step in steps if step.name in reused])
+    for step in steps:
+        merge_result(result, partials[step.name])
+        if step.name in results:
+            report.timings[step.name] = round(results[step.name].duration, 4)
+            if step_failed(partials[step.name], results[step.name].error):
+                report.failed.append(step.name)
+    report.critical_path = critical_path(phases, results)
+    report.total = round(max((r.started + r.duration for r in results.values()), default=0.0), 4)
+    return report
+
+
+__all__ = [
+    "PLAN_WORKERS",
+    "STEP_KINDS",
+    "PlanStep",
+    "PlanReport",
+    "step_failed",
+    "merge_result",
+    "execute_plan",
+]
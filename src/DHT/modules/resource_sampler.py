@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+resource_sampler.py - Shared, non-blocking system resource snapshots
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created rolling resource sampler for guardian pre-flight checks
+# - Uses non-blocking cpu_percent(None) deltas instead of a 1s sleep per check
+# - Background daemon thread keeps a snapshot fresh for O(1) reads
+#
+
+"""
+resource_sampler.py - Shared, non-blocking system resource snapshots
+
+psutil.cpu_percent(interval=1) sleeps for a full second to measure CPU load.
+Checking resources before every guarded command that way adds up to minutes
+over a batch of hundreds of commands. This module keeps one rolling snapshot
+of memory, CPU and disk usage that is refreshed by a background thread, so
+reading it costs a lock-free attribute access.
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import psutil
+
+# Seconds between background samples
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    """System resource usage at a point in time."""
+
+    memory_available_mb: float
+    memory_percent: float
+    cpu_percent: float
+    disk_percent: float
+    timestamp: float
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the snapshot in the check_system_resources result format."""
+        data = asdict(self)
+        del data["timestamp"]
+        return data
+
+
+class ResourceSampler:
+    """Keeps a rolling snapshot of system resources."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, disk_path: str = "/") -> None:
+        """Initialize the sampler and take a first snapshot."""
+        self.interval = interval
+        self.disk_path = disk_path
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # The first non-blocking call only establishes the baseline for CPU deltas
+        psutil.cpu_percent(interval=None)
+        self._snapshot = self.sample()
+
+    def sample(self) -> ResourceSnapshot:
+        """Take a new snapshot without blocking and make it the current one."""
+        memory = psutil.virtual_memory()
+        snapshot = ResourceSnapshot(
+            memory_available_mb=memory.available / (1024 * 1024),
+            memory_percent=memory.percent,
+            cpu_percent=psutil.cpu_percent(interval=None),
+            disk_percent=psutil.disk_usage(self.disk_path).percent,
+            timestamp=time.monotonic(),
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self, max_age: float | None = None) -> ResourceSnapshot:
+        """
+        Return the current snapshot.
+
+        Args:
+            max_age: Resample synchronously if the snapshot is older than this
+                many seconds (defaults to twice the sampling interval, which
+                only triggers when the background thread is not running)
+
+        Returns:
+            The most recent ResourceSnapshot
+        """
+        snapshot = self._snapshot
+        limit = max_age if max_age is not None else self.interval * 2
+        if time.monotonic() - snapshot.timestamp > limit:
+            with self._lock:
+                snapshot = self._snapshot
+                if time.monotonic() - snapshot.timestamp > limit:
+                    snapshot = self.sample()
+        return snapshot
+
+    @property
+    def running(self) -> bool:
+        """Whether the background sampling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start refreshing the snapshot in a background daemon thread."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dht-resource-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                # Keep serving the last good snapshot
+                pass
+
+
+_shared_sampler: ResourceSampler | None = None
+_shared_lock = threading.Lock()
+
+
+def get_resource_sampler() -> ResourceSampler:
+    """Return the process-wide sampler, starting its background thread on first use."""
+    global _shared_sampler
+    if _shared_sampler is None:
+        with _shared_lock:
+            if _shared_sampler is None:
+                sampler = ResourceSampler()
+                sampler.start()
+                _shared_sampler = sampler
+    return _shared_sampler
+
+
+def current_resources() -> dict[str, float]:
+    """Return current resource usage from the shared sampler."""
+    return get_resource_sampler().snapshot().as_dict()
+
+
+__all__ = [
+    "DEFAULT_SAMPLE_INTERVAL",
+    "ResourceSnapshot",
+    "ResourceSampler",
+    "get_resource_sampler",
+    "current_resources",
+]
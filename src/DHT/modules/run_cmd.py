@@ -6,6 +6,8 @@ Copyright (c) 2024 Emasoft (Emanuele Sabetta)
 Licensed under the MIT License. See LICENSE file for details.
 """
 
+import codecs
+import io
 import os
 import platform
 import subprocess
@@ -16,6 +18,9 @@ from typing import Any
 import pexpect
 import psutil
 
+# Size of each read from the child's stdout pipe in live-output mode
+LIVE_OUTPUT_CHUNK_SIZE = 64 * 1024
+
 
 def run_cmd(
     command: str | list[str], verbose: bool = False, error_print: Any = None, cwd: str | None = None
@@ -76,29 +81,58 @@ def run_cmd_subprocess(
             command,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
             shell=True,
-            encoding=encoding,
-            errors="replace",
-            bufsize=0,  # Set bufsize to 0 for unbuffered output
-            universal_newlines=True,
+            bufsize=0,  # Unbuffered pipe, read directly from the raw fd
             cwd=cwd,
         )
 
-        output: list[Any] = []
-        while True:
-            chunk = process.stdout.read(1) if process.stdout else ""
-            if not chunk:
-                break
-            print(chunk, end="", flush=True)  # Print the chunk in real-time
-            output.append(chunk)  # Store the chunk for later use
+        output = stream_live_output(process.stdout.fileno(), encoding=encoding) if process.stdout else ""
 
         process.wait()
-        return process.returncode, "".join(output)
+        return process.returncode, output
     except Exception as e:
         return 1, str(e)
 
 
+def stream_live_output(
+    fd: int,
+    encoding: str | None = None,
+    echo: bool = True,
+    chunk_size: int = LIVE_OUTPUT_CHUNK_SIZE,
+) -> str:
+    """
+    Read a file descriptor to EOF in large chunks, echoing decoded text as it arrives.
+
+    Bytes are read with os.read, which returns as soon as any data is available,
+    so output is still echoed in real time while avoiding per-character reads.
+    Multi-byte characters split across chunk boundaries are handled by an
+    incremental decoder, and newlines are translated like universal_newlines.
+
+    :param fd: Raw file descriptor to read from (e.g. process.stdout.fileno()).
+    :param encoding: Text encoding of the stream, defaults to UTF-8.
+    :param echo: If True, echo decoded output to sys.stdout as it arrives.
+    :param chunk_size: Maximum number of bytes per read.
+    :return: The complete decoded output.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace"), translate=True
+    )
+    output: list[str] = []
+
+    while True:
+        data = os.read(fd, chunk_size)
+        text = decoder.decode(data, final=not data)
+        if text:
+            if echo:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            output.append(text)
+        if not data:
+            break
+
+    return "".join(output)
+
+
 def run_cmd_pexpect(command: str | list[str], verbose: bool = False, cwd: str | None = None) -> tuple[int, str]:
     """
     Run a shell command interactively using pexpect, capturing all output.
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+site_packages_scanner.py - Read a virtual environment's package list from disk.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created to inventory foreign virtual environments without running pip or uv
+# - Reads name, version, installer, RECORD size and top-level modules from *.dist-info
+# - dist-info directories are read in parallel on a small thread pool
+# - Inventories carry a format version so they can be stored and compared later
+#
+
+"""
+site_packages_scanner.py - Read a virtual environment's package list from disk.
+
+Every installed distribution leaves a `<name>-<version>.dist-info` directory
+in site-packages holding its METADATA headers, the INSTALLER that put it
+there and a RECORD of installed files. Reading those directly answers "what
+is installed in this .venv" in milliseconds, where `uv pip list` or
+`python -m pip list` against the same venv costs a process start (and for
+pip, importing pip itself).
+"""
+
+import configparser
+import csv
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .package_inventory import canonical_name, parse_metadata_headers
+
+# Version of the inventory dictionary layout produced by VenvInventory.to_dict
+INVENTORY_FORMAT = 1
+
+# Thread pool size for reading dist-info directories
+SCAN_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class InstalledDistribution:
+    """One distribution found in site-packages."""
+
+    name: str
+    version: str
+    installer: str | None = None
+    # Sum of the file sizes listed in RECORD, None without a RECORD
+    size: int | None = None
+    # Importable top-level names (packages and modules)
+    top_level: tuple[str, ...] = ()
+    location: str = ""
+
+
+@dataclass
+class VenvInventory:
+    """Packages installed in a virtual environment."""
+
+    venv_path: str
+    python_version: str | None = None
+    site_packages: list[str] = field(default_factory=list)
+    # Canonical name -> distribution
+    distributions: dict[str, InstalledDistribution] = field(default_factory=dict)
+    scanned_at: float = 0.0
+    format: int = INVENTORY_FORMAT
+
+    def packages(self) -> dict[str, str]:
+        """Return name -> version, with names as declared in the metadata."""
+        return {dist.name: dist.version for dist in self.distributions.values()}
+
+    def top_level_modules(self) -> set[str]:
+        """Return every importable top-level name provided by the distributions."""
+        return {module for dist in self.distributions.values() for module in dist.top_level}
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        data = asdict(self)
+        for dist in data["distributions"].values():
+            dist["top_level"] = list(dist["top_level"])
+        return data
+
+
+def find_site_packages(venv_path: Path) -> list[Path]:
+    """
+    Locate the site-packages directories of a virtual environment.
+
+    Args:
+        venv_path: Root of the virtual environment
+
+    Returns:
+        list: Existing site-packages directories (POSIX lib/pythonX.Y, lib64, Windows Lib)
+    """
+    candidates: list[Path] = []
+    for lib_name in ("lib", "lib64"):
+        lib_dir = venv_path / lib_name
+        if lib_dir.is_dir():
+            candidates.extend(sorted(lib_dir.glob("python*/site-packages")))
+    candidates.append(venv_path / "Lib" / "site-packages")
+
+    found: list[Path] = []
+    seen: set[Path] = set()
+    for candidate in candidates:
+        if not candidate.is_dir():
+            continue
+        # lib64 is usually a symlink to lib
+        resolved = candidate.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            found.append(candidate)
+    return found
+
+
+def read_python_version(venv_path: Path) -> str | None:
+    """Read the interpreter version recorded in pyvenv.cfg (venv writes "version", uv "version_info")."""
+    try:
+        text = (venv_path / "pyvenv.cfg").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read_string("[pyvenv]\n" + text)
+    except configparser.Error:
+        return None
+    section = parser["pyvenv"]
+    return section.get("version") or section.get("version_info")
+
+
+def _record_summary(record_text: str) -> tuple[int, tuple[str, ...]]:
+    """Return the total installed size and the top-level modules listed in a RECORD."""
+    size = 0
+    modules: set[str] = set()
+    for row in csv.reader(io.StringIO(record_text)):
+        if not row:
+            continue
+        path = row[0]
+        if len(row) >= 3 and row[2].isdigit():
+            size += int(row[2])
+        if path.startswith("..") or path.startswith("/"):
+            # Scripts and data installed outside site-packages
+            continue
+        head, sep, _ = path.partition("/")
+        if sep:
+            if path.endswith(".py") and not head.endswith((".dist-info", ".data")) and head != "__pycache__":
+                modules.add(head)
+        elif head.endswith((".py", ".so", ".pyd")):
+            # mod.py, or an extension module like _mod.cpython-312-x86_64-linux-gnu.so
+            modules.add(head.split(".", 1)[0])
+    return size, tuple(sorted(modules))
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+def read_distribution(dist_info: Path) -> InstalledDistribution | None:
+    """
+    Read one dist-info directory.
+
+    Args:
+        dist_info: Path to a `<name>-<version>.dist-info` directory
+
+    Returns:
+        InstalledDistribution, or None if its METADATA is missing or has no name/version
+    """
+    metadata_text = _read_text(dist_info / "METADATA")
+    if not metadata_text:
+        return None
+    headers = parse_metadata_headers(metadata_text)
+    name = headers.get("Name")
+    version = headers.get("Version")
+    if not name or not version:
+        return None
+
+    installer = _read_text(dist_info / "INSTALLER")
+    size: int | None = None
+    top_level: tuple[str, ...] = ()
+    record = _read_text(dist_info / "RECORD")
+    if record is not None:
+        size, top_level = _record_summary(record)
+    declared = _read_text(dist_info / "top_level.txt")
+    if declared:
+        top_level = tuple(sorted({line.strip() for line in declared.splitlines() if line.strip()}))
+
+    return InstalledDistribution(
+        name=name,
+        version=version,
+        installer=(installer.strip() or None) if installer else None,
+        size=size,
+        top_level=top_level,
+        location=str(dist_info),
+    )
+
+
+def scan_venv(venv_path: str | Path, max_workers: int = SCAN_WORKERS) -> VenvInventory:
+    """
+    Inventory a virtual environment by reading its dist-info directories.
+
+    When a distribution appears in more than one site-packages directory,
+    the first one found wins, matching import order.
+
+    Args:
+        venv_path: Root of the virtual environment
+        max_workers: Threads used to read dist-info directories
+
+    Returns:
+        VenvInventory (empty when the venv has no site-packages)
+    """
+    venv = Path(venv_path)
+    site_dirs = find_site_packages(venv)
+    dist_infos: list[Path] = []
+    for site_dir in site_dirs:
+        try:
+            with os.scandir(site_dir) as entries:
+                dist_infos.extend(
+                    Path(entry.path)
+                    for entry in sorted(entries, key=lambda e: e.name)
+                    if entry.name.endswith(".dist-info") and entry.is_dir()
+                )
+        except OSError:
+            continue
+
+    if len(dist_infos) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(dist_infos))) as executor:
+            found = list(executor.map(read_distribution, dist_infos))
+    else:
+        found = [read_distribution(path) for path in dist_infos]
+
+    distributions: dict[str, InstalledDistribution] = {}
+    for dist in found:
+        if dist is not None:
+            distributions.setdefault(canonical_name(dist.name), dist)
+
+    return VenvInventory(
+        venv_path=str(venv),
+        python_version=read_python_version(venv),
+        site_packages=[str(path) for path in site_dirs],
+        distributions=distributions,
+        scanned_at=time.time(),
+    )
+
+
+def is_virtualenv(path: str | Path) -> bool:
+    """Check whether a directory is a virtual environment root."""
+    return (Path(path) / "pyvenv.cfg").is_file()
+
+
+def venv_for_interpreter(python_executable: str | Path) -> Path | None:
+    """Return the virtual environment an interpreter lives in, None for base interpreters."""
+    executable = Path(python_executable).absolute()
+    root = executable.parent.parent
+    if is_virtualenv(root):
+        return root
+    return None
+
+
+__all__ = [
+    "INVENTORY_FORMAT",
+    "SCAN_WORKERS",
+    "InstalledDistribution",
+    "VenvInventory",
+    "find_site_packages",
+    "read_python_version",
+    "read_distribution",
+    "scan_venv",
+    "is_virtualenv",
+    "venv_for_interpreter",
+]
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+snapshot_blob_store.py - Content-addressed, compressed storage for snapshot file contents
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created sha256-keyed blob store for lock and config file contents
+# - Blobs are zlib-compressed and written atomically, once per distinct content
+# - Garbage collection removes blobs no snapshot references any more
+# - Garbage collection also reads references from binary snapshot containers
+# - Garbage collection can report what it would remove without deleting (dry run)
+#
+
+"""
+snapshot_blob_store.py - Content-addressed, compressed storage for snapshot file contents
+
+Snapshots embed every lock and config file of the project. Taken once per CI
+job, the same multi-megabyte uv.lock or package-lock.json ends up copied into
+thousands of snapshot files. A BlobStore keeps each distinct content once,
+under its sha256 (the same checksum recorded in EnvironmentSnapshot.checksums):
+
+    <store>/3f/a9c1...e2     zlib-compressed file content
+
+Snapshots saved against a store reference their files as {"blob": "<sha256>"},
+so storage grows with the number of distinct files rather than snapshots.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from .snapshot_container import BINARY_SUFFIX, SnapshotContainer, is_container
+
+# Directory next to saved snapshots that holds their blobs
+DEFAULT_BLOB_DIR = "blobs"
+
+# Snapshot sections whose file contents are moved into the store
+BLOB_SECTIONS = ("lock_files", "config_files")
+
+# Blobs written or reused more recently than this are kept by gc, so a snapshot being saved concurrently is not broken
+GC_MIN_AGE = 3600.0
+
+COMPRESSION_LEVEL = 6
+
+SNAPSHOT_SUFFIXES = (".json", ".yaml", ".yml", BINARY_SUFFIX)
+
+
+def content_checksum(content: str | bytes) -> str:
+    """Return the sha256 hex digest used as blob key (matches snapshot checksums)."""
+    data = content.encode() if isinstance(content, str) else content
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a snapshot file entry is a reference into a blob store."""
+    return isinstance(value, dict) and isinstance(value.get("blob"), str)
+
+
+@dataclass(frozen=True)
+class GCResult:
+    """Outcome of a blob store garbage collection."""
+
+    referenced: int
+    kept: int
+    removed: int
+    freed_bytes: int
+
+    def to_dict(self) -> dict[str, int]:
+        """Convert to dictionary."""
+        return {
+            "referenced": self.referenced,
+            "kept": self.kept,
+            "removed": self.removed,
+            "freed_bytes": self.freed_bytes,
+        }
+
+
+class BlobStore:
+    """Content-addressed store of compressed file contents."""
+
+    def __init__(self, root: Path | str) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory, created on first write
+        """
+        self.root = Path(root)
+
+    def path_for(self, checksum: str) -> Path:
+        """Return the file holding a blob."""
+        if len(checksum) != 64 or not all(c in "0123456789abcdef" for c in checksum):
+            raise ValueError(f"Not a sha256 checksum: {checksum!r}")
+        return self.root / checksum[:2] / checksum[2:]
+
+    def has(self, checksum: str) -> bool:
+        """Check whether a blob is stored."""
+        return self.path_for(checksum).is_file()
+
+    def put(self, content: str | bytes) -> str:
+        """
+        Store content unless the same content is already stored.
+
+        The content is always hashed rather than trusting a recorded checksum,
+        so a stale checksum can never make a snapshot point at the wrong file.
+        Hashing is cheap next to the compression and write it saves. Storing
+        content that is already present refreshes the blob's modification
+        time, which protects it from gc just like a newly written blob.
+
+        Args:
+            content: File content
+
+        Returns:
+            str: sha256 of the content
+        """
+        data = content.encode() if isinstance(content, str) else content
+        checksum = content_checksum(data)
+        path = self.path_for(checksum)
+        if path.is_file():
+            try:
+                # A reused blob counts as freshly written, so a concurrent gc keeps it for GC_MIN_AGE
+                os.utime(path)
+                return checksum
+            except FileNotFoundError:
+                pass  # Removed by gc in the meantime; write it again
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, COMPRESSION_LEVEL))
+            # Concurrent writers of the same content race harmlessly: both files are identical
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return checksum
+
+    def get_bytes(self, checksum: str) -> bytes:
+        """
+        Read a blob.
+
+        Raises:
+            FileNotFoundError: If the blob is not stored
+        """
+        path = self.path_for(checksum)
+        try:
+            compressed = path.read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Blob {checksum} not found in {self.root}") from None
+        return zlib.decompress(compressed)
+
+    def get(self, checksum: str) -> str:
+        """Read a blob as text."""
+        return self.get_bytes(checksum).decode()
+
+    def checksums(self) -> set[str]:
+        """Return the checksums of all stored blobs."""
+        found: set[str] = set()
+        if not self.root.is_dir():
+            return found
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.startswith(".tmp-"):
+                    found.add(shard.name + entry.name)
+        return found
+
+    def stats(self) -> dict[str, int]:
+        """Return blob count and compressed size on disk."""
+        sizes = [self.path_for(checksum).stat().st_size for checksum in self.checksums()]
+        return {"blobs": len(sizes), "bytes": sum(sizes)}
+
+    def gc(self, referenced: Iterable[str], min_age: float = GC_MIN_AGE, dry_run: bool = False) -> GCResult:
+        """
+        Remove blobs that are not referenced.
+
+        Args:
+            referenced: Checksums still in use
+            min_age: Seconds an unreferenced blob must have existed before removal
+            dry_run: Only count what would be removed
+
+        Returns:
+            GCResult
+        """
+        keep = set(referenced)
+        cutoff = time.time() - min_age
+        removed = freed = kept = 0
+
+        for checksum in self.checksums():
+            if checksum in keep:
+                kept += 1
+                continue
+            path = self.path_for(checksum)
+            try:
+                stat = path.stat()
+                if stat.st_mtime > cutoff:
+                    kept += 1
+                    continue
+                if not dry_run:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+
+        # Drop emptied shard directories and stale temp files of crashed writers
+        if self.root.is_dir() and not dry_run:
+            for shard in self.root.iterdir():
+                if not shard.is_dir():
+                    continue
+                for tmp in shard.glob(".tmp-*"):
+                    if tmp.stat().st_mtime <= cutoff:
+                        tmp.unlink(missing_ok=True)
+                try:
+                    shard.rmdir()
+                except OSError:
+                    pass
+
+        return GCResult(referenced=len(keep), kept=kept, removed=removed, freed_bytes=freed)
+
+
+def externalize_files(project: dict[str, Any], store: BlobStore) -> dict[str, Any]:
+    """
+    Move file contents of a serialized snapshot project section into a store.
+
+    Args:
+        project: The "project" section of a snapshot dictionary
+        store: Blob store receiving the contents
+
+    Returns:
+        A copy of the section with contents replaced by {"blob": checksum}
+    """
+    result = dict(project)
+    for section in BLOB_SECTIONS:
+        files = project.get(section) or {}
+        result[section] = {
+            name: content if is_blob_ref(content) else {"blob": store.put(content)} for name, content in files.items()
+        }
+    return result
+
+
+def resolve_files(project: dict[str, Any], store: BlobStore | None) -> dict[str, Any]:
+    """
+    Replace blob references in a serialized snapshot project section by their contents.
+
+    Raises:
+        FileNotFoundError: If a referenced blob or the store is missing
+    """
+    result = dict(project)
+    for section in BLOB_SECTIONS:
+        files = project.get(section) or {}
+        if not any(is_blob_ref(content) for content in files.values()):
+            continue
+        if store is None:
+            raise FileNotFoundError(f"Snapshot references blobs in {section} but no blob store is available")
+        result[section] = {
+            name: store.get(content["blob"]) if is_blob_ref(content) else content for name, content in files.items()
+        }
+    return result
+
+
+def snapshot_blob_refs(data: dict[str, Any]) -> set[str]:
+    """Return the checksums a serialized snapshot references."""
+    project = data.get("project") or {}
+    return {
+        content["blob"]
+        for section in BLOB_SECTIONS
+        for content in (project.get(section) or {}).values()
+        if is_blob_ref(content)
+    }
+
+
+def _read_snapshot_dict(path: Path) -> dict[str, Any]:
+    if is_container(path):
+        # Only the project section can reference blobs; the others stay undecoded
+        container = SnapshotContainer(path)
+        return {"project": container.section("project")} if "project" in container else {}
+    with open(path) as f:
+        data = yaml.safe_load(f) if path.suffix.lower() in (".yaml", ".yml") else json.load(f)
+    return data if isinstance(data, dict) else {}
+
+
+def collect_references(snapshot_paths: Iterable[Path | str]) -> set[str]:
+    """
+    Gather the blob checksums referenced by snapshot files.
+
+    Args:
+        snapshot_paths: Snapshot files or directories of snapshots
+
+    Raises:
+        ValueError: If a snapshot file cannot be read; gc must not run on partial references
+    """
+    referenced: set[str] = set()
+    for entry in snapshot_paths:
+        path = Path(entry)
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in SNAPSHOT_SUFFIXES) if path.is_dir() else [path]
+        for file in files:
+            try:
+                referenced |= snapshot_blob_refs(_read_snapshot_dict(file))
+            except (OSError, ValueError, zlib.error, yaml.YAMLError) as e:
+                raise ValueError(f"Cannot read snapshot {file}: {e}") from e
+    return referenced
+
+
+def gc_snapshot_dir(snapshot_dir: Path | str, min_age: float = GC_MIN_AGE, dry_run: bool = False) -> GCResult:
+    """
+    Collect garbage in the blob store of a snapshot directory.
+
+    Args:
+        snapshot_dir: Directory holding snapshot files and their DEFAULT_BLOB_DIR store
+        min_age: Seconds an unreferenced blob must have existed before removal
+        dry_run: Only count what would be removed
+
+    Returns:
+        GCResult
+
+    Raises:
+        ValueError: If a snapshot in the directory cannot be read
+    """
+    snapshot_dir = Path(snapshot_dir)
+    store = BlobStore(snapshot_dir / DEFAULT_BLOB_DIR)
+    return store.gc(collect_references([snapshot_dir]), min_age=min_age, dry_run=dry_run)
+
+
+__all__ = [
+    "DEFAULT_BLOB_DIR",
+    "BLOB_SECTIONS",
+    "GC_MIN_AGE",
+    "content_checksum",
+    "is_blob_ref",
+    "GCResult",
+    "BlobStore",
+    "externalize_files",
+    "resolve_files",
+    "snapshot_blob_refs",
+    "collect_references",
+    "gc_snapshot_dir",
+]
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+snapshot_bundle.py - Offline reproduction bundles of a snapshot and the wheels its lock file needs
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created bundles holding a snapshot and a wheel for every locked package found in the local uv caches
+# - Wheels are repacked from uv's unpacked cache archives into byte-for-byte reproducible .whl files
+# - Opening a bundle extracts it safely and verifies every wheel against the manifest
+#
+
+"""
+snapshot_bundle.py - Offline reproduction bundles of a snapshot and the wheels its lock file needs
+
+Reproducing a snapshot installs its dependencies from the package index,
+so air-gapped machines cannot do it and every rebuild pays the index
+round-trips. A bundle is a single tar archive with:
+
+    manifest.json    snapshot id, lock file, bundled wheels with sha256, missing packages
+    snapshot.json    the snapshot, with lock and config file contents inline
+    wheels/          one .whl per locked package (and platform) found in the uv caches
+
+uv keeps cached wheels unpacked (archive-v*/<id>/, reached through the
+per-package pointers in wheels-v*/ and sdists-v*/). An unpacked wheel still
+has its dist-info RECORD, so it is zipped back into a wheel. Entries are
+written in sorted order with a fixed timestamp, so the same cache entry
+always gives the same bytes and the same sha256.
+
+Only the packages installed on the capturing machine are in its cache:
+packages locked for other platforms are listed as missing. Reproducing
+from a bundle installs exactly the bundled versions with
+`uv pip install --offline --no-index --find-links wheels/`, never
+contacting an index. Hashes recorded in uv.lock are those of the index's
+files, which the repacked wheels do not match, so the bundle's own
+manifest checksums are verified instead when it is opened.
+"""
+
+import json
+import logging
+import os
+import shutil
+import stat
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.file_hashing import hash_files
+from DHT.modules.lock_file_parsers import PYPI, LockedPackage, parse_lock_content
+from DHT.modules.platform_normalizer import get_cache_directory
+from DHT.modules.wheel_cache import cache_enabled, get_wheel_cache
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+BUNDLE_SUFFIX = ".dhtbundle"
+
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_NAME = "snapshot.json"
+WHEELS_DIR = "wheels"
+REQUIREMENTS_NAME = "requirements.txt"
+
+# Default number of wheels repacked at once; zlib releases the GIL
+BUNDLE_WORKERS = 4
+
+# Python lock files a bundle can be built from, in order of preference
+PYTHON_LOCK_FILES = ("uv.lock", "poetry.lock", "Pipfile.lock", "requirements.txt")
+
+# Lock sources (as kind+location) that are not index releases
+_LOCAL_SOURCES = ("git", "url", "path", "directory", "editable", "virtual", "file")
+
+# Earliest timestamp a zip entry can hold; used for every entry so repacking is reproducible
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class BundledWheel:
+    """A wheel in a bundle."""
+
+    name: str
+    version: str
+    filename: str
+    sha256: str
+
+
+@dataclass
+class BundleManifest:
+    """Contents of a bundle."""
+
+    snapshot_id: str
+    lock_file: str | None
+    created_at: float = 0.0
+    wheels: list[BundledWheel] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)  # "name==version" not found in any cache
+    format: int = BUNDLE_FORMAT
+
+    def requirements(self) -> str:
+        """Return requirement lines pinning every bundled package to its bundled version."""
+        pins = dict.fromkeys(f"{wheel.name}=={wheel.version}" for wheel in self.wheels)
+        return "".join(f"{pin}\n" for pin in sorted(pins))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BundleManifest:
+        """
+        Create a manifest from its dictionary form.
+
+        Raises:
+            ValueError: If the manifest has an unsupported format or is malformed
+        """
+        if data.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported bundle format: {data.get('format')!r}")
+        try:
+            return cls(
+                snapshot_id=data["snapshot_id"],
+                lock_file=data.get("lock_file"),
+                created_at=data.get("created_at", 0.0),
+                wheels=[BundledWheel(**wheel) for wheel in data.get("wheels", [])],
+                missing=list(data.get("missing", [])),
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed bundle manifest: {e}") from e
+
+
+@dataclass
+class ExtractedBundle:
+    """A bundle unpacked into a directory and verified."""
+
+    root: Path
+    manifest: BundleManifest
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.root / SNAPSHOT_NAME
+
+    @property
+    def wheels_dir(self) -> Path:
+        return self.root / WHEELS_DIR
+
+    @property
+    def requirements_path(self) -> Path:
+        return self.root / REQUIREMENTS_NAME
+
+
+def uv_cache_dirs() -> list[Path]:
+    """Return the uv caches to take wheels from: DHT's shared cache first, then uv's own."""
+    candidates = []
+    if cache_enabled():
+        candidates.append(get_wheel_cache().uv_dir)
+    if os.environ.get("UV_CACHE_DIR"):
+        candidates.append(Path(os.environ["UV_CACHE_DIR"]).expanduser())
+    candidates.append(get_cache_directory() / "uv")
+
+    found: list[Path] = []
+    for candidate in candidates:
+        if candidate.is_dir() and candidate.resolve() not in [path.resolve() for path in found]:
+            found.append(candidate)
+    return found
+
+
+def locked_python_packages(snapshot: EnvironmentSnapshot) -> tuple[str | None, list[LockedPackage]]:
+    """
+    Return the snapshot's Python lock file and its packages pinned to an index release.
+
+    Packages from git, URLs or local paths (including the project itself) and
+    unpinned requirements are left out: they cannot be looked up in the cache by version.
+
+    Raises:
+        ValueError: If the lock file is malformed
+    """
+    for lock_name in PYTHON_LOCK_FILES:
+        if lock_name in snapshot.lock_files:
+            graph = parse_lock_content(lock_name, snapshot.lock_files[lock_name])
+            if graph.ecosystem != PYPI:
+                continue
+            packages = [
+                package
+                for package in graph.packages
+                if package.version
+                and package.version[0].isalnum()
+                and package.source.partition("+")[0] not in _LOCAL_SOURCES
+            ]
+            return lock_name, packages
+    return None, []
+
+
+def _dist_info(archive: Path) -> Path | None:
+    return next((path for path in archive.glob("*.dist-info") if path.is_dir()), None)
+
+
+def find_cached_wheels(name: str, version: str, cache_dirs: Sequence[Path]) -> list[Path]:
+    """
+    Find the unpacked wheels of a package version in uv caches.
+
+    Args:
+        name: Canonical package name
+        version: Exact version
+        cache_dirs: uv cache directories, searched in order
+
+    Returns:
+        Unpacked wheel directories, one per distinct wheel
+    """
+    archives: list[Path] = []
+    for cache_dir in cache_dirs:
+        # Downloaded wheels, then wheels uv built from source distributions
+        pointers = [
+            *cache_dir.glob(f"wheels-v*/*/{name}/{version}-*"),
+            *cache_dir.glob(f"sdists-v*/*/{name}/{version}/*/*"),
+        ]
+        for pointer in sorted(pointers):
+            if pointer.suffix in (".http", ".msgpack", ".lock", ".rev") or not pointer.is_dir():
+                continue
+            archive = Path(os.path.realpath(pointer))
+            dist_info = _dist_info(archive)
+            if dist_info is None or not dist_info.name.endswith(f"-{version}.dist-info"):
+                continue
+            if archive not in archives:
+                archives.append(archive)
+    return archives
+
+
+def wheel_filename(archive: Path) -> str:
+    """
+    Return the file name of the wheel an unpacked wheel directory came from.
+
+    Raises:
+        ValueError: If the directory has no dist-info or no wheel tags
+    """
+    dist_info = _dist_info(archive)
+    if dist_info is None:
+        raise ValueError(f"No .dist-info directory in {archive}")
+    distribution = dist_info.name[: -len(".dist-info")]
+
+    tags: list[tuple[str, ...]] = []
+    build = ""
+    for line in (dist_info / "WHEEL").read_text(encoding="utf-8").splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() == "Tag":
+            tags.append(tuple(value.strip().split("-", 2)))
+        elif key.strip() == "Build":
+            build = f"-{value.strip()}"
+    if not tags or any(len(tag) != 3 for tag in tags):
+        raise ValueError(f"No valid wheel tags in {dist_info / 'WHEEL'}")
+
+    # Compressed tag sets, as in py2.py3-none-any
+    parts = [".".join(dict.fromkeys(tag[i] for tag in tags)) for i in range(3)]
+    return f"{distribution}{build}-{'-'.join(parts)}.whl"
+
+
+def repack_wheel(archive: Path, dest_dir: Path) -> Path:
+    """
+    Zip an unpacked wheel back into a wheel file.
+
+    Entries are sorted, with the dist-info directory last as the wheel
+    specification recommends, and all carry the same timestamp, so the
+    result only depends on the unpacked files.
+
+    Returns:
+        Path of the wheel file in dest_dir
+    """
+    target = Path(dest_dir) / wheel_filename(archive)
+
+    def order(path: Path) -> tuple[bool, str]:
+        relative = path.relative_to(archive)
+        return relative.parts[0].endswith(".dist-info"), relative.as_posix()
+
+    files = sorted((path for path in archive.rglob("*") if path.is_file()), key=order)
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as wheel:
+        for path in files:
+            info = zipfile.ZipInfo(path.relative_to(archive).as_posix(), date_time=_ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            mode = 0o755 if path.stat().st_mode & stat.S_IXUSR else 0o644
+            info.external_attr = (stat.S_IFREG | mode) << 16
+            with open(path, "rb") as source, wheel.open(info, "w") as entry:
+                shutil.copyfileobj(source, entry, 1024 * 1024)
+    return target
+
+
+def _add_to_tar(tar: tarfile.TarFile, path: Path, arcname: str) -> None:
+    info = tar.gettarinfo(str(path), arcname)
+    info.mtime, info.uid, info.gid, info.uname, info.gname = 0, 0, 0, "", ""
+    with open(path, "rb") as f:
+        tar.addfile(info, f)
+
+
+def create_bundle(
+    snapshot: EnvironmentSnapshot,
+    output: Path,
+    cache_dirs: Sequence[Path] | None = None,
+    strict: bool = False,
+    max_workers: int = BUNDLE_WORKERS,
+) -> BundleManifest:
+    """
+    Package a snapshot and the wheels of its locked Python packages into one archive.
+
+    Args:
+        snapshot: Snapshot to bundle
+        output: Bundle file to write
+        cache_dirs: uv cache directories to take wheels from (default: uv_cache_dirs())
+        strict: Fail if any locked package is not in the caches
+        max_workers: Maximum number of wheels repacked at once
+
+    Returns:
+        The bundle's manifest
+
+    Raises:
+        ValueError: If strict and packages are missing, or the lock file is malformed
+        OSError: If the bundle cannot be written
+    """
+    cache_dirs = uv_cache_dirs() if cache_dirs is None else list(cache_dirs)
+    lock_name, packages = locked_python_packages(snapshot)
+    manifest = BundleManifest(snapshot_id=snapshot.snapshot_id, lock_file=lock_name, created_at=time.time())
+
+    # The same wheel can be cached more than once (several caches or indexes); bundle it once
+    found: dict[str, tuple[LockedPackage, Path]] = {}
+    for package in packages:
+        archives = find_cached_wheels(package.name, package.version, cache_dirs)
+        if not archives:
+            manifest.missing.append(f"{package.name}=={package.version}")
+        for archive in archives:
+            found.setdefault(wheel_filename(archive), (package, archive))
+
+    if strict and manifest.missing:
+        raise ValueError(f"Not in the local uv cache: {', '.join(manifest.missing)}")
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="dht-bundle-") as staging_name:
+        staging = Path(staging_name)
+        wheels_dir = staging / WHEELS_DIR
+        wheels_dir.mkdir()
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            wheels = list(executor.map(lambda item: repack_wheel(item[1], wheels_dir), found.values()))
+        checksums = hash_files(wheels, normalize_newlines=False)
+        for (package, _), wheel in zip(found.values(), wheels, strict=True):
+            manifest.wheels.append(BundledWheel(package.name, package.version, wheel.name, checksums[wheel]))
+
+        EnvironmentSnapshotIO().save_snapshot(snapshot, staging / SNAPSHOT_NAME)
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest.to_dict(), indent=2, sort_keys=True), encoding="utf-8")
+
+        fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            # Wheels are already compressed; the archive only groups the files
+            with tarfile.open(tmp_name, "w") as tar:
+                _add_to_tar(tar, staging / MANIFEST_NAME, MANIFEST_NAME)
+                _add_to_tar(tar, staging / SNAPSHOT_NAME, SNAPSHOT_NAME)
+                for bundled in manifest.wheels:
+                    _add_to_tar(tar, wheels_dir / bundled.filename, f"{WHEELS_DIR}/{bundled.filename}")
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, output)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    logger.info(
+        f"Bundled snapshot {snapshot.snapshot_id} with {len(manifest.wheels)} wheels into {output}"
+        + (f"; missing {len(manifest.missing)} packages" if manifest.missing else "")
+    )
+    return manifest
+
+
+def _safe_members(tar: tarfile.TarFile, dest: Path) -> Iterable[tarfile.TarInfo]:
+    root = dest.resolve()
+    for member in tar.getmembers():
+        target = (root / member.name).resolve()
+        if not member.isfile() and not member.isdir():
+            raise ValueError(f"Unexpected entry in bundle: {member.name}")
+        if target != root and root not in target.parents:
+            raise ValueError(f"Bundle entry escapes the extraction directory: {member.name}")
+        yield member
+
+
+def open_bundle(bundle: Path, dest: Path) -> ExtractedBundle:
+    """
+    Extract a bundle and verify its wheels against the manifest.
+
+    Args:
+        bundle: Bundle file
+        dest: Directory to extract into
+
+    Returns:
+        ExtractedBundle, with a requirements file pinning the bundled versions
+
+    Raises:
+        ValueError: If the bundle is malformed or a wheel does not match its checksum
+        OSError: If the bundle cannot be read
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    try:
+        with tarfile.open(bundle, "r:*") as tar:
+            members = list(_safe_members(tar, dest))
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(dest, members=members, filter="data")
+            else:
+                tar.extractall(dest, members=members)
+        manifest = BundleManifest.from_dict(json.loads((dest / MANIFEST_NAME).read_text(encoding="utf-8")))
+    except (tarfile.TarError, json.JSONDecodeError, FileNotFoundError) as e:
+        raise ValueError(f"Not a DHT bundle: {bundle}: {e}") from e
+
+    extracted = ExtractedBundle(dest, manifest)
+    expected = {extracted.wheels_dir / wheel.filename: wheel.sha256 for wheel in manifest.wheels}
+    actual = hash_files(expected, normalize_newlines=False)
+    corrupt = [path.name for path, checksum in expected.items() if actual.get(path) != checksum]
+    if corrupt:
+        raise ValueError(f"Bundle wheels do not match the manifest: {', '.join(corrupt)}")
+
+    extracted.requirements_path.write_text(manifest.requirements(), encoding="utf-8")
+    return extracted
+
+
+__all__ = [
+    "BUNDLE_FORMAT",
+    "BUNDLE_SUFFIX",
+    "BUNDLE_WORKERS",
+    "PYTHON_LOCK_FILES",
+    "BundledWheel",
+    "BundleManifest",
+    "ExtractedBundle",
+    "uv_cache_dirs",
+    "locked_python_packages",
+    "find_cached_wheels",
+    "wheel_filename",
+    "repack_wheel",
+    "create_bundle",
+    "open_bundle",
+]
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+snapshot_container.py - Binary snapshot container with lazily decoded sections
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created length-prefixed binary container for environment snapshots
+# - Sections (metadata, environment, project, reproduction) are compressed and decoded independently
+# - zlib compression by default, zstd when the zstandard package is installed
+# - Added benchmark comparing the container with JSON and YAML snapshot files
+#
+
+"""
+snapshot_container.py - Binary snapshot container with lazily decoded sections
+
+JSON and YAML snapshots must be parsed in full (YAML by a pure-Python parser)
+before any field can be read, even when the caller only wants tool versions.
+The container stores each top-level snapshot section separately:
+
+    magic "DHTSNAP\\0" | version u16 | section count u16
+    per section: name length u8 | codec u8 | offset u64 | length u64 | raw length u64 | crc32 u32 | name
+    section payloads: compact JSON, optionally compressed
+
+Opening a container reads only the header; a section is read, decompressed
+and decoded on first access. JSON and YAML remain the export formats.
+"""
+
+import json
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"DHTSNAP\x00"
+CONTAINER_VERSION = 1
+BINARY_SUFFIX = ".dhtsnap"
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+SECTIONS = ("metadata", "environment", "project", "reproduction")
+
+_HEADER = struct.Struct("<8sHH")
+_ENTRY = struct.Struct("<BBQQQI")
+
+
+def available_codecs() -> list[str]:
+    """Return the compression names usable in this environment."""
+    return [name for name, codec in CODECS.items() if codec != CODEC_ZSTD or zstandard is not None]
+
+
+def _compress(codec: int, raw: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.compress(raw, 6)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def _decompress(codec: int, payload: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Snapshot section is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == CODEC_NONE:
+        return payload
+    raise ValueError(f"Unknown snapshot section codec {codec}")
+
+
+def encode_container(data: dict[str, Any], compression: str = "zlib") -> bytes:
+    """
+    Encode a snapshot dictionary as a binary container.
+
+    Args:
+        data: Snapshot dictionary with one entry per section
+        compression: 'zlib', 'zstd' or 'none'
+
+    Returns:
+        bytes: Container contents
+
+    Raises:
+        ValueError: If the compression is unknown or unavailable
+    """
+    if compression not in available_codecs():
+        raise ValueError(f"Unsupported snapshot compression {compression!r}; available: {available_codecs()}")
+    codec = CODECS[compression]
+
+    names = [name.encode() for name in data]
+    payloads: list[tuple[bytes, int, int]] = []
+    for section in data.values():
+        raw = json.dumps(section, separators=(",", ":"), sort_keys=True).encode()
+        payloads.append((_compress(codec, raw), len(raw), zlib.crc32(raw)))
+
+    offset = _HEADER.size + sum(_ENTRY.size + len(name) for name in names)
+    parts = [_HEADER.pack(MAGIC, CONTAINER_VERSION, len(names))]
+    for name, (payload, raw_length, crc) in zip(names, payloads, strict=True):
+        parts.append(_ENTRY.pack(len(name), codec, offset, len(payload), raw_length, crc) + name)
+        offset += len(payload)
+    parts.extend(payload for payload, _, _ in payloads)
+    return b"".join(parts)
+
+
+def write_container(data: dict[str, Any], path: Path, compression: str = "zlib") -> Path:
+    """Write a snapshot dictionary to a binary container file."""
+    path = Path(path)
+    path.write_bytes(encode_container(data, compression))
+    return path
+
+
+def is_container(path: Path) -> bool:
+    """Check whether a file is a binary snapshot container."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotContainer:
+    """Read access to a binary snapshot container, decoding sections on demand."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open a container and read its section table.
+
+        Args:
+            path: Container file
+
+        Raises:
+            ValueError: If the file is not a supported container
+        """
+        self.path = Path(path)
+        self._entries: dict[str, tuple[int, int, int, int, int]] = {}
+        self._decoded: dict[str, Any] = {}
+
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{self.path} is not a snapshot container")
+            magic, version, count = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot container")
+            if version != CONTAINER_VERSION:
+                raise ValueError(f"{self.path}: unsupported snapshot container version {version}")
+            for _ in range(count):
+                name_length, codec, offset, length, raw_length, crc = _ENTRY.unpack(f.read(_ENTRY.size))
+                name = f.read(name_length).decode()
+                self._entries[name] = (codec, offset, length, raw_length, crc)
+
+    @property
+    def sections(self) -> list[str]:
+        """Names of the sections in file order."""
+        return list(self._entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def section(self, name: str) -> Any:
+        """
+        Return one decoded section, reading it from disk on first access.
+
+        Raises:
+            KeyError: If the container has no such section
+            ValueError: If the section is corrupt
+        """
+        if name in self._decoded:
+            return self._decoded[name]
+        codec, offset, length, raw_length, crc = self._entries[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            payload = f.read(length)
+        raw = _decompress(codec, payload)
+        if len(raw) != raw_length or zlib.crc32(raw) != crc:
+            raise ValueError(f"{self.path}: section {name!r} is corrupt")
+        self._decoded[name] = value = json.loads(raw)
+        return value
+
+    def to_dict(self) -> dict[str, Any]:
+        """Decode every section into a snapshot dictionary."""
+        return {name: self.section(name) for name in self._entries}
+
+
+def benchmark_formats(
+    data: dict[str, Any], directory: Path, repeat: int = 3, section: str = "environment"
+) -> dict[str, dict[str, float | int]]:
+    """
+    Compare snapshot file formats on size and load time.
+
+    Each format is loaded the way EnvironmentSnapshotIO loads it: JSON and YAML
+    in full, containers either in full or one section only.
+
+    Args:
+        data: Snapshot dictionary
+        directory: Scratch directory for the files
+        repeat: Runs per measurement; the fastest is reported
+        section: Section read by the partial load
+
+    Returns:
+        dict: Format name -> {"bytes", "save_s", "load_s", "section_s"}
+    """
+    import yaml
+
+    def best(func: Callable[..., Any], *args: Any) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(*args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def yaml_load(path: Path) -> Any:
+        with open(path) as f:
+            return yaml.safe_load(f)
+
+    def json_load(path: Path) -> Any:
+        with open(path) as f:
+            return json.load(f)
+
+    def yaml_save(path: Path) -> None:
+        with open(path, "w") as f:
+            yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+
+    def json_save(path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+    def container_load(path: Path) -> Any:
+        return SnapshotContainer(path).to_dict()
+
+    def container_section(path: Path) -> Any:
+        return SnapshotContainer(path).section(section)
+
+    results: dict[str, dict[str, float | int]] = {}
+    text_formats = {"json": (json_save, json_load), "yaml": (yaml_save, yaml_load)}
+    for name, (save, load) in text_formats.items():
+        path = Path(directory) / f"bench.{name}"
+        save_s = best(save, path)
+        load_s = best(load, path)
+        results[name] = {"bytes": path.stat().st_size, "save_s": save_s, "load_s": load_s, "section_s": load_s}
+
+    for compression in available_codecs():
+        path = Path(directory) / f"bench-{compression}{BINARY_SUFFIX}"
+        save_s = best(write_container, data, path, compression)
+        results[f"binary-{compression}"] = {
+            "bytes": path.stat().st_size,
+            "save_s": save_s,
+            "load_s": best(container_load, path),
+            "section_s": best(container_section, path),
+        }
+    return results
+
+
+def synthetic_snapshot(packages: int = 2000, lock_size: int = 2_000_000) -> dict[str, Any]:
+    """Build a large snapshot dictionary for benchmarking."""
+    lock = "".join(f'[[package]]\nname = "pkg{i}"\nversion = "1.{i}.0"\n\n' for i in range(packages))
+    lock = (lock * (lock_size // max(len(lock), 1) + 1))[:lock_size]
+    return {
+        "metadata": {"timestamp": "2024-06-01T00:00:00", "platform": "linux", "snapshot_id": "bench"},
+        "environment": {
+            "python_version": "3.11.5",
+            "python_packages": {f"pkg{i}": f"1.{i}.0" for i in range(packages)},
+            "system_packages": {f"lib{i}": f"2.{i}" for i in range(packages)},
+            "tool_versions": {f"tool{i}": f"0.{i}" for i in range(100)},
+            "environment_variables": {f"VAR_{i}": "x" * 40 for i in range(200)},
+            "path_entries": [f"/opt/tool{i}/bin" for i in range(50)],
+        },
+        "project": {"lock_files": {"uv.lock": lock}, "config_files": {}, "checksums": {}},
+        "reproduction": {"steps": [f"step {i}" for i in range(50)], "platform_notes": []},
+    }
+
+
+def format_benchmark(results: dict[str, dict[str, float | int]]) -> str:
+    """Render benchmark results as a text table."""
+    lines = [f"{'FORMAT':<14}{'SIZE':>12}{'SAVE ms':>10}{'LOAD ms':>10}{'SECTION ms':>12}"]
+    for name, row in results.items():
+        lines.append(
+            f"{name:<14}{row['bytes']:>12,}{row['save_s'] * 1000:>10.1f}"
+            f"{row['load_s'] * 1000:>10.1f}{row['section_s'] * 1000:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    """Benchmark snapshot formats on a snapshot file or a synthetic snapshot."""
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark snapshot file formats")
+    parser.add_argument("snapshot", nargs="?", help="JSON, YAML or binary snapshot (default: synthetic)")
+    parser.add_argument("--packages", type=int, default=2000, help="Packages in the synthetic snapshot")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    if args.snapshot:
+        path = Path(args.snapshot)
+        if is_container(path):
+            data = SnapshotContainer(path).to_dict()
+        elif path.suffix.lower() in (".yaml", ".yml"):
+            import yaml
+
+            data = yaml.safe_load(path.read_text())
+        else:
+            data = json.loads(path.read_text())
+    else:
+        data = synthetic_snapshot(args.packages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(format_benchmark(benchmark_formats(data, Path(tmp), repeat=args.repeat)))
+    return 0
+
+
+__all__ = [
+    "MAGIC",
+    "CONTAINER_VERSION",
+    "BINARY_SUFFIX",
+    "SECTIONS",
+    "available_codecs",
+    "encode_container",
+    "write_container",
+    "is_container",
+    "SnapshotContainer",
+    "benchmark_formats",
+    "synthetic_snapshot",
+    "format_benchmark",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
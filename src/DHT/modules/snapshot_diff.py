@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+snapshot_diff.py - Compare environment snapshots and report drift
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created snapshot diff engine for packages, tools, env vars, PATH and project files
+# - Lock and config files are compared by checksum; contents are only read when checksums differ
+# - Added fleet drift report comparing many snapshots against a baseline
+#
+
+"""
+snapshot_diff.py - Compare environment snapshots and report drift
+
+Until now the only way to compare two snapshots was to reproduce one and read
+ReproductionResult.version_mismatches. This module compares the saved files
+directly. Snapshots are read as raw section dictionaries (binary containers
+decode only the sections needed), whole sections are compared first, and lock
+and config files are compared by checksum so their contents - possibly held in
+a blob store - are only loaded for the files that actually changed.
+"""
+
+import difflib
+import itertools
+import json
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from DHT.modules.snapshot_blob_store import BLOB_SECTIONS, BlobStore, content_checksum, is_blob_ref
+from DHT.modules.snapshot_container import SnapshotContainer, is_container
+
+# Snapshot fields compared key by key, by section
+MAPPING_FIELDS = {
+    "environment": ("python_packages", "system_packages", "tool_versions", "environment_variables"),
+}
+# Scalar fields compared as a whole, by section
+SCALAR_FIELDS = {
+    "metadata": ("platform", "architecture", "dht_version"),
+    "environment": ("python_version",),
+    "project": ("project_type",),
+}
+
+# Unified diff lines kept per changed file
+MAX_DIFF_LINES = 200
+
+
+class SnapshotSource:
+    """Raw, lazily loaded sections of a saved snapshot."""
+
+    def __init__(self, path: Path | str, blob_store: Path | None = None) -> None:
+        """
+        Open a snapshot file.
+
+        Args:
+            path: JSON, YAML or binary snapshot
+            blob_store: Blob store directory, overriding the one recorded in the snapshot
+        """
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Snapshot file not found: {self.path}")
+        self._blob_store = blob_store
+        self._container: SnapshotContainer | None = None
+        self._data: dict[str, Any] | None = None
+        if is_container(self.path):
+            self._container = SnapshotContainer(self.path)
+
+    def section(self, name: str) -> dict[str, Any]:
+        """Return a section as stored, without resolving blob references."""
+        if self._container is not None:
+            return self._container.section(name) if name in self._container else {}
+        if self._data is None:
+            with open(self.path) as f:
+                self._data = yaml.safe_load(f) if self.path.suffix.lower() in (".yaml", ".yml") else json.load(f)
+        return self._data.get(name) or {}
+
+    @property
+    def snapshot_id(self) -> str:
+        """Snapshot id, or the file name when none is recorded."""
+        return str(self.section("metadata").get("snapshot_id") or self.path.stem)
+
+    def file_checksums(self, kind: str) -> dict[str, str]:
+        """Return filename -> sha256 for lock_files or config_files."""
+        project = self.section("project")
+        recorded = project.get("checksums") or {}
+        checksums = {}
+        for name, content in (project.get(kind) or {}).items():
+            if is_blob_ref(content):
+                checksums[name] = content["blob"]
+            else:
+                checksums[name] = recorded.get(name) or content_checksum(content)
+        return checksums
+
+    def file_content(self, kind: str, name: str) -> str:
+        """Return the content of a lock or config file, reading its blob if needed."""
+        project = self.section("project")
+        content = (project.get(kind) or {})[name]
+        if not is_blob_ref(content):
+            return str(content)
+        store = self._blob_store
+        if store is None:
+            store = self.path.parent / project.get("blob_store", "blobs")
+        return BlobStore(store).get(content["blob"])
+
+
+@dataclass
+class MappingDiff:
+    """Key-level differences of a name -> value mapping."""
+
+    added: dict[str, Any] = field(default_factory=dict)
+    removed: dict[str, Any] = field(default_factory=dict)
+    changed: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "changed": {key: list(values) for key, values in self.changed.items()},
+        }
+
+
+def diff_mappings(old: dict[str, Any], new: dict[str, Any]) -> MappingDiff:
+    """Compare two mappings key by key."""
+    if old == new:
+        return MappingDiff()
+    return MappingDiff(
+        added={key: new[key] for key in new.keys() - old.keys()},
+        removed={key: old[key] for key in old.keys() - new.keys()},
+        changed={key: (old[key], new[key]) for key in old.keys() & new.keys() if old[key] != new[key]},
+    )
+
+
+@dataclass
+class FileDiff:
+    """Difference of one lock or config file."""
+
+    status: str  # "added", "removed" or "changed"
+    old_checksum: str | None = None
+    new_checksum: str | None = None
+    diff: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "status": self.status,
+            "old_checksum": self.old_checksum,
+            "new_checksum": self.new_checksum,
+            "diff": self.diff,
+        }
+
+
+@dataclass
+class SnapshotDiff:
+    """Differences between two snapshots."""
+
+    old_id: str
+    new_id: str
+    fields: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    mappings: dict[str, MappingDiff] = field(default_factory=dict)
+    path_entries: MappingDiff = field(default_factory=MappingDiff)
+    path_order_changed: bool = False
+    files: dict[str, FileDiff] = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        """Check whether the snapshots differ."""
+        return bool(
+            self.fields or any(self.mappings.values()) or self.path_entries or self.path_order_changed or self.files
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "old": self.old_id,
+            "new": self.new_id,
+            "has_changes": self.has_changes,
+            "fields": {key: list(values) for key, values in self.fields.items()},
+            **{name: diff.to_dict() for name, diff in self.mappings.items() if diff},
+            "path_entries": {
+                "added": sorted(self.path_entries.added),
+                "removed": sorted(self.path_entries.removed),
+                "order_changed": self.path_order_changed,
+            },
+            "files": {name: diff.to_dict() for name, diff in self.files.items()},
+        }
+
+    def summary(self, show_contents: bool = True) -> str:
+        """Render a human-readable summary."""
+        if not self.has_changes:
+            return f"{self.old_id} -> {self.new_id}: no differences"
+        lines = [f"{self.old_id} -> {self.new_id}:"]
+        for key, (old, new) in sorted(self.fields.items()):
+            lines.append(f"  {key}: {old} -> {new}")
+        for name, diff in self.mappings.items():
+            if not diff:
+                continue
+            lines.append(f"  {name}:")
+            lines.extend(f"    + {key} {value}" for key, value in sorted(diff.added.items()))
+            lines.extend(f"    - {key} {value}" for key, value in sorted(diff.removed.items()))
+            lines.extend(f"    ~ {key} {old} -> {new}" for key, (old, new) in sorted(diff.changed.items()))
+        if self.path_entries or self.path_order_changed:
+            lines.append("  path_entries:")
+            lines.extend(f"    + {entry}" for entry in sorted(self.path_entries.added))
+            lines.extend(f"    - {entry}" for entry in sorted(self.path_entries.removed))
+            if self.path_order_changed:
+                lines.append("    ~ order changed")
+        for name, file_diff in sorted(self.files.items()):
+            lines.append(f"  {name}: {file_diff.status}")
+            if show_contents:
+                lines.extend(f"    {line}" for line in file_diff.diff)
+        return "\n".join(lines)
+
+
+def _diff_path_entries(old: list[str], new: list[str]) -> tuple[MappingDiff, bool]:
+    if old == new:
+        return MappingDiff(), False
+    old_set, new_set = set(old), set(new)
+    entries = MappingDiff(added=dict.fromkeys(new_set - old_set), removed=dict.fromkeys(old_set - new_set))
+    # PATH precedence matters: the same directories in another order can resolve other tools
+    common = old_set & new_set
+    order_changed = [e for e in old if e in common] != [e for e in new if e in common]
+    return entries, order_changed
+
+
+def _diff_files(
+    old: SnapshotSource, new: SnapshotSource, kind: str, with_contents: bool, max_lines: int
+) -> dict[str, FileDiff]:
+    old_sums, new_sums = old.file_checksums(kind), new.file_checksums(kind)
+    files: dict[str, FileDiff] = {}
+    for name in sorted(old_sums.keys() | new_sums.keys()):
+        old_sum, new_sum = old_sums.get(name), new_sums.get(name)
+        if old_sum == new_sum:
+            continue
+        status = "added" if old_sum is None else "removed" if new_sum is None else "changed"
+        file_diff = FileDiff(status=status, old_checksum=old_sum, new_checksum=new_sum)
+        if with_contents and status == "changed":
+            try:
+                lines = difflib.unified_diff(
+                    old.file_content(kind, name).splitlines(),
+                    new.file_content(kind, name).splitlines(),
+                    fromfile=f"{old.snapshot_id}/{name}",
+                    tofile=f"{new.snapshot_id}/{name}",
+                    lineterm="",
+                )
+                file_diff.diff = list(itertools.islice(lines, max_lines))
+            except FileNotFoundError as e:
+                file_diff.diff = [f"(contents unavailable: {e})"]
+        files[name] = file_diff
+    return files
+
+
+def diff_snapshots(
+    old: SnapshotSource | Path | str,
+    new: SnapshotSource | Path | str,
+    with_contents: bool = True,
+    max_lines: int = MAX_DIFF_LINES,
+) -> SnapshotDiff:
+    """
+    Compare two snapshots.
+
+    Args:
+        old: Baseline snapshot (file or opened source)
+        new: Snapshot compared against the baseline
+        with_contents: Produce unified diffs of changed lock and config files
+        max_lines: Unified diff lines kept per file
+
+    Returns:
+        SnapshotDiff
+    """
+    old = old if isinstance(old, SnapshotSource) else SnapshotSource(old)
+    new = new if isinstance(new, SnapshotSource) else SnapshotSource(new)
+    result = SnapshotDiff(old_id=old.snapshot_id, new_id=new.snapshot_id)
+
+    for section, names in SCALAR_FIELDS.items():
+        old_section, new_section = old.section(section), new.section(section)
+        for name in names:
+            if old_section.get(name) != new_section.get(name):
+                result.fields[name] = (old_section.get(name), new_section.get(name))
+
+    old_env, new_env = old.section("environment"), new.section("environment")
+    for name in MAPPING_FIELDS["environment"]:
+        result.mappings[name] = diff_mappings(old_env.get(name) or {}, new_env.get(name) or {})
+    result.path_entries, result.path_order_changed = _diff_path_entries(
+        old_env.get("path_entries") or [], new_env.get("path_entries") or []
+    )
+
+    for kind in BLOB_SECTIONS:
+        result.files.update(_diff_files(old, new, kind, with_contents, max_lines))
+    return result
+
+
+@dataclass
+class DriftReport:
+    """Differences of many snapshots against one baseline."""
+
+    baseline: str
+    diffs: list[SnapshotDiff] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def drifted(self) -> list[SnapshotDiff]:
+        """Return the diffs of snapshots that differ from the baseline."""
+        return [diff for diff in self.diffs if diff.has_changes]
+
+    def drift_counts(self) -> dict[str, int]:
+        """Count, per drifting item, how many snapshots differ on it."""
+        counts: dict[str, int] = {}
+
+        def bump(key: str) -> None:
+            counts[key] = counts.get(key, 0) + 1
+
+        for diff in self.diffs:
+            for name in diff.fields:
+                bump(name)
+            for category, mapping in diff.mappings.items():
+                for key in (*mapping.added, *mapping.removed, *mapping.changed):
+                    bump(f"{category}.{key}")
+            if diff.path_entries or diff.path_order_changed:
+                bump("path_entries")
+            for name in diff.files:
+                bump(f"files.{name}")
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {
+            "baseline": self.baseline,
+            "snapshots": len(self.diffs),
+            "drifted": [diff.new_id for diff in self.drifted()],
+            "drift_counts": self.drift_counts(),
+            "diffs": [diff.to_dict() for diff in self.drifted()],
+            "errors": dict(self.errors),
+        }
+
+    def summary(self) -> str:
+        """Render a human-readable drift summary."""
+        lines = [f"Baseline {self.baseline}: {len(self.drifted())} of {len(self.diffs)} snapshot(s) drifted"]
+        for key, count in self.drift_counts().items():
+            lines.append(f"  {count:>5}  {key}")
+        for path, error in self.errors.items():
+            lines.append(f"  skipped {path}: {error}")
+        return "\n".join(lines)
+
+
+def diff_against_baseline(
+    baseline: Path | str, snapshots: Iterable[Path | str], with_contents: bool = False, max_workers: int = 8
+) -> DriftReport:
+    """
+    Compare many snapshots against a baseline.
+
+    The baseline is opened once and shared; snapshots are read in parallel.
+
+    Args:
+        baseline: Baseline snapshot file
+        snapshots: Snapshot files to compare
+        with_contents: Produce unified diffs of changed files (slower)
+        max_workers: Threads used to read snapshots
+
+    Returns:
+        DriftReport, with unreadable snapshots listed in errors
+    """
+    base = SnapshotSource(baseline)
+    # Decode the shared baseline sections before the workers read them concurrently
+    for name in ("metadata", "environment", "project"):
+        base.section(name)
+    paths = [Path(path) for path in snapshots]
+
+    def compare(path: Path) -> SnapshotDiff | str:
+        try:
+            return diff_snapshots(base, SnapshotSource(path), with_contents=with_contents)
+        except (OSError, ValueError, KeyError, yaml.YAMLError) as e:
+            return str(e)
+
+    report = DriftReport(baseline=base.snapshot_id)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths) or 1))) as executor:
+        for path, result in zip(paths, executor.map(compare, paths), strict=True):
+            if isinstance(result, str):
+                report.errors[str(path)] = result
+            else:
+                report.diffs.append(result)
+    return report
+
+
+__all__ = [
+    "MAX_DIFF_LINES",
+    "SnapshotSource",
+    "MappingDiff",
+    "diff_mappings",
+    "FileDiff",
+    "SnapshotDiff",
+    "diff_snapshots",
+    "DriftReport",
+    "diff_against_baseline",
+]
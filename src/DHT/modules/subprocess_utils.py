@@ -16,6 +16,7 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Added context manager for proper resource cleanup
 # - Included security features like sensitive data masking
 # - Fixed all type annotations for mypy strict mode compliance
+# - check_command_exists uses the PATH index instead of spawning which/where
 #
 
 """
@@ -43,6 +44,8 @@ from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
+from .path_index import is_tool_installed
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -472,16 +475,7 @@ def run_shell_command(command: str, **kwargs: Any) -> dict[str, Any]:
 
 def check_command_exists(command: str) -> bool:
     """Check if a command exists in PATH."""
-    try:
-        result = run_subprocess(["which", command], check=False, log_command=False)
-        return bool(result["success"])
-    except ProcessNotFoundError:
-        # 'which' itself not found (Windows?)
-        try:
-            result = run_subprocess(["where", command], check=False, log_command=False)
-            return bool(result["success"])
-        except ProcessNotFoundError:
-            return False
+    return is_tool_installed(command)
 
 
 __all__ = [
@@ -11,6 +11,10 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Extracted PRACTICAL_TAXONOMY to system_taxonomy_data.py and system_taxonomy_data2.py
 # - Extracted constants to system_taxonomy_constants.py
 # - Retained core functionality with delegation to helper modules
+# - Taxonomy data is loaded on first use instead of at import
+# - Platform exclusions and tool categories are served from indexes built once
+# - get_category_for_platform builds filtered copies without copy.deepcopy
+# - Added get_all_tool_categories()
 #
 
 """
@@ -27,15 +31,13 @@ The taxonomy is designed to be:
 - Extensible (easy to add new tools and categories)
 """
 
-import copy
 import platform
-from typing import Any
+import threading
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
 
-from DHT.modules.system_taxonomy_constants import CROSS_PLATFORM_TOOLS, PLATFORM_EXCLUSIONS, PLATFORM_TOOLS
-
-# Import taxonomy data and constants from helper modules
-from DHT.modules.system_taxonomy_data import PRACTICAL_TAXONOMY as PRACTICAL_TAXONOMY_PART1
-from DHT.modules.system_taxonomy_data2 import PRACTICAL_TAXONOMY_PART2
+from DHT.modules.system_taxonomy_constants import PLATFORM_EXCLUSIONS, PLATFORM_TOOLS
 
 
 def get_current_platform() -> str:
@@ -66,6 +68,10 @@ def merge_taxonomies() -> dict[str, Any]:
     Returns:
         Dict containing the complete practical taxonomy
     """
+    # Import taxonomy data from helper modules
+    from DHT.modules.system_taxonomy_data import PRACTICAL_TAXONOMY as PRACTICAL_TAXONOMY_PART1
+    from DHT.modules.system_taxonomy_data2 import PRACTICAL_TAXONOMY_PART2
+
     # Merge the two taxonomy parts
     complete_taxonomy: dict[str, Any] = {}
     complete_taxonomy.update(PRACTICAL_TAXONOMY_PART1)
@@ -73,8 +79,75 @@ def merge_taxonomies() -> dict[str, Any]:
     return complete_taxonomy
 
 
-# Create the complete PRACTICAL_TAXONOMY by merging parts
-PRACTICAL_TAXONOMY: dict[str, Any] = merge_taxonomies()
+_taxonomy: dict[str, Any] | None = None
+_taxonomy_lock = threading.Lock()
+
+
+def _load_taxonomy() -> dict[str, Any]:
+    """Return the complete PRACTICAL_TAXONOMY, merging the parts on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = merge_taxonomies()
+    return _taxonomy
+
+
+if TYPE_CHECKING:
+    # Provided lazily by __getattr__
+    PRACTICAL_TAXONOMY: dict[str, Any]
+
+
+def __getattr__(name: str) -> Any:
+    """Load PRACTICAL_TAXONOMY on first access instead of at import."""
+    if name == "PRACTICAL_TAXONOMY":
+        return _load_taxonomy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@cache
+def _excluded_tools(platform_name: str) -> frozenset[str]:
+    """Tools explicitly excluded on a platform."""
+    return frozenset(PLATFORM_EXCLUSIONS.get(platform_name, ()))
+
+
+@lru_cache(maxsize=1)
+def _tool_category_index() -> MappingProxyType[str, str]:
+    """Map every tool to the first category path that lists it."""
+    index: dict[str, str] = {}
+    for category_name, category_data in _load_taxonomy().items():
+        if "tools" in category_data:
+            for tool_name in category_data["tools"]:
+                index.setdefault(tool_name, category_name)
+
+        # Handle nested categories
+        if "categories" in category_data:
+            for subcat_name, subcat_data in category_data["categories"].items():
+                if "tools" in subcat_data:
+                    for tool_name in subcat_data["tools"]:
+                        index.setdefault(tool_name, f"{category_name}.{subcat_name}")
+
+                # Handle language-specific package managers
+                elif isinstance(subcat_data, dict):
+                    for lang_name, lang_tools in subcat_data.items():
+                        if lang_name != "description" and isinstance(lang_tools, list):
+                            for tool_name in lang_tools:
+                                index.setdefault(tool_name, f"{category_name}.{subcat_name}.{lang_name}")
+    return MappingProxyType(index)
+
+
+def _copy_tree(value: Any) -> Any:
+    """Copy the dict/list structure of taxonomy data (leaves are immutable)."""
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    return value
+
+
+def _filter_tools(tools: dict[str, Any], excluded: frozenset[str]) -> dict[str, Any]:
+    """Copy a tools mapping without the excluded tools."""
+    return {name: _copy_tree(info) for name, info in tools.items() if name not in excluded}
 
 
 def is_tool_available_on_platform(tool_name: str, platform_name: str | None = None) -> bool:
@@ -91,24 +164,10 @@ def is_tool_available_on_platform(tool_name: str, platform_name: str | None = No
     if platform_name is None:
         platform_name = get_current_platform()
 
-    # Check if tool is explicitly excluded on this platform
-    if platform_name in PLATFORM_EXCLUSIONS:
-        if tool_name in PLATFORM_EXCLUSIONS[platform_name]:
-            return False
-
-    # Check if it's a cross-platform tool (available everywhere)
-    if tool_name in CROSS_PLATFORM_TOOLS:
-        return True
-
-    # Check if it's a platform-specific tool
-    if platform_name in PLATFORM_TOOLS:
-        for _category, tools in PLATFORM_TOOLS[platform_name].items():
-            if tool_name in tools:
-                return True
-
-    # If not explicitly excluded and not in platform-specific lists,
-    # we assume it might be available (user may have installed it)
-    return True
+    # Tools are assumed available unless explicitly excluded on the platform:
+    # cross-platform and platform-specific tools are available, and anything
+    # else might have been installed by the user
+    return tool_name not in _excluded_tools(platform_name)
 
 
 def filter_tools_for_platform(tools: dict[str, Any], platform_name: str | None = None) -> dict[str, Any]:
@@ -125,12 +184,8 @@ def filter_tools_for_platform(tools: dict[str, Any], platform_name: str | None =
     if platform_name is None:
         platform_name = get_current_platform()
 
-    filtered = {}
-    for tool_name, tool_info in tools.items():
-        if is_tool_available_on_platform(tool_name, platform_name):
-            filtered[tool_name] = tool_info
-
-    return filtered
+    excluded = _excluded_tools(platform_name)
+    return {tool_name: tool_info for tool_name, tool_info in tools.items() if tool_name not in excluded}
 
 
 def get_category_for_platform(category_name: str, platform_name: str | None = None) -> dict[str, Any]:
@@ -147,29 +202,41 @@ def get_category_for_platform(category_name: str, platform_name: str | None = No
     if platform_name is None:
         platform_name = get_current_platform()
 
-    if category_name not in PRACTICAL_TAXONOMY:
+    source = _load_taxonomy().get(category_name)
+    if source is None:
         return {}
 
-    category: dict[str, Any] = copy.deepcopy(PRACTICAL_TAXONOMY[category_name])
-
-    # Handle nested categories (like package_managers)
-    if "categories" in category:
-        for subcat_name, subcat_data in category["categories"].items():
-            if "tools" in subcat_data:
-                subcat_data["tools"] = filter_tools_for_platform(subcat_data["tools"], platform_name)
-            # Handle language-specific package managers (different structure)
-            elif subcat_name == "language" and isinstance(subcat_data, dict):
-                # The language subcategory has a different structure:
-                # It has language names as keys instead of 'tools'
-                for lang_name, lang_tools in subcat_data.items():
-                    if lang_name != "description" and isinstance(lang_tools, list):
-                        # Filter list of tools
-                        filtered_tools = [
-                            tool for tool in lang_tools if is_tool_available_on_platform(tool, platform_name)
-                        ]
-                        subcat_data[lang_name] = filtered_tools
-    elif "tools" in category:
-        category["tools"] = filter_tools_for_platform(category["tools"], platform_name)
+    # Build the filtered copy in one pass instead of deep-copying then filtering
+    excluded = _excluded_tools(platform_name)
+    category: dict[str, Any] = {}
+    for key, value in source.items():
+        if key == "categories":
+            # Handle nested categories (like package_managers)
+            subcategories: dict[str, Any] = {}
+            for subcat_name, subcat_data in value.items():
+                if "tools" in subcat_data:
+                    subcategories[subcat_name] = {
+                        sub_key: _filter_tools(sub_value, excluded) if sub_key == "tools" else _copy_tree(sub_value)
+                        for sub_key, sub_value in subcat_data.items()
+                    }
+                # Handle language-specific package managers (different structure):
+                # language names are keys instead of 'tools'
+                elif subcat_name == "language" and isinstance(subcat_data, dict):
+                    subcategories[subcat_name] = {
+                        lang_name: (
+                            [tool for tool in lang_tools if tool not in excluded]
+                            if lang_name != "description" and isinstance(lang_tools, list)
+                            else _copy_tree(lang_tools)
+                        )
+                        for lang_name, lang_tools in subcat_data.items()
+                    }
+                else:
+                    subcategories[subcat_name] = _copy_tree(subcat_data)
+            category[key] = subcategories
+        elif key == "tools" and "categories" not in source:
+            category[key] = _filter_tools(value, excluded)
+        else:
+            category[key] = _copy_tree(value)
 
     return category
 
@@ -187,8 +254,9 @@ def get_tool_fields(category_name: str, tool_name: str) -> list[str]:
     """
     # For single category names, search directly
     if "." not in category_name:
-        if category_name in PRACTICAL_TAXONOMY:
-            category_data = PRACTICAL_TAXONOMY[category_name]
+        taxonomy = _load_taxonomy()
+        if category_name in taxonomy:
+            category_data = taxonomy[category_name]
 
             # Check direct tools
             if "tools" in category_data and tool_name in category_data["tools"]:
@@ -213,7 +281,7 @@ def get_tool_fields(category_name: str, tool_name: str) -> list[str]:
     else:
         # Handle nested category paths
         category_parts = category_name.split(".")
-        current_data = PRACTICAL_TAXONOMY
+        current_data = _load_taxonomy()
 
         # Navigate to the correct category
         for i, part in enumerate(category_parts):
@@ -258,7 +326,7 @@ def get_all_tools_for_platform(platform_name: str | None = None) -> dict[str, li
 
     result = {}
 
-    for category_name, _category_data in PRACTICAL_TAXONOMY.items():
+    for category_name, _category_data in _load_taxonomy().items():
         filtered_category = get_category_for_platform(category_name, platform_name)
 
         if "tools" in filtered_category and filtered_category["tools"]:
@@ -289,24 +357,26 @@ def find_tool_category(tool_name: str) -> str | None:
     Returns:
         Optional[str]: Category path (e.g., "package_managers.language.python") or None
     """
-    for category_name, category_data in PRACTICAL_TAXONOMY.items():
-        if "tools" in category_data and tool_name in category_data["tools"]:
-            return category_name
+    return _tool_category_index().get(tool_name)
 
-        # Handle nested categories
-        if "categories" in category_data:
-            for subcat_name, subcat_data in category_data["categories"].items():
-                if "tools" in subcat_data and tool_name in subcat_data["tools"]:
-                    return f"{category_name}.{subcat_name}"
 
-                # Handle language-specific package managers
-                elif isinstance(subcat_data, dict):
-                    for lang_name, lang_tools in subcat_data.items():
-                        if lang_name != "description" and isinstance(lang_tools, list):
-                            if tool_name in lang_tools:
-                                return f"{category_name}.{subcat_name}.{lang_name}"
+def get_all_tool_categories() -> list[str]:
+    """
+    Get every category path in the taxonomy.
 
-    return None
+    Returns:
+        List[str]: Category paths such as "build_tools" or "package_managers.language.python"
+    """
+    categories: list[str] = []
+    for category_name, category_data in _load_taxonomy().items():
+        categories.append(category_name)
+        for subcat_name, subcat_data in category_data.get("categories", {}).items():
+            categories.append(f"{category_name}.{subcat_name}")
+            if "tools" not in subcat_data and isinstance(subcat_data, dict):
+                for lang_name, lang_tools in subcat_data.items():
+                    if lang_name != "description" and isinstance(lang_tools, list):
+                        categories.append(f"{category_name}.{subcat_name}.{lang_name}")
+    return categories
 
 
 def get_relevant_categories(platform_name: str | None = None) -> dict[str, Any]:
@@ -322,10 +392,11 @@ def get_relevant_categories(platform_name: str | None = None) -> dict[str, Any]:
     if platform_name is None:
         platform_name = get_current_platform()
 
-    filtered_taxonomy = copy.deepcopy(PRACTICAL_TAXONOMY)
+    taxonomy = _load_taxonomy()
+    filtered_taxonomy: dict[str, Any] = {}
 
     # Filter each category for the platform
-    for category_name in list(filtered_taxonomy.keys()):
+    for category_name in taxonomy:
         category_data = get_category_for_platform(category_name, platform_name)
 
         # Remove empty categories
@@ -344,8 +415,8 @@ def get_relevant_categories(platform_name: str | None = None) -> dict[str, Any]:
                                 has_tools = True
                                 break
 
-            if not has_tools:
-                del filtered_taxonomy[category_name]
+            if has_tools:
+                filtered_taxonomy[category_name] = _copy_tree(taxonomy[category_name])
         else:
             filtered_taxonomy[category_name] = category_data
 
@@ -363,5 +434,6 @@ __all__ = [
     "get_tool_fields",
     "get_all_tools_for_platform",
     "find_tool_category",
+    "get_all_tool_categories",
     "get_relevant_categories",
 ]
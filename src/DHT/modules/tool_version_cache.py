@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+tool_version_cache.py - Persistent cache of tool version probe output
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created persistent tool version cache keyed on executable identity
+# - Identity is (resolved path, inode, size, mtime_ns) plus the probe arguments
+# - Shebang scripts include their interpreter; shell wrappers (pyenv/asdf shims) are never cached
+# - Shared by tool_version_manager, environment_validator, dhtl_diagnostics,
+#   uv_manager_utils and diagnostic_tool_collector
+# - The invoked name is part of the identity so multi-call binaries (busybox, symlinked
+#   compilers) are cached per name; toolchain proxies (rustup, mise, ccache...) are never cached
+# - go (GOTOOLCHAIN switching) and the macOS /usr/bin developer tool stubs are never cached
+#
+
+"""
+tool_version_cache.py - Persistent cache of tool version probe output
+
+Running `<tool> --version` costs a process start every time, and for tools
+written in Python (pip, black, mypy, pytest...) that is hundreds of
+milliseconds each. A tool's version can only change when its executable
+changes, so the output of a version probe is cached on disk keyed by the
+executable's identity. Any upgrade, reinstall or replacement of the binary
+changes its inode, size or mtime and therefore misses the cache.
+
+Shell scripts are not cached: version managers install shell shims that
+pick the real binary at run time from the environment and working directory,
+so the shim's own identity says nothing about the version that will run.
+The same holds for binary proxies such as rustup's cargo/rustc, mise or
+volta shims and compiler wrappers like ccache, for anything run from a
+"shims" directory, for go (which switches to the toolchain GOTOOLCHAIN or
+go.mod asks for) and for the macOS /usr/bin stubs of git, clang, python3,
+java... (which run whatever xcode-select, DEVELOPER_DIR or JAVA_HOME
+select). Multi-call binaries answer differently depending on the
+name they are run as, so the invoked name is part of the identity.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from .path_index import which
+from .platform_normalizer import get_cache_directory
+
+logger = logging.getLogger(__name__)
+
+# Path to the cache file, or "off" to disable caching
+CACHE_ENV_VAR = "DHT_TOOL_VERSION_CACHE"
+
+# Oldest entries are dropped once the cache grows past this many probes
+MAX_ENTRIES = 512
+
+_CACHE_FORMAT = 1
+_SHELL_INTERPRETERS = frozenset({"sh", "bash", "dash", "zsh", "ksh", "fish", "csh", "tcsh"})
+# Binaries that forward to a tool chosen at run time, so their version output
+# can change without the binary itself changing
+_TOOLCHAIN_PROXIES = frozenset(
+    {"rustup", "rustup-init", "mise", "rtx", "volta-shim", "proto-shim", "ccache", "sccache", "distcc", "go"}
+)
+# macOS ships these in /usr/bin as stubs that run the selected developer tools or JDK
+_DARWIN_STUB_DIR = "/usr/bin"
+_DARWIN_STUBS = frozenset(
+    {
+        "python3",
+        "pip3",
+        "git",
+        "clang",
+        "clang++",
+        "cc",
+        "c++",
+        "gcc",
+        "g++",
+        "make",
+        "swift",
+        "swiftc",
+        "xcodebuild",
+        "java",
+        "javac",
+        "jar",
+    }
+)
+
+
+def _stat_identity(path: str) -> list[Any] | None:
+    """Return [resolved path, inode, size, mtime_ns] for a file, None if it cannot be stat'ed."""
+    resolved = os.path.realpath(path)
+    try:
+        st = os.stat(resolved)
+    except OSError:
+        return None
+    return [resolved, st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _read_shebang(path: str) -> list[str] | None:
+    """Return the shebang line split into words, None for binaries."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(256)
+    except OSError:
+        return None
+    if not head.startswith(b"#!"):
+        return None
+    line = head[2:].split(b"\n", 1)[0].decode("utf-8", errors="replace")
+    return line.split()
+
+
+def _is_toolchain_proxy(invoked_path: str, resolved_path: str) -> bool:
+    """Check whether an executable forwards to a tool selected at run time."""
+    if os.path.basename(os.path.dirname(invoked_path)) == "shims":
+        return True
+    name = os.path.basename(resolved_path).lower()
+    if sys.platform == "darwin" and os.path.dirname(resolved_path) == _DARWIN_STUB_DIR and name in _DARWIN_STUBS:
+        return True
+    return name.removesuffix(".exe") in _TOOLCHAIN_PROXIES
+
+
+def executable_identity(executable: str) -> list[Any] | None:
+    """
+    Compute the cache identity of an executable.
+
+    Args:
+        executable: Executable name (looked up on PATH) or path
+
+    Returns:
+        Identity list for the executable as invoked (and its interpreter, for
+        scripts), or None if the executable's output must not be cached
+    """
+    path = which(executable)
+    if path is None:
+        return None
+    identity = _stat_identity(path)
+    if identity is None or _is_toolchain_proxy(path, identity[0]):
+        return None
+    # Multi-call binaries (busybox, gcc/clang symlinks) answer per invoked name
+    identity.append(os.path.basename(path))
+
+    shebang = _read_shebang(identity[0])
+    if shebang is None:
+        return identity
+    if not shebang:
+        return None
+
+    interpreter, args = shebang[0], shebang[1:]
+    if os.path.basename(interpreter) == "env":
+        # "#!/usr/bin/env python3" - the interpreter is resolved through PATH
+        args = [a for a in args if not a.startswith("-")]
+        if not args:
+            return None
+        interpreter = args[0]
+    if os.path.basename(interpreter) in _SHELL_INTERPRETERS:
+        return None
+
+    interpreter_path = which(interpreter)
+    interpreter_identity = _stat_identity(interpreter_path) if interpreter_path else None
+    if interpreter_identity is None:
+        return None
+    return identity + interpreter_identity
+
+
+def default_cache_path() -> Path:
+    """Return the cache file path, honouring DHT_TOOL_VERSION_CACHE."""
+    override = os.environ.get(CACHE_ENV_VAR)
+    if override and override.lower() != "off":
+        return Path(override).expanduser()
+    return get_cache_directory() / "dht" / "tool_versions.json"
+
+
+def cache_enabled() -> bool:
+    """Check whether version probes should be cached."""
+    return os.environ.get(CACHE_ENV_VAR, "").lower() != "off"
+
+
+class ToolVersionCache:
+    """On-disk map of executable identity + probe arguments to probe output."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Initialize the cache; the file is read lazily on first lookup."""
+        self.path = path or default_cache_path()
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(identity: list[Any], args: Sequence[str]) -> str:
+        """Build the lookup key for an identity and probe arguments."""
+        payload = json.dumps([identity, list(args)], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            entries: dict[str, dict[str, Any]] = {}
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("format") == _CACHE_FORMAT:
+                    entries = data.get("entries", {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.debug(f"Ignoring unreadable tool version cache {self.path}: {e}")
+            self._entries = entries
+        return self._entries
+
+    def _save(self, entries: dict[str, dict[str, Any]]) -> None:
+        if len(entries) > MAX_ENTRIES:
+            newest = sorted(entries.items(), key=lambda item: item[1].get("cached_at", 0), reverse=True)
+            entries.clear()
+            entries.update(newest[:MAX_ENTRIES])
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".tool_versions.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"format": _CACHE_FORMAT, "entries": entries}, f)
+            os.replace(tmp_name, self.path)
+        except OSError as e:
+            logger.debug(f"Could not write tool version cache {self.path}: {e}")
+
+    def get(self, key: str) -> str | None:
+        """Return cached output for a key, or None."""
+        with self._lock:
+            entry = self._load().get(key)
+        return None if entry is None else entry.get("output")
+
+    def put(self, key: str, output: str, executable: str | None = None) -> None:
+        """Store probe output under a key and persist the cache."""
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"output": output, "executable": executable, "cached_at": time.time()}
+            self._save(entries)
+
+    def clear(self) -> None:
+        """Drop every cached probe."""
+        with self._lock:
+            self._entries = {}
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def probe(self, executable: str, args: Sequence[str], run_probe: Callable[[], str | None]) -> str | None:
+        """
+        Return the output of a version probe, running it only on a cache miss.
+
+        Args:
+            executable: Executable the probe runs (name on PATH or path)
+            args: Probe arguments, part of the cache key (e.g. ["--version"])
+            run_probe: Runs the probe and returns its output, or None on failure.
+                Failed probes are not cached.
+
+        Returns:
+            Probe output, or None if the probe failed
+        """
+        identity = executable_identity(executable) if cache_enabled() else None
+        if identity is None:
+            return run_probe()
+
+        key = self.make_key(identity, args)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        output = run_probe()
+        if output is not None:
+            self.put(key, output, executable=identity[0])
+        return output
+
+
+_shared_cache: ToolVersionCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_tool_version_cache() -> ToolVersionCache:
+    """Return the process-wide cache, re-created when DHT_TOOL_VERSION_CACHE changes."""
+    global _shared_cache
+    path = default_cache_path()
+    cache = _shared_cache
+    if cache is None or cache.path != path:
+        with _shared_lock:
+            cache = _shared_cache
+            if cache is None or cache.path != path:
+                cache = ToolVersionCache(path)
+                _shared_cache = cache
+    return cache
+
+
+def cached_probe(executable: str, args: Sequence[str], run_probe: Callable[[], str | None]) -> str | None:
+    """Run a version probe through the shared cache. See ToolVersionCache.probe."""
+    return get_tool_version_cache().probe(executable, args, run_probe)
+
+
+__all__ = [
+    "CACHE_ENV_VAR",
+    "MAX_ENTRIES",
+    "ToolVersionCache",
+    "executable_identity",
+    "default_cache_path",
+    "cache_enabled",
+    "get_tool_version_cache",
+    "cached_probe",
+]
@@ -19,17 +19,37 @@ suggestions for cross-platform environment reproduction.
 # - Extracted from environment_reproducer.py to reduce file size
 # - Contains tool version extraction and comparison logic
 # - Provides platform-specific installation commands
+# - Tool presence is checked against the shared PATH index
+# - Version probes are served from the persistent tool version cache
+# - capture_tool_versions probes tools concurrently with per-probe timeouts and an overall deadline
 #
 
 
 import platform
 import re
-import shutil
 import subprocess
+from functools import partial
 from typing import Any
 
 from prefect import get_run_logger, task
 
+from .parallel_probes import PROBE_DEADLINE, PROBE_TIMEOUT, run_probes
+from .path_index import which
+from .tool_version_cache import cached_probe
+
+
+def _run_version_probe(version_cmd: list[str], timeout: float = PROBE_TIMEOUT) -> str | None:
+    """Run a version command and return its combined output, None on failure."""
+    result = subprocess.run(version_cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        return None
+    return result.stdout + result.stderr
+
+
+def _cached_version_probe(tool_path: str, version_cmd: list[str], timeout: float = PROBE_TIMEOUT) -> str | None:
+    """Run a version command, reusing the cached output while the binary is unchanged."""
+    return cached_probe(tool_path, version_cmd[1:], partial(_run_version_probe, version_cmd, timeout))
+
 
 class ToolVersionManager:
     """Manages tool versions for environment reproduction."""
@@ -80,8 +100,24 @@ class ToolVersionManager:
         }
 
     @task(name="capture_tool_versions")
-    def capture_tool_versions(self) -> dict[str, dict[str, str]]:
-        """Capture versions of all installed development tools."""
+    def capture_tool_versions(
+        self, probe_timeout: float = PROBE_TIMEOUT, deadline: float = PROBE_DEADLINE
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Capture versions of all installed development tools.
+
+        Tools are probed concurrently. A tool whose probe times out, or is
+        still running when the deadline passes, is reported with a None
+        version and "timed_out" set instead of holding up the others.
+
+        Args:
+            probe_timeout: Timeout in seconds for each version command
+            deadline: Wall-clock budget in seconds for all probes
+
+        Returns:
+            Dict mapping tool name to {"version", "path"}, plus "timed_out"
+            and "error" for probes that did not finish
+        """
         logger = get_run_logger()
         tools_info: dict[str, Any] = {}
 
@@ -103,21 +139,25 @@ class ToolVersionManager:
             "pytest": ["pytest", "--version"],
         }
 
-        for tool_name, version_cmd in tools_to_check.items():
-            try:
-                # Check if tool is available
-                tool_path = shutil.which(version_cmd[0])
-                if tool_path:
-                    # Get version
-                    result = subprocess.run(version_cmd, capture_output=True, text=True, timeout=10)
-
-                    if result.returncode == 0:
-                        version = self.extract_version_from_output(result.stdout + result.stderr)
-                        if version:
-                            tools_info[tool_name] = {"version": version, "path": tool_path}
-
-            except Exception as e:
-                logger.debug(f"Failed to check {tool_name}: {e}")
+        # Only tools present on PATH are probed
+        tool_paths = {tool_name: which(version_cmd[0]) for tool_name, version_cmd in tools_to_check.items()}
+        probes = {
+            tool_name: partial(_cached_version_probe, tool_path, tools_to_check[tool_name])
+            for tool_name, tool_path in tool_paths.items()
+            if tool_path
+        }
+
+        for tool_name, probe in run_probes(probes, probe_timeout=probe_timeout, deadline=deadline).items():
+            tool_path = tool_paths[tool_name]
+            if probe.timed_out:
+                logger.warning(f"Version probe for {tool_name} did not finish: {probe.error}")
+                tools_info[tool_name] = {"version": None, "path": tool_path, "timed_out": True, "error": probe.error}
+            elif probe.error:
+                logger.debug(f"Failed to check {tool_name}: {probe.error}")
+            elif probe.output is not None:
+                version = self.extract_version_from_output(probe.output)
+                if version:
+                    tools_info[tool_name] = {"version": version, "path": tool_path}
 
         return tools_info
 
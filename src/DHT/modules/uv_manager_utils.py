@@ -17,6 +17,7 @@ This module contains utility functions used by the UV Manager.
 # HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
 # - Extracted from uv_manager.py to reduce file size
 # - Contains UV executable discovery, version checking, and command execution
+# - UV version output is cached per binary identity in the tool version cache
 #
 
 
@@ -32,6 +33,7 @@ from DHT.modules.subprocess_utils import (
     ProcessNotFoundError,
     run_subprocess,
 )
+from DHT.modules.tool_version_cache import cached_probe
 from DHT.modules.uv_manager_exceptions import UVError, UVNotFoundError
 
 # Development dependency patterns for intelligent classification
@@ -72,8 +74,8 @@ def verify_uv_version(uv_path: Path, min_version: str, run_command_func: Callabl
     """Verify UV version meets minimum requirements."""
     logger = logging.getLogger(__name__)
     try:
-        result = run_command_func(["--version"])
-        version_output = result["stdout"].strip()
+        version_output = cached_probe(str(uv_path), ["--version"], lambda: run_command_func(["--version"])["stdout"])
+        version_output = (version_output or "").strip()
         # Parse version from output like "uv 0.4.27" or "uv 0.7.12 (dc3fd4647 2025-06-06)"
         parts = version_output.split()
         # Version is the second part (after "uv")
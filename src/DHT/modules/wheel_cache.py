@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+"""
+wheel_cache.py - Shared, size-bounded package download and wheel cache
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+# HERE IS THE CHANGELOG FOR THIS VERSION OF THE CODE:
+# - Created a project-independent cache directory for uv and pip, handed to them via UV_CACHE_DIR/PIP_CACHE_DIR
+# - Records cache hits and misses parsed from install output
+# - Prunes least recently used packages once the cache grows past its size limit
+# - Pruning is explicit (`dhtl cache prune`); installs no longer prune the shared cache behind uv's back
+# - Installs enforce the size limit first, under an exclusive lock, when the last measured size is stale or over it
+# - Provides the volume and environment to share the cache with containers
+#
+
+"""
+wheel_cache.py - Shared, size-bounded package download and wheel cache
+
+Dependency installs during reproduction ran uv and pip with their default
+cache settings, so every runner, user and container had its own cache and
+containers lost theirs on exit. DHT now points both tools at one cache
+directory (DHT_WHEEL_CACHE, default <user cache>/dht/wheels) holding a
+`uv` and a `pip` subdirectory. Containers bind-mount the same directory.
+
+The cache is bounded (DHT_WHEEL_CACHE_MAX_MB, default 10 GiB). DHT installs
+hold a shared lock on the cache while uv or pip run. Before starting, an
+install enforces the limit: if the size last measured is more than an hour
+old or over the limit, and no other install holds the lock, it prunes under
+an exclusive lock; otherwise it leaves the cache alone and does not walk it.
+The lock is an flock, so it is not taken on Windows, where only
+`dhtl cache prune` applies the limit. Pruning evicts whole packages, least
+recently used first:
+
+- uv keeps unpacked wheels in archive-v*/ and per-package pointers
+  (symlinks) in wheels-v*/<index>/<package> and sdists-v*/<index>/<package>.
+  A package is evicted by removing its pointers, then every archive no
+  remaining pointer refers to. Archives nothing refers to go first. uv
+  treats a missing pointer as a cache miss and downloads the wheel again.
+- pip cache entries are independent files, evicted one by one.
+
+Hit rates come from the installers' own reports: uv prints how many
+packages it prepared (downloaded or built) and installed, pip prints
+"Using cached" or "Downloading" per distribution.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .platform_normalizer import get_cache_directory
+
+if sys.platform != "win32":
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+# Path to the cache directory, or "off" to leave uv and pip on their own caches
+CACHE_ENV_VAR = "DHT_WHEEL_CACHE"
+
+# Size limit in MiB, enforced when an install starts and by `dhtl cache prune`
+MAX_SIZE_ENV_VAR = "DHT_WHEEL_CACHE_MAX_MB"
+
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+# Where containers see the shared cache
+CONTAINER_CACHE_DIR = "/root/.cache/dht/wheels"
+
+# Seconds a measured cache size is trusted before an install measures it again
+SIZE_CHECK_INTERVAL = 3600
+
+_STATS_FILE = "dht-cache-stats.json"
+_STATS_FORMAT = 1
+_COUNTERS = ("installs", "hits", "misses")
+
+# Held shared by installs and exclusively while pruning
+_LOCK_FILE = ".dht-cache.lock"
+
+# uv buckets holding per-package pointers into the archive bucket
+_UV_POINTER_BUCKETS = ("wheels-", "sdists-")
+
+_UV_PREPARED = re.compile(r"Prepared (\d+) packages?")
+_UV_INSTALLED = re.compile(r"Installed (\d+) packages?")
+_PIP_HIT = re.compile(r"^\s*Using cached ", re.MULTILINE)
+_PIP_MISS = re.compile(r"^\s*Downloading ", re.MULTILINE)
+
+
+def cache_enabled() -> bool:
+    """Check whether DHT should manage the package cache."""
+    return os.environ.get(CACHE_ENV_VAR, "").lower() != "off"
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, honouring DHT_WHEEL_CACHE."""
+    override = os.environ.get(CACHE_ENV_VAR)
+    if override and override.lower() != "off":
+        return Path(override).expanduser()
+    return get_cache_directory() / "dht" / "wheels"
+
+
+def default_max_bytes() -> int:
+    """Return the cache size limit, honouring DHT_WHEEL_CACHE_MAX_MB."""
+    value = os.environ.get(MAX_SIZE_ENV_VAR)
+    if not value:
+        return DEFAULT_MAX_BYTES
+    try:
+        return max(0, int(float(value) * 1024 * 1024))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {MAX_SIZE_ENV_VAR}={value!r}")
+        return DEFAULT_MAX_BYTES
+
+
+@dataclass
+class CacheUsage:
+    """Packages an install took from the cache and packages it had to fetch or build."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float | None:
+        """Fraction of packages served from the cache, or None if nothing was installed."""
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def summary(self) -> str:
+        """Return a one-line description such as '10 of 12 packages from cache'."""
+        return f"{self.hits} of {self.hits + self.misses} packages from cache"
+
+
+def parse_install_output(tool: str, output: str) -> CacheUsage:
+    """
+    Count cache hits and misses in the output of an install command.
+
+    Args:
+        tool: "uv" or "pip"
+        output: Combined stdout and stderr of the command
+
+    Returns:
+        CacheUsage; zero counts when the output reports nothing
+    """
+    if tool == "uv":
+        prepared = sum(int(n) for n in _UV_PREPARED.findall(output))
+        installed = sum(int(n) for n in _UV_INSTALLED.findall(output))
+        return CacheUsage(hits=max(installed - prepared, 0), misses=prepared)
+    if tool == "pip":
+        return CacheUsage(hits=len(_PIP_HIT.findall(output)), misses=len(_PIP_MISS.findall(output)))
+    return CacheUsage()
+
+
+@dataclass
+class CacheStats:
+    """Size and effectiveness of the cache."""
+
+    path: str
+    size_bytes: int
+    max_bytes: int
+    entries: int  # evictable packages and files
+    installs: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float | None:
+        """Fraction of installed packages served from the cache since the statistics were reset."""
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dictionary."""
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+    def summary(self) -> str:
+        """Return a human-readable report."""
+        rate = f"{self.hit_rate:.0%}" if self.hit_rate is not None else "n/a"
+        return "\n".join(
+            [
+                f"Cache directory: {self.path}",
+                f"Size: {_format_size(self.size_bytes)} of {_format_size(self.max_bytes)}",
+                f"Entries: {self.entries}",
+                f"Installs recorded: {self.installs}",
+                f"Hit rate: {rate} ({self.hits} hits, {self.misses} misses)",
+            ]
+        )
+
+
+@dataclass
+class PruneResult:
+    """What pruning removed."""
+
+    size_before: int
+    size_after: int
+    removed: list[str] = field(default_factory=list)  # paths relative to the cache directory
+    dry_run: bool = False
+
+    @property
+    def freed_bytes(self) -> int:
+        """Bytes freed (or that would be freed, for a dry run)."""
+        return self.size_before - self.size_after
+
+
+@dataclass
+class _Entry:
+    """An evictable unit: a uv package's pointers, an orphaned uv archive or a pip cache file."""
+
+    paths: list[Path]
+    size: int
+    last_used: float
+    archives: set[Path] = field(default_factory=set)
+
+
+def _format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def _tree_usage(path: Path, links: list[Path] | None = None) -> tuple[int, float]:
+    """
+    Return the size and the most recent use of a file or tree.
+
+    Symlinks are not followed; when links is given, their paths are appended to it.
+    Access times only count for regular files: scanning the cache reads
+    directories and symlinks, which would refresh theirs.
+    """
+    try:
+        st = path.lstat()
+    except OSError:
+        return 0, 0.0
+    if path.is_symlink():
+        if links is not None:
+            links.append(path)
+        return st.st_size, st.st_mtime
+    if not path.is_dir():
+        return st.st_size, max(st.st_mtime, st.st_atime)
+
+    size, last_used = 0, st.st_mtime
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            entry = Path(root) / name
+            try:
+                st = entry.lstat()
+            except OSError:
+                continue
+            if entry.is_symlink():
+                if links is not None:
+                    links.append(entry)
+                size += st.st_size
+                last_used = max(last_used, st.st_mtime)
+            elif name not in dirs:
+                size += st.st_size
+                last_used = max(last_used, st.st_mtime, st.st_atime)
+    return size, last_used
+
+
+def _remove(path: Path) -> None:
+    try:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class WheelCache:
+    """A package cache directory shared by uv and pip across projects."""
+
+    def __init__(self, root: Path | None = None, max_bytes: int | None = None) -> None:
+        """Initialize the cache; nothing is created until it is used."""
+        self.root = Path(root) if root is not None else default_cache_dir()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def uv_dir(self) -> Path:
+        return self.root / "uv"
+
+    @property
+    def pip_dir(self) -> Path:
+        return self.root / "pip"
+
+    def env(self) -> dict[str, str]:
+        """
+        Return the environment variables that point uv and pip at this cache.
+
+        Returns an empty dict when DHT_WHEEL_CACHE is "off".
+        """
+        if not cache_enabled():
+            return {}
+        for directory in (self.uv_dir, self.pip_dir):
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Cannot create package cache directory {directory}: {e}")
+                return {}
+        return {"UV_CACHE_DIR": str(self.uv_dir), "PIP_CACHE_DIR": str(self.pip_dir)}
+
+    def container_volumes(self, target: str = CONTAINER_CACHE_DIR) -> dict[str, dict[str, str]]:
+        """Return the Docker volume mapping that mounts this cache at target."""
+        if not self.env():
+            return {}
+        return {str(self.root.resolve()): {"bind": target, "mode": "rw"}}
+
+    @staticmethod
+    def container_env(target: str = CONTAINER_CACHE_DIR) -> dict[str, str]:
+        """
+        Return the environment that points uv and pip inside a container at the mounted cache.
+
+        The mount is a different filesystem from the container's virtual
+        environments, so uv copies files out of the cache instead of trying
+        (and failing) to hard-link them.
+        """
+        if not cache_enabled():
+            return {}
+        return {"UV_CACHE_DIR": f"{target}/uv", "PIP_CACHE_DIR": f"{target}/pip", "UV_LINK_MODE": "copy"}
+
+    # Statistics
+
+    def _read_stats(self) -> dict[str, int]:
+        """Read the hit counters and the last measured size (size_bytes, measured_at)."""
+        keys = (*_COUNTERS, "size_bytes", "measured_at")
+        try:
+            data = json.loads((self.root / _STATS_FILE).read_text(encoding="utf-8"))
+            if data.get("format") == _STATS_FORMAT:
+                return {key: int(data.get(key, 0)) for key in keys}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Ignoring unreadable package cache statistics: {e}")
+        return dict.fromkeys(keys, 0)
+
+    def _write_stats(self, counters: dict[str, int]) -> None:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".dht-cache-stats.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"format": _STATS_FORMAT, **counters, "updated_at": time.time()}, f)
+            os.replace(tmp_name, self.root / _STATS_FILE)
+        except OSError as e:
+            logger.debug(f"Could not write package cache statistics: {e}")
+
+    def record_install(self, tool: str, output: str) -> CacheUsage:
+        """
+        Record the hits and misses of an install.
+
+        The cache is not pruned here: other installs may be reading from it.
+        The limit is enforced when an install starts (see installing).
+
+        Args:
+            tool: "uv" or "pip"
+            output: Combined stdout and stderr of the install command
+
+        Returns:
+            CacheUsage of this install
+        """
+        usage = parse_install_output(tool, output)
+        if not cache_enabled():
+            return usage
+        with self._lock:
+            counters = self._read_stats()
+            counters["installs"] += 1
+            counters["hits"] += usage.hits
+            counters["misses"] += usage.misses
+            self._write_stats(counters)
+        return usage
+
+    def reset_stats(self) -> None:
+        """Forget the recorded hits and misses."""
+        with self._lock:
+            self._write_stats({**self._read_stats(), **dict.fromkeys(_COUNTERS, 0)})
+
+    def _record_size(self, size: int) -> None:
+        with self._lock:
+            self._write_stats({**self._read_stats(), "size_bytes": size, "measured_at": int(time.time())})
+
+    def stats(self) -> CacheStats:
+        """Measure the cache and return its size, entries and hit rate."""
+        entries, _, _, size = self._scan()
+        self._record_size(size)
+        counters = self._read_stats()
+        return CacheStats(str(self.root), size, self.max_bytes, len(entries), *(counters[key] for key in _COUNTERS))
+
+    # Installs and the size limit
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool, blocking: bool = True) -> Iterator[bool]:
+        """
+        Hold the cache lock shared or exclusively across processes.
+
+        Yields:
+            bool: Whether the lock is held; False when blocking is False and
+            it is taken, when the cache cannot be locked, and always on
+            Windows, which has no flock
+        """
+        if sys.platform == "win32":
+            yield False
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.root / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError as e:
+            logger.debug(f"Could not lock package cache {self.root}: {e}")
+            yield False
+            return
+        try:
+            flags = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(fd, flags)
+                locked = True
+            except OSError:  # BlockingIOError when taken and not blocking
+                locked = False
+            yield locked
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def installing(self) -> Iterator[dict[str, str]]:
+        """
+        Enforce the size limit, then keep the cache locked against pruning while an install runs.
+
+        Yields:
+            dict: The environment from env(), empty when the cache is off
+        """
+        env = self.env()
+        if not env:
+            yield env
+            return
+        self.enforce_limit()
+        with self._file_lock(exclusive=False):
+            yield env
+
+    def enforce_limit(self, max_age: float = SIZE_CHECK_INTERVAL) -> PruneResult | None:
+        """
+        Prune the cache if it may be over its limit and no install is using it.
+
+        The size recorded by the last measurement is trusted for max_age
+        seconds, so most calls neither walk nor lock the cache. Pruning only
+        happens if the exclusive lock can be taken at once; with an install
+        running, the next install tries again.
+
+        Args:
+            max_age: Seconds a recorded size is trusted
+
+        Returns:
+            PruneResult if the cache was measured, None otherwise
+        """
+        if not cache_enabled():
+            return None
+        recorded = self._read_stats()
+        if time.time() - recorded["measured_at"] < max_age and recorded["size_bytes"] <= self.max_bytes:
+            return None
+        try:
+            with self._file_lock(exclusive=True, blocking=False) as locked:
+                if not locked:
+                    logger.debug(f"Package cache {self.root} is in use, not pruning it now")
+                    return None
+                return self._prune(self.max_bytes, dry_run=False)
+        except OSError as e:
+            logger.warning(f"Could not prune package cache {self.root}: {e}")
+            return None
+
+    # Pruning
+
+    def _scan(self) -> tuple[list[_Entry], dict[Path, int], dict[Path, int], int]:
+        """
+        Split the cache into evictable entries.
+
+        Returns:
+            (entries, archive sizes, archive reference counts, total size)
+        """
+        entries: list[_Entry] = []
+        archive_sizes: dict[Path, int] = {}
+        archive_used: dict[Path, float] = {}
+        refs: dict[Path, int] = {}
+        total = 0
+
+        uv_root = self.uv_dir.resolve() if self.uv_dir.is_dir() else None
+        if uv_root is not None:
+            buckets = sorted(p for p in uv_root.iterdir() if p.is_dir() and not p.is_symlink())
+            for bucket in buckets:
+                if bucket.name.startswith("archive-"):
+                    for archive in bucket.iterdir():
+                        archive_sizes[archive], archive_used[archive] = _tree_usage(archive)
+                        refs.setdefault(archive, 0)
+
+            for bucket in buckets:
+                if bucket.name.startswith("archive-"):
+                    continue
+                if not bucket.name.startswith(_UV_POINTER_BUCKETS):
+                    # Index metadata, interpreter info, build scratch: small, kept
+                    total += _tree_usage(bucket)[0]
+                    continue
+                for index in (p for p in bucket.iterdir() if p.is_dir()):
+                    for package in index.iterdir():
+                        links: list[Path] = []
+                        size, last_used = _tree_usage(package, links)
+                        entry = _Entry([package], size, last_used)
+                        for link in links:
+                            target = Path(os.path.realpath(link))
+                            if target in archive_sizes:
+                                entry.archives.add(target)
+                        for archive in entry.archives:
+                            refs[archive] += 1
+                        entries.append(entry)
+                        total += size
+
+            for archive, size in archive_sizes.items():
+                total += size
+                if not refs[archive]:
+                    # Orphans are garbage: evict them before anything that is still referenced
+                    entries.append(_Entry([], 0, -1.0, {archive}))
+
+        if self.pip_dir.is_dir():
+            for root, _, files in os.walk(self.pip_dir):
+                for name in files:
+                    path = Path(root) / name
+                    size, last_used = _tree_usage(path)
+                    entries.append(_Entry([path], size, last_used))
+                    total += size
+
+        for entry in entries:
+            if entry.last_used < 0:
+                continue
+            for archive in entry.archives:
+                entry.last_used = max(entry.last_used, archive_used[archive])
+        return entries, archive_sizes, refs, total
+
+    def prune(self, max_bytes: int | None = None, dry_run: bool = False) -> PruneResult:
+        """
+        Evict least recently used entries until the cache fits in max_bytes.
+
+        Waits until no DHT install holds the cache. Installs run by other
+        tools are not coordinated, so do not prune while they are running.
+
+        Args:
+            max_bytes: Target size; defaults to the cache's limit
+            dry_run: Only report what would be removed
+
+        Returns:
+            PruneResult with the sizes before and after and the removed paths
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        if dry_run:
+            return self._prune(limit, dry_run)
+        with self._file_lock(exclusive=True):
+            return self._prune(limit, dry_run)
+
+    def _prune(self, limit: int, dry_run: bool) -> PruneResult:
+        with self._lock:
+            entries, archive_sizes, refs, total = self._scan()
+            result = PruneResult(size_before=total, size_after=total, dry_run=dry_run)
+            for entry in sorted(entries, key=lambda e: e.last_used):
+                if result.size_after <= limit:
+                    break
+                freed = entry.size
+                removed = list(entry.paths)
+                for archive in entry.archives:
+                    refs[archive] -= 1
+                    if refs[archive] <= 0:
+                        freed += archive_sizes[archive]
+                        removed.append(archive)
+                        refs[archive] = 0
+                for path in removed:
+                    if not dry_run:
+                        _remove(path)
+                    result.removed.append(self._relative(path))
+                result.size_after -= freed
+
+        if not dry_run:
+            self._record_size(result.size_after)
+        if result.removed and not dry_run:
+            logger.info(
+                f"Pruned package cache {self.root}: {len(result.removed)} entries, "
+                f"{_format_size(result.freed_bytes)} freed"
+            )
+        return result
+
+    def _relative(self, path: Path) -> str:
+        for root in (self.root, self.root.resolve()):
+            try:
+                return str(path.relative_to(root))
+            except ValueError:
+                continue
+        return str(path)
+
+
+_shared_cache: WheelCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_wheel_cache() -> WheelCache:
+    """Return the process-wide cache, re-created when DHT_WHEEL_CACHE or its size limit changes."""
+    global _shared_cache
+    root, max_bytes = default_cache_dir(), default_max_bytes()
+    cache = _shared_cache
+    if cache is None or cache.root != root or cache.max_bytes != max_bytes:
+        with _shared_lock:
+            cache = _shared_cache
+            if cache is None or cache.root != root or cache.max_bytes != max_bytes:
+                cache = WheelCache(root, max_bytes)
+                _shared_cache = cache
+    return cache
+
+
+__all__ = [
+    "CACHE_ENV_VAR",
+    "MAX_SIZE_ENV_VAR",
+    "DEFAULT_MAX_BYTES",
+    "CONTAINER_CACHE_DIR",
+    "cache_enabled",
+    "default_cache_dir",
+    "default_max_bytes",
+    "CacheUsage",
+    "parse_install_output",
+    "CacheStats",
+    "PruneResult",
+    "WheelCache",
+    "get_wheel_cache",
+]
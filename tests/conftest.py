@@ -143,6 +143,31 @@ def skip_by_profile(request: pytest.FixtureRequest, test_config: dict[str, Any])
             pytest.skip(f"Skipping docker test in {get_test_profile()} profile")
 
 
+@pytest.fixture(autouse=True)
+def isolated_guardian_history(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep guardian run history recorded by tests out of the user cache directory."""
+    monkeypatch.setenv("DHT_GUARDIAN_HISTORY", str(tmp_path / "guardian_history.db"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_tool_version_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep tool version probes cached by tests out of the user cache directory."""
+    monkeypatch.setenv("DHT_TOOL_VERSION_CACHE", str(tmp_path / "tool_versions.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_lock_verification_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep lock checksums and lock states recorded by tests out of the user cache directory."""
+    monkeypatch.setenv("DHT_LOCK_CACHE", str(tmp_path / "lock_verification.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_wheel_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep packages and hit statistics of installs run by tests out of the user cache directory."""
+    monkeypatch.setenv("DHT_WHEEL_CACHE", str(tmp_path / "wheels"))
+    monkeypatch.delenv("DHT_WHEEL_CACHE_MAX_MB", raising=False)
+
+
 @pytest.fixture(scope="session")
 def project_root() -> Any:
     """Returns the project root directory."""
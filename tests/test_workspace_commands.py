@@ -10,10 +10,12 @@ Licensed under the MIT License. See LICENSE file for details.
 # - Create tests for workspace commands (workspaces, workspace, project)
 # - Test all subcommands: run, exec, upgrade, remove
 # - Test filtering options and aliases
+# - Test concurrent execution with --jobs
 #
 
 """Tests for workspace commands."""
 
+import time
 from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, patch
@@ -111,6 +113,56 @@ members = ["pkg1"]
             assert "test" in args
             assert "--verbose" in args
 
+    def test_workspaces_run_jobs(self, tmp_path) -> Any:
+        """Test --jobs runs the script in members through the concurrent engine."""
+        pyproject = tmp_path / "pyproject.toml"
+        pyproject.write_text("""
+[tool.uv.workspace]
+members = ["pkg1"]
+""")
+        (tmp_path / "pkg1").mkdir()
+        (tmp_path / "pkg1" / "pyproject.toml").write_text("[project]\nname = 'pkg1'")
+
+        outcome = {"success": True, "stdout": "ok", "stderr": "", "returncode": 0}
+        cmd = WorkspacesCommand()
+        with (
+            patch.object(Path, "cwd", return_value=tmp_path),
+            patch(
+                "src.DHT.modules.commands.workspace_base.run_subprocesses", return_value=[outcome, outcome]
+            ) as mock_fanout,
+            patch("subprocess.run") as mock_run,
+        ):
+            result = cmd.execute.fn(cmd, subcommand="run", script="test", jobs=2)
+
+        assert result["success"] is True
+        assert result["success_count"] == 2
+        mock_run.assert_not_called()
+        commands = mock_fanout.call_args.args[0]
+        assert [c[:2] for c in commands] == [["uv", "run"], ["uv", "run"]]
+        assert mock_fanout.call_args.kwargs["max_concurrency"] == 2
+
+    def test_execute_in_members_concurrently(self, tmp_path) -> Any:
+        """Test concurrent execution overlaps members and reports failures per member."""
+        members = [tmp_path / name for name in ("ok1", "ok2", "ok3", "fails", "slow", "broken")]
+
+        def build_command(member: Path) -> list[str]:
+            if member.name == "broken":
+                raise ValueError("no script")
+            script = {"fails": "exit 3", "slow": "sleep 30"}.get(member.name, "sleep 0.5; echo done")
+            return ["sh", "-c", script]
+
+        cmd = WorkspacesCommand()
+        start = time.time()
+        result = cmd.execute_in_members(members, "Testing", build_command, timeout=2, max_concurrency=6)
+        assert time.time() - start < 5
+
+        results = result["results"]
+        assert [results[str(tmp_path / name)]["stdout"].strip() for name in ("ok1", "ok2", "ok3")] == ["done"] * 3
+        assert results[str(tmp_path / "fails")]["returncode"] == 3
+        assert results[str(tmp_path / "slow")]["error"] == "Timed out after 2 seconds"
+        assert results[str(tmp_path / "broken")]["error"] == "no script"
+        assert (result["success"], result["success_count"], result["failed_count"]) == (False, 3, 3)
+
     @patch("subprocess.run")
     def test_workspaces_exec_subcommand(self, mock_run, tmp_path) -> Any:
         """Test workspaces exec subcommand."""
@@ -390,6 +442,10 @@ class TestCommandDispatcherWorkspaces:
         assert args["subcommand"] == "run"
         assert args["script"] == "test"
         assert args["only"] == ["pkg*"]
+        assert args["jobs"] == 1
+
+        args = dispatcher._parse_command_args("workspaces", ["run", "test", "-j", "4"])
+        assert args["jobs"] == 4
 
         # Test upgrade subcommand
         args = dispatcher._parse_command_args("ws", ["upgrade", "requests", "pytest"])
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the asyncio subprocess execution layer.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import psutil
+import pytest
+
+from DHT.modules.async_subprocess_utils import run_subprocess_async, run_subprocesses
+from DHT.modules.guardian_history import GuardianHistory
+from DHT.modules.guardian_prefect import GuardianConfig, run_with_guardian_async
+from DHT.modules.subprocess_utils import CommandTimeoutError, ProcessExecutionError, ProcessNotFoundError
+
+
+class TestRunSubprocessAsync:
+    """Test single command execution on the event loop."""
+
+    def test_successful_command_execution(self) -> Any:
+        """Test result schema matches run_subprocess."""
+        result = asyncio.run(run_subprocess_async(["echo", "hello world"]))
+        assert result["success"] is True
+        assert result["stdout"].strip() == "hello world"
+        assert result["stderr"] == ""
+        assert result["returncode"] == 0
+        assert result["command"] == ["echo", "hello world"]
+
+    def test_command_not_found_error(self) -> Any:
+        """Test missing executables raise ProcessNotFoundError."""
+        with pytest.raises(ProcessNotFoundError) as exc_info:
+            asyncio.run(run_subprocess_async(["nonexistent_command_xyz"]))
+        assert exc_info.value.command == ["nonexistent_command_xyz"]
+
+    def test_nonzero_exit(self) -> Any:
+        """Test check controls whether non-zero exits raise."""
+        result = asyncio.run(run_subprocess_async([sys.executable, "-c", "import sys; sys.exit(1)"], check=False))
+        assert result["success"] is False
+        assert result["returncode"] == 1
+
+        with pytest.raises(ProcessExecutionError) as exc_info:
+            asyncio.run(run_subprocess_async([sys.executable, "-c", "import sys; sys.exit(42)"]))
+        assert exc_info.value.returncode == 42
+
+    def test_input_and_stderr_merge(self) -> Any:
+        """Test stdin data and merged stderr."""
+        script = "import sys; data = sys.stdin.read(); print(data.upper()); print('err', file=sys.stderr)"
+        result = asyncio.run(
+            run_subprocess_async([sys.executable, "-c", script], input_data="abc", stderr_mode="merge")
+        )
+        assert "ABC" in result["stdout"]
+        assert "err" in result["stdout"]
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Process groups are POSIX only")
+    def test_timeout_kills_process_group(self, tmp_path: Path) -> Any:
+        """Test a timeout kills grandchildren spawned by the command."""
+        marker = tmp_path / "grandchild_alive"
+        script = (
+            "import subprocess, sys, time; "
+            f"subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(1.5); open(r\"{marker}\", \"w\")']); "
+            "time.sleep(30)"
+        )
+        start = time.time()
+        with pytest.raises(CommandTimeoutError):
+            asyncio.run(run_subprocess_async([sys.executable, "-c", script], timeout=0.5))
+        assert time.time() - start < 5
+
+        time.sleep(2)
+        assert not marker.exists()
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Process groups are POSIX only")
+    def test_cancellation_reaps_child(self) -> Any:
+        """Test cancelling a running command kills and reaps the child."""
+
+        async def cancel_running() -> int:
+            task = asyncio.ensure_future(run_subprocess_async(["sh", "-c", "echo $$; exec sleep 30"]))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return len(psutil.Process().children())
+
+        assert asyncio.run(cancel_running()) == 0
+
+
+class TestRunWithGuardianAsync:
+    """Test guarded commands on the event loop."""
+
+    def test_success_is_recorded(self) -> Any:
+        """Test output is captured and the run lands in the guardian history."""
+        result = asyncio.run(run_with_guardian_async(["sh", "-c", "echo out; echo err >&2"], GuardianConfig()))
+        assert result.success
+        assert (result.stdout, result.stderr) == ("out\n", "err\n")
+        assert GuardianHistory().stats()[0].runs == 1
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Process groups are POSIX only")
+    def test_timeout_kills_command(self) -> Any:
+        """Test the timeout is enforced from the event loop."""
+        config = GuardianConfig(timeout_seconds=1, check_interval=0.1)
+        start = time.time()
+        result = asyncio.run(run_with_guardian_async(["sleep", "30"], config))
+        assert time.time() - start < 5
+        assert result.was_killed and result.kill_reason == "timeout"
+        assert result.return_code == -1
+
+    def test_concurrent_commands(self) -> Any:
+        """Test several guarded commands can be awaited together."""
+
+        async def run_all() -> list[Any]:
+            config = GuardianConfig(check_interval=0.1)
+            return list(await asyncio.gather(*(run_with_guardian_async(["sleep", "0.5"], config) for _ in range(6))))
+
+        start = time.time()
+        results = asyncio.run(run_all())
+        assert all(r.success for r in results)
+        assert time.time() - start < 6 * 0.5
+
+    def test_missing_executable(self) -> Any:
+        """Test a command that cannot start fails instead of raising."""
+        result = asyncio.run(run_with_guardian_async(["nonexistent_command_xyz"], GuardianConfig()))
+        assert not result.success
+        assert result.return_code == -1
+
+
+class TestRunSubprocesses:
+    """Test concurrent fan-out."""
+
+    def test_results_keep_order(self) -> Any:
+        """Test results are returned in command order."""
+        commands = [["echo", str(i)] for i in range(20)]
+        results = run_subprocesses(commands, max_concurrency=5)
+        assert [r["stdout"].strip() for r in results] == [str(i) for i in range(20)]
+
+    def test_failures_do_not_abort_batch(self) -> Any:
+        """Test missing commands and timeouts become failed results."""
+        results = run_subprocesses(
+            [
+                ["echo", "ok"],
+                ["nonexistent_command_xyz"],
+                ["sleep", "10"],
+            ],
+            timeout=0.5,
+        )
+        assert results[0]["success"] is True
+        assert results[1]["success"] is False
+        assert "error" in results[1]
+        assert results[2]["success"] is False
+        assert results[2]["timed_out"] is True
+
+    def test_runs_concurrently(self) -> Any:
+        """Test commands overlap instead of running one after another."""
+        commands = [["sleep", "0.5"] for _ in range(8)]
+        start = time.time()
+        results = run_subprocesses(commands, max_concurrency=8)
+        assert all(r["success"] for r in results)
+        assert time.time() - start < 8 * 0.5
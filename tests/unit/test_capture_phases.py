@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for concurrent snapshot capture phases.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.capture_phases import CapturePhase, phase_order, run_phases
+from DHT.modules.environment_reproducer import EnvironmentReproducer
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.lock_file_manager import LockFileInfo
+
+
+class TestRunPhases:
+    """Test the dependency-aware phase runner."""
+
+    def test_independent_phases_overlap(self) -> Any:
+        """Test four 0.2 s phases finish in well under their 0.8 s sum."""
+        phases = [CapturePhase(f"p{i}", lambda: time.sleep(0.2)) for i in range(4)]
+        start = time.perf_counter()
+        results = run_phases(phases)
+        assert time.perf_counter() - start < 0.6
+        assert list(results) == ["p0", "p1", "p2", "p3"]
+        assert all(result.duration >= 0.2 and result.error is None for result in results.values())
+
+    def test_dependencies_are_respected(self) -> Any:
+        """Test a phase starts only after the phases it requires have finished."""
+        finished: list[str] = []
+        lock = threading.Lock()
+
+        def step(name: str, delay: float) -> Any:
+            def run() -> None:
+                time.sleep(delay)
+                with lock:
+                    finished.append(name)
+
+            return run
+
+        phases = [
+            CapturePhase("lock_files", step("lock_files", 0), requires=("analysis",)),
+            CapturePhase("analysis", step("analysis", 0.1)),
+            CapturePhase("tools", step("tools", 0.05)),
+        ]
+        results = run_phases(phases)
+        assert finished.index("analysis") < finished.index("lock_files")
+        assert results["lock_files"].started >= results["analysis"].started + results["analysis"].duration
+
+    def test_failures_are_reported(self) -> Any:
+        """Test a failing phase is recorded and its dependents still run."""
+        ran = []
+
+        def fail() -> None:
+            raise RuntimeError("boom")
+
+        results = run_phases([CapturePhase("a", fail), CapturePhase("b", lambda: ran.append("b"), requires=("a",))])
+        assert results["a"].error == "RuntimeError: boom"
+        assert results["b"].error is None and ran == ["b"]
+
+    def test_invalid_graphs(self) -> Any:
+        """Test cycles, unknown dependencies and duplicates are rejected."""
+        with pytest.raises(ValueError, match="cycle"):
+            phase_order([CapturePhase("a", print, ("b",)), CapturePhase("b", print, ("a",))])
+        with pytest.raises(ValueError, match="unknown"):
+            phase_order([CapturePhase("a", print, ("missing",))])
+        with pytest.raises(ValueError, match="Duplicate"):
+            phase_order([CapturePhase("a", print), CapturePhase("a", print)])
+        assert phase_order([CapturePhase("b", print, ("a",)), CapturePhase("a", print)]) == ["a", "b"]
+
+
+class TestParallelCapture:
+    """Test snapshot capture with concurrent phases."""
+
+    @pytest.fixture
+    def reproducer(self) -> EnvironmentReproducer:
+        reproducer = EnvironmentReproducer()
+        reproducer.logger = MagicMock()
+        reproducer.env_capture_utils.logger = MagicMock()
+        reproducer.project_capture_utils.logger = MagicMock()
+        return reproducer
+
+    def _slow_capture(self, reproducer: EnvironmentReproducer, project: Path, max_workers: int) -> Any:
+        def tools() -> dict[str, Any]:
+            time.sleep(0.3)
+            return {"git": {"version": "2.45.1", "path": "/usr/bin/git"}}
+
+        def analyze(**kwargs: Any) -> dict[str, Any]:
+            time.sleep(0.3)
+            return {"project_info": {"project_type": "python"}}
+
+        def lock_files(project_path: Path, project_type: str) -> dict[str, LockFileInfo]:
+            assert project_type == "python"
+            return {"uv.lock": LockFileInfo("uv.lock", "version = 1\n", "abc", 0, "")}
+
+        with (
+            patch.object(reproducer.tool_manager, "capture_tool_versions", side_effect=tools),
+            patch.object(reproducer.project_capture_utils.configurator, "analyze_environment_requirements", analyze),
+            patch.object(reproducer.project_capture_utils.lock_manager, "generate_project_lock_files", lock_files),
+        ):
+            return reproducer._capture_environment_snapshot_impl(project, max_workers=max_workers)
+
+    def test_capture_overlaps_and_records_timings(self, reproducer: EnvironmentReproducer, tmp_path: Path) -> Any:
+        """Test tool probes and project analysis overlap and per-phase timings survive a save/load."""
+        (tmp_path / "pyproject.toml").write_text("[project]\nname = 'demo'\n")
+
+        sequential = self._slow_capture(reproducer, tmp_path, max_workers=1)
+        parallel = self._slow_capture(reproducer, tmp_path, max_workers=6)
+
+        assert sequential.capture_timings["total"] >= 0.6
+        assert parallel.capture_timings["total"] < 0.5
+        assert parallel.tool_versions == sequential.tool_versions == {"git": "2.45.1"}
+        assert parallel.project_type == "python"
+        assert list(parallel.checksums) == ["uv.lock", "pyproject.toml"]
+        assert set(parallel.capture_timings) == {
+            "python_packages",
+            "system_tools",
+            "environment_variables",
+            "project_analysis",
+            "lock_files",
+            "config_files",
+            "project_checksums",
+            "total",
+        }
+
+        snapshot_io = EnvironmentSnapshotIO()
+        with patch("DHT.modules.environment_snapshot_io.get_run_logger", return_value=MagicMock()):
+            path = snapshot_io.save_snapshot.fn(snapshot_io, parallel, tmp_path / "snapshot.json")
+            loaded = snapshot_io.load_snapshot.fn(snapshot_io, path)
+        assert loaded.capture_timings == parallel.capture_timings
@@ -456,6 +456,48 @@ class TestEdgeCases:
             assert isinstance(python_cmd["category"], str)
 
 
+class TestRegistryIndexes:
+    """Test the lazily built registry indexes"""
+
+    @pytest.mark.unit
+    def test_registry_is_loaded_lazily(self) -> Any:
+        """Test importing the registry does not import the command definition modules"""
+        import subprocess
+
+        code = (
+            "import sys; from DHT.modules import cli_commands_registry; "
+            "print(any(m.startswith('DHT.modules.cli_commands_') and not m.endswith('registry') for m in sys.modules))"
+        )
+        src_dir = str(Path(__file__).parent.parent.parent / "src")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=src_dir)
+        assert result.stdout.strip() == "False", result.stderr
+
+    @pytest.mark.unit
+    def test_get_all_commands(self) -> Any:
+        """Test get_all_commands returns the full registry"""
+        assert cli_commands_registry.get_all_commands() is cli_commands_registry.CLI_COMMANDS
+
+    @pytest.mark.unit
+    def test_category_query_matches_ancestors_and_descendants(self) -> Any:
+        """Test category queries match the same commands as prefix comparisons"""
+        for category in ["package_managers", "package_managers.language.python.pip", "build_tools", "missing"]:
+            expected = [
+                name
+                for name, spec in cli_commands_registry.CLI_COMMANDS.items()
+                if spec["category"] == category
+                or spec["category"].startswith(category + ".")
+                or category.startswith(spec["category"] + ".")
+            ]
+            assert list(cli_commands_registry.get_commands_by_category(category)) == expected
+
+    @pytest.mark.unit
+    def test_platform_results_are_independent_copies(self) -> Any:
+        """Test callers cannot corrupt the cached platform index"""
+        commands = cli_commands_registry.get_platform_specific_commands("linux")
+        commands.pop("git")
+        assert "git" in cli_commands_registry.get_platform_specific_commands("linux")
+
+
 # Module-level test
 @pytest.mark.unit
 def test_module_exports() -> Any:
@@ -232,14 +232,12 @@ class TestRestoreFlow:
             version_result.stdout = "Python 3.10.0"
             version_result.returncode = 0
 
-            import_results = [
-                MagicMock(returncode=0),  # my_app
-                MagicMock(returncode=0),  # prefect
-                MagicMock(returncode=0),  # yaml
-                MagicMock(returncode=0),  # requests
-            ]
+            # All imports are checked in a single interpreter that reports JSON
+            import_result = MagicMock(
+                returncode=0, stdout='{"my_app": true, "prefect": true, "yaml": true, "requests": true}\n'
+            )
 
-            mock_subprocess.side_effect = [version_result] + import_results
+            mock_subprocess.side_effect = [version_result, import_result]
 
             result = verify_installation.fn(project_path, venv_path)
 
@@ -247,6 +245,7 @@ class TestRestoreFlow:
             assert result["python_version"] == "Python 3.10.0"
             assert result["import_results"]["my_app"] is True
             assert result["import_results"]["prefect"] is True
+            assert mock_subprocess.call_args[0][0][3:] == ["my_app", "prefect", "yaml", "requests"]
 
         finally:
             cleanup_temporary_project(project_path)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shell-free diagnostic command execution.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import sys
+import time
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.diagnostic_command_runner import compile_command, run_probe
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX commands")
+
+
+class TestCompileCommand:
+    """Test registry command strings compile to argv probes."""
+
+    def test_simple_command(self) -> Any:
+        """Test plain commands need no shell."""
+        probe = compile_command("git --version")
+        assert probe.argv == ("git", "--version")
+        assert not probe.uses_shell
+
+    def test_quoted_arguments(self) -> Any:
+        """Test quoted shell metacharacters stay inside their argument."""
+        probe = compile_command('python -c "import sys; print(sys.executable)"')
+        assert probe.argv == ("python", "-c", "import sys; print(sys.executable)")
+
+    def test_redirection_idioms(self) -> Any:
+        """Test stderr redirection and head pipes are emulated."""
+        probe = compile_command("ssh -V 2>&1")
+        assert probe.argv == ("ssh", "-V") and probe.merge_stderr
+
+        probe = compile_command("apt list --upgradable 2>/dev/null")
+        assert probe.argv == ("apt", "list", "--upgradable") and probe.discard_stderr
+
+        probe = compile_command("zip --version 2>&1 | head -n 2")
+        assert probe.argv == ("zip", "--version") and probe.merge_stderr and probe.head_lines == 2
+
+    def test_shell_fallback(self) -> Any:
+        """Test pipelines, chains and expansions keep the shell."""
+        for command in [
+            'java -version 2>&1 | grep "java.home"',
+            "df --version 2>&1 || df -h",
+            "echo $HOME",
+            "ls *.py",
+            "echo 'unbalanced",
+        ]:
+            assert compile_command(command).uses_shell, command
+
+    def test_registry_mostly_shell_free(self) -> Any:
+        """Test only a handful of registry commands need /bin/sh."""
+        from DHT.diagnostic_tool_collector import registry_probes
+
+        probes = [probe for commands in registry_probes().values() for probe in commands.values()]
+        assert sum(probe.uses_shell for probe in probes) < len(probes) // 10
+
+
+class TestRunProbe:
+    """Test probe execution matches the shell semantics of the original string."""
+
+    def test_merge_stderr(self) -> Any:
+        """Test `2>&1` captures stderr into stdout."""
+        stdout, error = run_probe(compile_command("python3 -c \"import sys; sys.stderr.write('v1.2')\" 2>&1"))
+        assert error is None
+        assert stdout == "v1.2"
+
+    def test_head_truncates_and_succeeds(self) -> Any:
+        """Test `| head -n N` keeps N lines and, like the shell, ignores the exit status."""
+        command = "python3 -c \"print('a'); print('b'); print('c'); raise SystemExit(3)\" | head -n 2"
+        stdout, error = run_probe(compile_command(command))
+        assert stdout == "a\nb\n"
+        assert error is None
+
+    def test_failure_reports_stderr(self) -> Any:
+        """Test a failing command returns its stderr as the error."""
+        stdout, error = run_probe(compile_command("python3 -c \"import sys; sys.exit('broken')\""))
+        assert error is not None and "broken" in error
+
+    def test_missing_executable(self) -> Any:
+        """Test a missing executable is reported instead of raised."""
+        stdout, error = run_probe(compile_command("definitely-not-a-tool-xyz --version"))
+        assert stdout == ""
+        assert error is not None and "not found" in error
+
+    def test_no_shell_spawned(self) -> Any:
+        """Test argv probes call subprocess without shell=True."""
+        with patch("DHT.diagnostic_command_runner.subprocess.run") as mock_run:
+            mock_run.return_value.stdout = "git version 2.45.1\n"
+            mock_run.return_value.returncode = 0
+            run_probe(compile_command("git --version"))
+        assert mock_run.call_args.args[0] == ["git", "--version"]
+        assert not mock_run.call_args.kwargs.get("shell")
+
+
+class TestCommandScheduling:
+    """Test tool commands are scheduled individually."""
+
+    def test_slow_command_does_not_serialize_tool(self) -> Any:
+        """Test a tool's commands run concurrently on the shared pool."""
+        from DHT.diagnostic_tool_collector import collect_all_tools
+
+        spec = {
+            "category": "utilities",
+            "commands": {"version": "sleep 1", "help": "sleep 1", "config": "sleep 1"},
+        }
+        with patch(
+            "DHT.diagnostic_tool_collector.cli_commands_registry.get_platform_specific_commands",
+            return_value={"sleep": spec},
+        ):
+            start = time.perf_counter()
+            tree = collect_all_tools()
+            elapsed = time.perf_counter() - start
+
+        assert tree["tools"]["utilities"]["sleep"]["is_installed"]
+        # Three one-second probes would take three seconds back to back
+        assert elapsed < 2.0
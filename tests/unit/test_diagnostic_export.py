@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for diagnostic row export and report merging.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from DHT.diagnostic_export import (
+    ROWS_FORMAT,
+    flatten_report,
+    merge_reports,
+    read_tool_versions,
+    report_to_rows,
+)
+
+
+def _report(host: str, git: str, python: str | None = "3.11.5") -> dict[str, Any]:
+    tools: dict[str, Any] = {
+        "version_control": {
+            "git": {"is_installed": True, "version": git, "config": {"version": "ignored"}},
+            "svn": {"is_installed": False},
+        },
+    }
+    if python:
+        tools["language_runtimes"] = {"python": {"is_installed": True, "version": python}}
+    return {
+        "system": {"hostname": host, "platform": "linux"},
+        "tools": tools,
+        "_metadata": {"generated_at": "2024-06-01T00:00:00Z"},
+    }
+
+
+class TestRowsExport:
+    """Test flattening reports into rows."""
+
+    def test_flatten_paths(self) -> Any:
+        """Test leaves get their atomic tree paths and metadata is skipped."""
+        rows = dict(flatten_report(_report("ci-01", "2.45.1")))
+        assert rows["tools.version_control.git.version"] == "2.45.1"
+        assert rows["tools.version_control.svn.is_installed"] is False
+        assert rows["system.hostname"] == "ci-01"
+        assert not any(path.startswith("_metadata") for path in rows)
+
+    def test_rows_format(self) -> Any:
+        """Test the header line and one JSON array per leaf."""
+        lines = report_to_rows(_report("ci-01", "2.45.1")).splitlines()
+        header = json.loads(lines[0])
+        assert header["format"] == ROWS_FORMAT
+        assert header["host"] == "ci-01"
+        assert header["generated_at"] == "2024-06-01T00:00:00Z"
+        assert ["tools.version_control.git.version", "2.45.1"] in [json.loads(line) for line in lines[1:]]
+
+    def test_rows_and_tree_agree(self, tmp_path: Path) -> Any:
+        """Test a rows file and the equivalent JSON tree yield the same versions."""
+        report = _report("ci-01", "2.45.1")
+        (tmp_path / "a.ndjson").write_text(report_to_rows(report))
+        (tmp_path / "a.json").write_text(json.dumps(report))
+        from_rows = read_tool_versions(tmp_path / "a.ndjson")
+        assert from_rows == read_tool_versions(tmp_path / "a.json")
+        assert from_rows == ("ci-01", {"version_control.git": "2.45.1", "language_runtimes.python": "3.11.5"})
+
+
+class TestMerge:
+    """Test aggregating many reports into a version matrix."""
+
+    def test_version_matrix(self, tmp_path: Path) -> Any:
+        """Test versions are counted per tool across hosts and bad files are reported."""
+        (tmp_path / "a.ndjson").write_text(report_to_rows(_report("a", "2.45.1")))
+        (tmp_path / "b.ndjson").write_text(report_to_rows(_report("b", "2.45.1", python=None)))
+        (tmp_path / "c.json").write_text(json.dumps(_report("c", "2.39.3")))
+        (tmp_path / "broken.json").write_text("{not json")
+
+        matrix = merge_reports([tmp_path])
+        data = matrix.to_dict()
+        assert data["hosts"] == 3
+        assert data["tools"]["version_control.git"] == {"2.45.1": ["a", "b"], "2.39.3": ["c"]}
+        assert data["tools"]["language_runtimes.python"] == {"3.11.5": ["a", "c"]}
+        assert str(tmp_path / "broken.json") in data["errors"]
+
+        table = matrix.to_table()
+        assert "version_control.git" in table and "3 report(s)" in table
+        assert matrix.to_csv().splitlines()[1] == "language_runtimes.python,3.11.5,2"
+
+    def test_merge_many_reports(self, tmp_path: Path) -> Any:
+        """Test a fleet-sized batch of row files merges quickly."""
+        for i in range(500):
+            report = _report(f"host-{i}", f"2.{i % 5}.0")
+            report["tools"]["misc"] = {
+                f"tool{j}": {"is_installed": True, "version": "1.0", "help": "x" * 200} for j in range(50)
+            }
+            (tmp_path / f"{i}.ndjson").write_text(report_to_rows(report))
+
+        start = time.perf_counter()
+        matrix = merge_reports([tmp_path])
+        elapsed = time.perf_counter() - start
+        assert len(matrix.hosts) == 500
+        assert len(matrix.tools["version_control.git"]) == 5
+        assert elapsed < 5.0
+
+    def test_dhtl_merge_command(self, tmp_path: Path, capsys: Any) -> Any:
+        """Test `dhtl diagnostics merge` prints the matrix."""
+        from DHT.modules.dhtl_diagnostics import diagnostics_command
+
+        (tmp_path / "a.ndjson").write_text(report_to_rows(_report("a", "2.45.1")))
+        assert diagnostics_command(["merge", str(tmp_path), "--format", "json"]) == 0
+        data = json.loads(capsys.readouterr().out)
+        assert data["tools"]["version_control.git"] == {"2.45.1": ["a"]}
+
+    def test_dhtl_merge_without_reports(self, tmp_path: Path) -> Any:
+        """Test merge fails when nothing could be read."""
+        from DHT.modules.dhtl_diagnostics import diagnostics_command
+
+        assert diagnostics_command(["merge", str(tmp_path / "missing.json")]) == 1
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental diagnostic refresh.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.diagnostic_refresh import diff_reports, refresh_report
+from DHT.diagnostic_tiers import DEPTH_VERSIONS_ONLY
+from DHT.diagnostic_tool_collector import BUDGET_EXHAUSTED
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX executable bits")
+
+SPECS = {
+    "mytool": {"category": "build_tools", "commands": {"version": "mytool --version"}},
+    "othertool": {"category": "build_tools", "commands": {"version": "othertool --version"}},
+}
+
+
+def _make_tool(directory: Path, name: str, version: str) -> Path:
+    path = directory / name
+    path.write_text(f"#!{sys.executable}\nprint('{name} {version}')\n")
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def tool_dir(tmp_path: Path) -> Iterator[Path]:
+    """A PATH directory holding fake tools, with the registry narrowed to them."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    with (
+        patch.dict(os.environ, {"PATH": f"{bin_dir}:/usr/bin:/bin"}),
+        patch(
+            "DHT.diagnostic_tool_collector.cli_commands_registry.get_platform_specific_commands",
+            return_value=SPECS,
+        ),
+    ):
+        yield bin_dir
+
+
+def _refresh(previous: dict[str, Any], **kwargs: Any) -> Any:
+    return refresh_report(previous, include_system_info=False, depth=DEPTH_VERSIONS_ONLY, **kwargs)
+
+
+class TestRefresh:
+    """Test which tools a refresh re-probes."""
+
+    def test_first_run_collects_everything(self, tool_dir: Path) -> Any:
+        """Test a report without fingerprints is collected in full."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        report, diff = _refresh({})
+        assert diff.full_refresh == "previous report has no fingerprints"
+        assert report["tools"]["build_tools"]["mytool"]["version"] == "1.0.0"
+        assert report["_metadata"]["fingerprints"]["tools"]["mytool"]["executable"] is not None
+
+    def test_unchanged_tools_are_not_probed(self, tool_dir: Path) -> Any:
+        """Test a refresh with nothing changed runs no commands and keeps the data."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        first, _ = _refresh({})
+        with patch("DHT.diagnostic_tool_collector.run_tool_command", side_effect=AssertionError("probed")):
+            second, diff = _refresh(first)
+        assert diff.reprobed == [] and diff.full_refresh is None
+        assert not diff.has_changes
+        assert second["tools"] == first["tools"]
+
+    def test_upgraded_tool_is_reprobed(self, tool_dir: Path) -> Any:
+        """Test replacing a binary re-probes only that tool and reports the new version."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        _make_tool(tool_dir, "othertool", "3.0.0")
+        first, _ = _refresh({})
+
+        _make_tool(tool_dir, "mytool", "1.1.0")
+        second, diff = _refresh(first)
+        assert diff.reprobed == ["mytool"]
+        assert diff.changed == {"tools.build_tools.mytool.version": ("1.0.0", "1.1.0")}
+        assert second["tools"]["build_tools"]["othertool"]["version"] == "3.0.0"
+
+    def test_installed_tool_is_added(self, tool_dir: Path) -> Any:
+        """Test a tool appearing on PATH is picked up."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        first, _ = _refresh({})
+        assert first["tools"]["build_tools"]["othertool"]["is_installed"] is False
+
+        _make_tool(tool_dir, "othertool", "3.0.0")
+        _, diff = _refresh(first)
+        assert diff.reprobed == ["othertool"]
+        assert diff.added == {"tools.build_tools.othertool.version": "3.0.0"}
+        assert diff.changed == {"tools.build_tools.othertool.is_installed": (False, True)}
+
+    def test_old_report_is_collected_again(self, tool_dir: Path) -> Any:
+        """Test a report older than max_age is not trusted."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        first, _ = _refresh({})
+        _, diff = _refresh(first, max_age=0)
+        assert diff.full_refresh == "previous report is too old"
+        assert set(diff.reprobed) == {"mytool", "othertool"}
+
+    def test_budget_skipped_tool_is_retried(self, tool_dir: Path) -> Any:
+        """Test a tool cut off by the previous run's time budget is probed again."""
+        _make_tool(tool_dir, "mytool", "1.0.0")
+        first, _ = _refresh({})
+        first["tools"]["build_tools"]["mytool"] = {"is_installed": True, "version_error": BUDGET_EXHAUSTED}
+        second, diff = _refresh(first)
+        assert diff.reprobed == ["mytool"]
+        assert second["tools"]["build_tools"]["mytool"]["version"] == "1.0.0"
+
+
+class TestDiff:
+    """Test report comparison."""
+
+    def test_diff_ignores_system_metrics(self) -> Any:
+        """Test only tool leaves are compared by default."""
+        old = {"system": {"memory": 1}, "tools": {"a": {"x": {"version": "1"}}, "b": {"y": {"version": "2"}}}}
+        new = {"system": {"memory": 2}, "tools": {"a": {"x": {"version": "1.1"}}, "c": {"z": {"version": "3"}}}}
+        diff = diff_reports(old, new)
+        assert diff.changed == {"tools.a.x.version": ("1", "1.1")}
+        assert diff.added == {"tools.c.z.version": "3"}
+        assert diff.removed == {"tools.b.y.version": "2"}
+        assert "tools.a.x.version" in diff.summary()
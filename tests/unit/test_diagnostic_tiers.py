@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tiered diagnostic collection.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import sys
+import time
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.diagnostic_tiers import (
+    COST_EXPENSIVE,
+    DEPTH_FULL,
+    DEPTH_STANDARD,
+    DEPTH_VERSIONS_ONLY,
+    Deadline,
+    command_cost,
+    commands_for_depth,
+    validate_depth,
+)
+
+SSH_SPEC = {
+    "commands": {"version": "ssh -V 2>&1", "config": "ssh -G localhost"},
+    "cost_tiers": {"config": COST_EXPENSIVE},
+    "category": "network_tools",
+}
+
+
+class TestCostTiers:
+    """Test command cost tiers and depth selection."""
+
+    def test_default_and_declared_tiers(self) -> Any:
+        """Test version commands default to the version tier and declarations override."""
+        assert command_cost(SSH_SPEC, "version") == "version"
+        assert command_cost(SSH_SPEC, "config") == "expensive"
+        assert command_cost({"commands": {"help": "x --help"}}, "help") == "standard"
+
+    def test_depth_selects_tiers(self) -> Any:
+        """Test each depth includes the tiers below it."""
+        spec = dict(SSH_SPEC, commands=dict(SSH_SPEC["commands"], help="ssh --help"))
+        assert list(commands_for_depth(spec, DEPTH_VERSIONS_ONLY)) == ["version"]
+        assert list(commands_for_depth(spec, DEPTH_STANDARD)) == ["version", "help"]
+        assert list(commands_for_depth(spec, DEPTH_FULL)) == ["version", "config", "help"]
+
+    def test_unknown_depth(self) -> Any:
+        """Test unknown depths are rejected."""
+        with pytest.raises(ValueError, match="Unknown diagnostic depth"):
+            validate_depth("everything")
+
+    def test_registry_marks_known_slow_commands(self) -> Any:
+        """Test the slow commands called out by users are expensive."""
+        from DHT.modules.cli_commands_registry import CLI_COMMANDS
+
+        assert command_cost(CLI_COMMANDS["ssh"], "config") == COST_EXPENSIVE
+        assert command_cost(CLI_COMMANDS["openssl"], "ciphers") == COST_EXPENSIVE
+        assert command_cost(CLI_COMMANDS["pip"], "list") == COST_EXPENSIVE
+
+    def test_deadline(self) -> Any:
+        """Test deadlines clamp probe timeouts."""
+        assert Deadline(None).timeout(30) == 30
+        assert not Deadline(None).expired
+        deadline = Deadline(5)
+        assert deadline.timeout(30) <= 5
+        assert Deadline(0).expired
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX sleep")
+class TestTieredCollection:
+    """Test depth and budget handling in the collectors."""
+
+    def _collect(self, spec: dict[str, Any], **kwargs: Any) -> Any:
+        from DHT.diagnostic_tool_collector import collect_all_tools
+
+        with patch(
+            "DHT.diagnostic_tool_collector.cli_commands_registry.get_platform_specific_commands",
+            return_value={"sleep": spec},
+        ):
+            return collect_all_tools(**kwargs)["tools"]["utilities"]["sleep"]
+
+    def test_versions_only_skips_other_commands(self) -> Any:
+        """Test a versions-only collection never runs non-version commands."""
+        spec = {"category": "utilities", "commands": {"version": "sleep 0", "help": "sleep 5"}}
+        start = time.perf_counter()
+        info = self._collect(spec, depth=DEPTH_VERSIONS_ONLY)
+        assert time.perf_counter() - start < 2.0
+        assert "help" not in info and "help_error" not in info
+
+    def test_budget_cancels_stragglers(self) -> Any:
+        """Test probes still running at the deadline are abandoned and reported."""
+        spec = {"category": "utilities", "commands": {"version": "sleep 0", "slow": "sleep 5", "slower": "sleep 6"}}
+        start = time.perf_counter()
+        info = self._collect(spec, budget=0.5)
+        assert time.perf_counter() - start < 2.0
+        assert "version_error" not in info
+        assert "slow_error" in info and "slower_error" in info
+
+    def test_psutil_depth(self) -> Any:
+        """Test network enumeration only runs for full reports."""
+        from DHT import diagnostic_system_info
+
+        if not diagnostic_system_info.HAS_PSUTIL:
+            pytest.skip("psutil not installed")
+        with patch("psutil.net_if_addrs", side_effect=AssertionError("enumerated interfaces")):
+            standard = diagnostic_system_info.collect_psutil_info(DEPTH_STANDARD)
+        assert "memory" in standard and "network_interfaces" not in standard
+        assert diagnostic_system_info.collect_psutil_info(DEPTH_VERSIONS_ONLY) == {}
+
+    def test_build_system_report_passes_depth(self) -> Any:
+        """Test the report builder forwards depth and budget to the collectors."""
+        from DHT import diagnostic_reporter_v2
+
+        with (
+            patch.object(diagnostic_reporter_v2, "collect_all_tools", return_value={}) as mock_tools,
+            patch.object(diagnostic_reporter_v2, "collect_psutil_info", return_value={}) as mock_psutil,
+            patch.object(diagnostic_reporter_v2, "collect_basic_system_info", return_value={}),
+        ):
+            diagnostic_reporter_v2.build_system_report(depth=DEPTH_VERSIONS_ONLY, budget=3)
+
+        mock_psutil.assert_called_once_with(DEPTH_VERSIONS_ONLY)
+        assert mock_tools.call_args.kwargs["depth"] == DEPTH_VERSIONS_ONLY
+        assert mock_tools.call_args.kwargs["budget"] == 3
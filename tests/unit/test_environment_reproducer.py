@@ -138,7 +138,7 @@ class TestEnvironmentReproducer:
                 patch("DHT.modules.environment_snapshot_io.EnvironmentSnapshotIO.load_snapshot") as mock_load,
             ):
                 # Make save_snapshot return the output path
-                mock_save.side_effect = lambda snapshot, output_path, format: output_path
+                mock_save.side_effect = lambda snapshot, output_path, format, **kwargs: output_path
 
                 # Make load_snapshot return a sample snapshot
                 from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
@@ -598,7 +598,7 @@ class TestEnvironmentReproducer:
             patch.object(reproducer.env_verification_utils, "verify_platform_compatibility"),
             patch.object(reproducer.env_verification_utils, "verify_python_version"),
             patch.object(reproducer.env_verification_utils, "verify_tools"),
-            patch.object(reproducer, "_reproduce_project_environment"),
+            patch.object(reproducer, "_restore_project_files"),
             patch.object(reproducer, "_verify_configurations"),
         ):
             result = reproducer._reproduce_environment_impl(
@@ -608,13 +608,13 @@ class TestEnvironmentReproducer:
             assert isinstance(result, ReproductionResult)
             assert result.snapshot_id == sample_snapshot.snapshot_id
 
-    def test_reproduce_project_environment(self, reproducer, sample_snapshot, tmp_path) -> Any:
-        """Test project environment reproduction."""
+    def test_restore_project_files(self, reproducer, sample_snapshot, tmp_path) -> Any:
+        """Test project files are restored into the target."""
         result = ReproductionResult(success=False, snapshot_id=sample_snapshot.snapshot_id, platform="darwin")
 
         target_path = tmp_path / "reproduction"
 
-        reproducer._reproduce_project_environment(sample_snapshot, result, target_path, False)
+        reproducer._restore_project_files(sample_snapshot, result, target_path)
 
         # Check that lock files were restored
         assert (target_path / "uv.lock").exists()
@@ -828,7 +828,7 @@ class TestIntegration:
 
                 # Mock environment_snapshot_io methods
                 with patch("DHT.modules.environment_snapshot_io.EnvironmentSnapshotIO.save_snapshot") as mock_save:
-                    mock_save.side_effect = lambda snapshot, output_path, format: output_path
+                    mock_save.side_effect = lambda snapshot, output_path, format, **kwargs: output_path
 
                     # Mock lock_file_manager methods
                     with patch(
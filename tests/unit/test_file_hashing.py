@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for streaming and parallel file hashing.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import hashlib
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from DHT.modules.file_hashing import file_checksum, hash_files, read_text_with_checksum
+from DHT.modules.lock_file_manager import LockFileManager
+
+
+def _snapshot_checksum(path: Path) -> str:
+    # How snapshot checksums were computed before streaming
+    return hashlib.sha256(path.read_text(encoding="utf-8").encode()).hexdigest()
+
+
+class TestFileChecksum:
+    """Test that streamed checksums match snapshot checksums."""
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"plain\nunix\n", b"dos\r\nline\r\n", b"old mac\rline\r", b"mixed\r\n\r\r\n\n\xc3\xa9\r"],
+        ids=["empty", "lf", "crlf", "cr", "mixed"],
+    )
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 1024])
+    def test_matches_read_text(self, tmp_path: Path, data: bytes, chunk_size: int) -> Any:
+        """Test newline translation across every chunk boundary, including a split \\r\\n."""
+        path = tmp_path / "file.txt"
+        path.write_bytes(data)
+        assert file_checksum(path, chunk_size=chunk_size) == _snapshot_checksum(path)
+        assert read_text_with_checksum(path) == (path.read_text(encoding="utf-8"), _snapshot_checksum(path))
+
+    def test_raw_bytes(self, tmp_path: Path) -> Any:
+        """Test normalize_newlines=False hashes the bytes on disk."""
+        path = tmp_path / "file.bin"
+        path.write_bytes(b"a\r\nb")
+        assert file_checksum(path, normalize_newlines=False) == hashlib.sha256(b"a\r\nb").hexdigest()
+
+    def test_memory_stays_bounded(self, tmp_path: Path) -> Any:
+        """Test a 16 MB file is hashed without holding it in memory."""
+        path = tmp_path / "uv.lock"
+        line = b'[[package]]\r\nname = "pkg"\r\nversion = "1.0.0"\r\n\r\n'
+        path.write_bytes(line * (16 * 1024 * 1024 // len(line)))
+
+        tracemalloc.start()
+        try:
+            checksum = file_checksum(path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < 4 * 1024 * 1024
+        assert checksum == _snapshot_checksum(path)
+
+
+class TestHashFiles:
+    """Test hashing many files concurrently."""
+
+    def test_parallel_hashes(self, tmp_path: Path) -> Any:
+        """Test results keep the input order and unreadable files are left out."""
+        paths = []
+        for i in range(20):
+            path = tmp_path / f"file{i}.txt"
+            path.write_text(f"content {i}\n" * 1000)
+            paths.append(path)
+        missing = tmp_path / "missing.txt"
+
+        result = hash_files([*paths, missing], max_workers=4)
+        assert list(result) == paths
+        assert all(result[path] == _snapshot_checksum(path) for path in paths)
+        assert hash_files([]) == {}
+
+
+class TestLockInfo:
+    """Test lock file information built from files on disk."""
+
+    def test_checksum_from_file(self, tmp_path: Path) -> Any:
+        """Test the recorded checksum matches the one computed from the content."""
+        path = tmp_path / "uv.lock"
+        path.write_bytes(b'version = 1\r\n\r\n[[package]]\r\nname = "a"\r\nversion = "1"\r\n')
+        manager = LockFileManager()
+        info = manager._lock_info_from_file("uv.lock", path)
+        assert info.content == path.read_text()
+        assert info.checksum == manager._create_lock_info("uv.lock", info.content).checksum
+        assert info.package_count == 1
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the guardian run history store.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import asyncio
+import os
+import subprocess
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.modules.guardian_history import (
+    AdaptiveLimitPolicy,
+    GuardianHistory,
+    GuardianRunRecord,
+    command_fingerprint,
+    default_history_path,
+    exit_reason_for,
+    is_install_command,
+    learn_limits,
+    percentile,
+    record_guardian_run,
+)
+
+
+def _record(fingerprint: str, duration: float, memory: float | None = 100.0, reason: str = "success") -> Any:
+    return GuardianRunRecord(
+        fingerprint=fingerprint,
+        command=f"cmd-{fingerprint}",
+        cwd="/tmp",
+        started_at=time.time(),
+        duration=duration,
+        peak_memory_mb=memory,
+        cpu_time=duration / 2,
+        return_code=0 if reason == "success" else 1,
+        exit_reason=reason,
+    )
+
+
+class TestFingerprintAndPercentiles:
+    """Test fingerprinting and statistics helpers."""
+
+    def test_fingerprint_ignores_executable_directory(self) -> Any:
+        """Test /usr/bin/uv and uv share a fingerprint."""
+        assert command_fingerprint(["/usr/bin/uv", "sync"]) == command_fingerprint("uv sync")
+        assert command_fingerprint("uv sync") != command_fingerprint("uv lock")
+
+    def test_fingerprint_tolerates_unbalanced_quotes(self) -> Any:
+        """Test malformed shell strings still fingerprint."""
+        assert command_fingerprint("echo 'oops") == command_fingerprint("echo 'oops")
+
+    def test_fingerprint_is_per_project(self, tmp_path: Path) -> Any:
+        """Test runs of a command in different projects do not share history."""
+        assert is_install_command(["uv", "sync", "--frozen"])
+        assert is_install_command(["/venv/bin/python", "-m", "pip", "install", "-r", "requirements.txt"])
+        assert is_install_command(["uv", "pip", "install", "."])
+        assert not is_install_command(["uv", "run", "pytest"])
+
+        a, b = tmp_path / "a", tmp_path / "b"
+        assert command_fingerprint(["uv", "sync"], a) != command_fingerprint(["uv", "sync"], b)
+        assert command_fingerprint(["uv", "sync"], a) == command_fingerprint(["uv", "sync"], a / "sub" / "..")
+        assert command_fingerprint(["make"], a) != command_fingerprint(["make"], b)
+
+    def test_percentile_interpolates(self) -> Any:
+        """Test percentile uses linear interpolation."""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 95) == pytest.approx(4.8)
+        assert percentile([7.0], 95) == 7.0
+        with pytest.raises(ValueError):
+            percentile([], 50)
+
+    def test_exit_reason_for(self) -> Any:
+        """Test guardian result dicts map to exit reasons."""
+        assert exit_reason_for({"returncode": 0}) == "success"
+        assert exit_reason_for({"returncode": 2}) == "failed"
+        assert exit_reason_for({"returncode": -1, "killed": True, "reason": "timeout"}) == "timeout"
+        assert exit_reason_for({"returncode": -1, "error": "boom"}) == "error"
+
+
+class TestGuardianHistory:
+    """Test the SQLite history store."""
+
+    def test_record_and_stats(self, tmp_path: Path) -> Any:
+        """Test per-command p50/p95 statistics."""
+        history = GuardianHistory(tmp_path / "history.db")
+        for duration in [1.0, 2.0, 3.0, 4.0, 5.0]:
+            history.record(_record("slow", duration, memory=duration * 100))
+        history.record(_record("fast", 0.1, memory=None, reason="failed"))
+
+        stats = {s.fingerprint: s for s in history.stats()}
+        assert stats["slow"].runs == 5
+        assert stats["slow"].failures == 0
+        assert stats["slow"].p50_duration == 3.0
+        assert stats["slow"].p95_memory_mb == pytest.approx(480.0)
+        assert stats["fast"].failures == 1
+        assert stats["fast"].p50_memory_mb is None
+        assert history.stats()[0].fingerprint == "slow"
+
+    def test_stats_window_and_prune(self, tmp_path: Path) -> Any:
+        """Test only the most recent runs count and prune drops the rest."""
+        history = GuardianHistory(tmp_path / "history.db")
+        for i in range(10):
+            record = _record("cmd", float(i))
+            record.started_at = 1000.0 + i
+            history.record(record)
+
+        assert history.stats(window=3)[0].p50_duration == 8.0
+        assert history.prune(keep_per_command=3) == 7
+        assert [r.duration for r in history.runs_for("cmd")] == [9.0, 8.0, 7.0]
+
+    def test_command_filter(self, tmp_path: Path) -> Any:
+        """Test stats can be filtered by command text."""
+        history = GuardianHistory(tmp_path / "history.db")
+        history.record(_record("a", 1.0))
+        history.record(_record("b", 1.0))
+        assert [s.fingerprint for s in history.stats(command_filter="cmd-b")] == ["b"]
+
+    def test_record_guardian_run(self, tmp_path: Path) -> Any:
+        """Test guardian result dicts are recorded with a fingerprint."""
+        history = GuardianHistory(tmp_path / "history.db")
+        record_guardian_run(
+            ["uv", "sync"],
+            tmp_path,
+            {"returncode": -1, "duration": 2.5, "peak_memory_mb": 64.0, "killed": True, "reason": "memory"},
+            history=history,
+        )
+        runs = history.runs_for(command_fingerprint(["uv", "sync"], tmp_path))
+        assert len(runs) == 1
+        assert runs[0].exit_reason == "memory"
+        assert runs[0].cwd == str(tmp_path.resolve())
+        assert runs[0].command == "uv sync"
+
+    def test_history_path_env_override(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Any:
+        """Test DHT_GUARDIAN_HISTORY relocates or disables the store."""
+        monkeypatch.setenv("DHT_GUARDIAN_HISTORY", str(tmp_path / "custom.db"))
+        assert default_history_path() == tmp_path / "custom.db"
+
+        monkeypatch.setenv("DHT_GUARDIAN_HISTORY", "off")
+        record_guardian_run(["echo"], None, {"returncode": 0, "duration": 0.1})
+        assert not (tmp_path / "custom.db").exists()
+
+    @pytest.mark.skipif(os.name == "nt", reason="Uses POSIX echo")
+    def test_guardian_runs_are_recorded(self) -> Any:
+        """Test guarded runs are recorded into the configured history."""
+        from DHT.modules.guardian_prefect import run_with_guardian_async
+
+        result = asyncio.run(run_with_guardian_async(["echo", "recorded"]))
+        assert result.success
+
+        stats = GuardianHistory().stats(command_filter="echo")
+        assert stats and stats[0].runs == 1
+
+    @pytest.mark.skipif(os.name == "nt", reason="Uses POSIX sleep")
+    def test_memory_kills_record_cpu_time(self) -> Any:
+        """Test a run killed for its memory use is recorded with its CPU time."""
+        from DHT.modules.guardian_prefect import monitor_process
+
+        process = subprocess.Popen(["sleep", "5"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with patch("DHT.modules.guardian_prefect.get_run_logger"):
+            result = monitor_process(process, SimpleNamespace(timeout=10, memory_mb=0))
+        assert result["reason"] == "memory"
+        assert result["cpu_time"] is not None
+
+        record_guardian_run(["sleep", "5"], None, {**result, "duration": 0.1})
+        (run,) = GuardianHistory().runs_for(command_fingerprint(["sleep", "5"]))
+        assert run.exit_reason == "memory" and run.cpu_time is not None
+
+    @pytest.mark.skipif(os.name == "nt", reason="Uses POSIX sh")
+    def test_cli_guardian_runs_are_recorded(self) -> Any:
+        """Test the guard used by dhtl sync/test/publish records its runs too."""
+        from DHT.modules.dhtl_guardian_1 import run_with_guardian
+
+        assert run_with_guardian("sh", "test", 2048, "-c", "exit 4") == 4
+        assert run_with_guardian("nonexistent_command_xyz", "test", 2048) == 1
+
+        stats = {s.command: s for s in GuardianHistory().stats()}
+        assert stats["sh -c 'exit 4'"].failures == 1
+        assert stats["nonexistent_command_xyz"].failures == 1
+
+
+class TestLearnLimits:
+    """Test adaptive limits derived from run history."""
+
+    POLICY = AdaptiveLimitPolicy(max_memory_mb=16384)
+
+    def _history_with(
+        self, tmp_path: Path, runs: list[tuple[float, float | None, str]], command: tuple[str, ...] = ("ruff", "check")
+    ) -> Any:
+        history = GuardianHistory(tmp_path / "history.db")
+        fingerprint = command_fingerprint(command)
+        for i, (duration, memory, reason) in enumerate(runs):
+            record = _record(fingerprint, duration, memory=memory, reason=reason)
+            record.started_at = 1000.0 + i
+            history.record(record)
+        return history
+
+    def test_cold_start_without_history(self, tmp_path: Path) -> Any:
+        """Test no limits are learned without enough samples."""
+        history = self._history_with(tmp_path, [(1.0, 100.0, "success")] * 4)
+        assert learn_limits(["ruff", "check"], 2048, 600, self.POLICY, history) is None
+        assert learn_limits(["ruff", "check"], 2048, 600, self.POLICY, GuardianHistory(tmp_path / "none.db")) is None
+
+    def test_fast_command_gets_short_timeout(self, tmp_path: Path) -> Any:
+        """Test quick commands get a timeout near the minimum instead of the default."""
+        history = self._history_with(tmp_path, [(2.0, 100.0, "success")] * 10)
+        learned = learn_limits(["ruff", "check"], 2048, 900, self.POLICY, history)
+        assert learned is not None
+        assert learned.timeout_seconds == 60
+        assert learned.memory_limit_mb == 406
+        assert learned.samples == 10
+
+    def test_heavy_command_gets_more_headroom(self, tmp_path: Path) -> Any:
+        """Test slow, memory-hungry commands get limits above the defaults."""
+        history = self._history_with(tmp_path, [(500.0, 3000.0, "success")] * 10)
+        learned = learn_limits(["ruff", "check"], 2048, 600, self.POLICY, history)
+        assert learned is not None
+        assert learned.timeout_seconds == 1530
+        assert learned.memory_limit_mb == 4756
+
+    def test_guardian_kills_back_off(self, tmp_path: Path) -> Any:
+        """Test a recent guardian kill prevents learning a limit below the cold start."""
+        runs = [(2.0, 100.0, "success")] * 10 + [(60.0, 120.0, "timeout")]
+        history = self._history_with(tmp_path, runs)
+        learned = learn_limits(["ruff", "check"], 2048, 600, self.POLICY, history)
+        assert learned is not None
+        assert learned.timeout_seconds == 600
+        assert learned.memory_limit_mb < 2048
+
+    def test_install_timeout_never_below_cold_start(self, tmp_path: Path) -> Any:
+        """Test fast warm-cache installs do not shrink the timeout for the next cold install."""
+        history = self._history_with(tmp_path, [(2.0, 100.0, "success")] * 10, command=("uv", "sync"))
+        learned = learn_limits(["uv", "sync"], 2048, 600, self.POLICY, history)
+        assert learned is not None
+        assert learned.timeout_seconds == 600
+        assert learned.memory_limit_mb == 406
+
+    def test_adaptive_guardian_config(self, tmp_path: Path) -> Any:
+        """Test adaptive_guardian_config falls back to the cold-start config."""
+        from DHT.modules.guardian_prefect import GuardianConfig, adaptive_guardian_config
+
+        fallback = GuardianConfig(memory_limit_mb=1024, timeout_seconds=600)
+        assert adaptive_guardian_config(["ruff", "check"], fallback=fallback) is fallback
+
+        history = GuardianHistory()
+        for _ in range(5):
+            history.record(_record(command_fingerprint(["ruff", "check"]), 1.0))
+            history.record(_record(command_fingerprint(["uv", "sync"], tmp_path / "a"), 1.0))
+        config = adaptive_guardian_config(["ruff", "check"], fallback=fallback)
+        assert config.timeout_seconds == 60
+        assert config.check_interval == fallback.check_interval
+
+        assert adaptive_guardian_config(["uv", "sync"], fallback=fallback, cwd=str(tmp_path / "b")) is fallback
+        learned = adaptive_guardian_config(["uv", "sync"], fallback=fallback, cwd=str(tmp_path / "a"))
+        assert (learned.timeout_seconds, learned.memory_limit_mb) == (600, 406)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Unit tests for structured lock file parsing.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from DHT.modules.lock_file_manager import LockFileManager
+from DHT.modules.lock_file_parsers import parse_lock_content, parse_lock_file
+
+UV_LOCK = """version = 1
+requires-python = ">=3.10"
+
+[[package]]
+name = "Demo"
+version = "0.1.0"
+source = { editable = "." }
+dependencies = [
+    { name = "requests" },
+]
+
+[package.optional-dependencies]
+test = [
+    { name = "pytest" },
+]
+
+[package.metadata]
+requires-dist = [{ name = "requests", specifier = ">=2" }]
+
+[[package]]
+name = "requests"
+version = "2.31.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "charset-normalizer" },
+    { name = "urllib3", marker = "python_version >= '3.8'" },
+]
+sdist = { url = "https://files/requests-2.31.0.tar.gz", hash = "sha256:aaa", size = 10 }
+wheels = [
+    { url = "https://files/requests-2.31.0-py3-none-any.whl", hash = "sha256:bbb", size = 10 },
+]
+"""
+
+POETRY_LOCK = """[[package]]
+name = "requests"
+version = "2.31.0"
+description = "HTTP"
+optional = false
+python-versions = ">=3.7"
+files = [
+    {file = "requests-2.31.0-py3-none-any.whl", hash = "sha256:bbb"},
+]
+
+[package.dependencies]
+certifi = ">=2017.4.17"
+
+[package.dependencies.urllib3]
+version = ">=1.21.1,<3"
+markers = "python_version >= '3.8'"
+
+[package.extras]
+socks = ["PySocks (>=1.5.6,!=1.5.7)"]
+
+[[package]]
+name = "my-lib"
+version = "1.0.0"
+description = ""
+optional = false
+python-versions = "*"
+files = []
+
+[package.source]
+type = "git"
+url = "https://github.com/org/my-lib.git"
+reference = "main"
+
+[metadata]
+lock-version = "2.0"
+python-versions = "^3.10"
+content-hash = "abc"
+"""
+
+PACKAGE_LOCK_V3 = {
+    "name": "app",
+    "version": "1.0.0",
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"name": "app", "version": "1.0.0", "dependencies": {"@babel/core": "^7.0.0", "lodash": "^4"}},
+        "node_modules/@babel/core": {
+            "version": "7.24.0",
+            "resolved": "https://registry.npmjs.org/@babel/core/-/core-7.24.0.tgz",
+            "integrity": "sha512-core",
+            "dependencies": {"debug": "^4.1.0"},
+        },
+        "node_modules/@babel/core/node_modules/debug": {"version": "3.2.7", "integrity": "sha512-d3"},
+        "node_modules/debug": {"version": "4.3.4", "integrity": "sha512-d4"},
+        "node_modules/lodash": {"version": "4.17.21"},
+    },
+}
+
+PACKAGE_LOCK_V1 = {
+    "name": "app",
+    "lockfileVersion": 1,
+    "dependencies": {
+        "@types/node": {"version": "20.1.0", "integrity": "sha512-t"},
+        "express": {
+            "version": "4.18.2",
+            "requires": {"debug": "2.6.9"},
+            "dependencies": {"debug": {"version": "2.6.9"}},
+        },
+        "debug": {"version": "4.3.4"},
+    },
+}
+
+YARN_V1 = """# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@babel/core@^7.0.0", "@babel/core@^7.1.0":
+  version "7.24.0"
+  resolved "https://registry.yarnpkg.com/@babel/core/-/core-7.24.0.tgz#abc"
+  integrity sha512-core
+  dependencies:
+    "@babel/types" "^7.24.0"
+    debug "^4.1.0"
+
+debug@^4.1.0:
+  version "4.3.4"
+  resolved "https://registry.yarnpkg.com/debug/-/debug-4.3.4.tgz#def"
+"""
+
+YARN_BERRY = """__metadata:
+  version: 6
+  cacheKey: 8
+
+"@babel/core@npm:^7.0.0":
+  version: 7.24.0
+  resolution: "@babel/core@npm:7.24.0"
+  dependencies:
+    "@babel/types": ^7.24.0
+    debug: ^4.1.0
+  checksum: abc123
+  languageName: node
+  linkType: hard
+"""
+
+
+class TestTomlLocks:
+    """Test uv.lock and poetry.lock parsing."""
+
+    def test_uv_lock(self) -> Any:
+        """Test names, versions, sources, hashes and edges including optional groups."""
+        graph = parse_lock_content("uv.lock", UV_LOCK)
+        assert graph.versions() == {"demo": "0.1.0", "requests": "2.31.0"}
+        requests = graph.get("requests")
+        assert requests is not None
+        assert requests.source == "registry+https://pypi.org/simple"
+        assert requests.hashes == ("sha256:aaa", "sha256:bbb")
+        assert requests.dependencies == ("charset-normalizer", "urllib3")
+        assert graph.get("demo").dependencies == ("requests", "pytest")  # type: ignore[union-attr]
+        assert graph.metadata["requires-python"] == ">=3.10"
+        assert graph.roots() == ["demo"]
+
+    def test_poetry_nested_version_does_not_overwrite(self) -> Any:
+        """Test a `version =` inside [package.dependencies.x] is not taken as the package version."""
+        graph = parse_lock_content("poetry.lock", POETRY_LOCK)
+        assert graph.versions() == {"requests": "2.31.0", "my-lib": "1.0.0"}
+        assert graph.get("requests").dependencies == ("certifi", "urllib3")  # type: ignore[union-attr]
+        assert graph.get("my-lib").source == "git+https://github.com/org/my-lib.git"  # type: ignore[union-attr]
+        assert graph.metadata["metadata"]["lock-version"] == "2.0"
+
+    def test_malformed_toml(self) -> Any:
+        """Test broken TOML raises ValueError."""
+        with pytest.raises(ValueError):
+            parse_lock_content("uv.lock", '[[package]]\nname = "x\n')
+
+
+class TestNpmLocks:
+    """Test package-lock.json and yarn.lock parsing."""
+
+    def test_package_lock_v3(self) -> Any:
+        """Test the packages map, scoped names and hoisted versions winning over nested copies."""
+        graph = parse_lock_content("package-lock.json", json.dumps(PACKAGE_LOCK_V3))
+        assert graph.versions() == {"@babel/core": "7.24.0", "debug": "4.3.4", "lodash": "4.17.21"}
+        assert graph.all_versions("debug") == ["4.3.4", "3.2.7"]
+        assert graph.get("@babel/core").dependencies == ("debug",)  # type: ignore[union-attr]
+        assert graph.metadata["lockfileVersion"] == 3
+
+    def test_package_lock_v1(self) -> Any:
+        """Test the nested v1 dependencies tree."""
+        graph = parse_lock_content("package-lock.json", json.dumps(PACKAGE_LOCK_V1))
+        assert graph.versions() == {"@types/node": "20.1.0", "express": "4.18.2", "debug": "4.3.4"}
+        assert graph.all_versions("debug") == ["4.3.4", "2.6.9"]
+        assert graph.dependents("debug") == {"express"}
+
+    @pytest.mark.parametrize("content", [YARN_V1, YARN_BERRY], ids=["v1", "berry"])
+    def test_yarn_scoped_packages(self, content: str) -> Any:
+        """Test scoped package names survive and dependencies become edges."""
+        graph = parse_lock_content("yarn.lock", content)
+        core = graph.get("@babel/core")
+        assert core is not None and core.version == "7.24.0"
+        assert core.dependencies == ("@babel/types", "debug")
+        assert "__metadata" not in graph
+
+
+class TestOtherFormats:
+    """Test Pipfile.lock and requirements.txt parsing."""
+
+    def test_pipfile_lock(self) -> Any:
+        """Test versions lose their == prefix and hashes are kept."""
+        content = json.dumps(
+            {"_meta": {"hash": {}}, "default": {"Flask": {"version": "==3.0.0", "hashes": ["sha256:f"]}}}
+        )
+        graph = parse_lock_content("Pipfile.lock", content)
+        assert graph.versions() == {"flask": "3.0.0"}
+        assert graph.get("flask").hashes == ("sha256:f",)  # type: ignore[union-attr]
+
+    def test_hash_pinned_requirements(self) -> Any:
+        """Test continuation lines, extras, markers and hashes."""
+        content = (
+            "# comment\n"
+            "requests[socks]==2.31.0 \\\n"
+            "    --hash=sha256:aaa \\\n"
+            "    --hash=sha256:bbb\n"
+            "click>=8.0; python_version >= '3.8'\n"
+            "-e .\n"
+            "six\n"
+        )
+        graph = parse_lock_content("requirements.txt", content)
+        assert graph.versions() == {"requests": "2.31.0", "click": ">=8.0", "six": "*"}
+        assert graph.get("requests").hashes == ("sha256:aaa", "sha256:bbb")  # type: ignore[union-attr]
+
+
+class TestLockFileManager:
+    """Test the manager's parsing entry points."""
+
+    def test_manager_uses_graph(self) -> Any:
+        """Test the legacy name -> version parsers return the structured results."""
+        manager = LockFileManager()
+        assert manager._parse_poetry_lock(POETRY_LOCK)["requests"] == "2.31.0"
+        assert manager._parse_yarn_lock(YARN_V1)["@babel/core"] == "7.24.0"
+        assert manager._parse_package_lock_json(json.dumps(PACKAGE_LOCK_V3))["lodash"] == "4.17.21"
+        assert manager._parse_uv_lock("not toml [[") == {}
+
+    def test_package_count_for_v3_lock(self) -> Any:
+        """Test package-lock v3 files are counted from their packages map."""
+        info = LockFileManager()._create_lock_info("package-lock.json", json.dumps(PACKAGE_LOCK_V3))
+        assert info.package_count == 4
+
+
+def _large_uv_lock(count: int) -> str:
+    parts = ['version = 1\nrequires-python = ">=3.10"\n\n']
+    for i in range(count):
+        deps = "".join(f'    {{ name = "pkg{(i + j) % count}" }},\n' for j in range(1, 4))
+        wheels = "".join(
+            f'    {{ url = "https://files/pkg{i}-{t}.whl", hash = "sha256:{i:064x}", size = 1 }},\n' for t in range(2)
+        )
+        parts.append(
+            f'[[package]]\nname = "pkg{i}"\nversion = "1.{i}.0"\nsource = {{ registry = "https://pypi.org/simple" }}\n'
+            f"dependencies = [\n{deps}]\nwheels = [\n{wheels}]\n\n"
+        )
+    return "".join(parts)
+
+
+class TestLargeLocks:
+    """Benchmark parsing of 5000-package lock files."""
+
+    def test_large_uv_lock(self, tmp_path: Path) -> Any:
+        """Test a 5000-package uv.lock is streamed from disk in bounded time."""
+        path = tmp_path / "uv.lock"
+        path.write_text(_large_uv_lock(5000))
+        start = time.perf_counter()
+        graph = parse_lock_file(path)
+        elapsed = time.perf_counter() - start
+        assert len(graph) == 5000
+        assert sum(1 for _ in graph.edges()) == 15000
+        assert elapsed < 5.0
+
+    def test_large_npm_locks(self, tmp_path: Path) -> Any:
+        """Test 5000-package package-lock.json and yarn.lock files parse quickly."""
+        packages = {"": {"name": "app"}}
+        yarn = []
+        for i in range(5000):
+            name = f"@scope/pkg{i}" if i % 2 else f"pkg{i}"
+            packages[f"node_modules/{name}"] = {"version": f"1.{i}.0", "integrity": "sha512-x", "dependencies": {}}
+            yarn.append(f'"{name}@^1.0.0":\n  version "1.{i}.0"\n  integrity sha512-x\n\n')
+        (tmp_path / "package-lock.json").write_text(json.dumps({"lockfileVersion": 3, "packages": packages}))
+        (tmp_path / "yarn.lock").write_text("".join(yarn))
+
+        start = time.perf_counter()
+        npm = parse_lock_file(tmp_path / "package-lock.json")
+        yarn_graph = parse_lock_file(tmp_path / "yarn.lock")
+        elapsed = time.perf_counter() - start
+        assert len(npm) == len(yarn_graph) == 5000
+        assert npm.versions() == yarn_graph.versions()
+        assert elapsed < 2.0
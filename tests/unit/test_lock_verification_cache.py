@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cached lock verification and lock freshness checks.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import hashlib
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.lock_file_manager import LockFileManager
+from DHT.modules.lock_verification_cache import (
+    LockVerificationCache,
+    get_lock_verification_cache,
+    lock_inputs,
+    text_checksum,
+)
+
+
+def _age(path: Path, seconds: float = 60) -> None:
+    """Backdate a file so it is outside the racy-timestamp window."""
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "pyproject.toml").write_text('[project]\nname = "demo"\ndependencies = ["requests"]\n')
+    (root / "uv.lock").write_text('version = 1\n\n[[package]]\nname = "requests"\nversion = "2.31.0"\n')
+    for path in root.iterdir():
+        _age(path)
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> LockVerificationCache:
+    return LockVerificationCache(tmp_path / "cache.json")
+
+
+class TestChecksums:
+    """Test the (path, size, mtime) checksum cache."""
+
+    def test_unchanged_file_is_not_rehashed(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test a second lookup is answered from the cache, also after a reload from disk."""
+        lock = project / "uv.lock"
+        first = cache.checksum(lock)
+        cache.save()
+
+        reloaded = LockVerificationCache(cache.path)
+        with patch("DHT.modules.lock_verification_cache.text_checksum", side_effect=AssertionError("rehashed")):
+            assert reloaded.checksum(lock) == first
+        assert reloaded.hits == 1
+
+    def test_changed_file_is_rehashed(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test a modified file gets its new checksum."""
+        lock = project / "uv.lock"
+        first = cache.checksum(lock)
+        lock.write_text(lock.read_text() + "\n")
+        _age(lock, 30)
+        assert cache.checksum(lock) != first
+
+    def test_recent_files_are_not_cached(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test a file modified within the timestamp granularity is hashed every time."""
+        lock = project / "uv.lock"
+        lock.write_text("fresh\n")
+        cache.checksum(lock)
+        cache.checksum(lock)
+        assert cache.misses == 2
+
+    def test_batch_checksums(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test many files are hashed once, then served from the cache; missing files are left out."""
+        paths = [project / "uv.lock", project / "pyproject.toml", project / "missing.lock"]
+        first = cache.checksums(paths)
+        assert list(first) == paths[:2]
+        assert first[project / "uv.lock"] == cache.checksum(project / "uv.lock")
+        with patch("DHT.modules.lock_verification_cache.hash_files", return_value={}) as hasher:
+            assert cache.checksums(paths) == first
+        assert not list(hasher.call_args.args[0])
+
+    def test_checksum_matches_snapshot_checksums(self, tmp_path: Path) -> Any:
+        """Test CRLF files hash like their text content, as recorded in snapshots."""
+        path = tmp_path / "requirements.txt"
+        path.write_bytes(b"requests==2.31.0\r\nclick==8.1.7\r\n")
+        assert text_checksum(path) == hashlib.sha256(path.read_text().encode()).hexdigest()
+
+
+class TestLockFreshness:
+    """Test detection of locks that no longer match their inputs."""
+
+    def test_unrecorded_lock_is_stale(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test a lock DHT did not generate is not trusted."""
+        assert not cache.is_lock_fresh(project)
+
+    def test_recorded_lock_is_fresh(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test a lock stays fresh until pyproject.toml changes."""
+        cache.record_lock(project)
+        assert LockVerificationCache(cache.path).is_lock_fresh(project)
+
+        (project / "pyproject.toml").write_text('[project]\nname = "demo"\ndependencies = ["httpx"]\n')
+        assert not cache.is_lock_fresh(project)
+
+    def test_edited_lock_is_stale(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test hand edits to the lock file itself are detected."""
+        cache.record_lock(project)
+        (project / "uv.lock").write_text("version = 1\n")
+        assert not cache.is_lock_fresh(project)
+
+    def test_resolver_settings_are_inputs(
+        self, project: Path, cache: LockVerificationCache, monkeypatch: pytest.MonkeyPatch
+    ) -> Any:
+        """Test switching package index makes the lock stale."""
+        cache.record_lock(project)
+        monkeypatch.setenv("UV_INDEX_URL", "https://mirror.example/simple")
+        assert not cache.is_lock_fresh(project)
+
+    def test_workspace_members_are_inputs(self, project: Path, cache: LockVerificationCache) -> Any:
+        """Test member pyproject.toml files count as lock inputs."""
+        (project / "pyproject.toml").write_text(
+            '[tool.uv.workspace]\nmembers = ["packages/*"]\nexclude = ["packages/old"]\n'
+        )
+        for member in ("a", "old"):
+            (project / "packages" / member).mkdir(parents=True)
+            (project / "packages" / member / "pyproject.toml").write_text(f'[project]\nname = "{member}"\n')
+        assert project / "packages" / "a" / "pyproject.toml" in lock_inputs(project)
+        assert project / "packages" / "old" / "pyproject.toml" not in lock_inputs(project)
+
+        cache.record_lock(project)
+        (project / "packages" / "a" / "pyproject.toml").write_text('[project]\nname = "a"\nversion = "2"\n')
+        assert not cache.is_lock_fresh(project)
+
+
+class TestLockFileManager:
+    """Test that the manager only runs `uv lock` when needed."""
+
+    @pytest.fixture
+    def manager(self) -> Iterator[LockFileManager]:
+        with patch("DHT.modules.lock_file_manager.get_run_logger", return_value=MagicMock()):
+            yield LockFileManager()
+
+    def test_uv_lock_skipped_when_fresh(self, project: Path, manager: LockFileManager) -> Any:
+        """Test the second capture reuses the lock and an input change regenerates it."""
+        with patch("DHT.modules.lock_file_manager.generate_lock_file", return_value={"success": True}) as uv_lock:
+            first = manager.generate_project_lock_files.fn(manager, project, "python")
+            second = manager.generate_project_lock_files.fn(manager, project, "python")
+            assert uv_lock.call_count == 1
+            assert first["uv.lock"].checksum == second["uv.lock"].checksum
+
+            (project / "pyproject.toml").write_text('[project]\nname = "demo"\ndependencies = ["httpx"]\n')
+            manager.generate_project_lock_files.fn(manager, project, "python")
+            assert uv_lock.call_count == 2
+
+    def test_failed_uv_lock_is_not_recorded(self, project: Path, manager: LockFileManager) -> Any:
+        """Test a failed generation is retried next time."""
+        with patch("DHT.modules.lock_file_manager.generate_lock_file", return_value={"success": False}) as uv_lock:
+            manager.generate_project_lock_files.fn(manager, project, "python")
+            manager.generate_project_lock_files.fn(manager, project, "python")
+            assert uv_lock.call_count == 2
+
+    def test_verify_lock_files(self, project: Path, manager: LockFileManager) -> Any:
+        """Test verification compares cached checksums and reports mismatches."""
+        info = manager._create_lock_info("uv.lock", (project / "uv.lock").read_text())
+        assert manager.verify_lock_files.fn(manager, project, {"uv.lock": info}) == {"uv.lock": True}
+
+        cache = get_lock_verification_cache()
+        misses = cache.misses
+        assert manager.verify_lock_files.fn(manager, project, {"uv.lock": info}) == {"uv.lock": True}
+        assert cache.misses == misses
+
+        (project / "uv.lock").write_text("version = 1\n")
+        assert manager.verify_lock_files.fn(manager, project, {"uv.lock": info}) == {"uv.lock": False}
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the installed package inventory.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import sys
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from DHT.modules.package_inventory import (
+    current_environment_packages,
+    get_installed_packages,
+    inventory_distributions,
+    is_current_environment,
+    parse_metadata_headers,
+)
+
+
+def _write_dist(site_packages: Path, name: str, version: str, description: str = "") -> None:
+    dist_info = site_packages / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\nSummary: test\n\n{description}"
+    )
+
+
+class TestMetadataHeaders:
+    """Test METADATA header parsing."""
+
+    def test_stops_at_description(self) -> Any:
+        """Test headers repeated in the description body are ignored."""
+        text = "Name: demo\nVersion: 1.0\nClassifier: A\nClassifier: B\n\nVersion: 9.9\n"
+        headers = parse_metadata_headers(text)
+        assert headers["Name"] == "demo"
+        assert headers["Version"] == "1.0"
+        assert headers["Classifier"] == "A"
+
+    def test_folded_headers(self) -> Any:
+        """Test continuation lines do not become headers."""
+        headers = parse_metadata_headers("Name: demo\nLicense: MIT\n        Version: 0\nVersion: 2.0\n")
+        assert headers["Version"] == "2.0"
+
+
+class TestInventory:
+    """Test in-process package listing."""
+
+    def test_reads_site_packages(self, tmp_path: Path) -> Any:
+        """Test distributions are listed with their declared names."""
+        _write_dist(tmp_path, "Demo-Pkg", "1.2.3", description="Version: 0.0.1\n")
+        _write_dist(tmp_path, "other", "0.1")
+        packages = inventory_distributions(metadata.distributions(path=[str(tmp_path)]))
+        assert packages == {"Demo-Pkg": "1.2.3", "other": "0.1"}
+
+    def test_first_installation_wins(self, tmp_path: Path) -> Any:
+        """Test a distribution shadowed later on the path is ignored."""
+        _write_dist(tmp_path / "first", "demo", "2.0")
+        _write_dist(tmp_path / "second", "demo", "1.0")
+        paths = [str(tmp_path / "first"), str(tmp_path / "second")]
+        assert inventory_distributions(metadata.distributions(path=paths)) == {"demo": "2.0"}
+
+    def test_matches_importlib(self) -> Any:
+        """Test the running interpreter's inventory agrees with importlib.metadata."""
+        packages = current_environment_packages()
+        assert packages["pytest"] == metadata.version("pytest")
+
+    def test_current_interpreter_never_spawns(self) -> Any:
+        """Test listing the running interpreter does not start pip."""
+        with patch("subprocess.run", side_effect=AssertionError("pip spawned")):
+            assert get_installed_packages() == current_environment_packages()
+            assert get_installed_packages(sys.executable) == current_environment_packages()
+
+    def test_foreign_interpreter_uses_pip(self, tmp_path: Path) -> Any:
+        """Test another base interpreter is listed through its own pip."""
+        python = tmp_path / "bin" / "python"
+        assert not is_current_environment(python)
+
+        pip_result = Mock(returncode=0, stdout=json.dumps([{"name": "flask", "version": "3.0.0"}]))
+        with patch("subprocess.run", return_value=pip_result) as mock_run:
+            assert get_installed_packages(python) == {"flask": "3.0.0"}
+        assert mock_run.call_args.args[0][:4] == [str(python), "-m", "pip", "list"]
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges on Windows")
+    def test_shared_prefix_is_not_the_same_interpreter(self, tmp_path: Path) -> Any:
+        """Test interpreters are matched by venv or executable, not by the prefix they live in."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        running = bin_dir / "python3.12"
+        running.touch()
+        (bin_dir / "python3.11").touch()
+        (bin_dir / "python3").symlink_to(running)
+        venv = tmp_path / "venv"
+        (venv / "bin").mkdir(parents=True)
+        (venv / "pyvenv.cfg").write_text(f"home = {bin_dir}\n")
+        (venv / "bin" / "python").symlink_to(running)
+
+        with (
+            patch.object(sys, "executable", str(running)),
+            patch.object(sys, "prefix", str(tmp_path)),
+            patch.object(sys, "base_prefix", str(tmp_path)),
+        ):
+            assert is_current_environment(bin_dir / "python3")
+            assert not is_current_environment(bin_dir / "python3.11")
+            assert not is_current_environment(venv / "bin" / "python")
+            assert not is_current_environment(venv)
+
+        with patch.object(sys, "prefix", str(venv)), patch.object(sys, "base_prefix", str(tmp_path)):
+            assert is_current_environment(venv / "bin" / "python")
+            assert is_current_environment(venv)
+            assert not is_current_environment(running)
+
+    def test_foreign_interpreter_failure(self, tmp_path: Path) -> Any:
+        """Test a failing pip is reported as an error."""
+        with patch("subprocess.run", return_value=Mock(returncode=1, stderr="No module named pip")):
+            with pytest.raises(RuntimeError, match="No module named pip"):
+                get_installed_packages(tmp_path / "bin" / "python")
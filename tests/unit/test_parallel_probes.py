@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests for concurrent tool version probes.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.modules.parallel_probes import run_probes
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX sleep")
+
+
+def _sleep_probe(seconds: float, output: str = "ok") -> Any:
+    def probe(timeout: float) -> str:
+        subprocess.run(["sleep", str(seconds)], timeout=timeout, check=False)
+        return output
+
+    return probe
+
+
+def _make_tool(directory: Path, name: str, version: str, delay: float = 0) -> Path:
+    # Shell scripts are never cached, so every call really runs the probe
+    path = directory / name
+    path.write_text(f"#!/bin/sh\nsleep {delay}\necho '{name} version {version}'\n")
+    path.chmod(0o755)
+    return path
+
+
+class TestRunProbes:
+    """Test the bounded probe pool."""
+
+    def test_probes_run_concurrently(self) -> Any:
+        """Test probes overlap instead of running back to back."""
+        start = time.perf_counter()
+        results = run_probes({name: _sleep_probe(1, name) for name in ["a", "b", "c"]})
+        assert time.perf_counter() - start < 2.0
+        assert [result.output for result in results.values()] == ["a", "b", "c"]
+
+    def test_probe_timeout_is_marked(self) -> Any:
+        """Test a hung probe is reported as timed out while the others succeed."""
+        start = time.perf_counter()
+        results = run_probes({"hung": _sleep_probe(30), "fast": _sleep_probe(0)}, probe_timeout=0.5)
+        assert time.perf_counter() - start < 2.0
+        assert results["hung"].timed_out and results["hung"].output is None
+        assert results["fast"].output == "ok" and not results["fast"].timed_out
+
+    def test_deadline_returns_partial_results(self) -> Any:
+        """Test probes queued or running past the deadline are reported, not waited for."""
+        start = time.perf_counter()
+        probes = {"fast": _sleep_probe(0), "slow": _sleep_probe(30), "queued": _sleep_probe(30)}
+        results = run_probes(probes, probe_timeout=60, deadline=0.5, max_workers=2)
+        assert time.perf_counter() - start < 2.0
+        assert results["fast"].output == "ok"
+        assert results["slow"].timed_out and results["queued"].timed_out
+        assert list(results) == ["fast", "slow", "queued"]
+
+    def test_errors_are_captured(self) -> Any:
+        """Test a probe raising an exception does not affect the others."""
+
+        def broken(timeout: float) -> str:
+            raise OSError("exec format error")
+
+        results = run_probes({"broken": broken, "fine": lambda timeout: "v1"})
+        assert results["broken"].error == "exec format error" and not results["broken"].timed_out
+        assert results["fine"].output == "v1"
+
+
+class TestToolProbeCallers:
+    """Test the tool verification entry points use the pool."""
+
+    def test_verify_tools_marks_hung_tool(self, tmp_path: Path) -> Any:
+        """Test a hung tool times out without blocking the other verifications."""
+        from DHT.modules.environment_validator import EnvironmentValidator
+
+        _make_tool(tmp_path, "git", "2.45.1")
+        _make_tool(tmp_path, "docker", "24.0.7", delay=30)
+        validator = EnvironmentValidator()
+        with (
+            patch.dict(os.environ, {"PATH": f"{tmp_path}:/usr/bin:/bin"}),
+            patch("DHT.modules.environment_validator.get_run_logger"),
+            patch(
+                "DHT.modules.environment_validator.get_tool_command",
+                side_effect=lambda tool, _: [tool, "--version"],
+            ),
+        ):
+            start = time.perf_counter()
+            results = validator.verify_tools.fn(validator, {"docker": "24.0.7", "git": "2.45.1"}, probe_timeout=1)
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 5.0
+        assert list(results) == ["docker", "git"]
+        assert results["docker"]["timed_out"] and not results["docker"]["matched"]
+        assert results["git"]["version"] == "2.45.1" and results["git"]["matched"]
+
+    def test_capture_tool_versions_marks_hung_tool(self, tmp_path: Path) -> Any:
+        """Test capture returns the tools that answered and marks the one that did not."""
+        from DHT.modules.tool_version_manager import ToolVersionManager
+
+        _make_tool(tmp_path, "git", "2.45.1")
+        _make_tool(tmp_path, "docker", "24.0.7", delay=30)
+        manager = ToolVersionManager()
+        with (
+            patch.dict(os.environ, {"PATH": f"{tmp_path}:/usr/bin:/bin"}),
+            patch("DHT.modules.tool_version_manager.get_run_logger"),
+        ):
+            start = time.perf_counter()
+            info = manager.capture_tool_versions.fn(manager, deadline=1)
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 5.0
+        assert info["git"] == {"version": "2.45.1", "path": str(tmp_path / "git")}
+        assert info["docker"]["timed_out"] and info["docker"]["version"] is None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the PATH executable index.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.modules.path_index import PathIndex, get_path_index, which
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX executable bits")
+
+
+def _make_executable(directory: Path, name: str, executable: bool = True) -> Path:
+    path = directory / name
+    path.write_text("#!/bin/sh\necho ok\n")
+    path.chmod(0o755 if executable else 0o644)
+    return path
+
+
+class TestPathIndex:
+    """Test building and querying the PATH index."""
+
+    def test_indexes_executables_only(self, tmp_path: Path) -> Any:
+        """Test non-executable files and directories are ignored."""
+        tool = _make_executable(tmp_path, "mytool")
+        _make_executable(tmp_path, "notes.txt", executable=False)
+        (tmp_path / "subdir").mkdir()
+
+        index = PathIndex.build(str(tmp_path))
+        assert index.which("mytool") == str(tool)
+        assert "notes.txt" not in index
+        assert "subdir" not in index
+
+    def test_first_path_entry_wins(self, tmp_path: Path) -> Any:
+        """Test precedence follows PATH order like the shell."""
+        first, second = tmp_path / "first", tmp_path / "second"
+        first.mkdir()
+        second.mkdir()
+        expected = _make_executable(first, "tool")
+        _make_executable(second, "tool")
+
+        index = PathIndex.build(os.pathsep.join([str(first), str(second)]))
+        assert index.which("tool") == str(expected)
+
+    def test_missing_directories_are_skipped(self, tmp_path: Path) -> Any:
+        """Test nonexistent PATH entries do not break the scan."""
+        _make_executable(tmp_path, "tool")
+        index = PathIndex.build(os.pathsep.join([str(tmp_path / "missing"), "", str(tmp_path)]))
+        assert "tool" in index
+
+    def test_agrees_with_shutil_which(self) -> Any:
+        """Test lookups match shutil.which for common tools."""
+        index = PathIndex.build()
+        for name in ["sh", "ls", "python3", "definitely-not-a-tool-xyz"]:
+            expected = shutil.which(name)
+            if expected is None:
+                assert index.which(name) is None
+            else:
+                assert index.which(name) is not None
+
+    def test_staleness_detects_installs(self, tmp_path: Path) -> Any:
+        """Test a tool installed after the scan is found by which()."""
+        with patch.dict(os.environ, {"PATH": str(tmp_path)}):
+            get_path_index(refresh=True)
+            assert which("latecomer") is None
+
+            _make_executable(tmp_path, "latecomer")
+            os.utime(tmp_path, ns=(0, get_path_index().directory_mtimes[str(tmp_path)] + 10**9))
+
+            assert which("latecomer") == str(tmp_path / "latecomer")
+
+    def test_rebuilds_when_path_changes(self, tmp_path: Path) -> Any:
+        """Test the shared index follows PATH changes."""
+        _make_executable(tmp_path, "onlyhere")
+        with patch.dict(os.environ, {"PATH": str(tmp_path)}):
+            assert get_path_index().which("onlyhere") is not None
+        with patch.dict(os.environ, {"PATH": os.defpath}):
+            assert get_path_index().which("onlyhere") is None
+
+
+class TestDiagnosticPresence:
+    """Test the diagnostic collector uses the index instead of forking."""
+
+    def test_check_tool_installed_does_not_spawn(self) -> Any:
+        """Test presence checks never start a subprocess."""
+        from DHT.diagnostic_tool_collector import check_tool_installed
+
+        with patch("subprocess.run", side_effect=AssertionError("subprocess spawned")):
+            assert check_tool_installed("sh") is True
+            assert check_tool_installed("definitely-not-a-tool-xyz") is False
+
+    def test_registry_name_differs_from_executable(self, tmp_path: Path) -> Any:
+        """Test tools like maven are detected through the executable they invoke."""
+        from DHT.diagnostic_tool_collector import check_tool_installed
+
+        _make_executable(tmp_path, "mvn")
+        spec = {"commands": {"version": "mvn --version"}}
+        with patch.dict(os.environ, {"PATH": str(tmp_path)}):
+            assert check_tool_installed("maven", spec) is True
+            assert check_tool_installed("maven") is False
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Unit tests for reproduction plans: concurrency, checkpoints and critical path.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.environment_reproducer import EnvironmentReproducer
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot, ReproductionResult
+from DHT.modules.reproduction_plan import PlanStep, execute_plan
+
+
+def _result() -> ReproductionResult:
+    return ReproductionResult(success=False, snapshot_id="snap", platform="linux")
+
+
+def _step(name: str, delay: float = 0, kind: str = "verify", requires: tuple[str, ...] = (), fail: bool = False) -> Any:
+    def action(result: ReproductionResult) -> None:
+        time.sleep(delay)
+        result.warnings.append(name)
+        if fail:
+            result.actions_failed.append(f"{name} failed")
+        else:
+            result.actions_completed.append(name)
+
+    return PlanStep(name, kind, action, requires)
+
+
+class TestExecutePlan:
+    """Test running plan steps."""
+
+    def test_independent_steps_run_concurrently(self) -> Any:
+        """Test four 0.2 s checks overlap and results merge in plan order, not completion order."""
+        result = _result()
+        steps = [_step(f"tool:{i}", delay=0.2 - i * 0.05) for i in range(4)]
+        start = time.perf_counter()
+        report = execute_plan(steps, result)
+        assert time.perf_counter() - start < 0.6
+        assert result.warnings == ["tool:0", "tool:1", "tool:2", "tool:3"]
+        assert set(report.timings) == {step.name for step in steps}
+
+    def test_critical_path(self) -> Any:
+        """Test the slowest chain of dependent steps is reported."""
+        steps = [
+            _step("restore_files", 0.1, "restore"),
+            _step("tool:git", 0.05),
+            _step("install_dependencies", 0.15, "install", requires=("restore_files", "tool:git")),
+            _step("verify_configs", 0.01, requires=("restore_files",)),
+        ]
+        report = execute_plan(steps, _result())
+        assert report.critical_path == ["restore_files", "install_dependencies"]
+
+    def test_exceptions_are_step_failures(self) -> Any:
+        """Test a raising step is reported and the others still run."""
+
+        def broken(result: ReproductionResult) -> None:
+            raise RuntimeError("disk full")
+
+        result = _result()
+        report = execute_plan([PlanStep("restore_files", "restore", broken), _step("python")], result)
+        assert report.failed == ["restore_files"]
+        assert result.actions_failed == ["restore_files_error: disk full"]
+        assert result.actions_completed == ["python"]
+
+    def test_steps_after_a_failed_restore_are_skipped(self) -> Any:
+        """Test installs do not run when the files they need were not restored; verify steps still do."""
+
+        def broken(result: ReproductionResult) -> None:
+            raise OSError("read-only file system")
+
+        result = _result()
+        steps = [
+            PlanStep("restore_files", "restore", broken),
+            _step("install_dependencies", kind="install", requires=("restore_files",)),
+            _step("build", kind="install", requires=("install_dependencies",)),
+            _step("verify_configs", requires=("restore_files",)),
+        ]
+        report = execute_plan(steps, result)
+        assert report.failed == ["restore_files", "install_dependencies", "build"]
+        assert result.actions_failed == [
+            "restore_files_error: read-only file system",
+            "install_dependencies_skipped: requires restore_files",
+            "build_skipped: requires install_dependencies",
+        ]
+        assert result.actions_completed == ["verify_configs"]
+
+    def test_unknown_kind(self) -> Any:
+        """Test step kinds are validated."""
+        with pytest.raises(ValueError, match="Unknown kind"):
+            execute_plan([PlanStep("x", "download", lambda r: None)], _result())
+
+
+class TestCheckpoint:
+    """Test resuming a failed reproduction."""
+
+    def test_resume_skips_completed_steps(self, tmp_path: Path) -> Any:
+        """Test succeeded restore steps are reused with their results; failed and verify steps rerun."""
+        checkpoint = tmp_path / "checkpoint.json"
+        key = {"snapshot_id": "snap"}
+        calls: list[str] = []
+
+        def plan(install_fails: bool) -> list[PlanStep]:
+            def record(step: PlanStep) -> PlanStep:
+                def action(result: ReproductionResult) -> None:
+                    calls.append(step.name)
+                    step.action(result)
+
+                return PlanStep(step.name, step.kind, action, step.requires)
+
+            return [
+                record(_step("restore_files", kind="restore")),
+                record(_step("tool:git")),
+                record(_step("install_dependencies", kind="install", requires=("restore_files",), fail=install_fails)),
+            ]
+
+        first = _result()
+        report = execute_plan(plan(install_fails=True), first, checkpoint=checkpoint, checkpoint_key=key)
+        assert report.failed == ["install_dependencies"]
+        assert json.loads(checkpoint.read_text())["steps"]["restore_files"]["status"] == "ok"
+
+        calls.clear()
+        second = _result()
+        report = execute_plan(plan(install_fails=False), second, checkpoint=checkpoint, checkpoint_key=key)
+        assert report.resumed == ["restore_files"]
+        assert sorted(calls) == ["install_dependencies", "tool:git"]
+        assert second.actions_completed == ["restore_files", "tool:git", "install_dependencies"]
+        assert not report.failed
+
+    def test_checkpoint_of_another_plan_is_ignored(self, tmp_path: Path) -> Any:
+        """Test a checkpoint written for a different snapshot is not reused."""
+        checkpoint = tmp_path / "checkpoint.json"
+        execute_plan([_step("restore_files", kind="restore")], _result(), checkpoint, {"snapshot_id": "a"})
+        report = execute_plan([_step("restore_files", kind="restore")], _result(), checkpoint, {"snapshot_id": "b"})
+        assert report.resumed == []
+
+
+class TestReproducerPlan:
+    """Test the reproducer's compiled plan."""
+
+    @pytest.fixture
+    def reproducer(self) -> EnvironmentReproducer:
+        reproducer = EnvironmentReproducer()
+        reproducer.logger = MagicMock()
+        return reproducer
+
+    @pytest.fixture
+    def snapshot(self) -> EnvironmentSnapshot:
+        lock = "version = 1\n"
+        return EnvironmentSnapshot(
+            timestamp="2024-06-01T00:00:00",
+            platform="linux",
+            architecture="x86_64",
+            dht_version="1.0.0",
+            snapshot_id="snap",
+            python_version="3.11.5",
+            python_executable="/usr/bin/python3",
+            tool_versions={"git": "2.45.1", "uv": "0.4.0", "node": "20.0.0"},
+            project_path="/src/demo",
+            lock_files={"uv.lock": lock},
+            config_files={"pyproject.toml": "[project]\nname = 'demo'\n"},
+            checksums={"uv.lock": "x"},
+        )
+
+    def test_plan_shape(self, reproducer: EnvironmentReproducer, snapshot: EnvironmentSnapshot, tmp_path: Path) -> Any:
+        """Test installs wait for files, Python and tools; config checks wait for restored files."""
+        steps = {step.name: step for step in reproducer._build_reproduction_plan(snapshot, tmp_path, False, True)}
+        assert set(steps["install_dependencies"].requires) == {
+            "restore_files",
+            "python",
+            "tool:git",
+            "tool:uv",
+            "tool:node",
+        }
+        assert steps["verify_configs"].requires == ("restore_files",)
+        assert steps["tool:git"].requires == ()
+
+    def test_failed_restore_skips_install(
+        self, reproducer: EnvironmentReproducer, snapshot: EnvironmentSnapshot, tmp_path: Path
+    ) -> Any:
+        """Test dependencies are not installed into a target whose lock files could not be written."""
+        verification = reproducer.env_verification_utils
+        with (
+            patch.object(verification, "verify_platform_compatibility"),
+            patch.object(verification, "verify_python_version"),
+            patch.object(verification, "verify_tool"),
+            patch.object(reproducer.deps_installer, "install_project_dependencies") as install,
+            patch.object(reproducer, "_restore_project_files", side_effect=OSError("disk full")),
+            patch.object(reproducer, "_verify_configurations"),
+        ):
+            result = reproducer._reproduce_environment_impl(snapshot, tmp_path, strict_mode=False, auto_install=True)
+        install.assert_not_called()
+        assert not result.success
+        assert "install_dependencies_skipped: requires restore_files" in result.actions_failed
+
+    def test_resumed_reproduction(
+        self, reproducer: EnvironmentReproducer, snapshot: EnvironmentSnapshot, tmp_path: Path
+    ) -> Any:
+        """Test tools are checked concurrently and a failed install resumes without restoring again."""
+        target = tmp_path / "target"
+        checkpoint = tmp_path / "checkpoint.json"
+        verification = reproducer.env_verification_utils
+
+        def verify_tool(tool: str, version: str, result: ReproductionResult, **kwargs: Any) -> None:
+            time.sleep(0.2)
+            result.tools_verified[tool] = True
+            result.versions_verified[tool] = True
+
+        outcomes = iter(["uv sync failed", None])
+
+        def install(snapshot: EnvironmentSnapshot, result: ReproductionResult, target_path: Path, bundle: Any) -> None:
+            outcome = next(outcomes)
+            if outcome:
+                result.actions_failed.append(outcome)
+            else:
+                result.actions_completed.append("Installed dependencies via UV sync")
+
+        with (
+            patch.object(verification, "verify_platform_compatibility"),
+            patch.object(verification, "verify_python_version"),
+            patch.object(verification, "verify_tool", side_effect=verify_tool),
+            patch.object(reproducer.deps_installer, "install_project_dependencies", side_effect=install),
+            patch.object(reproducer, "_restore_project_files", wraps=reproducer._restore_project_files) as restore,
+        ):
+            first = reproducer._reproduce_environment_impl(
+                snapshot, target, strict_mode=False, auto_install=True, checkpoint=checkpoint
+            )
+            assert not first.success and checkpoint.exists()
+            assert first.step_timings["tool:git"] >= 0.2
+            assert first.execution_time < 0.55
+
+            second = reproducer._reproduce_environment_impl(
+                snapshot, target, strict_mode=False, auto_install=True, checkpoint=checkpoint
+            )
+
+        assert restore.call_count == 1
+        assert second.success
+        assert second.resumed_steps == ["restore_files"]
+        assert "Restored config pyproject.toml" in second.actions_completed
+        assert second.critical_path[-1] == "install_dependencies"
+        assert not checkpoint.exists()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared resource sampler.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import time
+from typing import Any
+from unittest.mock import patch
+
+from DHT.modules.resource_sampler import ResourceSampler, current_resources
+
+
+class TestResourceSampler:
+    """Test rolling, non-blocking resource snapshots."""
+
+    def test_snapshot_format_matches_check_system_resources(self) -> Any:
+        """Test the snapshot dict has the keys validate_command relies on."""
+        resources = current_resources()
+        assert set(resources) == {"memory_available_mb", "memory_percent", "cpu_percent", "disk_percent"}
+        assert resources["memory_available_mb"] > 0
+
+    def test_never_blocks_on_cpu_measurement(self) -> Any:
+        """Test sampling uses non-blocking cpu_percent calls."""
+        with patch("DHT.modules.resource_sampler.psutil.cpu_percent", return_value=12.5) as mock_cpu:
+            sampler = ResourceSampler()
+            snapshot = sampler.sample()
+
+        assert snapshot.cpu_percent == 12.5
+        for call in mock_cpu.call_args_list:
+            assert call.kwargs.get("interval") is None
+
+    def test_repeated_snapshots_are_cheap(self) -> Any:
+        """Test hundreds of pre-flight reads complete far below one blocking cpu_percent(interval=1)."""
+        sampler = ResourceSampler(interval=60)
+        start = time.perf_counter()
+        for _ in range(1000):
+            sampler.snapshot()
+        assert time.perf_counter() - start < 0.5
+
+    def test_stale_snapshot_is_resampled(self) -> Any:
+        """Test a snapshot older than max_age is refreshed synchronously."""
+        sampler = ResourceSampler(interval=60)
+        first = sampler.snapshot()
+        time.sleep(0.01)
+        assert sampler.snapshot(max_age=60) is first
+        assert sampler.snapshot(max_age=0).timestamp > first.timestamp
+
+    def test_background_thread_refreshes(self) -> Any:
+        """Test the background thread keeps the snapshot fresh."""
+        sampler = ResourceSampler(interval=0.05)
+        first = sampler.snapshot()
+        sampler.start()
+        try:
+            assert sampler.running
+            time.sleep(0.3)
+            assert sampler.snapshot(max_age=60).timestamp > first.timestamp
+        finally:
+            sampler.stop()
+        assert not sampler.running
+
+    def test_validate_command_does_not_sleep(self) -> Any:
+        """Test guardian pre-flight validation avoids the one-second CPU sample."""
+        from DHT.modules.guardian_prefect import ResourceLimits, validate_command
+
+        def non_blocking_cpu_percent(interval: float | None = None, percpu: bool = False) -> float:
+            assert interval is None, "blocking cpu_percent call"
+            return 0.0
+
+        limits = ResourceLimits(memory_mb=1, cpu_percent=100, timeout=10)
+        with (
+            patch("DHT.modules.guardian_prefect.get_run_logger"),
+            patch("psutil.cpu_percent", side_effect=non_blocking_cpu_percent),
+        ):
+            start = time.perf_counter()
+            for _ in range(20):
+                assert validate_command.fn(["echo", "hi"], limits) is True
+        assert time.perf_counter() - start < 1.0
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the site-packages scanner.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.package_inventory import get_installed_packages
+from DHT.modules.site_packages_scanner import INVENTORY_FORMAT, read_distribution, scan_venv
+
+
+def _make_venv(root: Path, python_version: str = "3.11.5") -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "pyvenv.cfg").write_text(f"home = /usr/bin\nversion = {python_version}\n")
+    site_packages = root / "lib" / f"python{python_version.rsplit('.', 1)[0]}" / "site-packages"
+    site_packages.mkdir(parents=True)
+    return site_packages
+
+
+def _add_dist(
+    site_packages: Path, name: str, version: str, files: dict[str, int] | None = None, installer: str = "uv"
+) -> Path:
+    dist_info = site_packages / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nlong text\n")
+    (dist_info / "INSTALLER").write_text(f"{installer}\n")
+    rows = [f"{path},sha256=abc,{size}" for path, size in (files or {}).items()]
+    rows.append(f"{dist_info.name}/RECORD,,")
+    (dist_info / "RECORD").write_text("\n".join(rows) + "\n")
+    return dist_info
+
+
+class TestReadDistribution:
+    """Test reading a single dist-info directory."""
+
+    def test_reads_metadata_installer_and_record(self, tmp_path: Path) -> Any:
+        """Test name, version, installer, size and top-level modules are extracted."""
+        site_packages = _make_venv(tmp_path / ".venv")
+        files = {
+            "yaml/__init__.py": 1000,
+            "yaml/_yaml.cpython-311-x86_64-linux-gnu.so": 5000,
+            "_yaml/__init__.py": 100,
+            "../../../bin/yaml-tool": 50,
+        }
+        dist = read_distribution(_add_dist(site_packages, "PyYAML", "6.0.1", files))
+        assert dist is not None
+        assert (dist.name, dist.version, dist.installer) == ("PyYAML", "6.0.1", "uv")
+        assert dist.size == 6150
+        assert dist.top_level == ("_yaml", "yaml")
+
+    def test_single_module_distribution(self, tmp_path: Path) -> Any:
+        """Test top-level modules and extension modules outside a package are found."""
+        site_packages = _make_venv(tmp_path / ".venv")
+        dist = read_distribution(_add_dist(site_packages, "six", "1.16.0", {"six.py": 34000}))
+        assert dist is not None and dist.top_level == ("six",)
+
+    def test_missing_metadata(self, tmp_path: Path) -> Any:
+        """Test a half-removed dist-info directory is skipped."""
+        broken = tmp_path / "broken-1.0.dist-info"
+        broken.mkdir()
+        assert read_distribution(broken) is None
+
+
+class TestScanVenv:
+    """Test inventories of whole virtual environments."""
+
+    def test_scan(self, tmp_path: Path) -> Any:
+        """Test a venv inventory lists every distribution with the interpreter version."""
+        venv = tmp_path / ".venv"
+        site_packages = _make_venv(venv)
+        _add_dist(site_packages, "requests", "2.31.0", {"requests/__init__.py": 10})
+        _add_dist(site_packages, "click", "8.1.7", {"click/__init__.py": 10}, installer="pip")
+
+        inventory = scan_venv(venv)
+        assert inventory.format == INVENTORY_FORMAT
+        assert inventory.python_version == "3.11.5"
+        assert inventory.packages() == {"click": "8.1.7", "requests": "2.31.0"}
+        assert inventory.distributions["click"].installer == "pip"
+        assert inventory.top_level_modules() == {"click", "requests"}
+        assert json.loads(json.dumps(inventory.to_dict()))["distributions"]["requests"]["top_level"] == ["requests"]
+
+    def test_missing_venv(self, tmp_path: Path) -> Any:
+        """Test a path without site-packages yields an empty inventory."""
+        inventory = scan_venv(tmp_path / "nowhere")
+        assert inventory.distributions == {} and inventory.python_version is None
+
+    def test_large_venv_is_fast(self, tmp_path: Path) -> Any:
+        """Test a 600-package venv is inventoried well under a second."""
+        venv = tmp_path / ".venv"
+        site_packages = _make_venv(venv)
+        for i in range(600):
+            _add_dist(site_packages, f"pkg-{i}", f"1.{i}.0", {f"pkg_{i}/__init__.py": i})
+
+        start = time.perf_counter()
+        inventory = scan_venv(venv)
+        elapsed = time.perf_counter() - start
+        assert len(inventory.distributions) == 600
+        assert elapsed < 1.0
+
+    def test_foreign_interpreter_is_scanned(self, tmp_path: Path) -> Any:
+        """Test listing a venv interpreter reads its site-packages instead of running pip."""
+        venv = tmp_path / ".venv"
+        _add_dist(_make_venv(venv), "flask", "3.0.0")
+        with patch("subprocess.run", side_effect=AssertionError("pip spawned")):
+            assert get_installed_packages(venv / "bin" / "python") == {"flask": "3.0.0"}
+
+
+class TestCallers:
+    """Test the commands that count or verify venv packages."""
+
+    def test_count_site_packages(self, tmp_path: Path) -> Any:
+        """Test package counting uses the scanner."""
+        from DHT.modules.dhtl_commands_utils import count_site_packages
+
+        site_packages = _make_venv(tmp_path / ".venv")
+        _add_dist(site_packages, "a", "1.0")
+        _add_dist(site_packages, "b", "1.0")
+        assert count_site_packages(tmp_path / ".venv") == 2
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Uses a POSIX shell wrapper as the venv interpreter")
+    def test_verify_installation_imports_for_real(self, tmp_path: Path) -> Any:
+        """Test broken installs fail verification even though their dist-info is present."""
+        from DHT.modules.dht_flows.restore_flow import verify_installation
+
+        venv = tmp_path / ".venv"
+        site_packages = _make_venv(venv)
+        (venv / "bin").mkdir()
+        python = venv / "bin" / "python"
+        python.write_text(f'#!/bin/sh\nPYTHONPATH="{site_packages}" exec "{sys.executable}" "$@"\n')
+        python.chmod(0o755)
+        packages = {"prefect": "import missing_dependency_xyz\n", "yaml": "", "requests": ""}
+        for name, source in packages.items():
+            (site_packages / name).mkdir()
+            (site_packages / name / "__init__.py").write_text(source)
+            _add_dist(site_packages, name, "1.0", {f"{name}/__init__.py": 1})
+
+        with (
+            patch("DHT.modules.dht_flows.restore_flow.get_run_logger", return_value=MagicMock()),
+            patch("DHT.modules.dht_flows.restore_flow.subprocess.run", wraps=subprocess.run) as mock_run,
+        ):
+            result = verify_installation.fn(tmp_path, venv)
+
+        assert mock_run.call_count == 1  # version from pyvenv.cfg, all imports in one interpreter
+        assert result["import_results"] == {"prefect": False, "yaml": True, "requests": True}
+        assert result["success"] is False
+        assert result["python_version"] == "Python 3.11.5"
+        assert result["packages_installed"] == 3
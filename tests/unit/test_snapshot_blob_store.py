@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed snapshot blob store.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.snapshot_blob_store import (
+    DEFAULT_BLOB_DIR,
+    BlobStore,
+    content_checksum,
+    gc_snapshot_dir,
+)
+
+LOCK = "version = 1\n" + "".join(f'[[package]]\nname = "pkg{i}"\nversion = "1.{i}.0"\n\n' for i in range(2000))
+
+
+def _snapshot(snapshot_id: str, lock: str = LOCK, pyproject: str = "[project]\nname = 'demo'\n") -> EnvironmentSnapshot:
+    return EnvironmentSnapshot(
+        timestamp="2024-06-01T00:00:00",
+        platform="linux",
+        architecture="x86_64",
+        dht_version="1.0.0",
+        snapshot_id=snapshot_id,
+        python_version="3.11.5",
+        python_executable="/usr/bin/python3",
+        lock_files={"uv.lock": lock},
+        config_files={"pyproject.toml": pyproject},
+        checksums={"uv.lock": content_checksum(lock), "pyproject.toml": content_checksum(pyproject)},
+    )
+
+
+@pytest.fixture
+def snapshot_io() -> Iterator[EnvironmentSnapshotIO]:
+    with patch("DHT.modules.environment_snapshot_io.get_run_logger", return_value=MagicMock()):
+        yield EnvironmentSnapshotIO()
+
+
+def _save(io: EnvironmentSnapshotIO, snapshot: EnvironmentSnapshot, directory: Path, fmt: str = "json") -> Path:
+    suffix = {"yaml": "yaml", "binary": "dhtsnap"}.get(fmt, "json")
+    return io.save_snapshot.fn(
+        io, snapshot, directory / f"{snapshot.snapshot_id}.{suffix}", fmt, blob_store=directory / DEFAULT_BLOB_DIR
+    )
+
+
+class TestBlobStore:
+    """Test storing and reading blobs."""
+
+    def test_put_get_roundtrip(self, tmp_path: Path) -> Any:
+        """Test content is keyed by its sha256 and stored compressed."""
+        store = BlobStore(tmp_path / "blobs")
+        checksum = store.put(LOCK)
+        assert checksum == content_checksum(LOCK)
+        assert store.get(checksum) == LOCK
+        assert store.stats()["bytes"] < len(LOCK) / 5
+
+    def test_identical_content_is_stored_once(self, tmp_path: Path) -> Any:
+        """Test writing the same content again does not rewrite the existing blob."""
+        store = BlobStore(tmp_path / "blobs")
+        checksum = store.put(LOCK)
+        inode = store.path_for(checksum).stat().st_ino
+        assert store.put(LOCK) == checksum
+        assert store.path_for(checksum).stat().st_ino == inode
+        assert store.stats()["blobs"] == 1
+
+    def test_missing_blob(self, tmp_path: Path) -> Any:
+        """Test reading an unknown blob raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            BlobStore(tmp_path).get("0" * 64)
+
+
+class TestSnapshotIO:
+    """Test snapshots saved against a blob store."""
+
+    @pytest.mark.parametrize("fmt", ["json", "yaml"])
+    def test_roundtrip(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path, fmt: str) -> Any:
+        """Test file contents are referenced by checksum and restored on load."""
+        snapshot = _snapshot("snap1")
+        path = _save(snapshot_io, snapshot, tmp_path, fmt)
+
+        if fmt == "json":
+            project = json.loads(path.read_text())["project"]
+            assert project["lock_files"] == {"uv.lock": {"blob": snapshot.checksums["uv.lock"]}}
+            assert project["blob_store"] == DEFAULT_BLOB_DIR
+
+        loaded = snapshot_io.load_snapshot.fn(snapshot_io, path)
+        assert loaded.lock_files == snapshot.lock_files
+        assert loaded.config_files == snapshot.config_files
+
+    def test_storage_grows_with_distinct_content(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test many snapshots of the same project share their lock file blob."""
+        for i in range(50):
+            _save(snapshot_io, _snapshot(f"job{i}"), tmp_path)
+        _save(snapshot_io, _snapshot("changed", lock=LOCK + "# bumped\n"), tmp_path)
+
+        assert BlobStore(tmp_path / DEFAULT_BLOB_DIR).stats()["blobs"] == 3
+        assert (tmp_path / "job0.json").stat().st_size < len(LOCK) / 10
+
+    def test_inline_snapshots_still_load(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test snapshots saved without a store keep their contents inline."""
+        snapshot = _snapshot("inline")
+        path = snapshot_io.save_snapshot.fn(snapshot_io, snapshot, tmp_path / "inline.json")
+        assert json.loads(path.read_text())["project"]["lock_files"]["uv.lock"] == LOCK
+        assert snapshot_io.load_snapshot.fn(snapshot_io, path).lock_files == snapshot.lock_files
+
+
+class TestGarbageCollection:
+    """Test removal of unreferenced blobs."""
+
+    def test_gc_keeps_referenced_blobs(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test deleting a snapshot frees only the blobs nothing else references."""
+        _save(snapshot_io, _snapshot("old", lock=LOCK + "# old\n"), tmp_path)
+        _save(snapshot_io, _snapshot("new"), tmp_path)
+        (tmp_path / "old.json").unlink()
+
+        result = gc_snapshot_dir(tmp_path, min_age=0)
+        assert result.removed == 1 and result.freed_bytes > 0
+        assert result.kept == 2
+        assert snapshot_io.load_snapshot.fn(snapshot_io, tmp_path / "new.json").lock_files["uv.lock"] == LOCK
+
+    def test_gc_reads_binary_snapshots(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test blobs referenced only by a binary container are kept."""
+        _save(snapshot_io, _snapshot("old", lock=LOCK + "# old\n"), tmp_path)
+        binary = _save(snapshot_io, _snapshot("new"), tmp_path, fmt="binary")
+        (tmp_path / "old.json").unlink()
+
+        result = gc_snapshot_dir(tmp_path, min_age=0)
+        assert (result.referenced, result.kept, result.removed) == (2, 2, 1)
+        assert snapshot_io.load_snapshot.fn(snapshot_io, binary).lock_files["uv.lock"] == LOCK
+
+    def test_gc_spares_recent_blobs(self, tmp_path: Path) -> Any:
+        """Test fresh unreferenced blobs survive, as a snapshot may still be being written."""
+        store = BlobStore(tmp_path / DEFAULT_BLOB_DIR)
+        fresh = store.put("fresh")
+        stale = store.put("stale")
+        old = time.time() - 7200
+        os.utime(store.path_for(stale), (old, old))
+
+        result = gc_snapshot_dir(tmp_path)
+        assert result.removed == 1
+        assert store.has(fresh) and not store.has(stale)
+
+    def test_gc_spares_reused_blobs(self, tmp_path: Path) -> Any:
+        """Test an old unreferenced blob that a concurrent save stores again is not removed."""
+        store = BlobStore(tmp_path / DEFAULT_BLOB_DIR)
+        reused = store.put("reused")
+        old = time.time() - 7200
+        os.utime(store.path_for(reused), (old, old))
+
+        assert store.put("reused") == reused
+        assert gc_snapshot_dir(tmp_path).removed == 0
+        assert store.get(reused) == "reused"
+
+    def test_gc_command(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test `dhtl snapshot gc` honours --dry-run and --min-age and fails on unreadable snapshots."""
+        from DHT.modules.dhtl_snapshot import snapshot_command
+
+        _save(snapshot_io, _snapshot("old", lock=LOCK + "# old\n"), tmp_path)
+        _save(snapshot_io, _snapshot("new"), tmp_path)
+        (tmp_path / "old.json").unlink()
+        store = BlobStore(tmp_path / DEFAULT_BLOB_DIR)
+
+        assert snapshot_command(["gc", str(tmp_path)]) == 0
+        assert snapshot_command(["gc", str(tmp_path), "--min-age", "0", "--dry-run"]) == 0
+        assert len(store.checksums()) == 3
+        assert snapshot_command(["gc", str(tmp_path), "--min-age", "0"]) == 0
+        assert len(store.checksums()) == 2
+
+        (tmp_path / "broken.json").write_text("{not json")
+        assert snapshot_command(["gc", str(tmp_path), "--min-age", "0"]) == 1
+        assert snapshot_command(["gc", str(tmp_path / "empty")]) == 0
+
+    def test_gc_refuses_unreadable_snapshots(self, tmp_path: Path) -> Any:
+        """Test gc stops instead of deleting blobs a corrupt snapshot might reference."""
+        BlobStore(tmp_path / DEFAULT_BLOB_DIR).put("content")
+        (tmp_path / "broken.json").write_text("{not json")
+        with pytest.raises(ValueError):
+            gc_snapshot_dir(tmp_path, min_age=0)
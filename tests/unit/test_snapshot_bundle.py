@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Unit tests for offline reproduction bundles.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import hashlib
+import io
+import json
+import tarfile
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.dependencies_installer import DependenciesInstaller
+from DHT.modules.dhtl_snapshot import snapshot_command
+from DHT.modules.environment_reproducer import EnvironmentReproducer
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot, ReproductionResult
+from DHT.modules.snapshot_bundle import (
+    BundleManifest,
+    ExtractedBundle,
+    create_bundle,
+    locked_python_packages,
+    open_bundle,
+    wheel_filename,
+)
+
+UV_LOCK = """version = 1
+requires-python = ">=3.10"
+
+[[package]]
+name = "demo"
+version = "0.1.0"
+source = { editable = "." }
+dependencies = [{ name = "six" }, { name = "typing-extensions" }, { name = "colorama" }]
+
+[[package]]
+name = "six"
+version = "1.16.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "typing-extensions"
+version = "4.12.2"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "colorama"
+version = "0.4.6"
+source = { registry = "https://pypi.org/simple" }
+"""
+
+
+def _cached_wheel(cache: Path, name: str, dist: str, version: str, tags: list[str], archive_id: str) -> Path:
+    """Create an unpacked wheel in a fake uv cache and the pointer to it."""
+    archive = cache / "archive-v0" / archive_id
+    (archive / dist.lower()).mkdir(parents=True)
+    (archive / dist.lower() / "__init__.py").write_text(f"VERSION = '{version}'\n")
+    dist_info = archive / f"{dist}-{version}.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+    (dist_info / "WHEEL").write_text("Wheel-Version: 1.0\n" + "".join(f"Tag: {tag}\n" for tag in tags))
+    (dist_info / "RECORD").write_text("")
+
+    pointers = cache / "wheels-v7" / "pypi" / name
+    pointers.mkdir(parents=True)
+    pointer = pointers / f"{version}-{tags[0]}"
+    pointer.symlink_to(Path("../../../archive-v0") / archive_id)
+    (pointers / f"{version}-{tags[0]}.http").write_bytes(b"\x00")
+    return archive
+
+
+@pytest.fixture
+def uv_cache(tmp_path: Path) -> Path:
+    cache = tmp_path / "uv-cache"
+    _cached_wheel(cache, "six", "six", "1.16.0", ["py2-none-any", "py3-none-any"], "a1")
+    _cached_wheel(cache, "typing-extensions", "typing_extensions", "4.12.2", ["py3-none-any"], "a2")
+    return cache
+
+
+@pytest.fixture
+def snapshot() -> EnvironmentSnapshot:
+    return EnvironmentSnapshot(
+        timestamp="2024-06-01T00:00:00",
+        platform="linux",
+        architecture="x86_64",
+        dht_version="1.0.0",
+        snapshot_id="snap",
+        python_version="3.11",
+        python_executable="/usr/bin/python3",
+        project_path="/src/demo",
+        lock_files={"uv.lock": UV_LOCK},
+    )
+
+
+@pytest.fixture(autouse=True)
+def snapshot_io() -> Iterator[None]:
+    """Run the snapshot I/O tasks as plain methods."""
+    save, load = EnvironmentSnapshotIO.save_snapshot.fn, EnvironmentSnapshotIO.load_snapshot.fn
+    with (
+        patch.object(EnvironmentSnapshotIO, "save_snapshot", lambda self, *a, **k: save(self, *a, **k)),
+        patch.object(EnvironmentSnapshotIO, "load_snapshot", lambda self, *a, **k: load(self, *a, **k)),
+        patch("DHT.modules.environment_snapshot_io.get_run_logger", return_value=MagicMock()),
+    ):
+        yield
+
+
+class TestBundleContents:
+    """Test which wheels go into a bundle and how."""
+
+    def test_locked_packages(self, snapshot: EnvironmentSnapshot) -> Any:
+        """Test the project itself is not looked up in the cache."""
+        lock_name, packages = locked_python_packages(snapshot)
+        assert lock_name == "uv.lock"
+        assert [package.name for package in packages] == ["six", "typing-extensions", "colorama"]
+
+    def test_wheel_filename(self, uv_cache: Path) -> Any:
+        """Test the file name is rebuilt from the dist-info with compressed tags."""
+        assert wheel_filename(uv_cache / "archive-v0" / "a1") == "six-1.16.0-py2.py3-none-any.whl"
+
+    def test_create_and_open(self, snapshot: EnvironmentSnapshot, uv_cache: Path, tmp_path: Path) -> Any:
+        """Test cached wheels are bundled with the snapshot, uncached ones reported."""
+        manifest = create_bundle(snapshot, tmp_path / "demo.dhtbundle", cache_dirs=[uv_cache])
+        assert [wheel.filename for wheel in manifest.wheels] == [
+            "six-1.16.0-py2.py3-none-any.whl",
+            "typing_extensions-4.12.2-py3-none-any.whl",
+        ]
+        assert manifest.missing == ["colorama==0.4.6"]
+
+        bundle = open_bundle(tmp_path / "demo.dhtbundle", tmp_path / "extracted")
+        assert bundle.manifest == manifest
+        assert bundle.requirements_path.read_text() == "six==1.16.0\ntyping-extensions==4.12.2\n"
+        assert json.loads(bundle.snapshot_path.read_text())["metadata"]["snapshot_id"] == "snap"
+
+        with zipfile.ZipFile(bundle.wheels_dir / "six-1.16.0-py2.py3-none-any.whl") as wheel:
+            names = wheel.namelist()
+            assert names[0] == "six/__init__.py"
+            assert names[-1].startswith("six-1.16.0.dist-info/")
+            assert wheel.read("six/__init__.py") == b"VERSION = '1.16.0'\n"
+
+    def test_bundles_are_reproducible(self, snapshot: EnvironmentSnapshot, uv_cache: Path, tmp_path: Path) -> Any:
+        """Test bundling the same cache twice gives identical wheels."""
+        first = create_bundle(snapshot, tmp_path / "a.dhtbundle", cache_dirs=[uv_cache])
+        second = create_bundle(snapshot, tmp_path / "b.dhtbundle", cache_dirs=[uv_cache])
+        assert [w.sha256 for w in first.wheels] == [w.sha256 for w in second.wheels]
+
+    def test_strict(self, snapshot: EnvironmentSnapshot, uv_cache: Path, tmp_path: Path) -> Any:
+        """Test strict bundling fails on uncached packages and writes nothing."""
+        with pytest.raises(ValueError, match="colorama==0.4.6"):
+            create_bundle(snapshot, tmp_path / "demo.dhtbundle", cache_dirs=[uv_cache], strict=True)
+        assert not (tmp_path / "demo.dhtbundle").exists()
+
+
+class TestOpenBundle:
+    """Test bundles are verified before use."""
+
+    def test_tampered_wheel(self, snapshot: EnvironmentSnapshot, uv_cache: Path, tmp_path: Path) -> Any:
+        """Test a wheel that does not match the manifest is rejected."""
+        create_bundle(snapshot, tmp_path / "demo.dhtbundle", cache_dirs=[uv_cache])
+        with tarfile.open(tmp_path / "demo.dhtbundle") as source, tarfile.open(tmp_path / "bad.dhtbundle", "w") as bad:
+            for member in source.getmembers():
+                data = source.extractfile(member).read()  # type: ignore[union-attr]
+                if member.name.startswith("wheels/six"):
+                    data += b"\x00"
+                    member.size = len(data)
+                bad.addfile(member, io.BytesIO(data))
+
+        with pytest.raises(ValueError, match="six-1.16.0"):
+            open_bundle(tmp_path / "bad.dhtbundle", tmp_path / "extracted")
+
+    def test_entries_cannot_escape(self, tmp_path: Path) -> Any:
+        """Test entries outside the extraction directory are refused."""
+        with tarfile.open(tmp_path / "evil.dhtbundle", "w") as tar:
+            info = tarfile.TarInfo("../escaped.txt")
+            info.size = 2
+            tar.addfile(info, io.BytesIO(b"hi"))
+        with pytest.raises(ValueError, match="escapes"):
+            open_bundle(tmp_path / "evil.dhtbundle", tmp_path / "extracted")
+        assert not (tmp_path / "escaped.txt").exists()
+
+
+class TestOfflineReproduction:
+    """Test reproducing from a bundle never reaches an index."""
+
+    @pytest.fixture
+    def bundle(self, tmp_path: Path) -> ExtractedBundle:
+        manifest = BundleManifest.from_dict(
+            {
+                "format": 1,
+                "snapshot_id": "snap",
+                "lock_file": "uv.lock",
+                "wheels": [{"name": "six", "version": "1.16.0", "filename": "six.whl", "sha256": "x"}],
+                "missing": ["colorama==0.4.6"],
+            }
+        )
+        return ExtractedBundle(tmp_path / "bundle", manifest)
+
+    def test_installer(self, snapshot: EnvironmentSnapshot, bundle: ExtractedBundle, tmp_path: Path) -> Any:
+        """Test a venv is created and the bundled pins are installed from the bundle's wheels only."""
+        result = ReproductionResult(success=False, snapshot_id="snap", platform="linux")
+        with (
+            patch("DHT.modules.dependencies_installer.get_run_logger"),
+            patch("DHT.modules.dependencies_installer.run_with_guardian", return_value=MagicMock(success=True)) as run,
+        ):
+            installer = DependenciesInstaller()
+            installer.install_project_dependencies.fn(installer, snapshot, result, tmp_path, bundle=bundle)
+
+        venv, install = (call.args[0] for call in run.call_args_list)
+        assert venv == ["uv", "venv", str(tmp_path / ".venv"), "--python", "3.11"]
+        assert install[:6] == ["uv", "pip", "install", "--offline", "--no-index", "--find-links"]
+        assert install[6:] == [str(bundle.wheels_dir), "-r", str(bundle.requirements_path)]
+        assert run.call_args.kwargs["env"]["UV_OFFLINE"] == "1"
+        assert result.actions_completed == ["Installed 1 packages offline from bundle"]
+        assert result.warnings == ["Bundle lacks locked packages: colorama==0.4.6"]
+
+    def test_plan_installs_from_bundle(
+        self, snapshot: EnvironmentSnapshot, bundle: ExtractedBundle, tmp_path: Path
+    ) -> Any:
+        """Test the install step runs from the bundle without enabling tool auto-installation."""
+        reproducer = EnvironmentReproducer()
+        plan = reproducer._build_reproduction_plan(snapshot, tmp_path, False, False, bundle)
+        steps = {step.name: step for step in plan}
+        with patch.object(reproducer.deps_installer, "install_project_dependencies") as install:
+            steps["install_dependencies"].action(MagicMock())
+        assert install.call_args.kwargs == {"bundle": bundle}
+
+    def test_bundle_of_another_snapshot(
+        self, snapshot: EnvironmentSnapshot, bundle: ExtractedBundle, tmp_path: Path
+    ) -> Any:
+        """Test a bundle is only used with the snapshot it was made from."""
+        reproducer = EnvironmentReproducer()
+        reproducer.logger = MagicMock()
+        bundle.manifest.snapshot_id = "other"
+        result = reproducer._reproduce_environment_impl(snapshot, tmp_path, bundle=bundle)
+        assert not result.success
+        assert "made for snapshot other" in result.actions_failed[0]
+
+
+class TestBundleCommand:
+    """Test `dhtl snapshot bundle`."""
+
+    def test_bundle_command(self, snapshot: EnvironmentSnapshot, uv_cache: Path, tmp_path: Path) -> Any:
+        """Test a saved snapshot is bundled next to it by default."""
+        snapshot_path = tmp_path / "snap.json"
+        EnvironmentSnapshotIO().save_snapshot(snapshot, snapshot_path)
+        with patch("DHT.modules.snapshot_bundle.uv_cache_dirs", return_value=[uv_cache]):
+            assert snapshot_command(["bundle", str(snapshot_path)]) == 0
+            assert snapshot_command(["bundle", str(snapshot_path), "--strict"]) == 1
+
+        with tarfile.open(tmp_path / "snap.dhtbundle") as tar:
+            manifest = json.loads(tar.extractfile("manifest.json").read())  # type: ignore[union-attr]
+            wheel = tar.extractfile("wheels/six-1.16.0-py2.py3-none-any.whl").read()  # type: ignore[union-attr]
+        assert manifest["wheels"][0]["sha256"] == hashlib.sha256(wheel).hexdigest()
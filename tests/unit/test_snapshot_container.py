@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the binary snapshot container.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.snapshot_container import (
+    BINARY_SUFFIX,
+    SnapshotContainer,
+    available_codecs,
+    benchmark_formats,
+    encode_container,
+    is_container,
+    synthetic_snapshot,
+    write_container,
+)
+
+
+@pytest.fixture
+def snapshot_io() -> Iterator[EnvironmentSnapshotIO]:
+    with patch("DHT.modules.environment_snapshot_io.get_run_logger", return_value=MagicMock()):
+        yield EnvironmentSnapshotIO()
+
+
+def _snapshot() -> EnvironmentSnapshot:
+    return EnvironmentSnapshot(
+        timestamp="2024-06-01T00:00:00",
+        platform="linux",
+        architecture="x86_64",
+        dht_version="1.0.0",
+        snapshot_id="snap1",
+        python_version="3.11.5",
+        python_executable="/usr/bin/python3",
+        python_packages={"requests": "2.31.0"},
+        tool_versions={"git": "2.45.1", "uv": "0.4.0"},
+        lock_files={"uv.lock": "version = 1\n"},
+        checksums={"uv.lock": "abc"},
+        reproduction_steps=["uv sync"],
+    )
+
+
+class TestContainer:
+    """Test encoding and lazy decoding of containers."""
+
+    @pytest.mark.parametrize("compression", available_codecs())
+    def test_roundtrip(self, tmp_path: Path, compression: str) -> Any:
+        """Test every available compression round-trips every section."""
+        data = synthetic_snapshot(packages=50, lock_size=10_000)
+        path = write_container(data, tmp_path / f"s{BINARY_SUFFIX}", compression)
+        assert is_container(path)
+        container = SnapshotContainer(path)
+        assert container.sections == list(data)
+        assert container.to_dict() == data
+
+    def test_sections_are_decoded_lazily(self, tmp_path: Path) -> Any:
+        """Test opening reads only the header and a section is decoded once, on access."""
+        path = write_container(synthetic_snapshot(packages=50, lock_size=10_000), tmp_path / "s.dhtsnap")
+        with patch("DHT.modules.snapshot_container.json.loads", wraps=__import__("json").loads) as loads:
+            container = SnapshotContainer(path)
+            loads.assert_not_called()
+            assert container.section("environment")["python_version"] == "3.11.5"
+            container.section("environment")
+            assert loads.call_count == 1
+
+    def test_corrupt_section(self, tmp_path: Path) -> Any:
+        """Test a damaged payload is detected rather than decoded."""
+        raw = bytearray(encode_container({"metadata": {"snapshot_id": "x" * 100}}, "none"))
+        raw[-10] ^= 0xFF
+        path = tmp_path / "broken.dhtsnap"
+        path.write_bytes(bytes(raw))
+        with pytest.raises(ValueError, match="corrupt"):
+            SnapshotContainer(path).section("metadata")
+
+    def test_not_a_container(self, tmp_path: Path) -> Any:
+        """Test JSON files are not mistaken for containers."""
+        path = tmp_path / "s.json"
+        path.write_text("{}")
+        assert not is_container(path)
+        with pytest.raises(ValueError):
+            SnapshotContainer(path)
+
+
+class TestSnapshotIO:
+    """Test the binary format through EnvironmentSnapshotIO."""
+
+    def test_save_and_load_binary(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test a binary snapshot loads back into the same snapshot."""
+        snapshot = _snapshot()
+        path = snapshot_io.save_snapshot.fn(snapshot_io, snapshot, tmp_path / "snap1.dhtsnap", "binary")
+        assert is_container(path)
+        assert snapshot_io.load_snapshot.fn(snapshot_io, path) == snapshot
+
+    @pytest.mark.parametrize("fmt", ["json", "yaml", "binary"])
+    def test_load_section(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path, fmt: str) -> Any:
+        """Test a single section reads the same from every format, with blobs resolved."""
+        path = snapshot_io.save_snapshot.fn(
+            snapshot_io, _snapshot(), tmp_path / f"snap1.{fmt}", fmt, blob_store=tmp_path / "blobs"
+        )
+        assert snapshot_io.load_section(path, "environment")["tool_versions"] == {"git": "2.45.1", "uv": "0.4.0"}
+        assert snapshot_io.load_section(path, "project")["lock_files"] == {"uv.lock": "version = 1\n"}
+
+
+class TestBenchmark:
+    """Test the format benchmark."""
+
+    def test_section_load_beats_text_formats(self, tmp_path: Path) -> Any:
+        """Test reading one section of a large container is faster than parsing JSON or YAML."""
+        results = benchmark_formats(synthetic_snapshot(packages=2000, lock_size=500_000), tmp_path, repeat=1)
+        binary = results["binary-zlib"]
+        assert binary["bytes"] < results["json"]["bytes"]
+        assert binary["section_s"] < results["json"]["load_s"]
+        assert binary["section_s"] < results["yaml"]["load_s"]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the snapshot diff engine.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.environment_snapshot_io import EnvironmentSnapshotIO
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot
+from DHT.modules.snapshot_blob_store import content_checksum
+from DHT.modules.snapshot_diff import SnapshotSource, diff_against_baseline, diff_snapshots
+
+LOCK = "".join(f'[[package]]\nname = "pkg{i}"\nversion = "1.{i}.0"\n\n' for i in range(500))
+
+
+@pytest.fixture
+def snapshot_io() -> Iterator[EnvironmentSnapshotIO]:
+    with patch("DHT.modules.environment_snapshot_io.get_run_logger", return_value=MagicMock()):
+        yield EnvironmentSnapshotIO()
+
+
+def _snapshot(snapshot_id: str, lock: str = LOCK) -> EnvironmentSnapshot:
+    return EnvironmentSnapshot(
+        timestamp="2024-06-01T00:00:00",
+        platform="linux",
+        architecture="x86_64",
+        dht_version="1.0.0",
+        snapshot_id=snapshot_id,
+        python_version="3.11.5",
+        python_executable="/usr/bin/python3",
+        python_packages={f"pkg{i}": f"1.{i}.0" for i in range(500)},
+        tool_versions={"git": "2.45.1", "uv": "0.4.0"},
+        environment_variables={"LANG": "C.UTF-8"},
+        path_entries=["/usr/local/bin", "/usr/bin"],
+        lock_files={"uv.lock": lock},
+        config_files={"pyproject.toml": "[project]\nname = 'demo'\n"},
+        checksums={"uv.lock": content_checksum(lock), "pyproject.toml": content_checksum("[project]\nname = 'demo'\n")},
+    )
+
+
+def _save(io: EnvironmentSnapshotIO, snapshot: EnvironmentSnapshot, directory: Path, fmt: str = "json") -> Path:
+    suffix = {"binary": "dhtsnap"}.get(fmt, fmt)
+    return io.save_snapshot.fn(
+        io, snapshot, directory / f"{snapshot.snapshot_id}.{suffix}", fmt, blob_store=directory / "blobs"
+    )
+
+
+class TestDiffSnapshots:
+    """Test comparing two snapshots."""
+
+    def test_identical_snapshots(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test equal snapshots report no differences."""
+        a = _save(snapshot_io, _snapshot("a"), tmp_path)
+        b = _save(snapshot_io, _snapshot("b"), tmp_path, "binary")
+        diff = diff_snapshots(a, b)
+        assert not diff.has_changes
+        assert "no differences" in diff.summary()
+
+    def test_environment_drift(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test packages, tools, env vars, PATH and interpreter changes are all reported."""
+        base = _snapshot("a")
+        drifted = replace(
+            base,
+            snapshot_id="b",
+            python_version="3.11.9",
+            python_packages={**base.python_packages, "pkg1": "9.9.9", "extra": "1.0"},
+            tool_versions={"git": "2.46.0"},
+            environment_variables={"LANG": "C.UTF-8", "CI": "1"},
+            path_entries=["/usr/bin", "/usr/local/bin"],
+        )
+        diff = diff_snapshots(_save(snapshot_io, base, tmp_path), _save(snapshot_io, drifted, tmp_path))
+
+        assert diff.fields == {"python_version": ("3.11.5", "3.11.9")}
+        assert diff.mappings["python_packages"].changed == {"pkg1": ("1.1.0", "9.9.9")}
+        assert diff.mappings["python_packages"].added == {"extra": "1.0"}
+        assert diff.mappings["tool_versions"].removed == {"uv": "0.4.0"}
+        assert diff.mappings["environment_variables"].added == {"CI": "1"}
+        assert diff.path_order_changed and not diff.path_entries
+        assert json.loads(json.dumps(diff.to_dict()))["tool_versions"]["changed"] == {"git": ["2.45.1", "2.46.0"]}
+
+    def test_changed_lock_file_is_diffed(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test a changed lock file gets a unified diff read from the blob store."""
+        a = _save(snapshot_io, _snapshot("a"), tmp_path)
+        b = _save(snapshot_io, _snapshot("b", lock=LOCK.replace('version = "1.7.0"', 'version = "1.8.0"')), tmp_path)
+        diff = diff_snapshots(a, b)
+        assert list(diff.files) == ["uv.lock"]
+        assert diff.files["uv.lock"].status == "changed"
+        assert '-version = "1.7.0"' in diff.files["uv.lock"].diff
+        assert '+version = "1.8.0"' in diff.files["uv.lock"].diff
+
+    def test_matching_checksums_skip_contents(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test unchanged files are never read from the blob store."""
+        a = _save(snapshot_io, _snapshot("a"), tmp_path)
+        b = _save(snapshot_io, _snapshot("b"), tmp_path)
+        with patch("DHT.modules.snapshot_diff.BlobStore.get", side_effect=AssertionError("blob read")):
+            assert not diff_snapshots(a, b).files
+
+
+class TestDrift:
+    """Test comparing many snapshots against a baseline."""
+
+    def test_fleet_drift_report(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test hundreds of snapshots are compared quickly and drift is counted per item."""
+        base = _snapshot("base")
+        baseline = _save(snapshot_io, base, tmp_path, "binary")
+        paths = []
+        for i in range(300):
+            tools = {"git": "2.46.0" if i % 3 == 0 else "2.45.1", "uv": "0.4.0"}
+            paths.append(_save(snapshot_io, replace(base, snapshot_id=f"job{i}", tool_versions=tools), tmp_path))
+        (tmp_path / "broken.json").write_text("{")
+        paths.append(tmp_path / "broken.json")
+
+        start = time.perf_counter()
+        report = diff_against_baseline(baseline, paths)
+        elapsed = time.perf_counter() - start
+
+        assert len(report.diffs) == 300
+        assert len(report.drifted()) == 100
+        assert report.drift_counts() == {"tool_versions.git": 100}
+        assert str(tmp_path / "broken.json") in report.errors
+        assert elapsed < 10.0
+
+    def test_snapshot_source_reads_sections(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path) -> Any:
+        """Test raw sections keep blob references unresolved."""
+        source = SnapshotSource(_save(snapshot_io, _snapshot("a"), tmp_path, "yaml"))
+        assert source.snapshot_id == "a"
+        assert "blob" in source.section("project")["lock_files"]["uv.lock"]
+        assert source.file_content("lock_files", "uv.lock") == LOCK
+
+
+class TestCommand:
+    """Test `dhtl snapshot diff`."""
+
+    def test_diff_command(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path, capsys: Any) -> Any:
+        """Test two snapshots are diffed and --exit-code reports drift."""
+        from DHT.modules.dhtl_snapshot import snapshot_command
+
+        a = _save(snapshot_io, _snapshot("a"), tmp_path)
+        b = _save(snapshot_io, replace(_snapshot("b"), tool_versions={"git": "2.46.0", "uv": "0.4.0"}), tmp_path)
+        assert snapshot_command(["diff", str(a), str(b), "--format", "json"]) == 0
+        assert json.loads(capsys.readouterr().out)["tool_versions"]["changed"] == {"git": ["2.45.1", "2.46.0"]}
+        assert snapshot_command(["diff", str(a), str(a), "--exit-code"]) == 0
+        assert snapshot_command(["diff", str(a), str(b), "--exit-code"]) == 1
+
+    def test_diff_directory(self, snapshot_io: EnvironmentSnapshotIO, tmp_path: Path, capsys: Any) -> Any:
+        """Test a directory of snapshots produces a drift summary."""
+        from DHT.modules.dhtl_snapshot import snapshot_command
+
+        a = _save(snapshot_io, _snapshot("a"), tmp_path)
+        _save(snapshot_io, _snapshot("b"), tmp_path)
+        assert snapshot_command(["diff", str(a), str(tmp_path)]) == 0
+        assert "0 of 1 snapshot(s) drifted" in capsys.readouterr().out
+
+    def test_unknown_subcommand(self) -> Any:
+        """Test a missing subcommand fails."""
+        from DHT.modules.dhtl_snapshot import snapshot_command
+
+        assert snapshot_command([]) == 1
@@ -815,6 +815,38 @@ class TestDataValidation:
                     )
 
 
+class TestTaxonomyIndexes:
+    """Test the lazily built taxonomy indexes"""
+
+    @pytest.mark.unit
+    def test_filtered_category_is_a_copy(self) -> Any:
+        """Test mutating a filtered category does not change the taxonomy"""
+        category = system_taxonomy.get_category_for_platform("package_managers", "linux")
+        category["categories"]["language"]["python"].append("not-a-tool")
+        category["categories"].clear()
+
+        fresh = system_taxonomy.get_category_for_platform("package_managers", "linux")
+        assert fresh["categories"]
+        assert "not-a-tool" not in fresh["categories"]["language"]["python"]
+
+    @pytest.mark.unit
+    def test_excluded_tools_are_filtered(self) -> Any:
+        """Test platform exclusions apply inside nested categories"""
+        category = system_taxonomy.get_category_for_platform("package_managers", "windows")
+        system_tools = category["categories"]["system"]["tools"]
+        assert "apt" not in system_tools
+        assert "choco" in system_tools
+
+    @pytest.mark.unit
+    def test_get_all_tool_categories(self) -> Any:
+        """Test every category path is listed, including language package managers"""
+        categories = system_taxonomy.get_all_tool_categories()
+        assert "build_tools" in categories
+        assert "package_managers.language.python" in categories
+        for category in categories:
+            assert category.split(".")[0] in system_taxonomy.PRACTICAL_TAXONOMY
+
+
 @pytest.mark.unit
 def test_module_imports() -> Any:
     """Test that the module can be imported without errors"""
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persistent tool version cache.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from DHT.modules.tool_version_cache import (
+    ToolVersionCache,
+    cached_probe,
+    executable_identity,
+    get_tool_version_cache,
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Uses POSIX executable bits")
+
+
+def _make_tool(directory: Path, name: str, version: str, interpreter: str = sys.executable) -> Path:
+    path = directory / name
+    path.write_text(f"#!{interpreter}\nprint('{name} {version}')\n")
+    path.chmod(0o755)
+    return path
+
+
+class Probe:
+    """Counts probe invocations."""
+
+    def __init__(self, output: str | None) -> None:
+        self.output = output
+        self.calls = 0
+
+    def __call__(self) -> str | None:
+        self.calls += 1
+        return self.output
+
+
+class TestExecutableIdentity:
+    """Test which executables are safe to cache."""
+
+    def test_identity_changes_when_binary_changes(self, tmp_path: Path) -> Any:
+        """Test reinstalling a tool changes its identity."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        before = executable_identity(str(tool))
+        assert before is not None
+
+        _make_tool(tmp_path, "tool", "1.0.1")
+        assert executable_identity(str(tool)) != before
+
+    def test_symlinks_resolve_to_target(self, tmp_path: Path) -> Any:
+        """Test a symlink and its target share an identity when invoked by the same name."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        (tmp_path / "bin").mkdir()
+        link = tmp_path / "bin" / "tool"
+        link.symlink_to(tool)
+        assert executable_identity(str(link)) == executable_identity(str(tool))
+
+    def test_multi_call_binaries_are_keyed_by_name(self, tmp_path: Path) -> Any:
+        """Test names sharing one binary (gcc/clang through one wrapper, busybox) do not share output."""
+        multi = _make_tool(tmp_path, "multi", "1.0")
+        (tmp_path / "gcc").symlink_to(multi)
+        (tmp_path / "clang").symlink_to(multi)
+
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        assert cache.probe(str(tmp_path / "gcc"), ["--version"], Probe("gcc 13.2")) == "gcc 13.2"
+        assert cache.probe(str(tmp_path / "clang"), ["--version"], Probe("clang 17.0")) == "clang 17.0"
+
+    def test_toolchain_proxies_are_not_cacheable(self, tmp_path: Path) -> Any:
+        """Test proxies whose output depends on the selected toolchain are never cached."""
+        rustup = _make_tool(tmp_path, "rustup", "1.27")
+        (tmp_path / "cargo").symlink_to(rustup)
+        assert executable_identity(str(tmp_path / "cargo")) is None
+
+        shims = tmp_path / "shims"
+        shims.mkdir()
+        assert executable_identity(str(_make_tool(shims, "node", "20.0"))) is None
+
+    def test_runtime_selected_toolchains_are_not_cacheable(self, tmp_path: Path) -> Any:
+        """Test go and the macOS developer tool stubs, whose version is chosen at run time, are never cached."""
+        assert executable_identity(str(_make_tool(tmp_path, "go", "1.22"))) is None
+
+        stubs = tmp_path / "usr-bin"
+        stubs.mkdir()
+        git = _make_tool(stubs, "git", "2.39")
+        with patch("DHT.modules.tool_version_cache._DARWIN_STUB_DIR", os.path.realpath(stubs)):
+            with patch.object(sys, "platform", "linux"):
+                assert executable_identity(str(git)) is not None
+            with patch.object(sys, "platform", "darwin"):
+                assert executable_identity(str(git)) is None
+                assert executable_identity(str(_make_tool(tmp_path, "git", "2.45"))) is not None
+
+    def test_shell_wrappers_are_not_cacheable(self, tmp_path: Path) -> Any:
+        """Test version manager shims that pick a binary at run time are never cached."""
+        shim = tmp_path / "shim"
+        shim.write_text('#!/usr/bin/env bash\nexec real-tool "$@"\n')
+        shim.chmod(0o755)
+        assert executable_identity(str(shim)) is None
+
+        script = tmp_path / "script"
+        script.write_text("#!/bin/sh\necho 1.0\n")
+        script.chmod(0o755)
+        assert executable_identity(str(script)) is None
+
+    def test_missing_executable(self, tmp_path: Path) -> Any:
+        """Test tools that are not installed have no identity."""
+        assert executable_identity(str(tmp_path / "missing")) is None
+        assert executable_identity("definitely-not-a-tool-xyz") is None
+
+
+class TestToolVersionCache:
+    """Test probe caching and persistence."""
+
+    def test_second_probe_is_served_from_cache(self, tmp_path: Path) -> Any:
+        """Test an unchanged executable is probed once across cache instances."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        probe = Probe("tool 1.0\n")
+
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        assert cache.probe(str(tool), ["--version"], probe) == "tool 1.0\n"
+        assert cache.probe(str(tool), ["--version"], probe) == "tool 1.0\n"
+        assert ToolVersionCache(tmp_path / "cache.json").probe(str(tool), ["--version"], probe) == "tool 1.0\n"
+        assert probe.calls == 1
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_upgrade_invalidates(self, tmp_path: Path) -> Any:
+        """Test replacing the executable re-runs the probe."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        cache.probe(str(tool), ["--version"], Probe("tool 1.0"))
+
+        _make_tool(tmp_path, "tool", "2.0.0")
+        assert cache.probe(str(tool), ["--version"], Probe("tool 2.0.0")) == "tool 2.0.0"
+
+    def test_arguments_are_part_of_the_key(self, tmp_path: Path) -> Any:
+        """Test different probe arguments are cached separately."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        cache.probe(str(tool), ["--version"], Probe("short"))
+        assert cache.probe(str(tool), ["version", "--verbose"], Probe("long")) == "long"
+
+    def test_failures_are_not_cached(self, tmp_path: Path) -> Any:
+        """Test a failed probe is retried next time."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        failing = Probe(None)
+        assert cache.probe(str(tool), ["--version"], failing) is None
+        assert cache.probe(str(tool), ["--version"], failing) is None
+        assert failing.calls == 2
+
+    def test_corrupt_cache_file_is_ignored(self, tmp_path: Path) -> Any:
+        """Test an unreadable cache file behaves like an empty cache."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        (tmp_path / "cache.json").write_text("{not json")
+        cache = ToolVersionCache(tmp_path / "cache.json")
+        assert cache.probe(str(tool), ["--version"], Probe("tool 1.0")) == "tool 1.0"
+        assert (
+            ToolVersionCache(tmp_path / "cache.json").get(
+                ToolVersionCache.make_key(executable_identity(str(tool)) or [], ["--version"])
+            )
+            == "tool 1.0"
+        )
+
+    def test_env_var_disables_cache(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Any:
+        """Test DHT_TOOL_VERSION_CACHE=off always runs the probe."""
+        tool = _make_tool(tmp_path, "tool", "1.0")
+        monkeypatch.setenv("DHT_TOOL_VERSION_CACHE", "off")
+        probe = Probe("tool 1.0")
+        cached_probe(str(tool), ["--version"], probe)
+        cached_probe(str(tool), ["--version"], probe)
+        assert probe.calls == 2
+
+
+class TestCallSites:
+    """Test the version probes that share the cache."""
+
+    def test_capture_tool_versions_reuses_cache(self, tmp_path: Path) -> Any:
+        """Test a second capture does not spawn version commands again."""
+        from DHT.modules.tool_version_manager import ToolVersionManager
+
+        _make_tool(tmp_path, "git", "2.45.1")
+        _make_tool(tmp_path, "ruff", "0.5.0")
+        manager = ToolVersionManager()
+        with (
+            patch.dict(os.environ, {"PATH": str(tmp_path)}),
+            patch("DHT.modules.tool_version_manager.get_run_logger"),
+        ):
+            first = manager.capture_tool_versions.fn(manager)
+            with patch("subprocess.run", side_effect=AssertionError("version probe spawned")):
+                second = manager.capture_tool_versions.fn(manager)
+
+        assert first["git"]["version"] == "2.45.1"
+        assert first["ruff"]["version"] == "0.5.0"
+        assert second == first
+
+    def test_diagnostic_collector_reuses_cache(self, tmp_path: Path) -> Any:
+        """Test the diagnostic collector's version command is cached per binary."""
+        from DHT.diagnostic_tool_collector import collect_tool_info
+
+        _make_tool(tmp_path, "mvn", "3.9.6")
+        spec = {"category": "build_tools", "commands": {"version": "mvn --version"}}
+        with patch.dict(os.environ, {"PATH": str(tmp_path)}):
+            first = collect_tool_info("maven", spec)
+            with patch("subprocess.run", side_effect=AssertionError("version probe spawned")):
+                second = collect_tool_info("maven", spec)
+
+        assert first["version"] == "3.9.6"
+        assert second == first
+        assert get_tool_version_cache().hits >= 1
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared, size-bounded wheel cache.
+
+Copyright (c) 2024 Emasoft (Emanuele Sabetta)
+Licensed under the MIT License. See LICENSE file for details.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from DHT.modules.dependencies_installer import DependenciesInstaller
+from DHT.modules.dhtl_cache import cache_command
+from DHT.modules.docker_manager import DockerManager
+from DHT.modules.dockerfile_generator import DockerfileGenerator, ProjectType
+from DHT.modules.environment_snapshot_models import EnvironmentSnapshot, ReproductionResult
+from DHT.modules.wheel_cache import CONTAINER_CACHE_DIR, WheelCache, get_wheel_cache, parse_install_output
+
+UV_OUTPUT = """Resolved 12 packages in 3ms
+Prepared 2 packages in 410ms
+Installed 12 packages in 25ms
+ + requests==2.31.0
+"""
+
+
+def _age(root: Path, age_days: float) -> None:
+    """Backdate a file or a whole tree, symlinks included."""
+    old = time.time() - age_days * 86400
+    for path in [root, *root.rglob("*")] if root.is_dir() and not root.is_symlink() else [root]:
+        os.utime(path, (old, old), follow_symlinks=False)
+
+
+def _write(path: Path, size: int, age_days: float) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    _age(path, age_days)
+    return path
+
+
+def _uv_package(uv: Path, name: str, archive: str, age_days: float) -> None:
+    """Create a wheel pointer for name referring to an archive, both last used age_days ago."""
+    pointer = uv / "wheels-v7" / "pypi" / name
+    _write(pointer / "1.0-py3-none-any.msgpack", 100, age_days)
+    (pointer / "1.0-py3-none-any").symlink_to(Path("../../../archive-v0") / archive)
+    _age(pointer, age_days)
+    _age(uv / "archive-v0" / archive, age_days)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> WheelCache:
+    """A cache with two uv packages, one orphaned archive, index metadata and a pip entry."""
+    cache = WheelCache(tmp_path / "wheels", max_bytes=10_000_000)
+    uv = cache.uv_dir
+    _write(uv / "archive-v0" / "old-archive" / "old" / "__init__.py", 4000, 30)
+    _write(uv / "archive-v0" / "new-archive" / "new" / "__init__.py", 4000, 1)
+    _write(uv / "archive-v0" / "orphan" / "gone" / "__init__.py", 1000, 0)
+    _uv_package(uv, "old", "old-archive", 30)
+    _uv_package(uv, "new", "new-archive", 1)
+    _write(uv / "simple-v26" / "pypi" / "old.rkyv", 50, 30)
+    _write(cache.pip_dir / "http-v2" / "a" / "entry", 500, 10)
+    return cache
+
+
+class TestInstallOutput:
+    """Test counting cache hits in installer output."""
+
+    def test_uv(self) -> Any:
+        """Test prepared packages are misses and the other installed packages hits."""
+        usage = parse_install_output("uv", UV_OUTPUT)
+        assert (usage.hits, usage.misses) == (10, 2)
+        assert usage.summary() == "10 of 12 packages from cache"
+
+    def test_uv_fully_cached(self) -> Any:
+        """Test a sync that prepares nothing is all hits."""
+        assert parse_install_output("uv", "Installed 1 package in 2ms\n").hit_rate == 1.0
+
+    def test_pip(self) -> Any:
+        """Test pip's per-distribution lines are counted."""
+        output = "Collecting a\n  Using cached a-1.0-py3-none-any.whl\nCollecting b\n  Downloading b-2.0.tar.gz\n"
+        usage = parse_install_output("pip", output)
+        assert (usage.hits, usage.misses) == (1, 1)
+
+    def test_nothing_installed(self) -> Any:
+        """Test an install without a report has no hit rate."""
+        assert parse_install_output("uv", "Audited 3 packages in 1ms\n").hit_rate is None
+
+
+class TestEnvironment:
+    """Test pointing installers at the cache."""
+
+    def test_env(self, tmp_path: Path) -> Any:
+        """Test uv and pip get their own subdirectories of the shared cache."""
+        env = get_wheel_cache().env()
+        root = tmp_path / "wheels"
+        assert env == {"UV_CACHE_DIR": str(root / "uv"), "PIP_CACHE_DIR": str(root / "pip")}
+        assert Path(env["UV_CACHE_DIR"]).is_dir()
+
+    def test_disabled(self, monkeypatch: pytest.MonkeyPatch) -> Any:
+        """Test DHT_WHEEL_CACHE=off leaves uv and pip on their own caches."""
+        monkeypatch.setenv("DHT_WHEEL_CACHE", "off")
+        assert get_wheel_cache().env() == {}
+        assert get_wheel_cache().container_volumes() == {}
+
+    def test_size_limit_from_environment(self, monkeypatch: pytest.MonkeyPatch) -> Any:
+        """Test DHT_WHEEL_CACHE_MAX_MB sets the limit of the shared cache."""
+        monkeypatch.setenv("DHT_WHEEL_CACHE_MAX_MB", "512")
+        assert get_wheel_cache().max_bytes == 512 * 1024 * 1024
+
+
+class TestPrune:
+    """Test size-bounded eviction."""
+
+    def test_stats(self, cache: WheelCache) -> Any:
+        """Test size covers everything and entries are the evictable units."""
+        stats = cache.stats()
+        assert stats.size_bytes >= 4000 + 4000 + 1000 + 500 + 50
+        assert stats.entries == 4  # old, new, the orphaned archive, the pip entry
+        assert stats.hit_rate is None
+
+    def test_under_limit_is_untouched(self, cache: WheelCache) -> Any:
+        """Test nothing is removed while the cache fits."""
+        assert cache.prune().removed == []
+
+    def test_least_recently_used_first(self, cache: WheelCache) -> Any:
+        """Test orphans go first, then old packages with their archives; recent packages stay."""
+        size = cache.stats().size_bytes
+        result = cache.prune(max_bytes=size - 2000)
+        assert result.removed == [
+            "uv/archive-v0/orphan",
+            "uv/wheels-v7/pypi/old",
+            "uv/archive-v0/old-archive",
+        ]
+        assert result.size_after <= size - 2000
+        assert result.size_after == cache.stats().size_bytes
+        assert (cache.uv_dir / "wheels-v7" / "pypi" / "new" / "1.0-py3-none-any" / "new").is_dir()
+        assert (cache.uv_dir / "simple-v26" / "pypi" / "old.rkyv").exists()
+
+    def test_dry_run(self, cache: WheelCache) -> Any:
+        """Test a dry run reports without removing."""
+        result = cache.prune(max_bytes=0, dry_run=True)
+        assert "uv/archive-v0/new-archive" in result.removed
+        assert result.size_after < result.size_before
+        assert (cache.uv_dir / "archive-v0" / "new-archive").is_dir()
+
+    def test_shared_archive_is_kept_while_referenced(self, cache: WheelCache) -> Any:
+        """Test an archive survives the eviction of one of the packages pointing at it."""
+        _uv_package(cache.uv_dir, "alias", "old-archive", 0)
+        _age(cache.uv_dir / "archive-v0" / "old-archive", 30)
+        result = cache.prune(max_bytes=cache.stats().size_bytes - 1500)
+        assert "uv/wheels-v7/pypi/old" in result.removed
+        assert (cache.uv_dir / "archive-v0" / "old-archive").is_dir()
+
+    def test_record_install(self, cache: WheelCache) -> Any:
+        """Test hits accumulate across installs and installing never prunes the shared cache."""
+        cache.record_install("uv", UV_OUTPUT)
+        cache.max_bytes = 0
+        cache.record_install("pip", "  Using cached a-1.0-py3-none-any.whl\n")
+        stats = cache.stats()
+        assert (stats.installs, stats.hits, stats.misses) == (2, 11, 2)
+        assert (cache.uv_dir / "archive-v0" / "new-archive").is_dir()
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="no flock on Windows")
+    def test_install_enforces_limit(self, cache: WheelCache) -> Any:
+        """Test an install prunes a cache over its limit before it starts, then holds it shared."""
+        cache.max_bytes = 0
+        with cache.installing() as env:
+            assert env["UV_CACHE_DIR"] == str(cache.uv_dir)
+            assert not (cache.uv_dir / "archive-v0" / "new-archive").exists()
+            # A concurrent install would keep the next one from pruning
+            with cache._file_lock(exclusive=True, blocking=False) as locked:
+                assert not locked
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="no flock on Windows")
+    def test_recent_size_is_trusted(self, cache: WheelCache) -> Any:
+        """Test installs do not walk a cache measured recently under its limit, and do when it is over."""
+        cache.stats()
+        with patch.object(cache, "_scan", side_effect=AssertionError("cache walked")):
+            assert cache.enforce_limit() is None
+        cache.max_bytes = 0
+        result = cache.enforce_limit()
+        assert result is not None and result.removed
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="no flock on Windows")
+    def test_busy_cache_is_not_pruned(self, cache: WheelCache) -> Any:
+        """Test the limit is not enforced while another install holds the cache."""
+        cache.max_bytes = 0
+        with cache._file_lock(exclusive=False):
+            assert cache.enforce_limit() is None
+        assert (cache.uv_dir / "archive-v0" / "new-archive").is_dir()
+
+
+class TestIntegration:
+    """Test installers, containers and the dhtl command use the cache."""
+
+    def test_dependencies_installer(self, tmp_path: Path) -> Any:
+        """Test uv sync runs against the shared cache and the hit rate is reported."""
+        snapshot = MagicMock(spec=EnvironmentSnapshot, lock_files={"uv.lock": "version = 1\n"})
+        result = ReproductionResult(success=False, snapshot_id="snap", platform="linux")
+        outcome = MagicMock(success=True, stdout="", stderr=UV_OUTPUT)
+        with (
+            patch("DHT.modules.dependencies_installer.get_run_logger"),
+            patch("DHT.modules.dependencies_installer.run_with_guardian", return_value=outcome) as run,
+        ):
+            installer = DependenciesInstaller()
+            installer.install_project_dependencies.fn(installer, snapshot, result, tmp_path)
+
+        assert run.call_args.kwargs["env"]["UV_CACHE_DIR"] == str(tmp_path / "wheels" / "uv")
+        assert result.actions_completed == ["Installed dependencies via UV sync (10 of 12 packages from cache)"]
+
+    @patch("docker.from_env")
+    def test_container_mount(self, mock_docker: MagicMock, tmp_path: Path) -> Any:
+        """Test containers can mount the cache without losing their own volumes and environment."""
+        client = MagicMock()
+        mock_docker.return_value = client
+        manager = DockerManager()
+        with patch.object(manager, "check_docker_requirements"):
+            manager.run_container.fn(
+                manager, "demo:latest", "demo", volumes={"/src": {"bind": "/app"}}, package_cache=True
+            )
+
+        kwargs = client.containers.run.call_args.kwargs
+        assert kwargs["volumes"][str((tmp_path / "wheels").resolve())] == {"bind": CONTAINER_CACHE_DIR, "mode": "rw"}
+        assert kwargs["volumes"]["/src"] == {"bind": "/app"}
+        assert kwargs["environment"]["UV_CACHE_DIR"] == f"{CONTAINER_CACHE_DIR}/uv"
+
+    def test_dockerfile_cache_mounts(self) -> Any:
+        """Test generated Dockerfiles can run uv with a BuildKit cache mount."""
+        generator = DockerfileGenerator()
+        info = {"type": ProjectType.CLI, "python_version": "3.11"}
+        dockerfile = generator.generate_dockerfile.fn(generator, info, cache_mounts=True)
+        assert dockerfile.startswith("# syntax=docker/dockerfile:1\n")
+        assert f"RUN --mount=type=cache,id=dht-wheels,target={CONTAINER_CACHE_DIR} uv sync --all-extras" in dockerfile
+        assert "UV_LINK_MODE=copy" in dockerfile
+        assert "--mount" not in generator.generate_dockerfile.fn(generator, info)
+
+    def test_cache_command(self, capsys: pytest.CaptureFixture[str]) -> Any:
+        """Test `dhtl cache stats` reports recorded installs and `prune` succeeds."""
+        get_wheel_cache().record_install("uv", UV_OUTPUT)
+        assert cache_command(["stats", "--format", "json"]) == 0
+        stats = json.loads(capsys.readouterr().out)
+        assert stats["hit_rate"] == pytest.approx(10 / 12)
+        assert cache_command(["prune", "--max-size", "0"]) == 0
+        assert cache_command(["purge"]) == 1